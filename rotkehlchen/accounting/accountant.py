@@ -1,22 +1,38 @@
 import logging
-from collections.abc import Sequence
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import gevent
 from more_itertools import peekable
 
-from rotkehlchen.accounting.constants import FREE_PNL_EVENTS_LIMIT
+from rotkehlchen.accounting.checkpoints import (
+    get_checkpoint_settings_hash,
+    get_checkpoint_timestamps,
+)
+from rotkehlchen.accounting.constants import (
+    FREE_PNL_EVENTS_LIMIT,
+    PNL_CHECKPOINT_INTERVAL,
+    PNL_CHECKPOINT_PRICES_MAX_DISTANCE,
+    PNL_CHECKPOINTS_MAX_NUM,
+    PRICES_PREFETCH_EVENTS,
+)
 from rotkehlchen.accounting.export.csv import CSVExporter
 from rotkehlchen.accounting.pot import AccountingPot
 from rotkehlchen.accounting.structures.types import ActionType
 from rotkehlchen.accounting.types import EventAccountingRuleStatus, MissingPrice
 from rotkehlchen.chain.evm.accounting.aggregator import EVMAccountingAggregators
+from rotkehlchen.db.filtering import ReportDataFilterQuery
 from rotkehlchen.db.reports import DBAccountingReports
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.errors.asset import UnknownAsset, UnprocessableTradePair, UnsupportedAsset
-from rotkehlchen.errors.misc import AccountingError, RemoteError
+from rotkehlchen.errors.misc import AccountingError, InputError, RemoteError
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
+from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.history.stream import HistoryStream
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import Premium
 from rotkehlchen.types import EVM_CHAIN_IDS_WITH_TRANSACTIONS, Timestamp
@@ -25,6 +41,7 @@ from rotkehlchen.utils.data_structures import DefaultLRUCache, LRUCacheWithRemov
 
 if TYPE_CHECKING:
     from rotkehlchen.accounting.mixins.event import AccountingEventMixin
+    from rotkehlchen.assets.asset import Asset
     from rotkehlchen.chain.aggregator import ChainsAggregator
     from rotkehlchen.db.dbhandler import DBHandler
 
@@ -64,6 +81,7 @@ class Accountant:
         ]
 
         self.currently_processing_timestamp = Timestamp(-1)
+        self.currently_processing_event: 'AccountingEventMixin | None' = None
         self.first_processed_timestamp = Timestamp(-1)
         self.premium = premium
         # cache to know what events will be processed or not during accounting
@@ -71,6 +89,11 @@ class Accountant:
         # map event rules signatures to a list of event identifiers affected by them
         # used to know which events need to be invalidated when updating a rule
         self.processable_events_cache_signatures: DefaultLRUCache[int, list[int]] = DefaultLRUCache(default_factory=list, maxsize=PROCESSABLE_EVENTS_CACHE_SIZE)  # noqa: E501
+        # interval of the timestamps at which the state is saved to resume later reports
+        self.checkpoint_interval = PNL_CHECKPOINT_INTERVAL
+        # set if an event was skipped while processing, since the result then depends on
+        # more than the history and the settings and no checkpoints are saved after it
+        self.skipped_events = False
         self.ignored_asset_ids: set[str] = set()  # populated in process_history so that we load them in memory once during accounting and not reload them from the DB for every single event processing  # noqa: E501
 
     def activate_premium_status(self, premium: Premium) -> None:
@@ -90,11 +113,12 @@ class Accountant:
     def _process_skipping_exception(
             self,
             exception: Exception,
-            events: Sequence['AccountingEventMixin'],
             count: int,
             reason: str,
     ) -> int:
-        event = events[count]
+        event = self.currently_processing_event
+        assert event is not None, 'exception can only be raised when processing an event'
+        self.skipped_events = True
         ts = event.get_timestamp()
         identifier = event.get_identifier()
         self.msg_aggregator.add_error(
@@ -109,17 +133,85 @@ class Accountant:
         )
         return count + 1
 
+    def _find_checkpoint(
+            self,
+            dbpnl: DBAccountingReports,
+            events: HistoryStream,
+            settings_hash: str,
+            start_ts: Timestamp,
+    ) -> tuple[Timestamp, dict[str, Any]] | None:
+        """Find the latest checkpoint up to start_ts whose history and prices before it
+        are unchanged"""
+        for timestamp, history_counts in dbpnl.get_pnl_checkpoints(
+                settings_hash=settings_hash,
+                to_ts=start_ts,
+        ):
+            if history_counts != events.count_before(timestamp):
+                log.debug(f'Skipping PnL checkpoint at {timestamp} since the history before it changed')  # noqa: E501
+                continue
+
+            try:
+                data = dbpnl.get_pnl_checkpoint_data(
+                    settings_hash=settings_hash,
+                    timestamp=timestamp,
+                )
+            except DeserializationError as e:
+                log.error(f'Skipping PnL checkpoint at {timestamp} due to {e!s}')
+                continue
+
+            if not isinstance(price_changes_id := data.get('price_changes_id'), int) or (
+                (changed_ts := GlobalDBHandler.get_price_changes_since(price_changes_id)) is not None and  # noqa: E501
+                timestamp > changed_ts - PNL_CHECKPOINT_PRICES_MAX_DISTANCE
+            ):
+                log.debug(f'Skipping PnL checkpoint at {timestamp} since the prices before it changed')  # noqa: E501
+                continue
+
+            return timestamp, data
+
+        return None
+
+    def _save_checkpoint(
+            self,
+            dbpnl: DBAccountingReports,
+            events: HistoryStream,
+            settings_hash: str,
+            timestamp: Timestamp,
+            processed_actions: int,
+            last_event_ts: Timestamp,
+            price_changes_id: int,
+    ) -> None:
+        """Save the state of the accounting right before the given timestamp. The id of the
+        latest price change before processing started is kept to check if the prices that
+        were used changed when resuming from it."""
+        dbpnl.add_pnl_checkpoint(
+            timestamp=timestamp,
+            settings_hash=settings_hash,
+            history_counts=events.count_before(timestamp),
+            data={
+                'price_changes_id': price_changes_id,
+                'first_processed_timestamp': self.first_processed_timestamp,
+                'last_processed_timestamp': last_event_ts,
+                'processed_actions': processed_actions,
+                'pot': self.pots[0].serialize_checkpoint(),
+            },
+        )
+        log.debug(f'Saved PnL checkpoint at {timestamp}')
+
     def process_history(
             self,
             start_ts: Timestamp,
             end_ts: Timestamp,
-            events: Sequence['AccountingEventMixin'],
+            events: 'Sequence[AccountingEventMixin] | HistoryStream',
     ) -> int:
         """Processes the entire history of cryptoworld actions in order to determine
         the price and time at which every asset was obtained and also
         the general and taxable profit/loss.
 
         The events history is already expected to be sorted when passed to this function.
+        If it's a HistoryStream the events are read from the DB while processing and
+        the processed events are not kept in memory, only written to the report. Also for
+        premium users processing then starts from the latest checkpoint of the accounting
+        state before start_ts, if any, and new checkpoints are saved while processing.
 
         start_ts here is the timestamp at which to start taking trades and other
         taxable events into account. Not where processing starts from. Processing
@@ -135,6 +227,10 @@ class Accountant:
             active_premium=active_premium,
         )
         events_limit = -1 if active_premium else FREE_PNL_EVENTS_LIMIT
+        self.skipped_events = False
+        # read before processing since prices added while processing may change the
+        # prices of events processed before them
+        price_changes_id = GlobalDBHandler.get_latest_price_change_id()
         # Ask the DB for the settings once at the start of processing so we got the
         # same settings through the entire task
         with self.db.conn.read_ctx() as cursor:
@@ -142,14 +238,42 @@ class Accountant:
             self.ignored_asset_ids = self.db.get_ignored_asset_ids(cursor)
             # Create a new pnl report in the DB to be used to save each event generated
             dbpnl = DBAccountingReports(self.db)
-            first_ts = Timestamp(0) if len(events) == 0 else events[0].get_timestamp()
+            settings_hash, checkpoint = None, None
+            if (  # checkpoints need the whole history before them to be processed
+                active_premium and isinstance(events, HistoryStream) and
+                db_settings.calculate_past_cost_basis
+            ):
+                settings_hash = get_checkpoint_settings_hash(
+                    cursor=cursor,
+                    database=self.db,
+                    settings=db_settings,
+                )
+                checkpoint = self._find_checkpoint(
+                    dbpnl=dbpnl,
+                    events=events,
+                    settings_hash=settings_hash,
+                    start_ts=start_ts,
+                )
+
+            if checkpoint is not None and isinstance(first_ts := checkpoint[1].get('first_processed_timestamp'), int):  # noqa: E501
+                first_ts = Timestamp(first_ts)
+            else:
+                checkpoint = None
+                first_event = next(iter(events), None)
+                first_ts = Timestamp(0) if first_event is None else first_event.get_timestamp()
             report_id = dbpnl.add_report(
                 first_processed_timestamp=first_ts,
                 start_ts=start_ts,
                 end_ts=end_ts,
                 settings=db_settings,
             )
-            self.pots[0].reset(settings=db_settings, start_ts=start_ts, end_ts=end_ts, report_id=report_id)  # noqa: E501
+            self.pots[0].reset(
+                settings=db_settings,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                report_id=report_id,
+                retain_processed_events=isinstance(events, Sequence),
+            )
             self.end_ts = end_ts
             self.csvexporter.reset(start_ts=start_ts, end_ts=end_ts)
 
@@ -158,12 +282,62 @@ class Accountant:
             self.first_processed_timestamp = first_ts
 
             count = 0
-            actions_length = len(events)
             prev_time = last_event_ts = Timestamp(0)
+            if checkpoint is not None and isinstance(events, HistoryStream):
+                checkpoint_ts, checkpoint_data = checkpoint
+                try:
+                    self.pots[0].restore_checkpoint(checkpoint_data['pot'])
+                    count = int(checkpoint_data['processed_actions'])
+                    prev_time = last_event_ts = Timestamp(checkpoint_data['last_processed_timestamp'])  # noqa: E501
+                except (DeserializationError, KeyError, TypeError, ValueError, UnknownAsset) as e:
+                    log.error(f'Could not restore PnL checkpoint at {checkpoint_ts} due to {e!s}')
+                    checkpoint, count, prev_time = None, 0, Timestamp(0)
+                    last_event_ts = Timestamp(0)
+                    self.pots[0].reset(
+                        settings=db_settings,
+                        start_ts=start_ts,
+                        end_ts=end_ts,
+                        report_id=report_id,
+                        retain_processed_events=False,
+                    )
+                else:
+                    log.info(f'Resuming history processing from the PnL checkpoint at {checkpoint_ts}')  # noqa: E501
+                    events = events.starting_at(checkpoint_ts)
+
+            actions_length = len(events) + count
+            checkpoint_timestamps = [] if settings_hash is None else [
+                x for x in get_checkpoint_timestamps(
+                    start_ts=start_ts,
+                    end_ts=end_ts,
+                    interval=self.checkpoint_interval,
+                    max_num=PNL_CHECKPOINTS_MAX_NUM,
+                ) if checkpoint is None or x > checkpoint[0]
+            ]
             ignored_ids_mapping = self.db.get_ignored_action_ids(cursor=cursor, action_type=None)
 
-        events_iter = peekable(events)
+        events_iter = peekable(self._prefetching_prices(
+            events=events,
+            start_ts=start_ts,
+            end_ts=end_ts,
+            db_settings=db_settings,
+        ))
         while True:
+            if self.skipped_events is True:
+                checkpoint_timestamps = []  # the state depends on more than the history now
+
+            if len(checkpoint_timestamps) != 0 and isinstance(events, HistoryStream):
+                next_ts = next_event.get_timestamp() if (next_event := events_iter.peek(None)) is not None else end_ts + 1  # noqa: E501
+                while len(checkpoint_timestamps) != 0 and checkpoint_timestamps[0] <= next_ts:
+                    self._save_checkpoint(
+                        dbpnl=dbpnl,
+                        events=events,
+                        settings_hash=settings_hash,  # type: ignore[arg-type]  # set if there are checkpoint timestamps
+                        timestamp=checkpoint_timestamps.pop(0),
+                        processed_actions=count,
+                        last_event_ts=last_event_ts,
+                        price_changes_id=price_changes_id,
+                    )
+
             try:
                 (
                     processed_events_num,
@@ -179,12 +353,12 @@ class Accountant:
             except PriceQueryUnsupportedAsset as e:
                 count = self._process_skipping_exception(
                     exception=e,
-                    events=events,
                     count=count,
                     reason='not being able to find price for an unsupported asset',
                 )
                 continue
             except NoPriceForGivenTimestamp as e:
+                self.skipped_events = True
                 self.pots[0].cost_basis.missing_prices.add(
                     MissingPrice(
                         from_asset=e.from_asset,
@@ -197,7 +371,6 @@ class Accountant:
             except RemoteError as e:
                 count = self._process_skipping_exception(
                     exception=e,
-                    events=events,
                     count=count,
                     reason='inability to reach an external service at that point in time',
                 )
@@ -205,6 +378,7 @@ class Accountant:
             except AccountingError as e:
                 log.error(f'Found critical error {e} when processing history. Stopping.')
                 e.report_id = report_id
+                self.pots[0].flush_report_data()
                 raise
 
             if processed_events_num == 0:
@@ -225,6 +399,7 @@ class Accountant:
                 )
                 break
 
+        self.pots[0].flush_report_data()
         dbpnl.add_report_overview(
             report_id=report_id,
             last_processed_timestamp=last_event_ts,
@@ -237,8 +412,62 @@ class Accountant:
             pot.events_accountant.rules_manager.clean_rules()
 
         self.ignored_asset_ids.clear()  # clean ignored assets from memory once PnL report run concludes  # noqa: E501
+        self.pots[0].prefetched_prices = {}
+        self.currently_processing_event = None
         return report_id
 
+    def _prefetching_prices(
+            self,
+            events: 'Iterable[AccountingEventMixin]',
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            db_settings: DBSettings,
+    ) -> 'Iterator[AccountingEventMixin]':
+        """Yield the given events reading them ahead in windows of PRICES_PREFETCH_EVENTS.
+        The prices of each window are prefetched before its events are yielded, so that
+        the history is still read once and only a window of it is kept in memory."""
+        events_iter = iter(events)
+        while len(window := list(islice(events_iter, PRICES_PREFETCH_EVENTS))) != 0:
+            self._prefetch_prices(
+                events=window,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                db_settings=db_settings,
+            )
+            yield from window
+            if window[-1].get_timestamp() > end_ts:
+                return  # processing stops at the first event after the end of the period
+
+    def _prefetch_prices(
+            self,
+            events: list['AccountingEventMixin'],
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            db_settings: DBSettings,
+    ) -> None:
+        """Collect the assets and timestamps of the given sorted events for which a price
+        will be needed so that the pot can resolve them in bulk from the DB before they
+        are processed."""
+        asset_timestamps: defaultdict['Asset', set[Timestamp]] = defaultdict(set)
+        for event in events:
+            timestamp = event.get_timestamp()
+            if timestamp > end_ts:
+                break
+
+            if not db_settings.calculate_past_cost_basis and timestamp < start_ts:
+                continue
+
+            try:
+                event_assets = event.get_assets()
+            except (UnknownAsset, UnsupportedAsset, UnprocessableTradePair):
+                continue  # will be reported when processing the event
+
+            for asset in event_assets:
+                if asset.identifier not in self.ignored_asset_ids:
+                    asset_timestamps[asset].add(timestamp)
+
+        self.pots[0].prefetch_prices(asset_timestamps)
+
     def _process_event(
             self,
             events_iterator: "peekable['AccountingEventMixin']",
@@ -263,6 +492,8 @@ class Accountant:
         if event is None:
             return 0, prev_time
 
+        self.currently_processing_event = event
+
         # Assert we are sorted in ascending time order.
         timestamp = event.get_timestamp()
         prev_time = timestamp
@@ -278,18 +509,21 @@ class Accountant:
         try:
             event_assets = event.get_assets()
         except UnknownAsset as e:
+            self.skipped_events = True
             self.msg_aggregator.add_warning(
                 f'At history processing found event with unknown asset {e.identifier}. '
                 f'Ignoring the event.',
             )
             return 1, prev_time
         except UnsupportedAsset as e:
+            self.skipped_events = True
             self.msg_aggregator.add_warning(
                 f'At history processing found event with unsupported asset {e.identifier}. '
                 f'Ignoring the event.',
             )
             return 1, prev_time
         except UnprocessableTradePair as e:
+            self.skipped_events = True
             self.msg_aggregator.add_error(
                 f'At history processing found event with unprocessable trade pair {e!s} '
                 f'Ignoring the event.',
@@ -320,17 +554,29 @@ class Accountant:
         If a directory is given, it simply exports all event.csv in the given directory.
         If no directory is given it returns the path to a zip to export
         """
-        if len(self.pots[0].processed_events) == 0:
+        pot = self.pots[0]
+        if pot.processed_events_num == 0:
             return False, 'No history processed in order to perform an export'
 
+        if pot.retain_processed_events is True:
+            events = pot.processed_events
+        else:  # read them back from the report in the order they were processed
+            try:
+                events, _ = DBAccountingReports(self.db).get_report_data(
+                    filter_=ReportDataFilterQuery.make(
+                        report_id=pot.report_id,
+                        order_by_rules=[('identifier', True)],
+                    ),
+                    with_limit=False,
+                )
+            except InputError as e:
+                return False, str(e)
+
         if directory_path is None:
-            return self.csvexporter.create_zip(
-                events=self.pots[0].processed_events,
-                pnls=self.pots[0].pnls,
-            )
+            return self.csvexporter.create_zip(events=events, pnls=pot.pnls)
 
         return self.csvexporter.export(
-            events=self.pots[0].processed_events,
-            pnls=self.pots[0].pnls,
+            events=events,
+            pnls=pot.pnls,
             directory=directory_path,
         )
@@ -0,0 +1,92 @@
+"""Checkpoints of the accounting state used to resume PnL reports
+
+Processing the history always starts from the very first event so that the cost basis
+is correct. The state of the accounting right before some timestamps is saved while
+processing and a later report created with the same settings can start from the latest
+checkpoint that is not after its start instead of from the first event.
+
+A checkpoint is only valid while nothing that affects the accounting before its
+timestamp changes:
+- The settings, ignored assets, ignored actions, accounting rules and rotki version are
+hashed and checkpoints are only looked up for the same hash.
+- Edits, deletions and redecoding of history entries delete the checkpoints after them.
+See DBHandler.invalidate_pnl_checkpoints.
+- The number of history entries before the checkpoint is saved with it and compared
+before using it, which catches entries added or removed in any other way.
+- Changes of manual and historical prices are logged in the global DB and checkpoints
+after the earliest changed price, minus the distance at which prices are still looked
+up, are not used. See GlobalDBHandler.record_price_change.
+- No checkpoints are saved after an event got skipped, for example due to a missing
+price or an unknown asset, since the state then depends on more than the history.
+"""
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import Timestamp
+from rotkehlchen.utils.version_check import get_system_spec
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+    from rotkehlchen.db.settings import DBSettings
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+
+def get_checkpoint_settings_hash(
+        cursor: 'DBCursor',
+        database: 'DBHandler',
+        settings: 'DBSettings',
+) -> str:
+    """Hash everything other than the history itself that affects the accounting state"""
+    data = {
+        'version': get_system_spec()['rotkehlchen'],
+        'settings': [
+            settings.main_currency.identifier,
+            settings.taxfree_after_period,
+            settings.include_crypto2crypto,
+            settings.calculate_past_cost_basis,
+            settings.include_gas_costs,
+            settings.account_for_assets_movements,
+            settings.cost_basis_method.serialize(),
+            settings.eth_staking_taxable_after_withdrawal_enabled,
+            settings.include_fees_in_cost_basis,
+        ],
+        'ignored_assets': sorted(database.get_ignored_asset_ids(cursor)),
+        'ignored_actions': {
+            action_type.serialize(): sorted(identifiers)
+            for action_type, identifiers in database.get_ignored_action_ids(cursor, action_type=None).items()  # noqa: E501
+        },
+        'accounting_rules': cursor.execute(
+            'SELECT type, subtype, counterparty, taxable, count_entire_amount_spend, '
+            'count_cost_basis_pnl, accounting_treatment FROM accounting_rules '
+            'ORDER BY type, subtype, counterparty',
+        ).fetchall(),
+        'linked_rules_properties': cursor.execute(
+            'SELECT R.type, R.subtype, R.counterparty, L.property_name, L.setting_name '
+            'FROM linked_rules_properties L INNER JOIN accounting_rules R '
+            'ON L.accounting_rule=R.identifier ORDER BY R.type, R.subtype, R.counterparty, '
+            'L.property_name',
+        ).fetchall(),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def get_checkpoint_timestamps(
+        start_ts: Timestamp,
+        end_ts: Timestamp,
+        interval: int,
+        max_num: int,
+) -> list[Timestamp]:
+    """Returns the timestamps at which checkpoints should be taken when processing the
+    history up to end_ts, sorted ascending. Those are the multiples of interval right
+    before start_ts, to resume reports of the same period, and the latest ones before
+    end_ts, to resume reports of later periods."""
+    last_timestamp = end_ts - end_ts % interval
+    timestamps = {start_ts - start_ts % interval}
+    timestamps.update(last_timestamp - idx * interval for idx in range(max_num - 1))
+    return sorted(Timestamp(x) for x in timestamps if 0 < x <= end_ts)
@@ -2,6 +2,7 @@ from typing import Final
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.chain.evm.decoding.constants import CPT_GAS
+from rotkehlchen.constants.timing import DAY_IN_SECONDS, MONTH_IN_SECONDS
 from rotkehlchen.history.events.structures.types import (
     EventCategory,
     EventCategoryDetails,
@@ -12,6 +13,13 @@ from rotkehlchen.history.events.structures.types import (
 FREE_PNL_EVENTS_LIMIT = 1000
 FREE_REPORTS_LOOKUP_LIMIT = 20
 DEFAULT: Final = 'default'
+# Checkpoints of the accounting state are taken at multiples of the interval
+PNL_CHECKPOINT_INTERVAL: Final = 90 * DAY_IN_SECONDS
+PNL_CHECKPOINTS_MAX_NUM: Final = 8  # per settings hash
+# prices changed this close before a checkpoint may have been used by the events before it
+PNL_CHECKPOINT_PRICES_MAX_DISTANCE: Final = MONTH_IN_SECONDS
+# events read ahead while processing whose prices are prefetched from the DB together
+PRICES_PREFETCH_EVENTS: Final = 1000
 
 EVENT_CATEGORY_MAPPINGS = {  # possible combinations of types and subtypes mapped to their event category  # noqa: E501
     HistoryEventType.INFORMATIONAL: {
@@ -1,9 +1,10 @@
 import heapq
 import logging
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import defaultdict, deque
 from collections.abc import Callable, Iterator
 from dataclasses import dataclass, field
+from decimal import Decimal
 from typing import TYPE_CHECKING, Any, Literal, NamedTuple, Optional, overload
 
 from rotkehlchen.accounting.types import MissingAcquisition, MissingPrice
@@ -105,18 +106,19 @@ class AssetAcquisitionHeapElement(NamedTuple):
     """
     https://docs.python.org/3/library/heapq.html#basic-examples
 
-    This represents a heap element for the asset acquisition heap.
+    This represents a heap element for the HIFO acquisition heap.
     It is a tuple to also carry a priority which is used by the heap algorithm to
     preserve the heap invariant.
 
     Note:`heapq` uses a min heap implementation i.e. the smallest item comes out first.
 
-    For FIFO, a counter is used as the priority so the first acquisition comes out first.
-    For LIFO, a counter is used but negated, so the acquisition added last comes first.
-    For HIFO, the amount of the acquisition is used although negated so the
-    acquisition with the highest amount comes first.
+    The rate of the acquisition is used although negated so the acquisition with the
+    highest rate comes first. The rate is kept as a Decimal since comparing those is a
+    lot cheaper than comparing FVals. Acquisitions of the same rate come out in the order
+    they were added thanks to the counter, so the acquisition events are never compared.
     """
-    priority: FVal  # This is only used by heapq algorithm and not accessed from our code
+    priority: Decimal  # This is only used by heapq algorithm and not accessed from our code
+    order: int
     acquisition_event: AssetAcquisitionEvent
 
     def __str__(self) -> str:
@@ -124,9 +126,12 @@ class AssetAcquisitionHeapElement(NamedTuple):
 
 
 class BaseCostBasisMethod(ABC):
-    """The base class in which every other cost basis method inherits from."""
-    def __init__(self) -> None:
-        self._acquisitions_heap: list[AssetAcquisitionHeapElement] = []
+    """The base class in which every other cost basis method inherits from.
+
+    Each method keeps the acquisitions in a structure from which the next acquisition
+    to consume can be found and removed without touching the rest. A partially consumed
+    acquisition stays where it is with its remaining_amount reduced.
+    """
 
     @abstractmethod
     def add_in_event(self, acquisition: AssetAcquisitionEvent) -> None:
@@ -136,18 +141,34 @@ class BaseCostBasisMethod(ABC):
         and thus determines the PnL order.
         """
 
+    @abstractmethod
+    def _peek(self) -> AssetAcquisitionEvent:
+        """Returns the next acquisition to consume
+
+        May raise:
+        - IndexError if there are no acquisitions
+        """
+
+    @abstractmethod
+    def _pop(self) -> None:
+        """Removes the next acquisition to consume"""
+
+    @abstractmethod
+    def get_acquisitions(self) -> tuple[AssetAcquisitionEvent, ...]:
+        """Returns read-only the acquisitions in the order they will be consumed"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
     def processing_iterator(self) -> Iterator[AssetAcquisitionEvent]:
         """
         Iteration method over acquisition events.
         We can't return here Tuple of AssetAcquisitionEvents as we need to return
         the first event each time but _acquisitions may be not modified between iterations.
         """
-        while len(self._acquisitions_heap) > 0:
-            yield self._acquisitions_heap[0].acquisition_event
-
-    def get_acquisitions(self) -> tuple[AssetAcquisitionEvent, ...]:
-        """Returns read-only _acquisitions"""
-        return tuple(entry.acquisition_event for entry in self._acquisitions_heap)
+        while len(self) > 0:
+            yield self._peek()
 
     def consume_result(self, used_amount: FVal, asset: Asset) -> None:
         """
@@ -158,13 +179,14 @@ class BaseCostBasisMethod(ABC):
         May raise:
         - IndexError if the method was called when acquisitions were empty
         """
+        acquisition = self._peek()
         # this is a temporary assertion to test that new accounting tools work properly.
         # Written on 06.06.2022 and can be removed after a couple of months if everything goes well
-        assert ZERO <= used_amount <= self._acquisitions_heap[0].acquisition_event.remaining_amount, f'Used amount must be in the interval [0, {self._acquisitions_heap[0].acquisition_event.remaining_amount}] but it was {used_amount} for {asset}'  # noqa: E501
+        assert ZERO <= used_amount <= acquisition.remaining_amount, f'Used amount must be in the interval [0, {acquisition.remaining_amount}] but it was {used_amount} for {asset}'  # noqa: E501
 
-        self._acquisitions_heap[0].acquisition_event.remaining_amount -= used_amount
-        if self._acquisitions_heap[0].acquisition_event.remaining_amount == ZERO:
-            heapq.heappop(self._acquisitions_heap)
+        acquisition.remaining_amount -= used_amount
+        if acquisition.remaining_amount == ZERO:
+            self._pop()
 
     def calculate_spend_cost_basis(
             self,
@@ -289,54 +311,124 @@ class BaseCostBasisMethod(ABC):
             is_complete=is_complete,
         )
 
-    def __len__(self) -> int:
-        return len(self._acquisitions_heap)
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the acquisitions, in the order they will be consumed, to be saved
+        in a PnL checkpoint"""
+        return {'acquisitions': [{
+            'remaining_amount': str(acquisition.remaining_amount),
+            **acquisition.serialize(),
+        } for acquisition in self.get_acquisitions()]}
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        """Restore the state serialized by serialize_state into a method without acquisitions
+
+        May raise:
+        - DeserializationError
+        - KeyError
+        """
+        for entry in data['acquisitions']:
+            acquisition = AssetAcquisitionEvent(
+                amount=deserialize_fval(entry['full_amount'], name='full_amount', location='checkpoint'),  # noqa: E501
+                timestamp=entry['timestamp'],
+                rate=Price(deserialize_fval(entry['rate'], name='rate', location='checkpoint')),
+                index=entry['index'],
+            )
+            acquisition.remaining_amount = deserialize_fval(entry['remaining_amount'], name='remaining_amount', location='checkpoint')  # noqa: E501
+            self.add_in_event(acquisition)
 
 
 class FIFOCostBasisMethod(BaseCostBasisMethod):
     """
     Accounting in FIFO (first-in-first-out) method.
     https://www.investopedia.com/terms/f/fifo.asp
+
+    The acquisitions are kept in a deque in the order they were added and consumed
+    from its start.
     """
     def __init__(self) -> None:
-        super().__init__()
-        self._count = ZERO
+        self._acquisitions: deque[AssetAcquisitionEvent] = deque()
 
     def add_in_event(self, acquisition: AssetAcquisitionEvent) -> None:
-        """Adds an acquisition to the `_acquisitions_heap` using a counter to achieve the FIFO order."""  # noqa: E501
-        heapq.heappush(self._acquisitions_heap, AssetAcquisitionHeapElement(self._count, acquisition))  # noqa: E501
-        self._count += 1
+        self._acquisitions.append(acquisition)
+
+    def _peek(self) -> AssetAcquisitionEvent:
+        return self._acquisitions[0]
+
+    def _pop(self) -> None:
+        self._acquisitions.popleft()
+
+    def get_acquisitions(self) -> tuple[AssetAcquisitionEvent, ...]:
+        return tuple(self._acquisitions)
+
+    def __len__(self) -> int:
+        return len(self._acquisitions)
 
 
 class LIFOCostBasisMethod(BaseCostBasisMethod):
     """
     Accounting in LIFO (last-in-first-out) method.
     https://www.investopedia.com/terms/l/lifo.asp
+
+    The acquisitions are kept in a list used as a stack so the last one added is
+    consumed first from its end.
     """
     def __init__(self) -> None:
-        super().__init__()
-        self._count = ZERO
+        self._acquisitions: list[AssetAcquisitionEvent] = []
 
     def add_in_event(self, acquisition: AssetAcquisitionEvent) -> None:
-        """Adds an acquisition to the `_acquisitions_heap` using a negated counter to achieve the LIFO order."""  # noqa: E501
-        heapq.heappush(self._acquisitions_heap, AssetAcquisitionHeapElement(-self._count, acquisition))  # noqa: E501
-        self._count += 1
+        self._acquisitions.append(acquisition)
+
+    def _peek(self) -> AssetAcquisitionEvent:
+        return self._acquisitions[-1]
+
+    def _pop(self) -> None:
+        self._acquisitions.pop()
+
+    def get_acquisitions(self) -> tuple[AssetAcquisitionEvent, ...]:
+        return tuple(reversed(self._acquisitions))
+
+    def __len__(self) -> int:
+        return len(self._acquisitions)
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        # the acquisitions are serialized in consumption order, the reverse of the stack's
+        super().restore_state({'acquisitions': data['acquisitions'][::-1]})
 
 
 class HIFOCostBasisMethod(BaseCostBasisMethod):
     """
     Accounting in HIFO (highest-in-first-out) method.
     https://www.investopedia.com/terms/h/hifo.asp
+
+    The acquisitions are kept in a heap by negated rate so the one with the highest rate
+    is consumed first.
     """
+    def __init__(self) -> None:
+        self._acquisitions_heap: list[AssetAcquisitionHeapElement] = []
+        self._count = 0
+
     def add_in_event(self, acquisition: AssetAcquisitionEvent) -> None:
-        """
-        Adds an acquisition to the `_acquisitions_heap` using the negated rate
-        of the acquisition to achieve the HIFO order.
-        """
-        heapq.heappush(self._acquisitions_heap, AssetAcquisitionHeapElement(-acquisition.rate, acquisition))  # noqa: E501
+        heapq.heappush(self._acquisitions_heap, AssetAcquisitionHeapElement(
+            priority=-acquisition.rate.num,
+            order=self._count,
+            acquisition_event=acquisition,
+        ))
+        self._count += 1
+
+    def _peek(self) -> AssetAcquisitionEvent:
+        return self._acquisitions_heap[0].acquisition_event
 
+    def _pop(self) -> None:
+        heapq.heappop(self._acquisitions_heap)
+
+    def get_acquisitions(self) -> tuple[AssetAcquisitionEvent, ...]:
+        return tuple(entry.acquisition_event for entry in sorted(self._acquisitions_heap))
 
-class AverageCostBasisMethod(BaseCostBasisMethod):
+    def __len__(self) -> int:
+        return len(self._acquisitions_heap)
+
+
+class AverageCostBasisMethod(FIFOCostBasisMethod):
     """
     Accounting in Average Cost Basis(ACB) method.
 
@@ -349,10 +441,12 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
 
     For more details and explanations go here:
         https://github.com/rotki/rotki/issues/5561#issuecomment-1423338938
+
+    The acquisitions are consumed in the order they were added, same as FIFO, and the
+    totals needed for the average are kept up to date on every acquisition and spend.
     """  # noqa: E501
     def __init__(self) -> None:
         super().__init__()
-        self._count = ZERO
         # keeps track of the amount of the asset remaining after every acquisition or spend
         self.current_amount = ZERO
         # the current total cost basis of the asset
@@ -360,7 +454,7 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
 
     def add_in_event(self, acquisition: AssetAcquisitionEvent) -> None:
         """
-        Adds an acquisition to the `_acquisitions_heap` in order of time seen.
+        Adds an acquisition in order of time seen.
 
         It also calculates the average cost basis of that acquisition with respect to the
         previous average cost basis.
@@ -368,13 +462,20 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
         The formula used to calculate the average cost basis of an acquisition is:
         [Previous Total ACB] + [Cost of New Shares] + [Transaction Costs]
         """
-        heapq.heappush(
-            self._acquisitions_heap,
-            AssetAcquisitionHeapElement(self._count, acquisition),
-        )
+        super().add_in_event(acquisition)
         self.current_total_acb += acquisition.amount * acquisition.rate
         self.current_amount += acquisition.amount
-        self._count += 1
+
+    def serialize_state(self) -> dict[str, Any]:
+        return super().serialize_state() | {
+            'current_amount': str(self.current_amount),
+            'current_total_acb': str(self.current_total_acb),
+        }
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        super().restore_state(data)
+        self.current_amount = deserialize_fval(data['current_amount'], name='current_amount', location='checkpoint')  # noqa: E501
+        self.current_total_acb = deserialize_fval(data['current_total_acb'], name='current_total_acb', location='checkpoint')  # noqa: E501
 
     def consume_result(self, used_amount: FVal, asset: Asset) -> None:
         """
@@ -386,7 +487,7 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
             # this shouldn't happen but a user reported it in
             # https://github.com/rotki/rotki/issues/7273. We couldn't find the reason for it so we
             # decided to protect against it by raising an error shown in the frontend
-            log.error(f'Division by zero error when processing report using ACB. {self._acquisitions_heap}')  # noqa: E501
+            log.error(f'Division by zero error when processing report using ACB. {self._acquisitions}')  # noqa: E501
             raise AccountingError(
                 f'Remaining amount error during ACB calculation for {asset}. Contact support and '
                 'provide the log file for more information',
@@ -586,6 +687,30 @@ class CostBasisCalculator(CustomizableDateMixin):
         self.missing_acquisitions: list[MissingAcquisition] = []
         self.missing_prices: set[MissingPrice] = set()
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the state of the calculator to be saved in a PnL checkpoint. The spends
+        and used acquisitions are not needed to continue processing so they are not kept.
+        Missing prices are not kept either since no checkpoint is saved after one."""
+        return {
+            'assets': {
+                asset.identifier: events.acquisitions_manager.serialize_state()
+                for asset, events in self._events.items()
+            },
+            'missing_acquisitions': [x.serialize() for x in self.missing_acquisitions],
+        }
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        """Restore the state serialized by serialize_state. The calculator should have
+        been reset with the settings the state was created with.
+
+        May raise:
+        - DeserializationError
+        - KeyError
+        """
+        for identifier, state in data['assets'].items():
+            self._events[Asset(identifier)].acquisitions_manager.restore_state(state)
+        self.missing_acquisitions = [MissingAcquisition.deserialize(x) for x in data['missing_acquisitions']]  # noqa: E501
+
     def get_events(self, asset: Asset) -> CostBasisEvents:
         """Custom getter for events so that we have common cost basis for some assets"""
         if asset == A_WETH:
@@ -1,6 +1,6 @@
 import contextlib
 import logging
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, Final, Literal
 
 from rotkehlchen.accounting.cost_basis import CostBasisCalculator
 from rotkehlchen.accounting.cost_basis.prefork import (
@@ -35,6 +35,8 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+REPORT_DATA_BATCH_SIZE: Final = 500
+
 
 class AccountingPot(CustomizableDateMixin):
     """
@@ -69,30 +71,52 @@ class AccountingPot(CustomizableDateMixin):
             msg_aggregator=msg_aggregator,
         )
         self.pnls = PnlTotals()
+        # the processed events are only kept in memory if retain_processed_events is True.
+        # They are always written to the report in the DB, in batches of serialized events
         self.processed_events: list[ProcessedAccountingEvent] = []
+        self.processed_events_num = 0
+        self.retain_processed_events = True
+        self.pending_report_data: list[tuple[Timestamp, str]] = []
         self.events_accountant = EventsAccountant(
             evm_accounting_aggregators=evm_accounting_aggregators,
             pot=self,
         )
         self.query_start_ts = self.query_end_ts = Timestamp(0)
         self.report_id: int | None = None
+        # prices in profit currency prefetched from the DB before processing, keyed by
+        # asset identifier and timestamp. Populated by prefetch_prices
+        self.prefetched_prices: dict[tuple[str, Timestamp], Price] = {}
 
     def _add_processed_event(self, event: ProcessedAccountingEvent) -> None:
-        dbpnl = DBAccountingReports(self.database)
-        self.processed_events.append(event)
+        self.processed_events_num += 1
+        if self.retain_processed_events:
+            self.processed_events.append(event)
         try:
-            dbpnl.add_report_data(
-                report_id=self.report_id,  # type: ignore # report id is initialized by now
-                time=event.timestamp,
-                ts_converter=self.timestamp_to_date,
-                event=event,
-            )
-        except (DeserializationError, InputError) as e:
+            data = event.serialize_for_db(self.timestamp_to_date)
+        except DeserializationError as e:
             log.error(str(e))
             return
 
+        self.pending_report_data.append((event.timestamp, data))
+        if len(self.pending_report_data) >= REPORT_DATA_BATCH_SIZE:
+            self.flush_report_data()
+
         log.debug(event.to_string(self.timestamp_to_date))
 
+    def flush_report_data(self) -> None:
+        """Write the processed events that are pending to the report in the DB"""
+        if len(self.pending_report_data) == 0:
+            return
+
+        pending_report_data, self.pending_report_data = self.pending_report_data, []
+        try:
+            DBAccountingReports(self.database).add_report_data_entries(
+                report_id=self.report_id,  # type: ignore # report id is initialized by now
+                entries=pending_report_data,
+            )
+        except InputError as e:
+            log.error(str(e))
+
     def get_rate_in_profit_currency(self, asset: Asset, timestamp: Timestamp) -> Price:
         """Get the profit_currency price of asset in the given timestamp
 
@@ -105,6 +129,8 @@ class AccountingPot(CustomizableDateMixin):
         """
         if asset == self.profit_currency:
             rate = Price(ONE)
+        elif (prefetched_rate := self.prefetched_prices.get((asset.identifier, timestamp))) is not None:  # noqa: E501
+            rate = prefetched_rate
         else:
             rate = PriceHistorian().query_historical_price(
                 from_asset=asset,
@@ -113,12 +139,44 @@ class AccountingPot(CustomizableDateMixin):
             )
         return rate
 
+    def prefetch_prices(self, asset_timestamps: dict[Asset, set[Timestamp]]) -> None:
+        """Resolve in bulk the profit currency prices of the given assets at the given
+        timestamps from the prices already stored in the DB so that processing the events
+        does not need to query each one of them separately.
+
+        It's called for each window of the sorted events while processing. Prices of
+        previous windows before the earliest given timestamp are dropped, since the
+        events that needed them have been processed.
+
+        Prices that are not found are queried as usual at get_rate_in_profit_currency.
+        """
+        if len(asset_timestamps) != 0:
+            earliest_ts = min(min(x) for x in asset_timestamps.values())
+            self.prefetched_prices = {
+                key: price for key, price in self.prefetched_prices.items()
+                if key[1] >= earliest_ts
+            }
+        for asset, timestamps in asset_timestamps.items():
+            if asset == self.profit_currency:
+                continue
+
+            prices = PriceHistorian().query_cached_historical_prices(
+                from_asset=asset,
+                to_asset=self.profit_currency,
+                timestamps=sorted(timestamps),
+            )
+            for timestamp, price in prices.items():
+                self.prefetched_prices[(asset.identifier, timestamp)] = price
+
+        log.debug(f'Prefetched {len(self.prefetched_prices)} prices for {len(asset_timestamps)} assets')  # noqa: E501
+
     def reset(
             self,
             settings: DBSettings,
             start_ts: Timestamp,
             end_ts: Timestamp,
             report_id: int,
+            retain_processed_events: bool = True,
     ) -> None:
         self.settings = settings
         with self.database.conn.read_ctx() as cursor:
@@ -131,6 +189,30 @@ class AccountingPot(CustomizableDateMixin):
         self.cost_basis.reset(settings)
         self.events_accountant.reset()
         self.processed_events = []
+        self.processed_events_num = 0
+        self.retain_processed_events = retain_processed_events
+        self.pending_report_data = []
+        self.prefetched_prices = {}
+
+    def serialize_checkpoint(self) -> dict[str, Any]:
+        """Serialize the state that processing the history builds up so that processing
+        can be resumed later from the current point. See accounting/checkpoints.py"""
+        return {
+            'processed_events_num': self.processed_events_num,
+            'cost_basis': self.cost_basis.serialize_state(),
+            'evm_accountants': self.events_accountant.evm_accounting_aggregators.serialize_state(),
+        }
+
+    def restore_checkpoint(self, data: dict[str, Any]) -> None:
+        """Restore the state saved by serialize_checkpoint. Needs to be called after reset
+
+        May raise:
+        - DeserializationError or KeyError if the data is malformed
+        - UnknownAsset if an asset of the data is no longer in the global DB
+        """
+        self.processed_events_num = data['processed_events_num']
+        self.cost_basis.restore_state(data['cost_basis'])
+        self.events_accountant.evm_accounting_aggregators.restore_state(data['evm_accountants'])
 
     def add_in_event(
             self,  # pylint: disable=unused-argument
@@ -174,7 +256,7 @@ class AccountingPot(CustomizableDateMixin):
             amount=amount,
             price=price,
             ignored_asset_ids=self.ignored_asset_ids,
-            starting_index=len(self.processed_events),
+            starting_index=self.processed_events_num,
         )
         for prefork_event in prefork_events:
             self._add_processed_event(prefork_event)
@@ -196,7 +278,7 @@ class AccountingPot(CustomizableDateMixin):
             price=price,
             pnl=PNL(),  # filled out later
             cost_basis=None,
-            index=len(self.processed_events),
+            index=self.processed_events_num,
         )
         if extra_data:
             event.extra_data = extra_data
@@ -292,7 +374,7 @@ class AccountingPot(CustomizableDateMixin):
             price=price,
             pnl=PNL(),  # filled out later
             cost_basis=spend_cost,
-            index=len(self.processed_events),
+            index=self.processed_events_num,
         )
         if extra_data:
             spend_event.extra_data = extra_data
@@ -7,6 +7,7 @@ import jsonschema
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
+from rotkehlchen.serialization.deserialize import deserialize_fval
 from rotkehlchen.types import Timestamp
 from rotkehlchen.utils.mixins.enums import DBCharEnumMixIn, SerializableEnumNameMixin
 from rotkehlchen.utils.serialization import rlk_jsondumps
@@ -121,6 +122,19 @@ class MissingAcquisition(NamedTuple):
             'missing_amount': str(self.missing_amount),
         }
 
+    @classmethod
+    def deserialize(cls, data: dict[str, Any]) -> 'MissingAcquisition':
+        """May raise:
+        - DeserializationError
+        - KeyError
+        """
+        return cls(
+            asset=Asset(data['asset']),
+            time=Timestamp(data['time']),
+            found_amount=deserialize_fval(data['found_amount'], name='found_amount', location='missing acquisition'),  # noqa: E501
+            missing_amount=deserialize_fval(data['missing_amount'], name='missing_amount', location='missing acquisition'),  # noqa: E501
+        )
+
 
 class MissingPrice(NamedTuple):
     from_asset: Asset
@@ -119,6 +119,7 @@ from rotkehlchen.db.constants import (
     LINKABLE_ACCOUNTING_SETTINGS_NAME,
 )
 from rotkehlchen.db.custom_assets import DBCustomAssets
+from rotkehlchen.db.drivers.instrumentation import DB_INSTRUMENTATION
 from rotkehlchen.db.ens import DBEns
 from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import (
@@ -215,6 +216,7 @@ from rotkehlchen.types import (
     AVAILABLE_MODULES_MAP,
     EVM_CHAIN_IDS_WITH_TRANSACTIONS,
     EVM_CHAIN_IDS_WITH_TRANSACTIONS_TYPE,
+    EVM_CHAINS_WITH_TRANSACTIONS,
     EVM_LOCATIONS,
     SPAM_PROTOCOL,
     SUPPORTED_BITCOIN_CHAINS,
@@ -250,6 +252,7 @@ from rotkehlchen.types import (
     UserNote,
 )
 from rotkehlchen.utils.misc import combine_dicts, ts_now
+from rotkehlchen.utils.network import http_metrics
 from rotkehlchen.utils.snapshots import parse_import_snapshot_data
 from rotkehlchen.utils.version_check import get_current_version
 
@@ -2073,6 +2076,7 @@ class RestAPI:
                 'max_size_in_mb_all_logs': DEFAULT_MAX_LOG_SIZE_IN_MB,
                 'sqlite_instructions': DEFAULT_SQL_VM_INSTRUCTIONS_CB,
             },
+            'http_metrics': http_metrics.serialize(),
         }
         return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
 
@@ -2288,8 +2292,13 @@ class RestAPI:
 
     def get_rpc_nodes(self, blockchain: SupportedBlockchain) -> Response:
         nodes = self.rotkehlchen.data.db.get_rpc_nodes(blockchain=blockchain)
-        result_dict = _wrap_in_ok_result(process_result_list(list(nodes)))
-        return api_response(result_dict, status_code=HTTPStatus.OK)
+        result = process_result_list(list(nodes))
+        if blockchain in EVM_CHAINS_WITH_TRANSACTIONS:  # the evm chains with a node inquirer
+            node_inquirer = self.rotkehlchen.chains_aggregator.get_chain_manager(blockchain).node_inquirer  # type: ignore[arg-type]  # noqa: E501
+            for node, entry in zip(nodes, result, strict=True):
+                entry['stats'] = node_inquirer.serialize_node_stats(node=node, nodes=nodes)
+
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
 
     def add_rpc_node(self, node: WeightedNode) -> Response:
         try:
@@ -3597,6 +3606,7 @@ class RestAPI:
             'entries_found': entries_with_limit,
             'entries_limit': entries_limit,
             'entries_total': entries_total,
+            'next_cursor': None if group_by_event_ids else filter_query.next_page_cursor(events_result),  # type: ignore  # not grouped so list of events  # noqa: E501
         }
         if has_premium is False:
             result['entries_found_total'] = entries_found
@@ -4321,6 +4331,23 @@ class RestAPI:
 
         return api_response(OK_RESULT)
 
+    @staticmethod
+    def get_db_statistics() -> Response:
+        """Returns the statistics of the executed DB statements. Empty if disabled."""
+        return api_response(_wrap_in_ok_result(DB_INSTRUMENTATION.serialize()))
+
+    @staticmethod
+    def reset_db_statistics() -> Response:
+        DB_INSTRUMENTATION.reset()
+        return api_response(OK_RESULT)
+
+    @staticmethod
+    def get_cache_stats() -> Response:
+        """Returns the usage statistics of the in-memory caches of the global DB"""
+        return api_response(_wrap_in_ok_result({
+            'evm_tokens': GlobalDBHandler().evm_token_cache.stats(),
+        }))
+
     def get_types_mappings(self) -> Response:
         result = {
             'global_mappings': EVENT_CATEGORY_MAPPINGS,
@@ -50,6 +50,7 @@ from rotkehlchen.api.v1.resources import (
     BlockchainBalancesResource,
     BlockchainsAccountsResource,
     BTCXpubResource,
+    CacheStatsResource,
     ClearCacheResource,
     CompoundBalancesResource,
     ConfigurationsResource,
@@ -57,6 +58,7 @@ from rotkehlchen.api.v1.resources import (
     CustomAssetsTypesResource,
     DatabaseBackupsResource,
     DatabaseInfoResource,
+    DatabaseStatisticsResource,
     DataImportResource,
     DBSnapshotsResource,
     DefiBalancesResource,
@@ -300,6 +302,7 @@ URLS_V1: URLS = [
     ('/nfts/prices', NFTSPricesResource),
     ('/database/info', DatabaseInfoResource),
     ('/database/backups', DatabaseBackupsResource),
+    ('/database/statistics', DatabaseStatisticsResource),
     ('/locations/all', LocationResource),
     ('/locations/associated', AssociatedLocations),
     ('/staking/kraken', StakingResource),
@@ -316,6 +319,7 @@ URLS_V1: URLS = [
     ('/notes', UserNotesResource),
     ('/cache/<string:cache_type>/clear', ClearCacheResource),
     ('/cache/general/refresh', RefreshGeneralCacheResource),
+    ('/cache/stats', CacheStatsResource),
     ('/airdrops/metadata', AirdropsMetadataResource),
     ('/defi/metadata', DefiMetadataResource),
 ]
@@ -2991,6 +2991,24 @@ class ClearCacheResource(BaseMethodView):
         return self.rest_api.clear_avatars_cache(data['entries'])
 
 
+class DatabaseStatisticsResource(BaseMethodView):
+
+    @require_loggedin_user()
+    def get(self) -> Response:
+        return self.rest_api.get_db_statistics()
+
+    @require_loggedin_user()
+    def delete(self) -> Response:
+        return self.rest_api.reset_db_statistics()
+
+
+class CacheStatsResource(BaseMethodView):
+
+    @require_loggedin_user()
+    def get(self) -> Response:
+        return self.rest_api.get_cache_stats()
+
+
 class TypesMappingsResource(BaseMethodView):
 
     def get(self) -> Response:
@@ -67,6 +67,7 @@ from rotkehlchen.db.filtering import (
     ReportDataFilterQuery,
     TradesFilterQuery,
     UserNotesFilterQuery,
+    decode_pagination_cursor,
 )
 from rotkehlchen.db.settings import ModifiableDBSettings
 from rotkehlchen.db.utils import DBAssetBalance, LocationData
@@ -604,6 +605,7 @@ class HistoryEventSchema(
         load_default=None,
     )
     customized_events_only = fields.Boolean(load_default=False)
+    cursor = fields.String(load_default=None)
 
     # EvmEvent only
     tx_hashes = DelimitedOrNormalList(EVMTransactionHashField(), load_default=None)
@@ -633,6 +635,18 @@ class HistoryEventSchema(
                 field_name='order_by_attributes',
             )
 
+        if data['cursor'] is not None:
+            if data['limit'] is None or data['offset'] is not None:
+                raise ValidationError(
+                    message='cursor requires a limit and can not be combined with an offset',
+                    field_name='cursor',
+                )
+            if data['group_by_event_ids'] is True:
+                raise ValidationError(
+                    message='cursor can not be used when grouping by event identifiers',
+                    field_name='cursor',
+                )
+
     @post_load
     def make_history_event_filter(
             self,
@@ -674,12 +688,28 @@ class HistoryEventSchema(
             should_query_eth_staking_event = True
             should_query_evm_event = False
 
-        common_arguments = self.make_extra_filtering_arguments(data) | {
-            'order_by_rules': create_order_by_rules_list(
-                data=data,  # descending timestamp and ascending sequence index
-                default_order_by_fields=['timestamp', 'sequence_index'],
-                default_ascending=[False, True],
-            ),
+        order_by_rules = create_order_by_rules_list(
+            data=data,  # descending timestamp and ascending sequence index
+            default_order_by_fields=['timestamp', 'sequence_index'],
+            default_ascending=[False, True],
+        )
+        if order_by_rules is not None and data['group_by_event_ids'] is False and data['limit'] is not None:  # noqa: E501
+            # end in a unique column so that the next page can be sought with a cursor
+            order_by_rules.append(('history_events_identifier', True))
+
+        extra_arguments = self.make_extra_filtering_arguments(data)
+        if (
+            extra_arguments.get('after') is not None and
+            order_by_rules is not None and
+            len(extra_arguments['after']) != len(order_by_rules)
+        ):
+            raise ValidationError(
+                message='cursor does not match the order of the query',
+                field_name='cursor',
+            )
+
+        common_arguments = extra_arguments | {
+            'order_by_rules': order_by_rules,
             'entry_types': entry_types,
             'from_ts': data['from_timestamp'],
             'to_ts': data['to_timestamp'],
@@ -716,9 +746,17 @@ class HistoryEventSchema(
 
     def make_extra_filtering_arguments(self, data: dict[str, Any]) -> dict[str, Any]:
         """Generates the extra fields to be included in the filter_query dictionary"""
+        after = None
+        if data['cursor'] is not None:
+            try:
+                after = decode_pagination_cursor(data['cursor'])
+            except DeserializationError as e:
+                raise ValidationError(message=str(e), field_name='cursor') from e
+
         return {
             'limit': data['limit'],
             'offset': data['offset'],
+            'after': after,
         }
 
     def generate_fields_post_validation(self, data: dict[str, Any]) -> dict[str, Any]:
@@ -1261,6 +1299,27 @@ class ModifiableSettingsSchema(Schema):
             error='The penalty should be >= 1 seconds',
         ),
     )
+    db_backup_frequency = fields.Integer(
+        load_default=None,
+        validate=webargs.validate.Range(
+            min=0,
+            error='The backup frequency should be >= 0 hours',
+        ),
+    )
+    db_backups_to_keep = fields.Integer(
+        load_default=None,
+        validate=webargs.validate.Range(
+            min=1,
+            error='The number of backups to keep should be >= 1',
+        ),
+    )
+    etherscan_queries_per_second = fields.Integer(
+        load_default=None,
+        validate=webargs.validate.Range(
+            min=1,
+            error='The etherscan queries per second should be >= 1',
+        ),
+    )
 
     @validates_schema
     def validate_settings_schema(
@@ -1319,6 +1378,9 @@ class ModifiableSettingsSchema(Schema):
             read_timeout=data['read_timeout'],
             oracle_penalty_threshold_count=data['oracle_penalty_threshold_count'],
             oracle_penalty_duration=data['oracle_penalty_duration'],
+            db_backup_frequency=data['db_backup_frequency'],
+            db_backups_to_keep=data['db_backups_to_keep'],
+            etherscan_queries_per_second=data['etherscan_queries_per_second'],
         )
 
 
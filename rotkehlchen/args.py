@@ -131,6 +131,15 @@ def app_args(prog: str, description: str) -> argparse.ArgumentParser:
         default=DEFAULT_SQL_VM_INSTRUCTIONS_CB,
         type=_positive_int_or_zero,
     )
+    p.add_argument(
+        '--sqlite-slow-query-ms',
+        help=(
+            'If given and not zero then statistics of the executed DB statements are kept '
+            'and the statements that take at least this many milliseconds are logged.'
+        ),
+        default=0,
+        type=_positive_int_or_zero,
+    )
     p.add_argument(
         'version',
         help='Shows the rotki version',
@@ -17,6 +17,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     TransferEnrichmentOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.assets import A_1INCH, A_ETH, A_GTC
@@ -79,6 +80,16 @@ class EthereumTransactionDecoder(EVMTransactionDecoderWithDSProxy):
             ),
         )
 
+    @event_rule_filter(
+        GTC_CLAIM,
+        MERKLE_CLAIM,
+        GNOSIS_CHAIN_BRIDGE_RECEIVE,
+        addresses=(
+            string_to_evm_address('0xDE3e5a990bCE7fC60a6f017e7c4a95fc4939299E'),
+            string_to_evm_address('0xE295aD71242373C37C5FdA7B57F26f9eA1088AFe'),
+            string_to_evm_address('0x88ad09518695c6c3712AC10a214bE5109a655671'),
+        ),
+    )
     def _maybe_enrich_transfers(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -124,6 +135,7 @@ class EthereumTransactionDecoder(EVMTransactionDecoderWithDSProxy):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @event_rule_filter(GOVERNORALPHA_PROPOSE)
     def _maybe_decode_governance(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
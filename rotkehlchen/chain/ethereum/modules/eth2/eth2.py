@@ -30,7 +30,7 @@ from rotkehlchen.types import ChecksumEvmAddress, Eth2PubKey, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.data_structures import LRUCacheWithRemove
 from rotkehlchen.utils.interfaces import EthereumModule
-from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.misc import ts_ms_to_sec, ts_now
 
 from .constants import (
     CPT_ETH2,
@@ -561,7 +561,7 @@ class Eth2(EthereumModule):
         transaction events if they can be found"""
         with self.database.conn.read_ctx() as cursor:
             cursor.execute(
-                'SELECT B_H.identifier, B_T.block_number, B_H.notes FROM evm_transactions B_T '
+                'SELECT B_H.identifier, B_T.block_number, B_H.notes, B_H.timestamp FROM evm_transactions B_T '  # noqa: E501
                 'LEFT JOIN evm_events_info B_E '
                 'ON B_T.tx_hash=B_E.tx_hash LEFT JOIN history_events B_H '
                 'ON B_E.identifier=B_H.identifier WHERE '
@@ -597,6 +597,9 @@ class Eth2(EthereumModule):
                     # already exists. Probably right after resetting events? Delete old one
                     write_cursor.execute('DELETE FROM history_events WHERE identifier=?', (changes_entry[5],))  # noqa: E501
 
+        if len(result) != 0:  # the combined events are accounted as mev rewards
+            self.database.invalidate_pnl_checkpoints(ts_ms_to_sec(min(entry[3] for entry in result)))  # noqa: E501
+
     def detect_exited_validators(self) -> None:
         """This function will detect any validators that have exited from the ones that
         are last known to be active and set the DB values accordingly"""
@@ -37,6 +37,7 @@ from rotkehlchen.utils.hexbytes import hexstring_to_bytes
 from rotkehlchen.utils.interfaces import EthereumModule
 from rotkehlchen.utils.misc import iso8601ts_to_timestamp, set_user_agent
 from rotkehlchen.utils.mixins.enums import DBCharEnumMixIn
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 if TYPE_CHECKING:
@@ -129,7 +130,7 @@ class ZksyncLite(EthereumModule):
     ) -> None:
         self.database = database
         self.premium = premium
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
         set_user_agent(self.session)
         self.id_to_token: dict[int, CryptoAsset] = {}
         self.symbol_to_token: dict[str, CryptoAsset] = {}
@@ -44,7 +44,7 @@ BINDINGS_STABILITY_POOL_EVENTS = [
     HistoryEventSubType.REWARD.serialize(),
 ]
 QUERY_STABILITY_POOL_DEPOSITS = (
-    'SELECT SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)) '
+    'SELECT DECIMAL_SUM(amount), DECIMAL_SUM(usd_value) '
     'FROM history_events WHERE asset=? AND type=? AND subtype=?'
 )
 
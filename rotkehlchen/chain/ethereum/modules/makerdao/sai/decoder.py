@@ -18,7 +18,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     TransferEnrichmentOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
-from rotkehlchen.chain.evm.decoding.utils import maybe_reshuffle_events
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter, maybe_reshuffle_events
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants import ZERO
@@ -452,6 +452,7 @@ class MakerdaosaiDecoder(DecoderInterface):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @event_rule_filter(SAI_CDP_MIGRATION_TOPIC)
     def _decode_sai_cdp_migration(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
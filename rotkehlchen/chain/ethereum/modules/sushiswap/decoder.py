@@ -16,6 +16,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     DecodingOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.types import EvmTransaction
@@ -33,6 +34,7 @@ SUSHISWAP_V2_INIT_CODE_HASH = '0xe18a34eb0e04b04f7a0ac29a6e80748dca96319b42c54d6
 
 class SushiswapDecoder(DecoderInterface):
 
+    @event_rule_filter(SWAP_SIGNATURE)
     def _maybe_decode_v2_swap(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -54,6 +56,7 @@ class SushiswapDecoder(DecoderInterface):
             )
         return DEFAULT_DECODING_OUTPUT
 
+    @event_rule_filter(MINT_SIGNATURE, BURN_SIGNATURE)
     def _maybe_decode_v2_liquidity_addition_and_removal(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -1,15 +1,17 @@
 from collections import defaultdict
 from collections.abc import Iterator
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Any, cast
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.chain.ethereum.modules.thegraph.constants import CPT_THEGRAPH
 from rotkehlchen.chain.evm.accounting.interfaces import ModuleAccountantInterface
 from rotkehlchen.chain.evm.accounting.structures import EventsAccountantCallback
+from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants import ZERO
 from rotkehlchen.fval import FVal
 from rotkehlchen.history.events.structures.base import get_event_type_identifier
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
+from rotkehlchen.serialization.deserialize import deserialize_fval
 
 if TYPE_CHECKING:
     from rotkehlchen.accounting.pot import AccountingPot
@@ -21,6 +23,13 @@ class ThegraphAccountant(ModuleAccountantInterface):
     def reset(self) -> None:
         self.assets_supplied: dict[ChecksumEvmAddress, FVal] = defaultdict(FVal)
 
+    def serialize_state(self) -> dict[str, Any]:
+        return {address: str(amount) for address, amount in self.assets_supplied.items()}
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        for address, amount in data.items():
+            self.assets_supplied[string_to_evm_address(address)] = deserialize_fval(amount, name='supplied amount', location='thegraph checkpoint')  # noqa: E501
+
     def _process_deposit(
             self,
             pot: 'AccountingPot',  # pylint: disable=unused-argument
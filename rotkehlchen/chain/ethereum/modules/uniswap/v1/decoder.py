@@ -12,7 +12,7 @@ from rotkehlchen.chain.evm.decoding.uniswap.constants import (
     UNISWAP_ICON,
     UNISWAP_LABEL,
 )
-from rotkehlchen.chain.evm.decoding.utils import maybe_reshuffle_events
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter, maybe_reshuffle_events
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
@@ -35,6 +35,7 @@ ETH_PURCHASE = b'\x7f@\x91\xb4l3\xe9\x18\xa0\xf3\xaaB0vA\xd1{\xb6p)BzSi\xe5K59\x
 
 class Uniswapv1Decoder(DecoderInterface):
 
+    @event_rule_filter(TOKEN_PURCHASE, ETH_PURCHASE)
     def _maybe_decode_swap(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -21,6 +21,7 @@ from rotkehlchen.chain.evm.decoding.uniswap.constants import (
     UNISWAP_LABEL,
 )
 from rotkehlchen.chain.evm.decoding.uniswap.utils import decode_basic_uniswap_info
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants import ZERO
@@ -70,6 +71,7 @@ class Uniswapv2Decoder(DecoderInterface):
             native_currency=self.evm_inquirer.native_token,
         )
 
+    @event_rule_filter(SWAP_SIGNATURE)
     def _maybe_decode_v2_swap(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -100,6 +102,7 @@ class Uniswapv2Decoder(DecoderInterface):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @event_rule_filter(MINT_SIGNATURE, BURN_SIGNATURE)
     def _maybe_decode_v2_liquidity_addition_and_removal(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -4,7 +4,7 @@ import pkgutil
 from collections.abc import Sequence
 from contextlib import suppress
 from types import ModuleType
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
 from rotkehlchen.errors.misc import ModuleLoadingError
@@ -104,6 +104,20 @@ class EVMAccountingAggregator:
         for accountant in self.accountants.values():
             accountant.reset()
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the state of the submodule accountants that keep state between events"""
+        return {
+            name: state for name, accountant in self.accountants.items()
+            if (state := accountant.serialize_state()) is not None
+        }
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        """Restore the state serialized by serialize_state. May raise what the
+        submodule accountants' restore_state raises"""
+        for name, state in data.items():
+            if (accountant := self.accountants.get(name)) is not None:
+                accountant.restore_state(state)
+
 
 class EVMAccountingAggregators:
     """
@@ -130,3 +144,16 @@ class EVMAccountingAggregators:
         """Reset the state of all initialized submodule accountants"""
         for aggregator in self.aggregators:
             aggregator.reset()
+
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the state of the submodule accountants of all chains"""
+        return {
+            str(aggregator.node_inquirer.chain_id.serialize()): aggregator.serialize_state()
+            for aggregator in self.aggregators
+        }
+
+    def restore_state(self, data: dict[str, Any]) -> None:
+        """Restore the state serialized by serialize_state"""
+        for aggregator in self.aggregators:
+            if (state := data.get(str(aggregator.node_inquirer.chain_id.serialize()))) is not None:
+                aggregator.restore_state(state)
@@ -1,7 +1,7 @@
 import logging
 from abc import ABC, abstractmethod
 from collections.abc import Iterator
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.constants import ZERO
@@ -52,6 +52,20 @@ class ModuleAccountantInterface(ABC):
         """Subclasses may implement this to reset state between accounting runs"""
         return None
 
+    def serialize_state(self) -> dict[str, Any] | None:
+        """Subclasses that keep state between events implement this to have it saved
+        in the PnL report checkpoints. None means there is no state to save"""
+        return None
+
+    def restore_state(self, data: dict[str, Any]) -> None:  # pylint: disable=unused-argument
+        """Restore the state serialized by serialize_state
+
+        May raise:
+        - DeserializationError
+        - KeyError
+        """
+        return None
+
 
 class DepositableAccountantInterface(ModuleAccountantInterface):
     """
@@ -8,6 +8,10 @@ from .types import string_to_evm_address
 DEFAULT_TOKEN_DECIMALS: Final = 18
 
 MAX_BLOCKTIME_CACHE: Final = 250  # 55 mins with 13 secs avg block time
+DEFAULT_RPC_BATCH_SIZE: Final = 100  # calls per JSON-RPC batch request to a node
+DEFAULT_DECODING_BATCH_SIZE: Final = 100  # transactions read together when decoding
+# greenlets of a chain querying missing receipts at the same time, within the limits of the nodes
+RECEIPTS_QUERY_CONCURRENCY: Final = 4
 ZERO_ADDRESS: Final = string_to_evm_address('0x0000000000000000000000000000000000000000')
 ETH_SPECIAL_ADDRESS: Final = string_to_evm_address('0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE')
 ZERO_32_BYTES_HEX: Final = '0x' + '0' * 64
@@ -24,6 +24,7 @@ if TYPE_CHECKING:
 
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
+from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import EvmTokenKind, EvmTransaction, EVMTxHash, Location
 from rotkehlchen.utils.misc import hex_or_bytes_to_address, hex_or_bytes_to_int, ts_sec_to_ms
@@ -316,7 +317,18 @@ class BaseDecoderTools:
         )
 
     def get_or_create_evm_token(self, address: ChecksumEvmAddress) -> EvmToken:
-        """A version of get_create_evm_token to be called from the decoders"""
+        """A version of get_create_evm_token to be called from the decoders
+
+        Tokens that are already complete in the global DB are served by its evm token
+        cache without going through the creation logic.
+        """
+        if (
+            (token := GlobalDBHandler.get_evm_token(address=address, chain_id=self.evm_inquirer.chain_id)) is not None and  # noqa: E501
+            token.token_kind == EvmTokenKind.ERC20 and
+            token.name != token.identifier
+        ):
+            return token
+
         return get_or_create_evm_token(
             userdb=self.database,
             evm_address=address,
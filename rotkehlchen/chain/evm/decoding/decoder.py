@@ -2,20 +2,21 @@ import importlib
 import logging
 import pkgutil
 from abc import ABC, abstractmethod
-from collections.abc import Callable
-from contextlib import suppress
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
 from types import ModuleType
 from typing import TYPE_CHECKING, Any, Optional, Protocol
 
+import gevent
 from gevent.lock import Semaphore
 
 from rotkehlchen.accounting.structures.balance import Balance
-from rotkehlchen.accounting.structures.types import ActionType
 from rotkehlchen.api.websockets.typedefs import WSMessageType
 from rotkehlchen.assets.asset import AssetWithOracles, EvmToken
 from rotkehlchen.assets.utils import TokenEncounterInfo, get_or_create_evm_token
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
+from rotkehlchen.chain.evm.constants import DEFAULT_DECODING_BATCH_SIZE
 from rotkehlchen.chain.evm.decoding.interfaces import ReloadableDecoderMixin
 from rotkehlchen.chain.evm.decoding.oneinch.v5.decoder import Oneinchv5Decoder
 from rotkehlchen.chain.evm.decoding.safe.decoder import SafemultisigDecoder
@@ -42,11 +43,17 @@ from rotkehlchen.history.events.structures.evm_event import EvmProduct
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChecksumEvmAddress, EvmTokenKind, EvmTransaction, EVMTxHash
-from rotkehlchen.utils.misc import from_wei, hex_or_bytes_to_address, hex_or_bytes_to_int
+from rotkehlchen.utils.misc import (
+    from_wei,
+    get_chunks,
+    hex_or_bytes_to_address,
+    hex_or_bytes_to_int,
+)
 from rotkehlchen.utils.mixins.customizable_date import CustomizableDateMixin
 
 from .base import BaseDecoderTools, BaseDecoderToolsWithDSProxy
 from .constants import CPT_GAS, ERC20_APPROVE, ERC20_OR_ERC721_TRANSFER, OUTGOING_EVENT_TYPES
+from .session import DecodingSession
 from .structures import (
     DEFAULT_DECODING_OUTPUT,
     ActionItem,
@@ -55,7 +62,7 @@ from .structures import (
     EnricherContext,
     TransferEnrichmentOutput,
 )
-from .utils import maybe_reshuffle_events
+from .utils import EVENT_RULE_FILTERS, event_rule_filter, maybe_reshuffle_events
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.evm.node_inquirer import EvmNodeInquirer, EvmNodeInquirerWithDSProxy
@@ -137,7 +144,8 @@ class EVMTransactionDecoder(ABC):
         and the one that is spent for gas in this chain
 
         `event_rules` is a list of callables to act as decoding rules for all tx
-        receipt logs decoding for the particular chain
+        receipt logs decoding for the particular chain. Rules decorated with
+        event_rule_filter are only called for the logs they declared.
 
         `misc_counterparties` is a list of counterparties not associated with any specific
         decoder that should be included for this decoder modules.
@@ -172,7 +180,10 @@ class EVMTransactionDecoder(ABC):
         self._add_builtin_decoders(self.rules)
         # Recursively check all submodules to get all decoder address mappings and rules
         self.rules += self._recursively_initialize_decoders(self.chain_modules_root)
+        self._build_event_rules_index()
         self.undecoded_tx_query_lock = Semaphore()
+        # set while decoding many transactions so that their results are written in batches
+        self.decoding_session: DecodingSession | None = None
 
     def _add_builtin_decoders(self, rules: DecodingRules) -> None:
         """Adds decoders that should be built-in for every EVM decoding run
@@ -236,6 +247,31 @@ class EVMTransactionDecoder(ABC):
         rules.addresses_to_counterparties.update(new_address_to_counterparties)
         self._chain_specific_decoder_initialization(self.decoders[class_name])
 
+    def _build_event_rules_index(self) -> None:
+        """Index the event rules by the topic0 they declared with event_rule_filter so
+        that each log is only given to the rules that may decode it.
+
+        Rules that declared nothing are given every log. For every topic the rules
+        are kept in the order they were registered in, which is the order they run in.
+        """
+        rule_filters = [
+            EVENT_RULE_FILTERS.get(getattr(rule, '__func__', rule))
+            for rule in self.rules.event_rules
+        ]
+        self.event_rules_by_topic: dict[bytes, list[tuple[EventDecoderFunction, frozenset[ChecksumEvmAddress] | None]]] = {  # noqa: E501
+            topic: [] for rule_filter in rule_filters if rule_filter is not None
+            for topic in rule_filter[0]
+        }
+        self.catch_all_event_rules: list[tuple[EventDecoderFunction, frozenset[ChecksumEvmAddress] | None]] = []  # noqa: E501
+        for rule, rule_filter in zip(self.rules.event_rules, rule_filters, strict=True):
+            if rule_filter is None:
+                self.catch_all_event_rules.append((rule, None))
+                for topic_rules in self.event_rules_by_topic.values():
+                    topic_rules.append((rule, None))
+            else:
+                for topic in rule_filter[0]:
+                    self.event_rules_by_topic[topic].append((rule, rule_filter[1]))
+
     def _recursively_initialize_decoders(
             self,
             package: str | ModuleType,
@@ -308,12 +344,16 @@ class EVMTransactionDecoder(ABC):
             all_logs: list[EvmTxReceiptLog],
     ) -> DecodingOutput | None:
         """
-        Execute event rules for the current tx log. Returns None when no
-        new event or actions need to be propagated.
+        Execute the event rules that may match the topic and address of the current
+        tx log. Returns None when no new event or actions need to be propagated.
         """
-        for rule in self.rules.event_rules:
-            if len(tx_log.topics) == 0:
-                continue  # ignore anonymous events
+        if len(tx_log.topics) == 0:
+            return None  # ignore anonymous events
+
+        rules = self.event_rules_by_topic.get(tx_log.topics[0], self.catch_all_event_rules)
+        for rule, addresses in rules:
+            if addresses is not None and tx_log.address not in addresses:
+                continue
 
             try:
                 decoding_output = rule(token=token, tx_log=tx_log, transaction=transaction, decoded_events=decoded_events, action_items=action_items, all_logs=all_logs)  # noqa: E501
@@ -394,9 +434,12 @@ class EVMTransactionDecoder(ABC):
             self,
             transaction: EvmTransaction,
             tx_receipt: EvmTxReceipt,
+            redecoded: bool = False,
     ) -> tuple[list['EvmEvent'], bool]:
         """
         Decodes an evm transaction and its receipt and saves result in the DB.
+        If redecoded is True the previously decoded events of the transaction are
+        replaced in the same write.
         Returns the list of decoded events and a flag which is True if balances refresh is needed.
         """
         self.base.reset_sequence_counter()
@@ -471,26 +514,11 @@ class EVMTransactionDecoder(ABC):
         if len(events) == 0 and (eth_event := self._get_eth_transfer_event(transaction)) is not None:  # noqa: E501
             events = [eth_event]
 
-        with self.database.user_write() as write_cursor:
-            if len(events) > 0:
-                self.dbevents.add_history_events(
-                    write_cursor=write_cursor,
-                    history=events,
-                )
-            else:
-                # This is probably a phishing zero value token transfer tx.
-                # Details here: https://github.com/rotki/rotki/issues/5749
-                with suppress(InputError):  # We don't care if it's already in the DB
-                    self.database.add_to_ignored_action_ids(
-                        write_cursor=write_cursor,
-                        action_type=ActionType.HISTORY_EVENT,
-                        identifiers=[transaction.identifier],
-                    )
-            tx_id = transaction.get_or_query_db_id(write_cursor)
-            write_cursor.execute(
-                'INSERT OR IGNORE INTO evm_tx_mappings(tx_id, value) VALUES(?, ?)',
-                (tx_id, HISTORY_MAPPING_STATE_DECODED),
-            )
+        if self.decoding_session is not None:
+            self.decoding_session.add(transaction=transaction, events=events, redecoded=redecoded)
+        else:
+            with self._new_decoding_session() as session:
+                session.add(transaction=transaction, events=events, redecoded=redecoded)
 
         events = sorted(events, key=lambda x: x.sequence_index, reverse=False)
         return events, refresh_balances  # Propagate for post processing in the caller
@@ -525,18 +553,21 @@ class EVMTransactionDecoder(ABC):
             ignore_cache: bool,
             tx_hashes: list[EVMTxHash] | None,
             send_ws_notifications: bool = False,
+            batch_size: int = DEFAULT_DECODING_BATCH_SIZE,
     ) -> list['EvmEvent']:
         """Make sure that receipts are pulled + events decoded for the given transaction hashes.
 
-        The transaction hashes must exist in the DB at the time of the call
+        The transaction hashes must exist in the DB at the time of the call. They are
+        processed in chunks of batch_size. Each chunk is read in a single read context and
+        if ignore_cache is True the previously decoded events of each transaction are
+        deleted in the write that stores its new events. Passing tx_hashes as None
+        redecodes all the transactions of the chain.
 
         May raise:
         - DeserializationError if there is a problem with contacting a remote to get receipts
         - RemoteError if there is a problem with contacting a remote to get receipts
         - InputError if the transaction hash is not found in the DB
         """
-        events: list[EvmEvent] = []
-        refresh_balances = False
         with self.database.conn.read_ctx() as cursor:
             self.reload_data(cursor)
             # If no transaction hashes are passed, decode all transactions.
@@ -548,36 +579,13 @@ class EVMTransactionDecoder(ABC):
                 tx_hashes = [EVMTxHash(x[0]) for x in cursor]
 
         total_transactions = len(tx_hashes)
-        for tx_index, tx_hash in enumerate(tx_hashes):
-            if send_ws_notifications and tx_index % 10 == 0:
-                self.msg_aggregator.add_message(
-                    message_type=WSMessageType.EVM_UNDECODED_TRANSACTIONS,
-                    data={
-                        'evm_chain': self.evm_inquirer.chain_name,
-                        'total': total_transactions,
-                        'processed': tx_index,
-                    },
-                )
-
-            # TODO: Change this if transaction filter query can accept multiple hashes
-            with self.database.conn.read_ctx() as cursor:
-                try:
-                    tx, receipt = self.transactions.get_or_create_transaction(
-                        cursor=cursor,
-                        tx_hash=tx_hash,
-                        relevant_address=None,
-                    )
-                except RemoteError as e:
-                    raise InputError(f'{self.evm_inquirer.chain_name} hash {tx_hash.hex()} does not correspond to a transaction. {e}') from e  # noqa: E501
-
-            new_events, new_refresh_balances = self._get_or_decode_transaction_events(
-                transaction=tx,
-                tx_receipt=receipt,
+        with self._batched_writes():
+            events, refresh_balances = self._decode_transaction_hashes_in_chunks(
                 ignore_cache=ignore_cache,
+                tx_hashes=tx_hashes,
+                send_ws_notifications=send_ws_notifications,
+                batch_size=batch_size,
             )
-            events.extend(new_events)
-            if new_refresh_balances is True:
-                refresh_balances = True
 
         if send_ws_notifications:
             self.msg_aggregator.add_message(
@@ -592,6 +600,79 @@ class EVMTransactionDecoder(ABC):
         self._post_process(refresh_balances=refresh_balances)
         return events
 
+    def _new_decoding_session(self) -> DecodingSession:
+        return DecodingSession(
+            database=self.database,
+            dbevents=self.dbevents,
+            chain_id=self.evm_inquirer.chain_id,
+        )
+
+    @contextmanager
+    def _batched_writes(self) -> Iterator[DecodingSession]:
+        """Batch the DB writes of the transactions decoded inside the context"""
+        if (shared_session := self.decoding_session) is not None:  # another greenlet is already batching  # noqa: E501
+            try:
+                yield shared_session
+            finally:  # the owner may have finished and unset it in the meantime
+                shared_session.flush()
+            return
+
+        with self._new_decoding_session() as session:
+            self.decoding_session = session
+            try:
+                yield session
+            finally:
+                self.decoding_session = None
+
+    def _decode_transaction_hashes_in_chunks(
+            self,
+            ignore_cache: bool,
+            tx_hashes: list[EVMTxHash],
+            send_ws_notifications: bool,
+            batch_size: int,
+    ) -> tuple[list['EvmEvent'], bool]:
+        """Decode the given transactions in chunks of batch_size. Returns the events and a
+        flag which is True if balances refresh is needed"""
+        events: list[EvmEvent] = []
+        refresh_balances = False
+        total_transactions = len(tx_hashes)
+        for chunk_index, chunk in enumerate(get_chunks(tx_hashes, n=batch_size)):
+            if send_ws_notifications:
+                self.msg_aggregator.add_message(
+                    message_type=WSMessageType.EVM_UNDECODED_TRANSACTIONS,
+                    data={
+                        'evm_chain': self.evm_inquirer.chain_name,
+                        'total': total_transactions,
+                        'processed': chunk_index * batch_size,
+                    },
+                )
+
+            transactions = []
+            with self.database.conn.read_ctx() as cursor:
+                for tx_hash in chunk:
+                    try:
+                        transactions.append(self.transactions.get_or_create_transaction(
+                            cursor=cursor,
+                            tx_hash=tx_hash,
+                            relevant_address=None,
+                        ))
+                    except RemoteError as e:
+                        raise InputError(f'{self.evm_inquirer.chain_name} hash {tx_hash.hex()} does not correspond to a transaction. {e}') from e  # noqa: E501
+
+            for tx, receipt in transactions:
+                new_events, new_refresh_balances = self._get_or_decode_transaction_events(
+                    transaction=tx,
+                    tx_receipt=receipt,
+                    ignore_cache=ignore_cache,
+                )
+                events.extend(new_events)
+                if new_refresh_balances is True:
+                    refresh_balances = True
+
+            gevent.sleep(0)  # let other greenlets (e.g. api requests) run between chunks
+
+        return events, refresh_balances
+
     def _get_or_decode_transaction_events(
             self,
             transaction: EvmTransaction,
@@ -600,23 +681,16 @@ class EVMTransactionDecoder(ABC):
     ) -> tuple[list['EvmEvent'], bool]:
         """
         Get a transaction's events if existing in the DB or decode them.
+        If ignore_cache is True the transaction is always decoded again and its previously
+        decoded events are replaced.
         Returns the list of decoded events and a flag which is True if balances refresh is needed.
         """
-        with self.database.conn.read_ctx() as cursor:
-            tx_id = transaction.get_or_query_db_id(cursor)
-        if ignore_cache is True:  # delete all decoded events
-            with self.database.user_write() as write_cursor:
-                self.dbevents.delete_events_by_tx_hash(
-                    write_cursor=write_cursor,
-                    tx_hashes=[transaction.tx_hash],
-                    chain_id=self.evm_inquirer.chain_id,
-                )
-                write_cursor.execute(
-                    'DELETE from evm_tx_mappings WHERE tx_id=? AND value=?',
-                    (tx_id, HISTORY_MAPPING_STATE_DECODED),
-                )
-        else:  # see if events are already decoded and return them
+        if ignore_cache is False:  # see if events are already decoded and return them
+            if self.decoding_session is not None and (events := self.decoding_session.get_pending_events(transaction.tx_hash)) is not None:  # noqa: E501
+                return events, False
+
             with self.database.conn.read_ctx() as cursor:
+                tx_id = transaction.get_or_query_db_id(cursor)
                 cursor.execute(
                     'SELECT COUNT(*) from evm_tx_mappings WHERE tx_id=? AND value=?',
                     (tx_id, HISTORY_MAPPING_STATE_DECODED),
@@ -632,7 +706,11 @@ class EVMTransactionDecoder(ABC):
                     return events, False
 
         # else we should decode now
-        return self._decode_transaction(transaction=transaction, tx_receipt=tx_receipt)
+        return self._decode_transaction(
+            transaction=transaction,
+            tx_receipt=tx_receipt,
+            redecoded=ignore_cache,
+        )
 
     def _maybe_decode_internal_transactions(
             self,
@@ -705,6 +783,7 @@ class EVMTransactionDecoder(ABC):
             counterparty=counterparty,
         )
 
+    @event_rule_filter(ERC20_APPROVE)
     def _maybe_decode_erc20_approve(
             self,
             token: EvmToken | None,
@@ -833,6 +912,7 @@ class EVMTransactionDecoder(ABC):
             events.append(eth_event)
         return events
 
+    @event_rule_filter(ERC20_OR_ERC721_TRANSFER)
     def _maybe_decode_erc20_721_transfer(
             self,
             token: EvmToken | None,
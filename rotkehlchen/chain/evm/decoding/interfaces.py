@@ -80,7 +80,8 @@ class DecoderInterface(ABC):
     def decoding_rules(self) -> list[Callable]:
         """
         Subclasses may implement this to add new generic decoding rules to be attempted
-        by the decoding process
+        by the decoding process. Rules that only decode specific log topics should declare
+        them with event_rule_filter so that they are not called for every log.
         """
         return []
 
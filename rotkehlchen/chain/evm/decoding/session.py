@@ -0,0 +1,146 @@
+import logging
+import time
+from types import TracebackType
+from typing import TYPE_CHECKING, Final
+
+from rotkehlchen.accounting.structures.types import ActionType
+from rotkehlchen.db.constants import HISTORY_MAPPING_STATE_DECODED
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+    from rotkehlchen.db.history_events import DBHistoryEvents
+    from rotkehlchen.history.events.structures.evm_event import EvmEvent
+    from rotkehlchen.types import EVM_CHAIN_IDS_WITH_TRANSACTIONS_TYPE, EvmTransaction, EVMTxHash
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+SESSION_MAX_TRANSACTIONS: Final = 100
+SESSION_MAX_MILLISECONDS: Final = 2000
+
+
+class DecodingSession:
+    """Accumulates the results of decoded transactions and writes them to the DB together
+
+    Writing each decoded transaction in its own write transaction makes bulk decoding
+    spend most of its time committing. The session keeps the decoded events, the
+    transactions to mark as decoded and the action ids to ignore and writes them all in
+    a single write transaction once max_transactions have been added or max_milliseconds
+    have passed since the first pending one. Until then the pending results can be
+    queried with get_pending_events so that a transaction is not decoded twice.
+
+    The previously decoded events of redecoded transactions are deleted in the same
+    write transaction that stores their new events.
+    """
+
+    def __init__(
+            self,
+            database: 'DBHandler',
+            dbevents: 'DBHistoryEvents',
+            chain_id: 'EVM_CHAIN_IDS_WITH_TRANSACTIONS_TYPE',
+            max_transactions: int = SESSION_MAX_TRANSACTIONS,
+            max_milliseconds: int = SESSION_MAX_MILLISECONDS,
+    ) -> None:
+        self.database = database
+        self.dbevents = dbevents
+        self.chain_id = chain_id
+        self.max_transactions = max_transactions
+        self.max_milliseconds = max_milliseconds
+        self.pending: dict[EVMTxHash, tuple[EvmTransaction, list[EvmEvent], bool]] = {}
+        self.first_pending_at: float | None = None
+
+    def __enter__(self) -> 'DecodingSession':
+        return self
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None,
+    ) -> None:
+        """Write whatever is pending even on error, same as if each transaction was
+        written right after being decoded"""
+        self.flush()
+
+    def add(
+            self,
+            transaction: 'EvmTransaction',
+            events: list['EvmEvent'],
+            redecoded: bool = False,
+    ) -> None:
+        """Add the decoded events of a transaction. If redecoded is True its previously
+        decoded events are deleted when writing. Flushes if any of the limits is hit"""
+        if self.first_pending_at is None:
+            self.first_pending_at = time.monotonic()
+        if (previous := self.pending.get(transaction.tx_hash)) is not None:
+            redecoded = redecoded or previous[2]  # the old events are still in the DB
+        self.pending[transaction.tx_hash] = (transaction, events, redecoded)
+        if (
+            len(self.pending) >= self.max_transactions or
+            (time.monotonic() - self.first_pending_at) * 1000 >= self.max_milliseconds
+        ):
+            self.flush()
+
+    def get_pending_events(self, tx_hash: 'EVMTxHash') -> list['EvmEvent'] | None:
+        """Returns the decoded events of the transaction if it is waiting to be written"""
+        if (entry := self.pending.get(tx_hash)) is None:
+            return None
+        return entry[1]
+
+    def flush(self) -> None:
+        """Write all the pending decoding results to the DB in a single write transaction"""
+        if len(self.pending) == 0:
+            return
+
+        # detach the pending results first so that any addition from another greenlet
+        # while writing goes to the next flush
+        pending, self.pending, self.first_pending_at = self.pending, {}, None
+        ignored_bindings, mapping_bindings = [], []
+        redecoded_hashes = [tx_hash for tx_hash, entry in pending.items() if entry[2] is True]
+        with self.database.user_write() as write_cursor:
+            if len(redecoded_hashes) != 0:
+                self._delete_decoded_events(write_cursor=write_cursor, tx_hashes=redecoded_hashes)
+
+            for transaction, events, _ in pending.values():
+                if len(events) > 0:
+                    self.dbevents.add_history_events(write_cursor=write_cursor, history=events)
+                else:
+                    # This is probably a phishing zero value token transfer tx.
+                    # Details here: https://github.com/rotki/rotki/issues/5749
+                    ignored_bindings.append(
+                        (ActionType.HISTORY_EVENT.serialize_for_db(), transaction.identifier),
+                    )
+                mapping_bindings.append(
+                    (transaction.get_or_query_db_id(write_cursor), HISTORY_MAPPING_STATE_DECODED),
+                )
+
+            write_cursor.executemany(  # we don't care if they are already in the DB
+                'INSERT OR IGNORE INTO ignored_actions(type, identifier) VALUES(?, ?)',
+                ignored_bindings,
+            )
+            write_cursor.executemany(
+                'INSERT OR IGNORE INTO evm_tx_mappings(tx_id, value) VALUES(?, ?)',
+                mapping_bindings,
+            )
+
+        log.debug(f'Wrote the decoded events of {len(pending)} transactions to the DB')
+
+    def _delete_decoded_events(
+            self,
+            write_cursor: 'DBCursor',
+            tx_hashes: list['EVMTxHash'],
+    ) -> None:
+        """Delete the non-customized decoded events and the decoded state of the given
+        transactions"""
+        self.dbevents.delete_events_by_tx_hash(
+            write_cursor=write_cursor,
+            tx_hashes=tx_hashes,
+            chain_id=self.chain_id,
+        )
+        write_cursor.execute(
+            f'DELETE FROM evm_tx_mappings WHERE value=? AND tx_id IN (SELECT identifier '
+            f'FROM evm_transactions WHERE chain_id=? AND tx_hash IN ({",".join(["?"] * len(tx_hashes))}))',  # noqa: E501
+            (HISTORY_MAPPING_STATE_DECODED, self.chain_id.serialize_for_db(), *tx_hashes),
+        )
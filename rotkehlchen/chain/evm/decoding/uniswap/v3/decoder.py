@@ -30,6 +30,7 @@ from rotkehlchen.chain.evm.decoding.uniswap.v3.constants import (
     INCREASE_LIQUIDITY_SIGNATURE,
     SWAP_SIGNATURE,
 )
+from rotkehlchen.chain.evm.decoding.utils import event_rule_filter
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog, SwapData
 from rotkehlchen.constants import ONE, ZERO
 from rotkehlchen.constants.resolver import evm_address_to_identifier
@@ -176,6 +177,7 @@ class Uniswapv3CommonDecoder(DecoderInterface):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @event_rule_filter(SWAP_SIGNATURE)
     def _maybe_decode_v3_swap(
             self,
             token: EvmToken | None,  # pylint: disable=unused-argument
@@ -1,5 +1,5 @@
-from collections.abc import Sequence
-from typing import TYPE_CHECKING, Optional
+from collections.abc import Callable, Collection, Sequence
+from typing import TYPE_CHECKING, Any, Optional, TypeVar
 
 from rotkehlchen.assets.asset import AssetWithSymbol
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
@@ -11,6 +11,32 @@ if TYPE_CHECKING:
     from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
     from rotkehlchen.history.events.structures.evm_event import EvmEvent
 
+T = TypeVar('T', bound=Callable[..., Any])
+
+# Event rule functions that declared which logs they decode via event_rule_filter.
+# Maps each function to its topic0 values and optionally the addresses emitting the log.
+EVENT_RULE_FILTERS: dict[Callable, tuple[frozenset[bytes], frozenset[ChecksumEvmAddress] | None]] = {}  # noqa: E501
+
+
+def event_rule_filter(
+        *topics: bytes,
+        addresses: Collection[ChecksumEvmAddress] | None = None,
+) -> Callable[[T], T]:
+    """Decorator for event rules that only decode logs with the given topic0 and
+    optionally emitted by one of the given addresses.
+
+    The decoder uses it to only call the rule for the logs that match. The rule
+    should still do its own checks. Rules without it are called for every log.
+    """
+    def decorator(func: T) -> T:
+        EVENT_RULE_FILTERS[func] = (
+            frozenset(topics),
+            None if addresses is None else frozenset(addresses),
+        )
+        return func
+
+    return decorator
+
 
 def maybe_reshuffle_events(
         ordered_events: Sequence[Optional['EvmEvent']],
@@ -1,6 +1,5 @@
 import json
 import logging
-import random
 from abc import ABC, abstractmethod
 from collections.abc import Callable, Sequence
 from contextlib import suppress
@@ -17,6 +16,8 @@ from web3 import HTTPProvider, Web3
 from web3._utils.abi import get_abi_output_types
 from web3._utils.contracts import find_matching_event_abi
 from web3._utils.filters import construct_event_filter_params
+from web3._utils.method_formatters import receipt_formatter
+from web3._utils.request import make_post_request
 from web3.datastructures import MutableAttributeDict
 from web3.exceptions import TransactionNotFound, Web3Exception
 from web3.middleware import geth_poa_middleware
@@ -26,6 +27,7 @@ from rotkehlchen.assets.asset import CryptoAsset
 from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_TIMEOUT
 from rotkehlchen.chain.ethereum.utils import MULTICALL_CHUNKS, should_update_protocol_cache
 from rotkehlchen.chain.evm.constants import (
+    DEFAULT_RPC_BATCH_SIZE,
     DEFAULT_TOKEN_DECIMALS,
     ERC20_PROPERTIES,
     ERC20_PROPERTIES_NUM,
@@ -34,6 +36,7 @@ from rotkehlchen.chain.evm.constants import (
     GENESIS_HASH,
 )
 from rotkehlchen.chain.evm.contracts import EvmContract, EvmContracts
+from rotkehlchen.chain.evm.nodes import NodesStats
 from rotkehlchen.chain.evm.proxies_inquirer import EvmProxiesInquirer
 from rotkehlchen.chain.evm.types import NodeName, Web3Node, WeightedNode
 from rotkehlchen.constants import ONE
@@ -66,6 +69,7 @@ from rotkehlchen.types import (
     EVMTxHash,
     Timestamp,
 )
+from rotkehlchen.utils.concurrency import single_flight
 from rotkehlchen.utils.data_structures import LRUCacheWithRemove
 from rotkehlchen.utils.misc import from_wei, get_chunks, hex_or_bytes_to_str
 from rotkehlchen.utils.mixins.lockable import LockableQueryMixIn, protect_with_lock
@@ -187,6 +191,7 @@ class EvmNodeInquirer(ABC):
     """
     methods_that_query_past_data = (
         '_get_transaction_receipt',
+        '_get_transaction_receipts',
         '_get_transaction_by_hash',
         '_get_logs',
     )
@@ -221,6 +226,7 @@ class EvmNodeInquirer(ABC):
         self.contract_scan = contract_scan
         # Multicall from MakerDAO: https://github.com/makerdao/multicall/
         self.contract_multicall = contract_multicall
+        self.nodes_stats = NodesStats()
 
         # A cache for erc20 and erc721 contract info to not requery the info
         self.contract_info_erc20_cache: LRUCacheWithRemove[ChecksumEvmAddress, dict[str, Any]] = LRUCacheWithRemove(maxsize=1024)  # noqa: E501
@@ -266,7 +272,8 @@ class EvmNodeInquirer(ABC):
         """Default call order for evm nodes
 
         Own node always has preference. Then all other node types are randomly queried
-        in sequence depending on a weighted probability.
+        in sequence depending on a weighted probability. The weight configured by the
+        user is lowered for nodes that fail, get rate limited or are slow. See NodesStats.
 
 
         Some benchmarks on weighted probability based random selection when compared
@@ -286,13 +293,7 @@ class EvmNodeInquirer(ABC):
         else:
             selection = [wnode for wnode in open_nodes if wnode.node_info.owned is False]
 
-        ordered_list = []
-        while len(selection) != 0:
-            weights = [float(entry.weight) for entry in selection]
-            node = random.choices(selection, weights, k=1)
-            ordered_list.append(node[0])
-            selection.remove(node[0])
-
+        ordered_list = self.nodes_stats.order(selection)
         owned_nodes = [node for node in self.web3_mapping if node.owned]
         if len(owned_nodes) != 0:
             # Assigning one is just a default since we always use it.
@@ -301,6 +302,22 @@ class EvmNodeInquirer(ABC):
             ordered_list = [WeightedNode(node_info=node, weight=ONE, active=True) for node in owned_nodes] + ordered_list  # noqa: E501
         return ordered_list
 
+    def serialize_node_stats(
+            self,
+            node: WeightedNode,
+            nodes: Sequence[WeightedNode],
+    ) -> dict[str, Any]:
+        """Serialize the statistics and capabilities of one of the given nodes of the chain"""
+        result = self.nodes_stats.serialize(
+            node=node.node_info,
+            nodes=[x for x in nodes if x.active and x.node_info.owned is False],
+        )
+        web3node = self.web3_mapping.get(node.node_info)
+        result['connected'] = web3node is not None or node.node_info.name == self.etherscan_node_name  # noqa: E501
+        result['pruned'] = None if web3node is None else web3node.is_pruned
+        result['archive'] = None if web3node is None else web3node.is_archive
+        return result
+
     def get_multi_balance(
             self,
             accounts: Sequence[ChecksumEvmAddress],
@@ -503,11 +520,28 @@ class EvmNodeInquirer(ABC):
                 connectivity_check=True,
             )
 
-    def _query(self, method: Callable, call_order: Sequence[WeightedNode], **kwargs: Any) -> Any:
+    @single_flight(argument_keys={
+        'call_order': lambda call_order: sorted(x.node_info.name for x in call_order),
+    })
+    def _query(
+            self,
+            method: Callable,
+            call_order: Sequence[WeightedNode],
+            calls: int = 1,
+            **kwargs: Any,
+    ) -> Any:
         """Queries evm related data by performing a query of the provided method to all given nodes
 
         The first node in the call order that gets a successful response returns.
         If none get a result then RemoteError is raised
+
+        calls is the number of calls that the method makes in a single request to the
+        node for batch requests. They count as that many queries for the rate limit of
+        the node but their latency is not added to the node stats.
+
+        Identical queries to the same nodes that run at the same time are made only once,
+        whatever the order of the nodes, and their result is shared. Queries that skip
+        some nodes, like etherscan, are not merged with queries to all of them.
         """
         for weighted_node in call_order:
             node_info = weighted_node.node_info
@@ -522,10 +556,14 @@ class EvmNodeInquirer(ABC):
             ):
                 continue
 
+            if web3node is not None:  # etherscan limits its own queries
+                self.nodes_stats.acquire(node_info, calls=calls)
+            started_at = self.nodes_stats.clock()
             try:
                 web3 = web3node.web3_instance if web3node is not None else None
                 result = method(web3, **kwargs)
             except TransactionNotFound:
+                self.nodes_stats.add_success(node_info, started_at, calls=calls)  # the node did respond  # noqa: E501
                 if kwargs.get('must_exist', False) is True:
                     continue  # try other nodes, as transaction has to exist
                 return None
@@ -537,9 +575,11 @@ class EvmNodeInquirer(ABC):
                     ValueError,  # not removing yet due to possibility of raising from missing trie error  # noqa: E501
             ) as e:
                 log.warning(f'Failed to query {node_info} for {method!s} due to {e!s}')
+                self.nodes_stats.add_failure(node_info, e)
                 # Catch all possible errors here and just try next node call
                 continue
 
+            self.nodes_stats.add_success(node_info, started_at, calls=calls)
             return result
 
         # no node in the call order list was succesfully queried
@@ -801,6 +841,123 @@ class EvmNodeInquirer(ABC):
             raise RemoteError(f'{self.chain_name} tx_receipt should exist for {tx_hash.hex()}')
         return tx_receipt
 
+    def _batch_request(
+            self,
+            web3: Web3,
+            method: str,
+            params_list: Sequence[list[Any]],
+    ) -> list[Any]:
+        """Sends the calls of the method with each of the params in a single JSON-RPC batch
+        request to the node. Returns the result of each call in the same order. The results
+        of calls that failed are None.
+
+        May raise:
+        - RemoteError if the node does not respond with a result for each call, for example
+        if it does not support batch requests
+        - requests.exceptions.RequestException if there is a problem with the request
+        """
+        provider = web3.provider
+        if not isinstance(provider, HTTPProvider):
+            raise RemoteError(f'{self.chain_name} node at {provider} does not support batch requests')  # noqa: E501
+
+        raw_response = make_post_request(
+            provider.endpoint_uri,  # type: ignore[arg-type]  # always set by _init_web3
+            json.dumps([
+                {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': idx}
+                for idx, params in enumerate(params_list)
+            ]).encode(),
+            **provider.get_request_kwargs(),
+        )
+        try:
+            responses = json.loads(raw_response)
+        except json.JSONDecodeError as e:
+            raise RemoteError(
+                f'Invalid response to a batch request to {self.chain_name} node at '
+                f'{provider.endpoint_uri}: {raw_response[:200]!r}',
+            ) from e
+
+        if not isinstance(responses, list):  # a single error if batches are not supported
+            raise RemoteError(
+                f'{self.chain_name} node at {provider.endpoint_uri} did not respond to a '
+                f'batch request with a list: {raw_response[:200]!r}',
+            )
+
+        results: list[Any] = [None] * len(params_list)
+        for response in responses:  # the responses may come in any order
+            if (
+                not isinstance(response, dict) or
+                not isinstance(call_id := response.get('id'), int) or
+                not 0 <= call_id < len(params_list)
+            ):
+                log.debug(f'Ignoring unexpected response {response} to a {method} batch request to {provider.endpoint_uri}')  # noqa: E501
+            elif (error := response.get('error')) is not None or 'result' not in response:
+                log.debug(f'{method} call {call_id} of a batch request to {provider.endpoint_uri} failed with {error}')  # noqa: E501
+            else:
+                results[call_id] = response['result']
+
+        return results
+
+    def _get_transaction_receipts(
+            self,
+            web3: Web3 | None,
+            tx_hashes: Sequence[EVMTxHash],
+    ) -> dict[EVMTxHash, dict[str, Any]]:
+        """Returns the receipts of the given transactions that the node has. Etherscan has
+        no batch requests so they are queried from it one by one."""
+        receipts = {}
+        if web3 is None:
+            for tx_hash in tx_hashes:
+                if (tx_receipt := self._get_transaction_receipt(web3=None, tx_hash=tx_hash)) is not None:  # noqa: E501
+                    receipts[tx_hash] = tx_receipt
+            return receipts
+
+        results = self._batch_request(
+            web3=web3,
+            method='eth_getTransactionReceipt',
+            params_list=[[tx_hash.hex()] for tx_hash in tx_hashes],
+        )
+        for tx_hash, result in zip(tx_hashes, results, strict=True):
+            if tx_hash == GENESIS_HASH:
+                receipts[tx_hash] = FAKE_GENESIS_TX_RECEIPT
+            elif result is not None:
+                receipts[tx_hash] = process_result(receipt_formatter(result))
+
+        return receipts
+
+    def get_transaction_receipts(
+            self,
+            tx_hashes: Sequence[EVMTxHash],
+            call_order: Sequence[WeightedNode] | None = None,
+            batch_size: int = DEFAULT_RPC_BATCH_SIZE,
+    ) -> dict[EVMTxHash, dict[str, Any]]:
+        """Retrieves the receipts of the given transactions, which are assumed to exist.
+
+        Rpc nodes are sent batch_size receipt calls per request instead of one request per
+        receipt. The receipts that the node of a batch didn't return, for example if it's
+        missing them, are queried one by one from all nodes. Receipts that could not be
+        retrieved at all are not in the result.
+        """
+        call_order = call_order if call_order is not None else self.default_call_order()
+        receipts: dict[EVMTxHash, dict[str, Any]] = {}
+        for chunk in get_chunks(tx_hashes, n=batch_size):
+            with suppress(RemoteError):  # the receipts are queried one by one below
+                receipts.update(self._query(
+                    method=self._get_transaction_receipts,
+                    call_order=call_order,
+                    calls=len(chunk),
+                    tx_hashes=chunk,
+                ))
+
+            for tx_hash in chunk:
+                if tx_hash in receipts:
+                    continue
+                try:
+                    receipts[tx_hash] = self.get_transaction_receipt(tx_hash=tx_hash, call_order=call_order)  # noqa: E501
+                except RemoteError as e:
+                    log.warning(f'Failed to query {self.chain_name} receipt of {tx_hash.hex()} due to {e!s}')  # noqa: E501
+
+        return receipts
+
     def _get_transaction_by_hash(
             self,
             web3: Web3 | None,
@@ -1,8 +1,32 @@
-from typing import TYPE_CHECKING
+import random
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Final
+
+import gevent
+import requests
+
+from rotkehlchen.utils.network import TokenBucket
 
 if TYPE_CHECKING:
+    from rotkehlchen.chain.evm.types import NodeName, WeightedNode
     from rotkehlchen.db.drivers.gevent import DBCursor
 
+NODE_LATENCY_ALPHA: Final = 0.2  # weight of the latest query in the moving average of latency
+NODE_ERROR_ALPHA: Final = 0.25  # weight of the latest query in the moving average of errors
+NODE_RATE_LIMIT_COOLDOWN: Final = 60  # seconds that a rate limited node is penalized
+NODE_RATE_LIMIT_PENALTY: Final = 0.1
+# lowest health of a node, so that penalized nodes are still queried first once in a while
+# and can recover if they are working well again
+NODE_MIN_HEALTH: Final = 0.02
+NODE_EXPLORATION_RATE: Final = 0.05  # chance of ordering only by the configured weights
+# queries per second to each node that is not owned by the user. Lowered for nodes
+# that rate limit us until they stop doing so.
+NODE_QUERIES_PER_SECOND: Final = 10
+RATE_LIMIT_MESSAGES: Final = ('rate limit', 'too many requests')
+
 
 def populate_rpc_nodes_in_database(
         db_write_cursor: 'DBCursor',
@@ -21,3 +45,165 @@ def populate_rpc_nodes_in_database(
         'VALUES (?, ?, ?, ?, ?, ?)',
         nodes,
     )
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether the error of a query to a node means that we got rate limited"""
+    if (
+        isinstance(error, requests.exceptions.HTTPError) and
+        error.response is not None and
+        error.response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    ):
+        return True
+
+    message = str(error).lower()
+    return any(x in message for x in RATE_LIMIT_MESSAGES)
+
+
+@dataclass
+class NodeStats:
+    """Rolling statistics of the queries to a node"""
+    latency: float | None = None  # moving average in seconds. None until a query succeeds
+    error_rate: float = 0  # moving average of the failed queries
+    queries: int = 0
+    failures: int = 0
+    last_rate_limited: float | None = None  # clock time of the last rate limit
+
+    def add_success(self, latency: float | None) -> None:
+        self.queries += 1
+        self.error_rate *= 1 - NODE_ERROR_ALPHA
+        if latency is None:
+            return
+
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += NODE_LATENCY_ALPHA * (latency - self.latency)
+
+    def add_failure(self, rate_limited_at: float | None) -> None:
+        self.queries += 1
+        self.failures += 1
+        self.error_rate += NODE_ERROR_ALPHA * (1 - self.error_rate)
+        if rate_limited_at is not None:
+            self.last_rate_limited = rate_limited_at
+
+
+class NodesStats:
+    """Statistics of the nodes of a chain, from which the order to query them is computed
+
+    It also keeps the rate limiter of each node that is not owned by the user, so that
+    all greenlets querying the nodes stay within the limits of each node.
+
+    The clock, the sleep function and the random number generator can be given so that
+    the order is deterministic in tests.
+    """
+
+    def __init__(
+            self,
+            clock: Callable[[], float] = time.monotonic,
+            rng: random.Random | None = None,
+            sleep: Callable[[float], Any] = gevent.sleep,
+    ) -> None:
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng if rng is not None else random.Random()
+        self.stats: dict['NodeName', NodeStats] = {}
+        self.buckets: dict['NodeName', TokenBucket] = {}
+
+    def acquire(self, node: 'NodeName', calls: int = 1) -> None:
+        """Wait until the node can be queried with the given number of calls, which are
+        more than one for batch requests, without exceeding its rate limit"""
+        if node.owned is True:
+            return  # the user controls the limits of their own nodes
+
+        if (bucket := self.buckets.get(node)) is None:
+            bucket = self.buckets[node] = TokenBucket(
+                rate=NODE_QUERIES_PER_SECOND,
+                clock=self.clock,
+                sleep=self.sleep,
+            )
+        bucket.acquire(tokens=calls)
+
+    def add_success(self, node: 'NodeName', started_at: float, calls: int = 1) -> None:
+        """Add a query to the node that started at the given clock time and succeeded.
+        The latency of a batch request of many calls is not comparable to the latency of
+        a single call, so for those only the success is added."""
+        self.stats.setdefault(node, NodeStats()).add_success(
+            latency=self.clock() - started_at if calls == 1 else None,
+        )
+        if (bucket := self.buckets.get(node)) is not None:
+            bucket.succeeded()
+
+    def add_failure(self, node: 'NodeName', error: Exception) -> None:
+        rate_limited = is_rate_limit_error(error)
+        self.stats.setdefault(node, NodeStats()).add_failure(
+            rate_limited_at=self.clock() if rate_limited else None,
+        )
+        if rate_limited and (bucket := self.buckets.get(node)) is not None:
+            bucket.rate_limited()
+
+    def health(self, node: 'NodeName', fastest_latency: float | None) -> float:
+        """Returns how well the node is working from 1 down to NODE_MIN_HEALTH. Nodes
+        that were never queried are assumed to be working well until proven otherwise.
+
+        It is lower for nodes that fail more, were rate limited recently and are slower
+        than the fastest of the nodes that are ordered.
+        """
+        if (stats := self.stats.get(node)) is None:
+            return 1
+
+        health = 1 - stats.error_rate
+        if (
+            stats.last_rate_limited is not None and
+            self.clock() - stats.last_rate_limited < NODE_RATE_LIMIT_COOLDOWN
+        ):
+            health *= NODE_RATE_LIMIT_PENALTY
+        if fastest_latency is not None and stats.latency is not None and stats.latency > 0:
+            health *= fastest_latency / stats.latency
+
+        return max(health, NODE_MIN_HEALTH)
+
+    def _fastest_latency(self, nodes: Sequence['WeightedNode']) -> float | None:
+        latencies = [
+            stats.latency for node in nodes
+            if (stats := self.stats.get(node.node_info)) is not None and stats.latency is not None
+        ]
+        return min(latencies) if len(latencies) != 0 else None
+
+    def order(self, nodes: Sequence['WeightedNode']) -> list['WeightedNode']:
+        """Returns the nodes in the order to query them. Randomly picked in sequence with
+        a probability of their configured weight times their health.
+
+        Once in a while the health is ignored, so that nodes that got penalized get
+        queried first again and their statistics show if they work well again.
+        """
+        selection = list(nodes)
+        if self.rng.random() < NODE_EXPLORATION_RATE:
+            healths = [1.0] * len(selection)
+        else:
+            fastest_latency = self._fastest_latency(selection)
+            healths = [self.health(x.node_info, fastest_latency) for x in selection]
+
+        weights = [float(node.weight) * health for node, health in zip(selection, healths, strict=True)]  # noqa: E501
+        ordered_list = []
+        while len(selection) != 0:
+            idx = self.rng.choices(range(len(selection)), weights, k=1)[0]
+            ordered_list.append(selection.pop(idx))
+            weights.pop(idx)
+
+        return ordered_list
+
+    def serialize(self, node: 'NodeName', nodes: Sequence['WeightedNode']) -> dict[str, Any]:
+        """Serialize the statistics of the node. Its health is relative to the given nodes."""
+        stats = self.stats.get(node, NodeStats())
+        last_rate_limited = None
+        if stats.last_rate_limited is not None:
+            last_rate_limited = round(self.clock() - stats.last_rate_limited)
+        return {
+            'health': round(self.health(node, self._fastest_latency(nodes)), 4),
+            'latency_ms': None if stats.latency is None else round(stats.latency * 1000, 2),
+            'error_rate': round(stats.error_rate, 4),
+            'queries': stats.queries,
+            'failures': stats.failures,
+            'seconds_since_rate_limited': last_rate_limited,
+        }
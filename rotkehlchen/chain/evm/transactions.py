@@ -1,4 +1,5 @@
 import logging
+import time
 from abc import ABC
 from collections import defaultdict
 from collections.abc import Iterator, Sequence
@@ -6,10 +7,15 @@ from contextlib import contextmanager
 from typing import TYPE_CHECKING, Any, Optional
 
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 
 from rotkehlchen.api.websockets.typedefs import TransactionStatusStep, WSMessageType
 from rotkehlchen.assets.asset import EvmToken
-from rotkehlchen.chain.evm.constants import GENESIS_HASH
+from rotkehlchen.chain.evm.constants import (
+    DEFAULT_RPC_BATCH_SIZE,
+    GENESIS_HASH,
+    RECEIPTS_QUERY_CONCURRENCY,
+)
 from rotkehlchen.chain.evm.decoding.constants import ERC20_OR_ERC721_TRANSFER
 from rotkehlchen.chain.evm.types import EvmAccount
 from rotkehlchen.chain.structures import TimestampOrBlockRange
@@ -33,7 +39,7 @@ from rotkehlchen.types import (
     Timestamp,
 )
 from rotkehlchen.utils.hexbytes import hexstring_to_bytes
-from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.misc import get_chunks, ts_now
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.evm.node_inquirer import EvmNodeInquirer
@@ -709,6 +715,11 @@ class EvmTransactions(ABC):  # noqa: B024
 
         If the addresses argument is provided then it is used to filter the transactions missing
         their receipt. If it is None then no distinction is made among the transactions.
+
+        The receipts are queried in chunks by RECEIPTS_QUERY_CONCURRENCY greenlets at the same
+        time, while the rate limiters of the nodes and etherscan keep them within their limits.
+        Each chunk is saved as soon as it is queried, so if the task stops it resumes from the
+        transactions still missing their receipt the next time it runs.
         """
         with self.missing_receipts_lock:
             if addresses is None:
@@ -729,19 +740,50 @@ class EvmTransactions(ABC):  # noqa: B024
             if len(hash_results) == 0:
                 return  # nothing to do
 
-            for entry in hash_results:
-                try:
-                    tx_receipt_data = self.evm_inquirer.get_transaction_receipt(tx_hash=entry)
-                except RemoteError as e:
-                    log.warning(f'Failed to query information for {self.evm_inquirer.chain_name} transaction {entry.hex()} due to {e!s}. Skipping...')  # noqa: E501
+            total, processed, started_at = len(hash_results), 0, time.monotonic()
+            self._send_receipts_status(total=total, processed=processed, started_at=started_at)
+            pool = Pool(size=RECEIPTS_QUERY_CONCURRENCY)
+            for chunk_length in pool.imap_unordered(
+                    self._query_and_save_receipts,
+                    get_chunks(hash_results, n=DEFAULT_RPC_BATCH_SIZE),
+            ):
+                processed += chunk_length
+                self._send_receipts_status(total=total, processed=processed, started_at=started_at)
+
+            log.debug(
+                f'Queried {total} {self.evm_inquirer.chain_name} transaction receipts in '
+                f'{time.monotonic() - started_at:.2f} seconds',
+            )
+
+    def _query_and_save_receipts(self, tx_hashes: list[EVMTxHash]) -> int:
+        """Query the receipts of the given transactions and save them in the DB.
+        Returns the number of transactions processed."""
+        receipts = self.evm_inquirer.get_transaction_receipts(tx_hashes=tx_hashes)
+        with self.database.user_write() as write_cursor:
+            for entry in tx_hashes:
+                if (tx_receipt_data := receipts.get(entry)) is None:
+                    log.warning(f'Failed to query information for {self.evm_inquirer.chain_name} transaction {entry.hex()}. Skipping...')  # noqa: E501
                     continue
 
-                with self.database.user_write() as write_cursor:
-                    self.dbevmtx.add_or_ignore_receipt_data(
-                        write_cursor=write_cursor,
-                        chain_id=self.evm_inquirer.chain_id,
-                        data=tx_receipt_data,
-                    )
+                self.dbevmtx.add_or_ignore_receipt_data(
+                    write_cursor=write_cursor,
+                    chain_id=self.evm_inquirer.chain_id,
+                    data=tx_receipt_data,
+                )
+
+        return len(tx_hashes)
+
+    def _send_receipts_status(self, total: int, processed: int, started_at: float) -> None:
+        elapsed = time.monotonic() - started_at
+        self.msg_aggregator.add_message(
+            message_type=WSMessageType.EVM_TRANSACTION_RECEIPTS_STATUS,
+            data={
+                'evm_chain': self.evm_inquirer.chain_name,
+                'total': total,
+                'processed': processed,
+                'receipts_per_second': round(processed / elapsed, 2) if elapsed > 0 else 0,
+            },
+        )
 
     def add_transaction_by_hash(
             self,
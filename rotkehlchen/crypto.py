@@ -1,61 +1,142 @@
 import os
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 from rotkehlchen.errors.misc import UnableToDecryptRemoteData
 
 AES_BLOCK_SIZE = 16
+# Encrypted DBs start with the magic and the format version. Those encrypted before the
+# format was versioned start with a random iv, which matches the magic with negligible odds.
+SYNC_MAGIC = b'ROTKIDB'
+SYNC_FORMAT_VERSION = 1
+SYNC_HEADER = SYNC_MAGIC + bytes([SYNC_FORMAT_VERSION])
+SYNC_SALT_SIZE = 16
+SYNC_CHUNK_SIZE = 64 * 1024  # plaintext bytes encrypted in each chunk
+SYNC_CHUNK_LENGTH_SIZE = 4  # each encrypted chunk is prefixed by its length
+READ_SIZE = 64 * 1024
 
 
-# AES encrypt/decrypt taken from here: https://stackoverflow.com/a/44212550/110395
-# and updated to use cryptography library as pyCrypto is deprecated
-# TODO: Perhaps use Fernet instead of this algorithm in the future? The docs of the
-# cryptography library seem to suggest it's the safest options. Problem is the
-# already encrypted and saved database files and how to handle the previous encryption
-# We need to keep a versioning of encryption used for each file.
-def encrypt(key: bytes, source: bytes) -> bytes:
-    assert isinstance(key, bytes), 'key should be given in bytes'
-    assert isinstance(source, bytes), 'source should be given in bytes'
+def _sha256_key(key: bytes) -> bytes:
     digest = hashes.Hash(hashes.SHA256())
     digest.update(key)
-    key = digest.finalize()  # use SHA-256 over our key to get a proper-sized AES key
-    iv = os.urandom(AES_BLOCK_SIZE)
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-    encryptor = cipher.encryptor()
-    padding = AES_BLOCK_SIZE - len(source) % AES_BLOCK_SIZE  # calculate needed padding
-    source += bytes([padding]) * padding  # Python 2.x: source += chr(padding) * padding
-    # store the iv at the beginning and encrypt
-    data = iv + (encryptor.update(source) + encryptor.finalize())
-    return data
-
-
-def decrypt(key: bytes, source: bytes) -> bytes:
+    return digest.finalize()  # use SHA-256 over our key to get a proper-sized AES key
+
+
+def _chunk_nonce(index: int, final: bool) -> bytes:
+    """The nonce of each chunk is its index and whether it's the last one so that chunks
+    can't be reordered, dropped or the stream truncated without failing authentication"""
+    return index.to_bytes(11, byteorder='big') + bytes([final])
+
+
+def _sync_cipher(key: bytes, salt: bytes) -> AESGCM:
+    """Each stream is encrypted with its own key derived from our key and a random salt"""
+    return AESGCM(HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=SYNC_HEADER,
+    ).derive(key))
+
+
+def encrypt_stream(key: bytes, source: Iterable[bytes]) -> Iterator[bytes]:
+    """Encrypts the data of the given source as it is consumed and yields the encrypted
+    stream in parts, so that the whole data never needs to be in memory.
+
+    The stream starts with a header with the format version and the salt, followed by the
+    data in chunks of SYNC_CHUNK_SIZE, each authenticated and prefixed by its length.
     """
-    Decrypts the given source data we with the given key.
+    assert isinstance(key, bytes), 'key should be given in bytes'
+    salt = os.urandom(SYNC_SALT_SIZE)
+    cipher = _sync_cipher(key, salt)
+    associated_data = SYNC_HEADER + salt
+    yield associated_data
+    buffer, index = bytearray(), 0
+
+    def seal(chunk: bytes, final: bool) -> bytes:
+        encrypted = cipher.encrypt(_chunk_nonce(index, final), chunk, associated_data)
+        return len(encrypted).to_bytes(SYNC_CHUNK_LENGTH_SIZE, byteorder='big') + encrypted
+
+    for data in source:
+        buffer += data
+        while len(buffer) > SYNC_CHUNK_SIZE:  # always keep data for the final chunk
+            yield seal(bytes(buffer[:SYNC_CHUNK_SIZE]), final=False)
+            del buffer[:SYNC_CHUNK_SIZE]
+            index += 1
+
+    yield seal(bytes(buffer), final=True)
+
+
+def decrypt_stream(key: bytes, source: BinaryIO) -> Iterator[bytes]:
+    """Decrypts the encrypted data read from the given source and yields it in parts.
+
+    Data encrypted by versions before the streaming format was introduced, which is
+    a single AES-CBC encrypted blob with no header, can also be decrypted.
 
-    Returns the decrypted data.
     If data can't be decrypted then raises UnableToDecryptRemoteData
     """
     assert isinstance(key, bytes), 'key should be given in bytes'
-    assert isinstance(source, bytes), 'source should be given in bytes'
-    digest = hashes.Hash(hashes.SHA256())
-    digest.update(key)
-    key = digest.finalize()  # use SHA-256 over our key to get a proper-sized AES key
-    iv = source[:AES_BLOCK_SIZE]  # extract the iv from the beginning
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-    decryptor = cipher.decryptor()
-
-    data = source[AES_BLOCK_SIZE:]  # decrypt
-    data = decryptor.update(data)
-    padding = data[-1]  # pick the padding value from the end; Python 2.x: ord(data[-1])
-    if data[-padding:] != bytes([padding]) * padding:  # Python 2.x: chr(padding) * padding
+    header = source.read(len(SYNC_HEADER))
+    if header != SYNC_HEADER:
+        yield from _decrypt_legacy_stream(key=key, source=source, start=header)
+        return
+
+    salt = source.read(SYNC_SALT_SIZE)
+    cipher = _sync_cipher(key, salt)
+    associated_data = header + salt
+    index, length = 0, source.read(SYNC_CHUNK_LENGTH_SIZE)
+    while True:
+        if len(length) != SYNC_CHUNK_LENGTH_SIZE:
+            raise UnableToDecryptRemoteData('The DB data we received from the server is truncated')
+
+        encrypted = source.read(int.from_bytes(length, byteorder='big'))
+        length = source.read(SYNC_CHUNK_LENGTH_SIZE)
+        final = length == b''
+        try:
+            yield cipher.decrypt(_chunk_nonce(index, final), encrypted, associated_data)
+        except InvalidTag as e:
+            raise UnableToDecryptRemoteData(
+                'Could not authenticate the DB data we received from the server. '
+                'Are you using a new user and if yes have you used the same password as before? '
+                'If you have then please open a bug report.',
+            ) from e
+
+        if final:
+            return
+        index += 1
+
+
+# AES decrypt taken from here: https://stackoverflow.com/a/44212550/110395
+# and updated to use cryptography library as pyCrypto is deprecated
+def _decrypt_legacy_stream(key: bytes, source: BinaryIO, start: bytes) -> Iterator[bytes]:
+    """Decrypts AES-CBC data whose first bytes, given in start, have already been read.
+    The last block is held back until the end to remove its padding."""
+    iv = start + source.read(AES_BLOCK_SIZE - len(start))  # the iv is at the beginning
+    decryptor = Cipher(algorithms.AES(_sha256_key(key)), modes.CBC(iv)).decryptor()
+    held_back = b''
+    while block := source.read(READ_SIZE):
+        data = held_back + decryptor.update(block)
+        yield data[:-AES_BLOCK_SIZE]
+        held_back = data[-AES_BLOCK_SIZE:]
+
+    try:
+        data = held_back + decryptor.finalize()
+    except ValueError as e:  # not a multiple of the block size
+        raise UnableToDecryptRemoteData('The DB data we received from the server is truncated') from e  # noqa: E501
+
+    padding = data[-1] if len(data) != 0 else 0  # pick the padding value from the end
+    if not 1 <= padding <= AES_BLOCK_SIZE or data[-padding:] != bytes([padding]) * padding:
         raise UnableToDecryptRemoteData(
             'Invalid padding when decrypting the DB data we received from the server. '
             'Are you using a new user and if yes have you used the same password as before? '
             'If you have then please open a bug report.',
         )
-    return data[:-padding]  # remove the padding
+    yield data[:-padding]  # remove the padding
 
 
 def sha3(data: bytes) -> bytes:
@@ -4,12 +4,13 @@ import logging
 import shutil
 import tempfile
 import zlib
+from collections.abc import Iterator
 from pathlib import Path
 
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.misc import USERDB_NAME, USERSDIR_NAME
-from rotkehlchen.crypto import decrypt, encrypt
+from rotkehlchen.crypto import decrypt_stream, encrypt_stream
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.settings import ModifiableDBSettings
 from rotkehlchen.errors.api import AuthenticationError
@@ -185,57 +186,64 @@ class DataHandler:
 
         return users
 
-    def compress_and_encrypt_db(self) -> tuple[bytes, str]:
+    def compress_and_encrypt_db(self, encrypted_path: Path) -> str:
         """Decrypt the DB, dump in temporary plaintextdb, compress it,
-        and then re-encrypt it
+        and then re-encrypt it to encrypted_path.
 
-        Returns a b64 encoded binary blob"""
-        compressor = zlib.compressobj(level=9)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tempdbfile:
-            tempdbpath = Path(tempdbfile.name)
+        The plaintext DB is read, hashed, compressed and encrypted in chunks
+        so that memory use does not depend on the size of the DB.
+
+        Returns the b64 encoded hash of the plaintext DB"""
+        digest = hashlib.sha256()
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdirname:  # needed on windows, see https://tinyurl.com/tmp-win-err  # noqa: E501
+            tempdbpath = Path(tmpdirname) / 'plaintext.db'
             log.info(f'Compress and encrypt DB at temporary path: {tempdbpath}')
-            tempdbfile.close()  # close the file to allow re-opening by export_unencrypted in windows https://github.com/rotki/rotki/issues/5051  # noqa: E501
             self.db.export_unencrypted(tempdbpath)
-            source_data = bytearray()
-            compressed_data = bytearray()
-            with open(tempdbpath, 'rb') as src_f:
-                block = src_f.read(BUFFERSIZE)
-                while block:
-                    source_data += block
-                    compressed_data += compressor.compress(block)
-                    block = src_f.read(BUFFERSIZE)
-
-                compressed_data += compressor.flush()
-
-        original_data_hash = base64.b64encode(
-            hashlib.sha256(source_data).digest(),
-        ).decode()
-        encrypted_data = encrypt(self.db.password.encode(), bytes(compressed_data))
-        # cleanup temp file to avoid windows problem (https://github.com/rotki/rotki/issues/5051)
-        tempdbpath.unlink()
-        return encrypted_data, original_data_hash
-
-    def decompress_and_decrypt_db(self, encrypted_data: bytes) -> None:
-        """Decrypt and decompress the encrypted data we receive from the server
+
+            def compressed_blocks() -> Iterator[bytes]:
+                compressor = zlib.compressobj(level=9)
+                with open(tempdbpath, 'rb') as src_f:
+                    while block := src_f.read(BUFFERSIZE):
+                        digest.update(block)
+                        yield compressor.compress(block)
+
+                yield compressor.flush()
+
+            with open(encrypted_path, 'wb') as dst_f:
+                for data in encrypt_stream(self.db.password.encode(), compressed_blocks()):
+                    dst_f.write(data)
+
+        return base64.b64encode(digest.digest()).decode()
+
+    def decompress_and_decrypt_db(self, encrypted_path: Path) -> None:
+        """Decrypt and decompress the encrypted DB we received from the server
+        and saved at encrypted_path. Both happen in chunks.
 
         If successful then replace our local Database
 
         May Raise:
-        - UnableToDecryptRemoteData due to decrypt()
+        - UnableToDecryptRemoteData due to decrypt_stream()
         - DBUpgradeError if the rotki DB version is newer than the software or
         there is a DB upgrade and there is an error or if the version is older
         than the one supported.
         - SystemPermissionError if the DB file permissions are not correct
+        - OSError if the backup of the DB that gets replaced can't be written
         """
         log.info('Decompress and decrypt DB')
         # First make a backup of the DB we are about to replace
         date = timestamp_to_date(ts=ts_now(), formatstr='%Y_%m_%d_%H_%M_%S', treat_as_local=True)
-        users_dir = self.data_directory / USERSDIR_NAME
-        shutil.copyfile(
-            users_dir / self.username / USERDB_NAME,
-            users_dir / self.username / f'rotkehlchen_db_{date}.backup',
-        )
+        self.db.backup_db(self.data_directory / USERSDIR_NAME / self.username / f'rotkehlchen_db_{date}.backup')  # noqa: E501
+
+        decompressor = zlib.decompressobj()
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdirname:  # needed on windows, see https://tinyurl.com/tmp-win-err  # noqa: E501
+            tempdbpath = Path(tmpdirname) / 'plaintext.db'
+            with open(encrypted_path, 'rb') as src_f, open(tempdbpath, 'wb') as dst_f:
+                for compressed_data in decrypt_stream(self.db.password.encode(), src_f):
+                    data = compressed_data
+                    while data:  # bound the decompressed size of each write
+                        dst_f.write(decompressor.decompress(data, BUFFERSIZE))
+                        data = decompressor.unconsumed_tail
+
+                dst_f.write(decompressor.flush())
 
-        decrypted_data = decrypt(self.db.password.encode(), encrypted_data)
-        decompressed_data = zlib.decompress(decrypted_data)
-        self.db.import_unencrypted(decompressed_data)
+            self.db.import_unencrypted(tempdbpath)
@@ -21,6 +21,7 @@ class DBCacheStatic(Enum):
     LAST_PRODUCED_BLOCKS_QUERY_TS = 'last_produced_blocks_query_ts'
     LAST_WITHDRAWALS_EXIT_QUERY_TS = 'last_withdrawals_exit_query_ts'
     LAST_MONERIUM_QUERY_TS = 'last_monerium_query_ts'
+    LAST_DB_BACKUP_TS = 'last_db_backup_ts'
 
 
 class LabeledLocationArgsType(TypedDict):
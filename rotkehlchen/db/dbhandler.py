@@ -3,13 +3,14 @@ import logging
 import os
 import re
 import shutil
-import tempfile
 from collections import defaultdict
 from collections.abc import Iterator, Sequence
 from contextlib import contextmanager, suppress
 from pathlib import Path
 from typing import Any, Literal, Optional, Unpack, cast, get_args, overload
+from uuid import uuid4
 
+import gevent
 from gevent.lock import Semaphore
 from pysqlcipher3 import dbapi2 as sqlcipher
 
@@ -68,6 +69,7 @@ from rotkehlchen.db.filtering import (
     TradesFilterQuery,
     UserNotesFilterQuery,
 )
+from rotkehlchen.db.history_events import HistoryEventsCounts
 from rotkehlchen.db.loopring import DBLoopring
 from rotkehlchen.db.misc import detect_sqlcipher_version
 from rotkehlchen.db.schema import DB_SCRIPT_CREATE_TABLES
@@ -169,7 +171,40 @@ TABLES_WITH_ASSETS = (
 )
 
 
-DB_BACKUP_RE = re.compile(r'(\d+)_rotkehlchen_db_v(\d+).backup')
+DB_BACKUP_RE = re.compile(r'(\d+)_rotkehlchen_db_v(\d+)(?:_auto)?.backup')
+AUTOMATIC_DB_BACKUP_GLOB = '*_rotkehlchen_db_v*_auto.backup'
+
+
+def _export_unencrypted(dbpath: Path, key_script: str, temppath: Path) -> None:
+    """Export the encrypted DB at dbpath to the plaintext DB at temppath with a new
+    connection. Runs in a thread of the threadpool."""
+    conn = sqlcipher.connect(str(dbpath))  # pylint: disable=no-member
+    try:
+        conn.executescript(
+            f'{key_script}ATTACH DATABASE "{temppath}" AS plaintext KEY "";'
+            'SELECT sqlcipher_export("plaintext");'
+            'DETACH DATABASE plaintext;',
+        )
+    finally:
+        conn.close()
+
+
+def _backup_db(dbpath: Path, key_script: str, backuppath: Path) -> None:
+    """Write a consistent snapshot of the encrypted DB at dbpath to backuppath, encrypted
+    with the same key, with a new connection. Runs in a thread of the threadpool.
+
+    VACUUM INTO fails if its target exists, so the snapshot is written to a new file next
+    to backuppath that then replaces it. That also means an existing backup at backuppath
+    is only replaced by a complete one."""
+    temppath = backuppath.with_name(f'{backuppath.name}.{uuid4().hex}.tmp')
+    conn = sqlcipher.connect(str(dbpath))  # pylint: disable=no-member
+    try:
+        conn.executescript(key_script)
+        conn.execute('VACUUM INTO ?', (str(temppath),))
+        temppath.replace(backuppath)
+    finally:
+        conn.close()
+        temppath.unlink(missing_ok=True)
 
 
 # https://stackoverflow.com/questions/4814167/storing-time-series-data-relational-or-non
@@ -214,6 +249,7 @@ class DBHandler:
         self.conn_transient: DBConnection = None  # type: ignore
         # Lock to make sure that 2 callers of get_or_create_evm_token do not go in at the same time
         self.get_or_create_evm_token_lock = Semaphore()
+        self.history_events_counts = HistoryEventsCounts()
         self.password = password
         self._connect()
         self._check_unfinished_upgrades(resume_from_backup=resume_from_backup)
@@ -344,6 +380,7 @@ class DBHandler:
         # run checks on the database
         self.conn.schema_sanity_check()
         self._check_settings()
+        self.history_events_counts.install(self.conn)
 
         # This logic executes only for the transient db
         self._connect(conn_attribute='conn_transient')
@@ -478,10 +515,7 @@ class DBHandler:
                 f'Could not open database file: {fullpath}. Permission errors?',
             ) from e
 
-        password_for_sqlcipher = protect_password_sqlcipher(self.password)
-        script = f'PRAGMA key="{password_for_sqlcipher}";'
-        if self.sqlcipher_version == 3:
-            script += f'PRAGMA kdf_iter={KDF_ITER};'
+        script = self._key_script(self.password)
         try:
             conn.executescript(script)
             conn.execute('PRAGMA foreign_keys=ON')
@@ -497,8 +531,16 @@ class DBHandler:
                 'Wrong password or invalid/corrupt database for user',
             ) from e
 
+        conn.enable_readers(setup_script=script)  # so that reads don't go through the writer
         setattr(self, conn_attribute, conn)
 
+    def _key_script(self, password: str) -> str:
+        """Returns the script that unlocks the DB with password in a new connection"""
+        script = f'PRAGMA key="{protect_password_sqlcipher(password)}";'
+        if self.sqlcipher_version == 3:
+            script += f'PRAGMA kdf_iter={KDF_ITER};'
+        return script
+
     def _change_password(
             self,
             new_password: str,
@@ -523,6 +565,9 @@ class DBHandler:
                 f'database: {e!s}',
             )
             return False
+
+        # readers opened with the old key can't read anymore
+        conn.enable_readers(setup_script=self._key_script(new_password))
         return True
 
     def change_password(self, new_password: str) -> bool:
@@ -544,24 +589,18 @@ class DBHandler:
     def export_unencrypted(self, temppath: Path) -> None:
         """Export the unencrypted DB to the temppath as plaintext DB
 
-        The critical section is absolutely needed as a context switch
-        from inside this execute script can result in:
-        1. coming into this code again from another greenlet which can result
-        to DB plaintext already in use
-        2. Having a DB transaction open between the attach and detach and not
-        closed when we detach which will result in DB plaintext locked.
-        """
-        with self.conn.critical_section():
-            # flush the wal file to have up to date information when exporting data
-            self.conn.execute('PRAGMA wal_checkpoint;')
-            self.conn.executescript(
-                f'ATTACH DATABASE "{temppath}" AS plaintext KEY "";'
-                'SELECT sqlcipher_export("plaintext");'
-                'DETACH DATABASE plaintext;',
-            )
+        The export takes long for big DBs so it runs in a thread of the threadpool with
+        a connection of its own. The plaintext DB is attached only to that connection
+        so no other greenlet can use it or keep a transaction open on it, which would
+        leave the plaintext DB locked. Only committed data is exported.
+        """
+        gevent.get_hub().threadpool.apply(
+            _export_unencrypted,
+            (self.user_data_dir / USERDB_NAME, self._key_script(self.password), temppath),
+        )
 
-    def import_unencrypted(self, unencrypted_db_data: bytes) -> None:
-        """Imports an unencrypted DB from raw data
+    def import_unencrypted(self, unencrypted_db_path: Path) -> None:
+        """Imports the unencrypted DB at the given path
 
         May raise:
         - DBUpgradeError if the rotki DB version is newer than the software or
@@ -579,25 +618,19 @@ class DBHandler:
         )
         rdbpath.unlink()
 
-        # dump the unencrypted data into a temporary file
-        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdirname:  # needed on windows, see https://tinyurl.com/tmp-win-err  # noqa: E501
-            tempdbpath = os.path.join(tmpdirname, 'temp.db')
-            with open(tempdbpath, 'wb') as f:
-                f.write(unencrypted_db_data)
-
-            # Now attach to the unencrypted DB and copy it to our DB and encrypt it
-            self.conn = DBConnection(
-                path=tempdbpath,
-                connection_type=DBConnectionType.USER,
-                sql_vm_instructions_cb=self.sql_vm_instructions_cb,
-            )
-            password_for_sqlcipher = protect_password_sqlcipher(self.password)
-            script = f'ATTACH DATABASE "{rdbpath}" AS encrypted KEY "{password_for_sqlcipher}";'
-            if self.sqlcipher_version == 3:
-                script += f'PRAGMA encrypted.kdf_iter={KDF_ITER};'
-            script += 'SELECT sqlcipher_export("encrypted");DETACH DATABASE encrypted;'
-            self.conn.executescript(script)
-            self.disconnect()
+        # Now attach to the unencrypted DB and copy it to our DB and encrypt it
+        self.conn = DBConnection(
+            path=str(unencrypted_db_path),
+            connection_type=DBConnectionType.USER,
+            sql_vm_instructions_cb=self.sql_vm_instructions_cb,
+        )
+        password_for_sqlcipher = protect_password_sqlcipher(self.password)
+        script = f'ATTACH DATABASE "{rdbpath}" AS encrypted KEY "{password_for_sqlcipher}";'
+        if self.sqlcipher_version == 3:
+            script += f'PRAGMA encrypted.kdf_iter={KDF_ITER};'
+        script += 'SELECT sqlcipher_export("encrypted");DETACH DATABASE encrypted;'
+        self.conn.executescript(script)
+        self.disconnect()
 
         try:
             self._connect()
@@ -606,6 +639,7 @@ class DBHandler:
                 f'Permission error when reopening the DB. {e!s}. Should never happen here',
             ) from e
         self._run_actions_after_first_connection()
+        self.invalidate_pnl_checkpoints()  # the imported history can be entirely different
         # all went okay, remove the original temp backup
         (self.user_data_dir / 'rotkehlchen_temp_backup.db').unlink()
 
@@ -626,6 +660,16 @@ class DBHandler:
         with self.conn_transient.write_ctx() as cursor:
             yield cursor
 
+    def invalidate_pnl_checkpoints(self, timestamp: Timestamp | None = None) -> None:
+        """Delete the PnL checkpoints affected by a change of the history at the given
+        timestamp, which are all the checkpoints after it. If no timestamp is given then
+        all of them are deleted."""
+        with self.transient_write() as cursor:
+            if timestamp is None:
+                cursor.execute('DELETE FROM pnl_checkpoints')
+            else:
+                cursor.execute('DELETE FROM pnl_checkpoints WHERE timestamp > ?', (timestamp,))
+
     def get_settings(self, cursor: 'DBCursor', have_premium: bool = False) -> DBSettings:
         """Aggregates settings from DB and from the given args and returns the settings object"""
         cursor.execute('SELECT name, value FROM settings;')
@@ -2141,6 +2185,9 @@ class DBHandler:
             old_trade_id: str,
             trade: Trade,
     ) -> tuple[bool, str]:
+        old_timestamp = write_cursor.execute(
+            'SELECT timestamp FROM trades WHERE id=?', (old_trade_id,),
+        ).fetchone()
         write_cursor.execute(
             'UPDATE trades SET '
             '  id=?, '
@@ -2175,6 +2222,7 @@ class DBHandler:
         if write_cursor.rowcount == 0:
             return False, 'Tried to edit non existing trade id'
 
+        self.invalidate_pnl_checkpoints(min(old_timestamp[0], trade.timestamp))
         return True, ''
 
     def get_trades_and_limit_info(
@@ -2229,6 +2277,11 @@ class DBHandler:
         May raise:
         - InputError if any of the `trade_id` are non-existent.
         """
+        if (timestamp := write_cursor.execute(
+            f'SELECT MIN(timestamp) FROM trades WHERE id IN ({",".join(["?"] * len(trades_ids))})',
+            trades_ids,
+        ).fetchone()[0]) is not None:
+            self.invalidate_pnl_checkpoints(timestamp)
         write_cursor.executemany(
             'DELETE FROM trades WHERE id=?',
             [(trade_id,) for trade_id in trades_ids],
@@ -2300,7 +2353,7 @@ class DBHandler:
             if not include_nfts:
                 with self.conn.read_ctx() as nft_cursor:
                     nft_cursor.execute(
-                        'SELECT timestamp, SUM(usd_value) FROM timed_balances WHERE '
+                        'SELECT timestamp, DECIMAL_SUM(usd_value) FROM timed_balances WHERE '
                         'timestamp >= ? AND currency LIKE ? GROUP BY timestamp',
                         (from_ts, f'{NFT_DIRECTIVE}%'),
                     )
@@ -2443,7 +2496,28 @@ class DBHandler:
         querystr += ' ORDER BY timestamp ASC;'
 
         cursor.execute(querystr, bindings)
-        results = cursor.fetchall()
+        balances = self._process_timed_balances(
+            cursor=cursor,
+            settings=settings,
+            results=cursor.fetchall(),
+            from_ts=from_ts,
+            to_ts=to_ts,
+        )
+        if settings.treat_eth2_as_eth and asset.identifier == 'ETH':
+            return combine_asset_balances(balances)
+
+        return balances
+
+    def _process_timed_balances(
+            self,
+            cursor: 'DBCursor',
+            settings: DBSettings,
+            results: list[Any],
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+    ) -> list[SingleDBAssetBalance]:
+        """Turn the timestamp, amount, usd_value and category rows of timed balances sorted
+        by timestamp into balances, adding the zero balances the settings ask for"""
         balances = []
         results_length = len(results)
         for idx, result in enumerate(results):
@@ -2482,9 +2556,6 @@ class DBHandler:
                 balances.extend(inferred_balances)
                 balances.sort(key=lambda x: x.time)
 
-        if settings.treat_eth2_as_eth and asset.identifier == 'ETH':
-            return combine_asset_balances(balances)
-
         return balances
 
     def query_collection_timed_balances(
@@ -2494,25 +2565,40 @@ class DBHandler:
             from_ts: Timestamp | None = None,
             to_ts: Timestamp | None = None,
     ) -> list[SingleDBAssetBalance]:
-        """Query all balance entries for all assets of a collection within a range of timestamps
+        """Query the balance entries of all assets of a collection within a range of timestamps
+
+        The balances of the assets are summed per timestamp by the DB. Zero balances are
+        added for the collection as a whole, the same way as for a single asset.
         """
+        if from_ts is None:
+            from_ts = Timestamp(0)
+        if to_ts is None:
+            to_ts = ts_now()
+
         with GlobalDBHandler().conn.read_ctx() as global_cursor:
-            global_cursor.execute(
+            assets = [x[0] for x in global_cursor.execute(
                 'SELECT asset FROM multiasset_mappings WHERE collection_id=?',
                 (collection_id,),
-            )
-            asset_balances: list[SingleDBAssetBalance] = []
-            for x in global_cursor:
-                asset_balances.extend(self.query_timed_balances(
-                    cursor=cursor,
-                    asset=Asset(x[0]),
-                    balance_type=BalanceType.ASSET,
-                    from_ts=from_ts,
-                    to_ts=to_ts,
-                ))
+            )]
 
-        asset_balances.sort(key=lambda x: x.time)
-        return combine_asset_balances(asset_balances)
+        settings = self.get_settings(cursor)
+        if settings.treat_eth2_as_eth and A_ETH.identifier in assets and 'ETH2' not in assets:
+            assets.append('ETH2')
+
+        cursor.execute(
+            'SELECT timestamp, DECIMAL_SUM(amount), DECIMAL_SUM(usd_value), category '
+            f'FROM timed_balances WHERE timestamp BETWEEN ? AND ? AND currency IN '
+            f'({",".join(["?"] * len(assets))}) AND category=? '
+            'GROUP BY timestamp ORDER BY timestamp ASC',
+            (from_ts, to_ts, *assets, BalanceType.ASSET.serialize_for_db()),
+        )
+        return self._process_timed_balances(
+            cursor=cursor,
+            settings=settings,
+            results=cursor.fetchall(),
+            from_ts=from_ts,
+            to_ts=to_ts,
+        )
 
     def query_owned_assets(self, cursor: 'DBCursor') -> list[Asset]:
         """Query the DB for a list of all assets ever owned
@@ -3228,20 +3314,66 @@ class DBHandler:
 
         return backups
 
-    def create_db_backup(self) -> Path:
-        """May raise:
+    def backup_db(self, backuppath: Path) -> None:
+        """Write a backup of the DB to backuppath
+
+        Unlike copying the DB file this includes the changes that are still in the WAL
+        file. The backup runs in a thread of the threadpool with a connection of its own
+        that reads a snapshot of the DB, so neither the app nor writes to the DB wait for it.
+
+        May raise:
+        - OSError if the backup can't be written
+        """
+        try:
+            gevent.get_hub().threadpool.apply(
+                _backup_db,
+                (self.user_data_dir / USERDB_NAME, self._key_script(self.password), backuppath),
+            )
+        except sqlcipher.OperationalError as e:  # pylint: disable=no-member
+            raise OSError(f'Could not write the DB backup to {backuppath}: {e!s}') from e
+
+    def create_db_backup(self, automatic: bool = False) -> Path:
+        """Create a backup of the DB in the user directory and return its path.
+        Automatic backups have their own suffix so that only they are rotated.
+
+        May raise:
         - OSError
         """
         with self.conn.read_ctx() as cursor:
             version = self.get_setting(cursor, 'version')
-        new_db_filename = f'{ts_now()}_rotkehlchen_db_v{version}.backup'
-        new_db_path = self.user_data_dir / new_db_filename
-        shutil.copyfile(
-            self.user_data_dir / USERDB_NAME,
-            new_db_path,
-        )
+        suffix = '_auto' if automatic else ''
+        new_db_path = self.user_data_dir / f'{ts_now()}_rotkehlchen_db_v{version}{suffix}.backup'
+        self.backup_db(new_db_path)
         return new_db_path
 
+    def create_automatic_db_backup(self) -> None:
+        """Create an automatic backup of the DB and delete the oldest automatic backups
+        so that only the latest `db_backups_to_keep` of them remain"""
+        with self.user_write() as write_cursor:  # saved first to not retry before next period
+            self.set_static_cache(
+                write_cursor=write_cursor,
+                name=DBCacheStatic.LAST_DB_BACKUP_TS,
+                value=ts_now(),
+            )
+
+        try:
+            backup_path = self.create_db_backup(automatic=True)
+        except OSError as e:
+            self.msg_aggregator.add_error(f'Failed to create an automatic DB backup due to {e!s}')
+            return
+
+        log.debug(f'Created automatic DB backup at {backup_path}')
+        backups = sorted(
+            self.user_data_dir.glob(AUTOMATIC_DB_BACKUP_GLOB),
+            key=lambda x: int(x.name.split('_', maxsplit=1)[0]),
+            reverse=True,
+        )
+        for old_backup in backups[CachedSettings().db_backups_to_keep:]:
+            try:
+                old_backup.unlink()
+            except OSError as e:
+                log.error(f'Failed to delete old automatic DB backup {old_backup} due to {e!s}')
+
     def get_associated_locations(self) -> set[Location]:
         with self.conn.read_ctx() as cursor:
             cursor.execute(
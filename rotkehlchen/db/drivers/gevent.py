@@ -4,18 +4,23 @@ but heavily modified"""
 
 import random
 import sqlite3
-from collections.abc import Generator, Sequence
+import time
+from collections.abc import Callable, Generator, Sequence
 from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
 from enum import Enum, auto
 from pathlib import Path
 from types import TracebackType
-from typing import TYPE_CHECKING, Any, Literal, Optional, TypeAlias
+from typing import TYPE_CHECKING, Any, Literal, Optional, TypeAlias, TypeVar
 from uuid import uuid4
 
 import gevent
+from gevent.event import Event
 from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.db.checks import sanity_check_impl
+from rotkehlchen.db.drivers.instrumentation import DB_INSTRUMENTATION, StatementRecord
 from rotkehlchen.db.minimized_schema import MINIMIZED_USER_DB_SCHEMA
 from rotkehlchen.globaldb.minimized_schema import MINIMIZED_GLOBAL_DB_SCHEMA
 from rotkehlchen.greenlets.utils import get_greenlet_name
@@ -28,10 +33,13 @@ UnderlyingCursor: TypeAlias = sqlite3.Cursor | sqlcipher.Cursor  # pylint: disab
 UnderlyingConnection: TypeAlias = sqlite3.Connection | sqlcipher.Connection  # pylint: disable=no-member
 
 CONTEXT_SWITCH_WAIT = 1  # seconds to wait for a status change in a DB context switch
+DEFAULT_MAX_READERS = 3  # read only connections that a connection can open for read_ctx
 import logging
 
 logger: 'RotkehlchenLogger' = logging.getLogger(__name__)  # type: ignore
 
+T = TypeVar('T')
+
 
 class ContextError(Exception):
     """Intended to be raised when something is wrong with db context management"""
@@ -42,6 +50,30 @@ class DBCursor:
     def __init__(self, connection: 'DBConnection', cursor: UnderlyingCursor) -> None:
         self._cursor = cursor
         self.connection = connection
+        # the statement whose rows are being read, if instrumentation is enabled
+        self._record: StatementRecord | None = None
+        self.lock_wait: float = 0  # seconds that write_ctx waited for the transaction lock
+
+    def __del__(self) -> None:
+        if self._record is not None:  # cursors are not always closed
+            self._finish_record()
+
+    def _start_record(self, statement: str) -> StatementRecord:
+        if self._record is not None:
+            self._finish_record()
+        self._record = DB_INSTRUMENTATION.start(statement, lock_wait=self.lock_wait)
+        self.lock_wait = 0
+        return self._record
+
+    def _stop_record(self, record: StatementRecord, rows: int, done: bool) -> None:
+        """Add the time since the record was last started and the rows read or changed"""
+        record.stop(rows=rows)
+        if done:
+            self._finish_record()
+
+    def _finish_record(self) -> None:
+        DB_INSTRUMENTATION.finish(self._record)  # type: ignore[arg-type]  # checked by callers
+        self._record = None
 
     def __iter__(self) -> 'DBCursor':
         if __debug__:
@@ -56,7 +88,11 @@ class DBCursor:
         """
         if __debug__:
             logger.trace(f'Get next item for cursor {self._cursor}')
+        if (record := self._record) is not None:
+            record.start()
         result = next(self._cursor, None)
+        if record is not None:
+            self._stop_record(record, rows=int(result is not None), done=result is None)
         if result is None:
             if __debug__:
                 logger.trace(f'Stopping iteration for cursor {self._cursor}')
@@ -81,6 +117,7 @@ class DBCursor:
     def execute(self, statement: str, *bindings: Sequence) -> 'DBCursor':
         if __debug__:
             logger.trace(f'EXECUTE {statement}')
+        record = self._start_record(statement) if DB_INSTRUMENTATION.enabled else None
         try:
             self._cursor.execute(statement, *bindings)
         except (sqlcipher.InterfaceError, sqlite3.InterfaceError):  # pylint: disable=no-member
@@ -88,6 +125,9 @@ class DBCursor:
             logger.debug(f'{statement} with {bindings} failed due to https://github.com/rotki/rotki/issues/5432. Retrying')  # noqa: E501
             self._cursor.execute(statement, *bindings)
 
+        if record is not None:  # statements that return no rows are done already
+            no_rows = self._cursor.description is None
+            self._stop_record(record, rows=max(self._cursor.rowcount, 0), done=no_rows)
         if __debug__:
             logger.trace(f'FINISH EXECUTE {statement}')
         return self
@@ -95,11 +135,44 @@ class DBCursor:
     def executemany(self, statement: str, *bindings: Sequence[Sequence]) -> 'DBCursor':
         if __debug__:
             logger.trace(f'EXECUTEMANY {statement}')
+        record = self._start_record(statement) if DB_INSTRUMENTATION.enabled else None
         self._cursor.executemany(statement, *bindings)
+        if record is not None:
+            self._stop_record(record, rows=max(self._cursor.rowcount, 0), done=True)
         if __debug__:
             logger.trace(f'FINISH EXECUTEMANY {statement}')
         return self
 
+    def execute_in_thread(self, statement: str, *bindings: Sequence) -> list[Any]:
+        """Execute a heavy statement and fetch all of its rows in a thread of the threadpool
+        so that other greenlets run meanwhile. See DBConnection.run_in_thread"""
+        if __debug__:
+            logger.trace(f'EXECUTE IN THREAD {statement}')
+        record = self._start_record(statement) if DB_INSTRUMENTATION.enabled else None
+        result = self.connection.run_in_thread(
+            cursor=self._cursor,
+            function=lambda cursor: cursor.execute(statement, *bindings).fetchall(),
+        )
+        if record is not None:
+            self._stop_record(record, rows=len(result), done=True)
+        if __debug__:
+            logger.trace(f'FINISH EXECUTE IN THREAD {statement}')
+        return result
+
+    def executemany_in_thread(self, statement: str, *bindings: Sequence[Sequence]) -> None:
+        """Like execute_in_thread but for executemany"""
+        if __debug__:
+            logger.trace(f'EXECUTEMANY IN THREAD {statement}')
+        record = self._start_record(statement) if DB_INSTRUMENTATION.enabled else None
+        self.connection.run_in_thread(
+            cursor=self._cursor,
+            function=lambda cursor: cursor.executemany(statement, *bindings),
+        )
+        if record is not None:
+            self._stop_record(record, rows=max(self._cursor.rowcount, 0), done=True)
+        if __debug__:
+            logger.trace(f'FINISH EXECUTEMANY IN THREAD {statement}')
+
     def executescript(self, script: str) -> 'DBCursor':
         """Remember this always issues a COMMIT before
         https://docs.python.org/3/library/sqlite3.html#sqlite3.Cursor.executescript
@@ -128,7 +201,11 @@ class DBCursor:
     def fetchone(self) -> Any:
         if __debug__:
             logger.trace('CURSOR FETCHONE')
+        if (record := self._record) is not None:
+            record.start()
         result = self._cursor.fetchone()
+        if record is not None:
+            self._stop_record(record, rows=int(result is not None), done=result is None)
         if __debug__:
             logger.trace('FINISH CURSOR FETCHONE')
         return result
@@ -138,7 +215,11 @@ class DBCursor:
             logger.trace(f'CURSOR FETCHMANY with {size=}')
         if size is None:
             size = self._cursor.arraysize
+        if (record := self._record) is not None:
+            record.start()
         result = self._cursor.fetchmany(size)
+        if record is not None:
+            self._stop_record(record, rows=len(result), done=len(result) < size)
         if __debug__:
             logger.trace('FINISH CURSOR FETCHMANY')
         return result
@@ -146,7 +227,11 @@ class DBCursor:
     def fetchall(self) -> list[Any]:
         if __debug__:
             logger.trace('CURSOR FETCHALL')
+        if (record := self._record) is not None:
+            record.start()
         result = self._cursor.fetchall()
+        if record is not None:
+            self._stop_record(record, rows=len(result), done=True)
         if __debug__:
             logger.trace('FINISH CURSOR FETCHALL')
         return result
@@ -160,6 +245,8 @@ class DBCursor:
         return self._cursor.lastrowid  # type: ignore
 
     def close(self) -> None:
+        if self._record is not None:
+            self._finish_record()
         self._cursor.close()
 
 
@@ -228,6 +315,66 @@ CALLBACK_MAP = {
 }
 
 
+def readers_callback() -> int:
+    """Progress callback of the read only connections. A read only connection is used
+    by a single greenlet at a time and is never modified while in use, so it can always
+    context switch without the locking of _progress_callback"""
+    gevent.sleep(0)
+    return 0
+
+
+def _wait_for_thread(
+        connection: UnderlyingConnection,
+        function: Callable[[UnderlyingCursor], T],
+        cursor: UnderlyingCursor,
+) -> T:
+    """Run function(cursor) in the threadpool and wait for its result"""
+    result = gevent.get_hub().threadpool.spawn(function, cursor)
+    try:
+        return result.get()
+    except BaseException:
+        if not result.ready():  # killed while waiting. Stop the statement since the
+            connection.interrupt()  # connection can't be used until the thread is done
+            result.wait()
+        raise
+
+
+@dataclass
+class DBReader:
+    """A read only connection checked out by a greenlet"""
+    connection: UnderlyingConnection
+    generation: int  # of the readers of the connection when the reader was opened
+    depth: int = 1  # number of nested read contexts of the greenlet using it
+
+
+class DecimalSum:
+    """SQL aggregate function DECIMAL_SUM that sums exactly numbers stored as text
+
+    SUM(CAST(x AS REAL)) loses precision for the amounts that the DBs keep as text. Like
+    the cast, values that are not numbers count as zero and like SUM the result is null
+    if there are no values. The sum is returned as text.
+    """
+
+    def __init__(self) -> None:
+        self.total: Decimal | None = None
+
+    def step(self, value: str | float | None) -> None:
+        if value is None:
+            return
+
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            number = Decimal(0)
+
+        if not number.is_finite():
+            number = Decimal(0)
+        self.total = number if self.total is None else self.total + number
+
+    def finalize(self) -> str | None:
+        return None if self.total is None else str(self.total)
+
+
 class DBConnection:
 
     def _set_progress_handler(self) -> None:
@@ -253,40 +400,209 @@ class DBConnection:
         # https://www.gevent.org/api/gevent.greenlet.html#gevent.Greenlet.minimal_ident
         self.savepoint_greenlet_id: str | None = None
         self.write_greenlet_id: str | None = None
-        if connection_type == DBConnectionType.GLOBAL:
-            self._conn = sqlite3.connect(
-                database=path,
-                check_same_thread=False,
-                isolation_level=None,
-            )
-        else:
-            self._conn = sqlcipher.connect(  # pylint: disable=no-member
-                database=path,
-                check_same_thread=False,
-                isolation_level=None,
-            )
+        self.path = path
+        # Read only connections used by read_ctx. Disabled until enable_readers is called.
+        self.readers_setup_script: str | None = None
+        self.max_readers = 0
+        self.readers_generation = 0
+        self.reader_opener: gevent.Greenlet | None = None
+        # set while the writer connection is used by a thread. See run_in_thread.
+        self.writer_thread_done: Event | None = None
+        self.idle_readers: list[UnderlyingConnection] = []
+        self.busy_readers: dict[int, DBReader] = {}  # by id of the greenlet using them
+        self._conn = self._open_connection()
         self._set_progress_handler()
+        self._conn.create_aggregate('DECIMAL_SUM', 1, DecimalSum)
         self.minimized_schema = None
         if connection_type == DBConnectionType.USER:
             self.minimized_schema = MINIMIZED_USER_DB_SCHEMA
         elif connection_type == DBConnectionType.GLOBAL:
             self.minimized_schema = MINIMIZED_GLOBAL_DB_SCHEMA
 
+    def _open_connection(self) -> UnderlyingConnection:
+        if self.connection_type == DBConnectionType.GLOBAL:
+            return sqlite3.connect(
+                database=self.path,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+
+        return sqlcipher.connect(  # pylint: disable=no-member
+            database=self.path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+
+    def enable_readers(self, setup_script: str, max_readers: int = DEFAULT_MAX_READERS) -> None:
+        """Make read_ctx read through up to max_readers read only connections instead of
+        the connection that writes. They are opened when first needed and set up by
+        running setup_script, which has to unlock the DB if it's encrypted.
+
+        The DB needs to be in WAL mode so that readers and the writer don't block each other.
+        Readers that are open are closed so this is also how to change the setup script.
+        """
+        self.close_readers()
+        self.readers_setup_script = setup_script
+        self.max_readers = max_readers
+
+    def close_readers(self) -> None:
+        """Close the idle read only connections. Those in use are closed when released."""
+        self.readers_generation += 1
+        for reader in self.idle_readers:
+            reader.close()
+        self.idle_readers = []
+
+    def _open_reader(self, setup_script: str) -> UnderlyingConnection:
+        """Runs in the threadpool since unlocking an encrypted DB derives the key from the
+        password, which takes long enough to noticeably block all greenlets.
+
+        May raise:
+        - sqlcipher.DatabaseError / sqlite3.DatabaseError if the reader can't be opened
+        """
+        reader = self._open_connection()
+        try:
+            reader.executescript(setup_script)
+            reader.execute('SELECT COUNT(*) FROM sqlite_master')  # unlock it here
+            reader.execute('PRAGMA query_only=ON')
+        except (sqlcipher.DatabaseError, sqlite3.DatabaseError):  # pylint: disable=no-member
+            reader.close()
+            raise
+
+        reader.set_progress_handler(readers_callback, self.sql_vm_instructions_cb)
+        reader.create_aggregate('DECIMAL_SUM', 1, DecimalSum)  # type: ignore[arg-type]
+        return reader
+
+    def _acquire_reader(self) -> DBReader | None:
+        """Returns the read only connection that the current greenlet should read through
+        or None if it should read through the writer connection.
+
+        The writer connection is used if readers are not enabled, if none is idle, in
+        which case one is opened in the background if there is room for more, and if the
+        greenlet has a transaction or savepoint open, since the readers would not see its
+        uncommitted changes. Nested read contexts of a greenlet share its reader.
+        """
+        if self.readers_setup_script is None:
+            return None
+
+        current_greenlet = gevent.getcurrent()
+        current_id = get_greenlet_name(current_greenlet)
+        if current_id in (self.write_greenlet_id, self.savepoint_greenlet_id) or (
+            # transaction opened outside write_ctx/savepoint_ctx. Can't know by whom.
+            self._conn.in_transaction is True and
+            self.write_greenlet_id is None and
+            self.savepoint_greenlet_id is None
+        ):
+            return None
+
+        if (reader := self.busy_readers.get(id(current_greenlet))) is not None:
+            reader.depth += 1
+            return reader
+
+        if len(self.idle_readers) == 0:
+            if self.reader_opener is None and len(self.busy_readers) < self.max_readers:
+                self.reader_opener = gevent.spawn(
+                    self._add_reader,
+                    setup_script=self.readers_setup_script,
+                    generation=self.readers_generation,
+                )
+            return None  # don't wait for the reader to be opened
+
+        reader = DBReader(connection=self.idle_readers.pop(), generation=self.readers_generation)
+        self.busy_readers[id(current_greenlet)] = reader
+        return reader
+
+    def _add_reader(self, setup_script: str, generation: int) -> None:
+        """Open a reader in the threadpool and add it to the idle ones"""
+        try:
+            connection = gevent.get_hub().threadpool.apply(self._open_reader, (setup_script,))
+        except (sqlcipher.DatabaseError, sqlite3.DatabaseError) as e:  # pylint: disable=no-member
+            logger.error(f'Could not open a read only {self.connection_type.name.lower()} DB connection due to {e!s}')  # noqa: E501
+            return
+        finally:
+            self.reader_opener = None
+
+        if generation == self.readers_generation and self.readers_setup_script is not None:
+            self.idle_readers.append(connection)
+        else:  # readers were closed or reconfigured while this one was being opened
+            connection.close()
+
+    def _release_reader(self, reader: DBReader) -> None:
+        reader.depth -= 1
+        if reader.depth != 0:
+            return
+
+        self.busy_readers.pop(id(gevent.getcurrent()), None)
+        if reader.generation == self.readers_generation and self.readers_setup_script is not None:
+            self.idle_readers.append(reader.connection)
+        else:  # readers were closed or reconfigured while this one was in use
+            reader.connection.close()
+
+    def run_in_thread(
+            self,
+            cursor: UnderlyingCursor,
+            function: Callable[[UnderlyingCursor], T],
+    ) -> T:
+        """Call function with the cursor in a thread of the threadpool and wait for it
+        without blocking the other greenlets. That's only safe if no other greenlet uses
+        the cursor's connection meanwhile, so otherwise function is called right away.
+
+        The connection is safe to use from a thread if it's the reader of the current
+        greenlet or the writer while the current greenlet is in write_ctx. In that case
+        other greenlets that use the writer connection, directly or through read_ctx,
+        wait for the thread when they create a cursor or execute a statement through the
+        connection, as write_ctx and savepoint_ctx already do. The progress handler can't
+        context switch from a thread so it's disabled while the thread runs. It already
+        is for write_ctx.
+        """
+        connection = cursor.connection
+        current_greenlet = gevent.getcurrent()
+        reader = self.busy_readers.get(id(current_greenlet))
+        if reader is not None and reader.connection is connection:
+            connection.set_progress_handler(None, 0)
+            try:
+                return _wait_for_thread(connection, function, cursor)
+            finally:
+                connection.set_progress_handler(readers_callback, self.sql_vm_instructions_cb)
+
+        if connection is self._conn and self.write_greenlet_id == get_greenlet_name(current_greenlet):  # noqa: E501
+            self.writer_thread_done = Event()
+            try:
+                return _wait_for_thread(connection, function, cursor)
+            finally:
+                self.writer_thread_done.set()
+                self.writer_thread_done = None
+
+        return function(cursor)
+
+    def _wait_for_writer_thread(self) -> None:
+        """Wait for a statement that runs in a thread through the writer connection to
+        finish, since the connection can't be used by another greenlet meanwhile"""
+        if self.writer_thread_done is not None:
+            self.writer_thread_done.wait()
+
     def execute(self, statement: str, *bindings: Sequence) -> DBCursor:
         if __debug__:
             logger.trace(f'DB CONNECTION EXECUTE {statement}')
-        underlying_cursor = self._conn.execute(statement, *bindings)
+        self._wait_for_writer_thread()
+        if DB_INSTRUMENTATION.enabled:
+            cursor = self.cursor().execute(statement, *bindings)
+        else:
+            cursor = DBCursor(connection=self, cursor=self._conn.execute(statement, *bindings))
         if __debug__:
             logger.trace(f'FINISH DB CONNECTION EXECUTEMANY {statement}')
-        return DBCursor(connection=self, cursor=underlying_cursor)
+        return cursor
 
     def executemany(self, statement: str, *bindings: Sequence[Sequence]) -> DBCursor:
         if __debug__:
             logger.trace(f'DB CONNECTION EXECUTEMANY {statement}')
-        underlying_cursor = self._conn.executemany(statement, *bindings)
+        self._wait_for_writer_thread()
+        if DB_INSTRUMENTATION.enabled:
+            cursor = self.cursor().executemany(statement, *bindings)
+        else:
+            cursor = DBCursor(connection=self, cursor=self._conn.executemany(statement, *bindings))
         if __debug__:
             logger.trace(f'FINISH DB CONNECTION EXECUTEMANY {statement}')
-        return DBCursor(connection=self, cursor=underlying_cursor)
+        return cursor
 
     def executescript(self, script: str) -> DBCursor:
         """Remember this always issues a COMMIT before
@@ -294,6 +610,7 @@ class DBConnection:
         """
         if __debug__:
             logger.trace(f'DB CONNECTION EXECUTESCRIPT {script}')
+        self._wait_for_writer_thread()
         underlying_cursor = self._conn.executescript(script)
         if __debug__:
             logger.trace(f'DB CONNECTION EXECUTESCRIPT {script}')
@@ -320,19 +637,29 @@ class DBConnection:
                     logger.trace('FINISH DB CONNECTION ROLLBACK')
 
     def cursor(self) -> DBCursor:
+        self._wait_for_writer_thread()
         return DBCursor(connection=self, cursor=self._conn.cursor())
 
     def close(self) -> None:
+        self.readers_setup_script = None
+        self.close_readers()
         self._conn.close()
         CONNECTION_MAP.pop(self.connection_type, None)
 
     @contextmanager
     def read_ctx(self) -> Generator['DBCursor', None, None]:
-        cursor = self.cursor()
+        """Opens a cursor for reading. If readers are enabled it reads through one of the
+        read only connections, which only see committed data. See _acquire_reader."""
+        if (reader := self._acquire_reader()) is None:
+            cursor = self.cursor()  # waits if the writer is used by a thread
+        else:
+            cursor = DBCursor(connection=self, cursor=reader.connection.cursor())
         try:
             yield cursor
         finally:
             cursor.close()
+            if reader is not None:
+                self._release_reader(reader)
 
     @contextmanager
     def write_ctx(self, commit_ts: bool = False) -> Generator['DBCursor', None, None]:
@@ -355,8 +682,11 @@ class DBConnection:
                     yield cursor
                     return
         # else
+        lock_requested_at = time.perf_counter() if DB_INSTRUMENTATION.enabled else None
         with self.critical_section(), self.transaction_lock:
             cursor = self.cursor()
+            if lock_requested_at is not None:  # recorded with BEGIN TRANSACTION
+                cursor.lock_wait = time.perf_counter() - lock_requested_at
             self.write_greenlet_id = get_greenlet_name(gevent.getcurrent())
             cursor.execute('BEGIN TRANSACTION')
             try:
@@ -494,6 +824,15 @@ class DBConnection:
         with self.critical_section(), self.transaction_lock:
             yield
 
+    def create_function(self, name: str, num_params: int, func: Callable[..., Any]) -> None:
+        """Make func callable by the statements of this connection. Not by its readers."""
+        self._conn.create_function(name, num_params, func)
+
+    @property
+    def in_transaction(self) -> bool:
+        """True while a transaction or savepoint is open in the connection that writes"""
+        return self._conn.in_transaction
+
     @property
     def total_changes(self) -> int:
         """total number of database rows that have been modified, inserted,
@@ -0,0 +1,164 @@
+"""Statistics of the statements executed through the DB driver
+
+Disabled by default. When enabled, the time that each statement takes, from its execution
+until its cursor is done with its rows, the rows it returns or changes and the time that
+write transactions wait for the transaction lock are aggregated per statement shape.
+Statements slower than the threshold are also written to the slow queries log.
+"""
+import logging
+import re
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Final
+
+SLOW_QUERIES_LOGGER: Final = 'rotkehlchen.db.slow_queries'
+# upper bounds in milliseconds of the buckets of the time histograms. The last one is unbounded
+HISTOGRAM_BUCKETS_MS: Final = (1, 5, 10, 50, 100, 500, 1000, 5000)
+MAX_STATEMENT_SHAPES: Final = 1000  # statements of new shapes after that are counted as OTHER
+MAX_CALL_SITES: Final = 20  # per statement shape. Calls from new sites after that are not kept
+OTHER_STATEMENTS: Final = 'OTHER'
+# frames that are not the call site of a statement but the DB code that executes it
+SKIPPED_CALL_SITE_MODULES: Final = {'contextlib', 'rotkehlchen.db.drivers.gevent', __name__}
+SKIPPED_CALL_SITE_FUNCTIONS: Final = {('rotkehlchen.db.dbhandler', 'user_write'), ('rotkehlchen.db.dbhandler', 'transient_write')}  # noqa: E501
+
+slow_log = logging.getLogger(SLOW_QUERIES_LOGGER)
+
+_QUOTED_RE: Final = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_NUMBER_RE: Final = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS_LIST_RE: Final = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE_RE: Final = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """Returns the shape of the statement. Literals become placeholders and lists of
+    placeholders, whose length depends on the data, become a single one so that the
+    statements that only differ in those are aggregated together."""
+    shape = _QUOTED_RE.sub('?', _WHITESPACE_RE.sub(' ', statement).strip())
+    shape = _NUMBER_RE.sub('?', shape)
+    return _PLACEHOLDERS_LIST_RE.sub('(?...)', shape)
+
+
+def get_call_site() -> str:
+    """Returns the module, line and function of the code that executes a statement"""
+    frame = sys._getframe(1)
+    while frame.f_back is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module not in SKIPPED_CALL_SITE_MODULES and (module, frame.f_code.co_name) not in SKIPPED_CALL_SITE_FUNCTIONS:  # noqa: E501
+            break
+        frame = frame.f_back
+
+    return f'{frame.f_globals.get("__name__")}:{frame.f_lineno} {frame.f_code.co_name}'
+
+
+@dataclass(slots=True)
+class StatementRecord:
+    """A statement whose cursor is not done with it yet"""
+    statement: str
+    call_site: str
+    lock_wait: float  # seconds
+    elapsed: float = 0  # seconds
+    rows: int = 0
+    started_at: float = 0
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def stop(self, rows: int) -> None:
+        self.elapsed += time.perf_counter() - self.started_at
+        self.rows += rows
+
+
+@dataclass
+class StatementStats:
+    """The aggregated statistics of the statements of a shape"""
+    count: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+    rows: int = 0
+    lock_wait_ms: float = 0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BUCKETS_MS) + 1))
+    call_sites: dict[str, int] = field(default_factory=dict)
+
+    def add(self, record: StatementRecord, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.rows += record.rows
+        self.lock_wait_ms += record.lock_wait * 1000
+        self.histogram[bisect_left(HISTOGRAM_BUCKETS_MS, duration_ms)] += 1
+        if record.call_site in self.call_sites or len(self.call_sites) < MAX_CALL_SITES:
+            self.call_sites[record.call_site] = self.call_sites.get(record.call_site, 0) + 1
+
+    def serialize(self, statement: str) -> dict[str, Any]:
+        return {
+            'statement': statement,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3),
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'lock_wait_ms': round(self.lock_wait_ms, 3),
+            'histogram': self.histogram,
+            'call_sites': dict(sorted(self.call_sites.items(), key=lambda x: x[1], reverse=True)),
+        }
+
+
+class DBInstrumentation:
+    """Statistics of the statements of all DB connections. When disabled the driver
+    only checks `enabled`, so that it costs next to nothing."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.slow_threshold_ms = 0
+        self.stats: dict[str, StatementStats] = {}
+
+    def enable(self, slow_threshold_ms: int) -> None:
+        self.enabled = True
+        self.slow_threshold_ms = slow_threshold_ms
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.stats = {}
+
+    def start(self, statement: str, lock_wait: float = 0) -> StatementRecord:
+        """Start recording a statement right before executing it"""
+        record = StatementRecord(statement=statement, call_site=get_call_site(), lock_wait=lock_wait)  # noqa: E501
+        record.start()
+        return record
+
+    def finish(self, record: StatementRecord) -> None:
+        """Add a statement whose cursor is done with it to the statistics"""
+        duration_ms = record.elapsed * 1000
+        shape = normalize_statement(record.statement)
+        if (stats := self.stats.get(shape)) is None:
+            if len(self.stats) >= MAX_STATEMENT_SHAPES:
+                shape = OTHER_STATEMENTS
+            stats = self.stats.setdefault(shape, StatementStats())
+        stats.add(record, duration_ms)
+        if duration_ms + record.lock_wait * 1000 >= self.slow_threshold_ms:
+            slow_log.warning(
+                f'Statement took {duration_ms:.1f}ms and waited {record.lock_wait * 1000:.1f}ms '
+                f'for the transaction lock for {record.rows} rows at {record.call_site}: '
+                f'{record.statement}',
+            )
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'slow_threshold_ms': self.slow_threshold_ms,
+            'histogram_buckets_ms': HISTOGRAM_BUCKETS_MS,
+            'statements': [
+                stats.serialize(shape) for shape, stats in
+                sorted(self.stats.items(), key=lambda x: x[1].total_ms, reverse=True)
+            ],
+        }
+
+
+DB_INSTRUMENTATION: Final = DBInstrumentation()
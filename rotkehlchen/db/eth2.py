@@ -243,7 +243,7 @@ class DBEth2:
         if (latest_result := write_cursor.fetchone()) is None:
             return  # no event found so nothing to do
 
-        if ts_ms_to_sec(latest_result[1]) >= withdrawable_timestamp:
+        if (timestamp := ts_ms_to_sec(latest_result[1])) >= withdrawable_timestamp:
             write_cursor.execute(
                 'UPDATE eth_staking_events_info SET is_exit_or_blocknumber=? WHERE identifier=?',
                 (1, latest_result[0]),
@@ -252,6 +252,7 @@ class DBEth2:
                 'UPDATE history_events SET notes=? WHERE identifier=?',
                 (form_withdrawal_notes(is_exit=True, validator_index=index, amount=latest_result[2]), latest_result[0]),  # noqa: E501
             )
+            self.db.invalidate_pnl_checkpoints(timestamp)  # exits are accounted differently
 
     def add_or_update_validators_except_ownership(
             self,
@@ -376,7 +377,7 @@ class DBEth2:
         """
         withdrawals_amounts = self._validator_stats_process_queries(
             cursor=cursor,
-            amount_querystr='SUM(CAST(amount AS REAL))',
+            amount_querystr='DECIMAL_SUM(amount)',
             filter_query=withdrawals_filter_query,
         )
         exits_pnl = self._validator_stats_process_queries(
@@ -386,7 +387,7 @@ class DBEth2:
         )
         execution_rewards_amounts = self._validator_stats_process_queries(
             cursor=cursor,
-            amount_querystr='SUM(CAST(amount AS REAL))',
+            amount_querystr='DECIMAL_SUM(amount)',
             filter_query=execution_filter_query,
         )
         return withdrawals_amounts, exits_pnl, execution_rewards_amounts
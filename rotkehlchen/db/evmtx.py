@@ -216,7 +216,7 @@ class DBEvmTx:
         Also returns how many are the total found for the filter.
         """
         txs = self.get_evm_transactions(cursor, filter_=filter_, has_premium=has_premium)
-        query, bindings = filter_.prepare(with_pagination=False)
+        query, bindings = filter_.prepare(with_pagination=False, with_order=False)
         query = 'SELECT COUNT(DISTINCT evm_transactions.tx_hash) FROM evm_transactions ' + query
         total_found_result = cursor.execute(query, bindings)
         return txs, total_found_result.fetchone()[0]  # always returns result
@@ -461,7 +461,7 @@ class DBEvmTx:
             ],
         )
         # Get all tx_hashes that are touched by this address and no other address for the chain
-        result = write_cursor.execute(
+        result = write_cursor.execute_in_thread(
             'SELECT A.tx_hash, A.identifier from evmtx_address_mappings AS B INNER JOIN '
             'evm_transactions AS A ON A.identifier=B.tx_id WHERE B.address=? AND A.chain_id=? '
             'AND B.tx_id NOT IN (SELECT tx_id from evmtx_address_mappings WHERE address!=? '
@@ -511,7 +511,7 @@ class DBEvmTx:
 
         # Now delete all relevant transactions. By deleting all relevant transactions all tables
         # are cleared thanks to cascading (except for history_events which was cleared above)
-        write_cursor.executemany(
+        write_cursor.executemany_in_thread(  # can be lots of them. Don't block meanwhile.
             'DELETE FROM evm_transactions WHERE tx_hash=? AND chain_id=? AND tx_hash NOT IN (SELECT tx_hash FROM evm_events_info)',  # noqa: E501
             [(x, chain_id_serialized) for x in tx_hashes],
         )
@@ -1,6 +1,8 @@
+import base64
+import json
 import logging
 from abc import ABC, abstractmethod
-from collections.abc import Collection
+from collections.abc import Collection, Sequence
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Any, Generic, Literal, NamedTuple, TypeVar
@@ -22,7 +24,7 @@ from rotkehlchen.db.constants import (
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
 from rotkehlchen.globaldb.cache import compute_cache_key
-from rotkehlchen.history.events.structures.base import HistoryBaseEntryType
+from rotkehlchen.history.events.structures.base import HistoryBaseEntry, HistoryBaseEntryType
 from rotkehlchen.history.events.structures.evm_event import EvmProduct
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -94,6 +96,68 @@ class DBFilterPagination(NamedTuple):
         return f'LIMIT {self.limit} OFFSET {self.offset}'
 
 
+class DBFilterKeysetPagination(NamedTuple):
+    """Pagination that seeks to the entries after the last entry of the previous page
+
+    Unlike an offset, the entries of the previous pages don't need to be read again so
+    every page is equally fast. `after` has the values of the order by columns of the
+    last entry of the previous page, which should end in a unique column so that the
+    order is total. The columns have to be plain columns ordered case sensitively.
+    """
+    limit: int
+    after: list[Any]
+
+    def prepare_condition(self, order_by: DBFilterOrder) -> tuple[str, list[Any]]:
+        """Returns the condition that only keeps the entries after `after` in the given order
+
+        A row value comparison can't be used since the columns may be ordered in different
+        directions, so it's expanded to `a > ? OR (a = ? AND (b > ? OR (b = ? AND ...)))`.
+        The first column is also compared on its own so that an index on it can be used.
+        """
+        condition, bindings = '', []
+        for (column, ascending), value in reversed(list(zip(order_by.rules, self.after, strict=True))):  # noqa: E501
+            operator = '>' if ascending else '<'
+            if condition == '':
+                condition, bindings = f'{column} {operator} ?', [value]
+            else:
+                condition = f'{column} {operator} ? OR ({column} = ? AND ({condition}))'
+                bindings = [value, value, *bindings]
+
+        first_column, first_ascending = order_by.rules[0]
+        return (
+            f'({first_column} {">=" if first_ascending else "<="} ? AND ({condition}))',
+            [self.after[0], *bindings],
+        )
+
+    def prepare(self) -> str:
+        return f'LIMIT {self.limit}'
+
+
+def encode_pagination_cursor(values: list[Any]) -> str:
+    """Encode the order by values of the last entry of a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_pagination_cursor(cursor: str) -> list[Any]:
+    """Decode a cursor created by encode_pagination_cursor
+
+    May raise:
+    - DeserializationError if the cursor is not valid
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:  # binascii.Error, JSONDecodeError and UnicodeError are ValueErrors
+        raise DeserializationError(f'Invalid pagination cursor {cursor}') from e
+
+    if (
+        not isinstance(values, list) or len(values) == 0 or
+        not all(isinstance(x, int | str) for x in values)
+    ):
+        raise DeserializationError(f'Invalid pagination cursor {cursor}')
+
+    return values
+
+
 class DBFilterGroupBy(NamedTuple):
     field_name: str
 
@@ -303,7 +367,7 @@ class DBFilterQuery(ABC):
     join_clause: DBFilter | None = None
     group_by: DBFilterGroupBy | None = None
     order_by: DBFilterOrder | None = None
-    pagination: DBFilterPagination | None = None
+    pagination: DBFilterPagination | DBFilterKeysetPagination | None = None
 
     def prepare(
             self,
@@ -345,9 +409,17 @@ class DBFilterQuery(ABC):
             filterstrings.append(f'({operator.join(filters)})')
             bindings.extend(single_bindings)
 
-        if len(filterstrings) != 0:
-            operator = ' AND ' if self.and_op else ' OR '
-            filter_query = f'{"WHERE " if self.join_clause is None else "AND ("}{operator.join(filterstrings)}{"" if self.join_clause is None else ")"}'  # noqa: E501
+        conditions = (' AND ' if self.and_op else ' OR ').join(filterstrings)
+        if (
+            with_pagination and self.order_by is not None and
+            isinstance(self.pagination, DBFilterKeysetPagination)
+        ):  # the seek condition applies on top of the filters whatever their operator
+            keyset_condition, keyset_bindings = self.pagination.prepare_condition(self.order_by)
+            conditions = keyset_condition if conditions == '' else f'({conditions}) AND {keyset_condition}'  # noqa: E501
+            bindings.extend(keyset_bindings)
+
+        if conditions != '':
+            filter_query = f'{"WHERE " if self.join_clause is None else "AND ("}{conditions}{"" if self.join_clause is None else ")"}'  # noqa: E501
             query_parts.append(filter_query)
 
         if with_group_by and self.group_by is not None:
@@ -373,8 +445,16 @@ class DBFilterQuery(ABC):
             order_by_case_sensitive: bool = True,
             order_by_rules: list[tuple[str, bool]] | None = None,
             group_by_field: str | None = None,
+            after: list[Any] | None = None,
     ) -> T_FilterQ:
-        if limit is None or offset is None:
+        """If `after` is given then the entries are paginated with the keyset of the
+        order_by_rules instead of the offset. See DBFilterKeysetPagination"""
+        pagination: DBFilterPagination | DBFilterKeysetPagination | None
+        if limit is None:
+            pagination = None
+        elif after is not None:
+            pagination = DBFilterKeysetPagination(limit=limit, after=after)
+        elif offset is None:
             pagination = None
         else:
             pagination = DBFilterPagination(limit=limit, offset=offset)
@@ -914,6 +994,7 @@ class HistoryBaseEntryFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWith
             entry_types: IncludeExcludeFilterData | None = None,
             exclude_ignored_assets: bool = False,
             customized_events_only: bool = False,
+            after: list[Any] | None = None,
     ) -> T_HistoryBaseEntryFilterQ:
         """May raise:
         - InvalidFilter for invalid combination of filters
@@ -927,6 +1008,7 @@ class HistoryBaseEntryFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWith
             offset=offset,
             order_by_rules=order_by_rules,
             group_by_field='event_identifier',
+            after=after,
         )
         if customized_events_only is True:
             if filter_query.join_clause is not None:  # atm "should not happen"
@@ -1024,6 +1106,23 @@ class HistoryBaseEntryFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWith
         filter_query.filters = filters
         return filter_query
 
+    def next_page_cursor(self, events: Sequence[HistoryBaseEntry]) -> str | None:
+        """Returns the cursor of the page that follows the given page of ungrouped events
+        or None if it was the last page. Only valid if the order ends with the identifier"""
+        if (
+            self.pagination is None or self.order_by is None or
+            len(events) < self.pagination.limit
+        ):
+            return None
+
+        last_event = events[-1]
+        values = {
+            'timestamp': last_event.timestamp,
+            'sequence_index': last_event.sequence_index,
+            'history_events_identifier': last_event.identifier,
+        }
+        return encode_pagination_cursor([values[column] for column, _ in self.order_by.rules])
+
     @staticmethod
     @abstractmethod
     def get_join_query() -> str:
@@ -1070,6 +1169,7 @@ class EvmEventFilterQuery(HistoryBaseEntryFilterQuery):
             entry_types: IncludeExcludeFilterData | None = None,
             exclude_ignored_assets: bool = False,
             customized_events_only: bool = False,
+            after: list[Any] | None = None,
             tx_hashes: list[EVMTxHash] | None = None,
             counterparties: list[str] | None = None,
             products: list[EvmProduct] | None = None,
@@ -1098,6 +1198,7 @@ class EvmEventFilterQuery(HistoryBaseEntryFilterQuery):
             entry_types=entry_types,
             exclude_ignored_assets=exclude_ignored_assets,
             customized_events_only=customized_events_only,
+            after=after,
         )
         if counterparties is not None:
             filter_query.filters.append(DBMultiStringFilter(
@@ -1165,6 +1266,7 @@ class EthStakingEventFilterQuery(HistoryBaseEntryFilterQuery, ABC):
             entry_types: IncludeExcludeFilterData | None = None,
             exclude_ignored_assets: bool = False,
             customized_events_only: bool = False,
+            after: list[Any] | None = None,
             validator_indices: list[int] | None = None,
     ) -> T_EthSTakingFilterQ:
         if entry_types is None:
@@ -1190,6 +1292,7 @@ class EthStakingEventFilterQuery(HistoryBaseEntryFilterQuery, ABC):
             entry_types=entry_types,
             exclude_ignored_assets=exclude_ignored_assets,
             customized_events_only=customized_events_only,
+            after=after,
         )
         if validator_indices is not None:
             filter_query.filters.append(DBMultiIntegerFilter(
@@ -1239,6 +1342,7 @@ class EthWithdrawalFilterQuery(EthStakingEventFilterQuery):
             entry_types: IncludeExcludeFilterData | None = None,
             exclude_ignored_assets: bool = False,
             customized_events_only: bool = False,
+            after: list[Any] | None = None,
             validator_indices: list[int] | None = None,
             withdrawal_types_filter: WithdrawalTypesFilter = WithdrawalTypesFilter.ALL,
     ) -> 'EthWithdrawalFilterQuery':
@@ -1265,6 +1369,7 @@ class EthWithdrawalFilterQuery(EthStakingEventFilterQuery):
             entry_types=entry_types,
             exclude_ignored_assets=exclude_ignored_assets,
             customized_events_only=customized_events_only,
+            after=after,
             validator_indices=validator_indices,
         )
         if withdrawal_types_filter != WithdrawalTypesFilter.ALL:
@@ -1311,6 +1416,7 @@ class EthDepositEventFilterQuery(EvmEventFilterQuery, EthStakingEventFilterQuery
             entry_types: IncludeExcludeFilterData | None = None,
             exclude_ignored_assets: bool = False,
             customized_events_only: bool = False,
+            after: list[Any] | None = None,
             tx_hashes: list[EVMTxHash] | None = None,
             validator_indices: list[int] | None = None,
     ) -> 'EthDepositEventFilterQuery':
@@ -1338,6 +1444,7 @@ class EthDepositEventFilterQuery(EvmEventFilterQuery, EthStakingEventFilterQuery
             exclude_ignored_assets=exclude_ignored_assets,
             tx_hashes=tx_hashes,
             customized_events_only=customized_events_only,
+            after=after,
         )
         if validator_indices is not None:
             filter_query.filters.append(DBMultiIntegerFilter(
@@ -1,7 +1,8 @@
 import copy
 import logging
+from collections import OrderedDict
 from collections.abc import Sequence
-from typing import TYPE_CHECKING, Any, Literal, Optional, overload
+from typing import TYPE_CHECKING, Any, Final, Literal, Optional, overload
 
 from pysqlcipher3 import dbapi2 as sqlcipher
 
@@ -57,7 +58,7 @@ from rotkehlchen.utils.misc import ts_ms_to_sec
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
-    from rotkehlchen.db.drivers.gevent import DBCursor
+    from rotkehlchen.db.drivers.gevent import DBConnection, DBCursor
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -76,6 +77,120 @@ def maybe_filter_ignore_asset(
     return ' '
 
 
+# The tables that the history events filters read. A write to any of them may change a count
+HISTORY_EVENTS_COUNTS_TABLES: Final = (
+    'history_events',
+    'evm_events_info',
+    'eth_staking_events_info',
+    'history_events_mappings',
+    'multisettings',
+)
+HISTORY_EVENTS_COUNTS_CACHE_SIZE: Final = 256
+# Temporary, so only seen by the connection that writes and created again for every new one
+DB_SCRIPT_HISTORY_EVENTS_COUNTS: Final = ''.join(
+    f'CREATE TEMP TRIGGER IF NOT EXISTS history_events_counts_{table}_{action.lower()} '
+    f'AFTER {action} ON {table} BEGIN SELECT history_events_written(); END;'
+    for table in HISTORY_EVENTS_COUNTS_TABLES for action in ('INSERT', 'UPDATE', 'DELETE')
+) + """
+CREATE TEMP TABLE IF NOT EXISTS history_events_totals (
+    location CHAR(1) NOT NULL PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+DELETE FROM history_events_totals;
+INSERT INTO history_events_totals(location, count)
+    SELECT location, COUNT(*) FROM history_events GROUP BY location;
+CREATE TEMP TRIGGER IF NOT EXISTS history_events_totals_insert AFTER INSERT ON history_events
+BEGIN
+    INSERT INTO history_events_totals(location, count) VALUES(NEW.location, 1)
+    ON CONFLICT(location) DO UPDATE SET count=count + 1;
+END;
+CREATE TEMP TRIGGER IF NOT EXISTS history_events_totals_delete AFTER DELETE ON history_events
+BEGIN
+    UPDATE history_events_totals SET count=count - 1 WHERE location=OLD.location;
+END;
+CREATE TEMP TRIGGER IF NOT EXISTS history_events_totals_update
+AFTER UPDATE OF location ON history_events WHEN NEW.location != OLD.location
+BEGIN
+    UPDATE history_events_totals SET count=count - 1 WHERE location=OLD.location;
+    INSERT INTO history_events_totals(location, count) VALUES(NEW.location, 1)
+    ON CONFLICT(location) DO UPDATE SET count=count + 1;
+END;
+"""
+
+
+class HistoryEventsCounts:
+    """Counts of history events per filter query, since counting the events that match
+    a filter means going through all of them for every page of events requested.
+
+    A count is cached until any of the tables that the filters read is written to. The
+    writes are noticed by temporary triggers in the connection that writes, which bump the
+    generation for every row written, whatever the code that writes it. Writes that are
+    rolled back bump it too, which only costs counting again.
+
+    The total of events per location is also kept up to date by triggers, in a temporary
+    table so that it changes in the same transaction as the events themselves.
+    """
+
+    def __init__(self) -> None:
+        self.conn: 'DBConnection | None' = None
+        self.generation = 0
+        self.counts: OrderedDict[tuple[str, tuple[Any, ...]], int] = OrderedDict()
+
+    def install(self, conn: 'DBConnection') -> None:
+        """Create the triggers and the totals in a new connection that writes"""
+        self.conn = conn
+        self.written()
+        conn.create_function('history_events_written', 0, self.written)
+        conn.executescript(f'BEGIN TRANSACTION;{DB_SCRIPT_HISTORY_EVENTS_COUNTS}COMMIT;')
+
+    def written(self) -> None:
+        """Called by the triggers for every row written to the tables of the filters"""
+        self.generation += 1
+        if len(self.counts) != 0:
+            self.counts.clear()
+
+    def _consistent(self) -> bool:
+        """Whether the writer has only committed data, as the readers see it"""
+        return (
+            self.conn is not None and
+            self.conn.writer_thread_done is None and
+            self.conn.in_transaction is False
+        )
+
+    def count(self, cursor: 'DBCursor', query: str, bindings: list[Any]) -> int:
+        """Returns the result of the given COUNT query, cached until the tables change
+
+        The count is only cached if no write was ongoing while counting, since the writer
+        connection could otherwise see events that are not committed yet, or a reader
+        could miss the events that were written meanwhile.
+        """
+        key = (query, tuple(bindings))
+        if (count := self.counts.get(key)) is not None:
+            self.counts.move_to_end(key)
+            return count
+
+        generation, consistent = self.generation, self._consistent()
+        count = cursor.execute(query, bindings).fetchone()[0]
+        if consistent is True and generation == self.generation:
+            self.counts[key] = count
+            if len(self.counts) > HISTORY_EVENTS_COUNTS_CACHE_SIZE:
+                self.counts.popitem(last=False)
+
+        return count
+
+    def get_totals(self) -> dict[str, int] | None:
+        """Returns the number of events per location, as serialized for the DB. None if
+        a write is ongoing as then the totals may contain uncommitted changes."""
+        if self._consistent() is False:
+            return None
+
+        cursor = self.conn.cursor()  # type: ignore[union-attr]  # checked by _consistent
+        try:
+            return dict(cursor.execute('SELECT location, count FROM history_events_totals'))
+        finally:
+            cursor.close()
+
+
 class DBHistoryEvents:
 
     def __init__(self, database: 'DBHandler') -> None:
@@ -139,6 +254,9 @@ class DBHistoryEvents:
         NOTE: It edits all the fields except the extra_data one.
         """
         with self.db.user_write() as write_cursor:
+            old_timestamp = write_cursor.execute(
+                'SELECT timestamp FROM history_events WHERE identifier=?', (event.identifier,),
+            ).fetchone()
             for idx, (_, updatestr, bindings) in enumerate(event.serialize_for_db()):
                 if idx == 0:  # base history event data
                     try:
@@ -162,6 +280,9 @@ class DBHistoryEvents:
                 (event.identifier, HISTORY_MAPPING_KEY_STATE, HISTORY_MAPPING_STATE_CUSTOMIZED),
             )
 
+        self.db.invalidate_pnl_checkpoints(ts_ms_to_sec(TimestampMS(
+            event.timestamp if old_timestamp is None else min(old_timestamp[0], event.timestamp),
+        )))
         return True, ''
 
     def delete_history_events_by_identifier(
@@ -198,6 +319,9 @@ class DBHistoryEvents:
                         )
 
             with self.db.user_write() as write_cursor:
+                timestamp = write_cursor.execute(
+                    'SELECT timestamp FROM history_events WHERE identifier=?', (identifier,),
+                ).fetchone()
                 write_cursor.execute(
                     'DELETE FROM history_events WHERE identifier=?', (identifier,),
                 )
@@ -207,6 +331,8 @@ class DBHistoryEvents:
                     f'Tried to remove history event with id {identifier} which does not exist'
                 )
 
+            self.db.invalidate_pnl_checkpoints(ts_ms_to_sec(timestamp[0]))
+
         return None
 
     def delete_events_by_tx_hash(
@@ -224,13 +350,16 @@ class DBHistoryEvents:
         """
         customized_event_ids = self.get_customized_event_identifiers(cursor=write_cursor, chain_id=chain_id)  # noqa: E501
         length = len(customized_event_ids)
-        querystr = f'DELETE FROM history_events WHERE identifier IN (SELECT H.identifier from history_events H INNER JOIN evm_events_info E ON H.identifier=E.identifier AND E.tx_hash IN ({", ".join(["?"] * len(tx_hashes))}))'  # noqa: E501
+        querystr = f'FROM history_events WHERE identifier IN (SELECT H.identifier from history_events H INNER JOIN evm_events_info E ON H.identifier=E.identifier AND E.tx_hash IN ({", ".join(["?"] * len(tx_hashes))}))'  # noqa: E501
         if length != 0:
             querystr += f' AND identifier NOT IN ({", ".join(["?"] * length)})'
             bindings = [*tx_hashes, *customized_event_ids]
         else:
             bindings = tx_hashes  # type: ignore  # different type of elements in the list
-        write_cursor.execute(querystr, bindings)
+        if (timestamp := write_cursor.execute(f'SELECT MIN(timestamp) {querystr}', bindings).fetchone()[0]) is not None:  # noqa: E501
+            # the events will be decoded again so the accounting after them may change
+            self.db.invalidate_pnl_checkpoints(ts_ms_to_sec(timestamp))
+        write_cursor.execute(f'DELETE {querystr}', bindings)
 
     def get_customized_event_identifiers(
             self,
@@ -398,10 +527,13 @@ class DBHistoryEvents:
         )
         bindings.extend(prepared_bindings)
 
-        cursor.execute(base_query + prepared_query, bindings)
+        if filter_query.pagination is None:  # the whole history. Don't block meanwhile.
+            entries: list[Any] | 'DBCursor' = cursor.execute_in_thread(base_query + prepared_query, bindings)  # noqa: E501
+        else:
+            entries = cursor.execute(base_query + prepared_query, bindings)
         output: list[HistoryBaseEntry] | list[tuple[int, HistoryBaseEntry]] = []
         data_start_idx = type_idx + 1
-        for entry in cursor:
+        for entry in entries:
             entry_type = HistoryBaseEntryType(entry[type_idx])
             try:
                 deserialized_event: HistoryEvent | (EvmEvent | (EthWithdrawalEvent | EthBlockEvent))  # noqa: E501
@@ -611,13 +743,14 @@ class DBHistoryEvents:
         the number of events if any limit is applied, otherwise the second value matches
         the first.
         """
-        prepared_query, bindings = query_filter.prepare(with_pagination=False)
-        # we need to select everything because any column could be used in the filter
-        query = f'SELECT {query_filter.get_columns()} {query_filter.get_join_query()} {prepared_query}'  # noqa: E501
-        if group_by_event_ids:
-            query = f'SELECT event_identifier FROM ({query}) GROUP BY event_identifier'
-        query = f'SELECT COUNT(*) FROM ({query})'
-        count_without_limit = cursor.execute(query, bindings).fetchone()[0]
+        counts = self.db.history_events_counts
+        if group_by_event_ids is True or (count_without_limit := self._get_count_from_totals(query_filter)) is None:  # noqa: E501
+            prepared_query, bindings = query_filter.prepare(with_pagination=False, with_order=False)  # noqa: E501
+            # we need to select everything because any column could be used in the filter
+            query = f'SELECT {query_filter.get_columns()} {query_filter.get_join_query()} {prepared_query}'  # noqa: E501
+            if group_by_event_ids:
+                query = f'SELECT event_identifier FROM ({query}) GROUP BY event_identifier'
+            count_without_limit = counts.count(cursor, f'SELECT COUNT(*) FROM ({query})', bindings)
 
         if entries_limit is not None:
             prepared_query, bindings = query_filter.prepare(
@@ -628,17 +761,40 @@ class DBHistoryEvents:
             )
 
             free_query_group_by = maybe_filter_ignore_asset(query_filter)
-            count_with_limit = cursor.execute(
-                f'SELECT COUNT(*) FROM ('
-                f'SELECT {query_filter.get_columns()} {query_filter.get_join_query()}{free_query_group_by}'  # we take the groups before the limit has been applied  # noqa: E501
-                'GROUP BY event_identifier ORDER BY timestamp DESC, sequence_index ASC LIMIT ?'
-                f'){prepared_query}',
-                [entries_limit] + bindings,  # add limit's binding before prepared_query's bindings
-            ).fetchone()[0]
+            count_with_limit = counts.count(
+                cursor=cursor,
+                query=(
+                    f'SELECT COUNT(*) FROM ('
+                    f'SELECT {query_filter.get_columns()} {query_filter.get_join_query()}{free_query_group_by}'  # we take the groups before the limit has been applied  # noqa: E501
+                    'GROUP BY event_identifier ORDER BY timestamp DESC, sequence_index ASC LIMIT ?'
+                    f'){prepared_query}'
+                ),
+                bindings=[entries_limit] + bindings,  # add limit's binding before prepared_query's bindings  # noqa: E501
+            )
             return count_without_limit, count_with_limit
 
         return count_without_limit, count_without_limit
 
+    def _get_count_from_totals(self, query_filter: HistoryBaseEntryFilterQuery) -> int | None:
+        """Returns the number of events of a filter that matches all events, or all events
+        of a location, from the totals per location. None for any other filter or if the
+        totals can't be used right now."""
+        if (
+            not isinstance(query_filter, HistoryEventFilterQuery) or
+            query_filter.join_clause is not None or
+            any(
+                fil is not query_filter.location_filter and len(fil.prepare()[0]) != 0
+                for fil in query_filter.filters
+            ) or
+            (totals := self.db.history_events_counts.get_totals()) is None
+        ):
+            return None
+
+        if query_filter.location_filter is None:
+            return sum(totals.values())
+
+        return totals.get(query_filter.location_filter.location.serialize_for_db(), 0)
+
     def get_value_stats(
             self,
             cursor: 'DBCursor',
@@ -652,7 +808,7 @@ class DBHistoryEvents:
         """
         usd_value = ZERO
         try:
-            query = 'SELECT SUM(CAST(usd_value AS REAL)) FROM history_events ' + query_filters
+            query = 'SELECT DECIMAL_SUM(usd_value) FROM history_events ' + query_filters
             result = cursor.execute(query, bindings).fetchone()[0]  # count(*) always returns
             if result is not None:
                 usd_value = deserialize_fval(
@@ -664,7 +820,7 @@ class DBHistoryEvents:
             log.error(f'Didnt get correct valid usd_value for history_events query. {e!s}')
 
         query = (
-            f'SELECT asset, SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)) '
+            f'SELECT asset, DECIMAL_SUM(amount), DECIMAL_SUM(usd_value) '
             f'FROM history_events {query_filters}'
             f' GROUP BY asset;'
         )
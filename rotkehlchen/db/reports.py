@@ -1,11 +1,16 @@
+import json
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from copy import deepcopy
 from typing import TYPE_CHECKING, Any, Literal, overload
 
 from pysqlcipher3 import dbapi2 as sqlcipher
 
-from rotkehlchen.accounting.constants import FREE_PNL_EVENTS_LIMIT, FREE_REPORTS_LOOKUP_LIMIT
+from rotkehlchen.accounting.constants import (
+    FREE_PNL_EVENTS_LIMIT,
+    FREE_REPORTS_LOOKUP_LIMIT,
+    PNL_CHECKPOINTS_MAX_NUM,
+)
 from rotkehlchen.accounting.pnl import PnlTotals
 from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
 from rotkehlchen.db.settings import DBSettings
@@ -241,6 +246,28 @@ class DBAccountingReports:
                     f'Probably report {report_id} does not exist?',
                 ) from e
 
+    def add_report_data_entries(
+            self,
+            report_id: int,
+            entries: Sequence[tuple[Timestamp, str]],
+    ) -> None:
+        """Adds many already serialized events to a transient report in a single write
+
+        May raise:
+        - InputError if the events can not be written to the DB. Probably report id does not exist.
+        """
+        with self.db.transient_write() as cursor:
+            try:
+                cursor.executemany(
+                    'INSERT INTO pnl_events(report_id, timestamp, data) VALUES(?, ?, ?);',
+                    [(report_id, time, data) for time, data in entries],
+                )
+            except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+                raise InputError(
+                    f'Could not write {len(entries)} events data to the DB due to {e!s}. '
+                    f'Probably report {report_id} does not exist?',
+                ) from e
+
     def get_report_data(
             self,
             filter_: 'ReportDataFilterQuery',
@@ -251,43 +278,42 @@ class DBAccountingReports:
         May raise:
         - InputError if the report ID does not exist in the DB
         """
-        cursor = self.db.conn_transient.cursor()
-        report_id = filter_.report_id
-        query_result = cursor.execute(
-            'SELECT COUNT(*) FROM pnl_reports WHERE identifier=?',
-            (report_id,),
-        )
-        if query_result.fetchone()[0] != 1:
-            raise InputError(
-                f'Tried to get PnL events from non existing report with id {report_id}',
+        with self.db.conn_transient.read_ctx() as cursor:
+            report_id = filter_.report_id
+            query_result = cursor.execute(
+                'SELECT COUNT(*) FROM pnl_reports WHERE identifier=?',
+                (report_id,),
             )
-
-        query, bindings = filter_.prepare()
-        query = 'SELECT timestamp, data FROM pnl_events ' + query
-        cursor.execute(query, bindings)
-
-        records = []
-        for result in cursor:
-            try:
-                record = ProcessedAccountingEvent.deserialize_from_db(result[0], result[1])
-            except DeserializationError as e:
-                self.db.msg_aggregator.add_error(
-                    f'Error deserializing AccountingEvent from the DB. Skipping it.'
-                    f'Error was: {e!s}',
+            if query_result.fetchone()[0] != 1:
+                raise InputError(
+                    f'Tried to get PnL events from non existing report with id {report_id}',
                 )
-                continue
 
-            records.append(record)
+            query, bindings = filter_.prepare()
+            query = 'SELECT timestamp, data FROM pnl_events ' + query
+            records = []
+            # sorting and reading the events of big reports takes long. Don't block meanwhile.
+            for result in cursor.execute_in_thread(query, bindings):
+                try:
+                    record = ProcessedAccountingEvent.deserialize_from_db(result[0], result[1])
+                except DeserializationError as e:
+                    self.db.msg_aggregator.add_error(
+                        f'Error deserializing AccountingEvent from the DB. Skipping it.'
+                        f'Error was: {e!s}',
+                    )
+                    continue
 
-        if filter_.pagination is not None:
-            no_pagination_filter = deepcopy(filter_)
-            no_pagination_filter.pagination = None
-            query, bindings = no_pagination_filter.prepare()
-            query = 'SELECT COUNT(*) FROM pnl_events ' + query
-            results = cursor.execute(query, bindings).fetchone()
-            total_filter_count = results[0]
-        else:
-            total_filter_count = len(records)
+                records.append(record)
+
+            if filter_.pagination is not None:
+                no_pagination_filter = deepcopy(filter_)
+                no_pagination_filter.pagination = None
+                query, bindings = no_pagination_filter.prepare()
+                query = 'SELECT COUNT(*) FROM pnl_events ' + query
+                results = cursor.execute(query, bindings).fetchone()
+                total_filter_count = results[0]
+            else:
+                total_filter_count = len(records)
 
         return _get_reports_or_events_maybe_limit(
             entry_type='events',
@@ -295,3 +321,67 @@ class DBAccountingReports:
             entries=records,
             with_limit=with_limit,
         )
+
+    def add_pnl_checkpoint(
+            self,
+            timestamp: Timestamp,
+            settings_hash: str,
+            history_counts: list[int],
+            data: dict[str, Any],
+    ) -> None:
+        """Save the accounting state right before the given timestamp. Only the latest
+        PNL_CHECKPOINTS_MAX_NUM checkpoints of each settings hash are kept"""
+        with self.db.transient_write() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO pnl_checkpoints(timestamp, settings_hash, '
+                'history_counts, data) VALUES(?, ?, ?, ?)',
+                (timestamp, settings_hash, json.dumps(history_counts), json.dumps(data)),
+            )
+            cursor.execute(
+                'DELETE FROM pnl_checkpoints WHERE settings_hash=? AND timestamp NOT IN '
+                '(SELECT timestamp FROM pnl_checkpoints WHERE settings_hash=? '
+                'ORDER BY timestamp DESC LIMIT ?)',
+                (settings_hash, settings_hash, PNL_CHECKPOINTS_MAX_NUM),
+            )
+
+    def get_pnl_checkpoints(
+            self,
+            settings_hash: str,
+            to_ts: Timestamp,
+    ) -> list[tuple[Timestamp, list[int]]]:
+        """Returns the timestamp and history counts of the checkpoints of the settings hash
+        up to the given timestamp, latest first. Malformed checkpoints are skipped"""
+        checkpoints = []
+        with self.db.conn_transient.read_ctx() as cursor:
+            cursor.execute(
+                'SELECT timestamp, history_counts FROM pnl_checkpoints WHERE '
+                'settings_hash=? AND timestamp <= ? ORDER BY timestamp DESC',
+                (settings_hash, to_ts),
+            )
+            for timestamp, history_counts in cursor:
+                try:
+                    checkpoints.append((Timestamp(timestamp), json.loads(history_counts)))
+                except json.JSONDecodeError as e:
+                    log.error(f'Skipping PnL checkpoint at {timestamp} due to {e!s}')
+
+        return checkpoints
+
+    def get_pnl_checkpoint_data(self, settings_hash: str, timestamp: Timestamp) -> dict[str, Any]:
+        """Returns the accounting state saved in the checkpoint
+
+        May raise:
+        - DeserializationError if the checkpoint does not exist or can't be decoded
+        """
+        with self.db.conn_transient.read_ctx() as cursor:
+            result = cursor.execute(
+                'SELECT data FROM pnl_checkpoints WHERE settings_hash=? AND timestamp=?',
+                (settings_hash, timestamp),
+            ).fetchone()
+
+        if result is None:
+            raise DeserializationError(f'PnL checkpoint at {timestamp} does not exist')
+
+        try:
+            return json.loads(result[0])
+        except json.JSONDecodeError as e:
+            raise DeserializationError(f'Could not decode PnL checkpoint at {timestamp} due to {e!s}') from e  # noqa: E501
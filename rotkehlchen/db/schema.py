@@ -743,6 +743,22 @@ DB_CREATE_KEY_VALUE_CACHE = """CREATE TABLE IF NOT EXISTS key_value_cache (
     value TEXT
 );"""
 
+# Secondary indexes for the columns the history events and transactions are filtered by.
+# event_identifier, evm_transactions tx_hash and the mapping tables by tx_id are already
+# indexed by their unique constraints and primary keys. The history events timestamp index
+# is in the order the events are shown, newest first and then by sequence index, so that
+# pages are read from it without sorting.
+DB_CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp DESC, sequence_index);
+CREATE INDEX IF NOT EXISTS idx_history_events_location ON history_events(location);
+CREATE INDEX IF NOT EXISTS idx_history_events_asset ON history_events(asset);
+CREATE INDEX IF NOT EXISTS idx_evm_events_info_tx_hash ON evm_events_info(tx_hash);
+CREATE INDEX IF NOT EXISTS idx_evm_events_info_counterparty ON evm_events_info(counterparty);
+CREATE INDEX IF NOT EXISTS idx_evm_transactions_timestamp ON evm_transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_evm_transactions_chain_id_timestamp ON evm_transactions(chain_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_evmtx_address_mappings_address ON evmtx_address_mappings(address);
+"""  # noqa: E501
+
 
 DB_SCRIPT_CREATE_TABLES = f"""
 PRAGMA foreign_keys=off;
@@ -800,6 +816,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_MAPPED_ACCOUNTING_RULES}
 {DB_CREATE_UNRESOLVED_REMOTE_CONFLICTS}
 {DB_CREATE_KEY_VALUE_CACHE}
+{DB_CREATE_INDEXES}
 COMMIT;
 PRAGMA foreign_keys=on;
 """
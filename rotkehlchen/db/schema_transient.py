@@ -47,6 +47,18 @@ CREATE TABLE IF NOT EXISTS pnl_events (
 );
 """
 
+# State of the accounting right before the given timestamp. Used to resume PnL reports
+# created with the same settings instead of processing the entire history again.
+DB_CREATE_PNL_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS pnl_checkpoints (
+    timestamp INTEGER NOT NULL,
+    settings_hash TEXT NOT NULL,
+    history_counts TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY(timestamp, settings_hash)
+);
+"""
+
 DB_CREATE_SETTINGS = """
 CREATE TABLE IF NOT EXISTS settings (
     name VARCHAR[24] NOT NULL PRIMARY KEY,
@@ -61,6 +73,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_REPORT_SETTINGS}
 {DB_CREATE_REPORT_TOTALS}
 {DB_CREATE_PNL_EVENTS}
+{DB_CREATE_PNL_CHECKPOINTS}
 {DB_CREATE_SETTINGS}
 COMMIT;
 PRAGMA foreign_keys=on;
@@ -57,6 +57,9 @@ DEFAULT_CONNECT_TIMEOUT = 30
 DEFAULT_READ_TIMEOUT = 30
 DEFAULT_ORACLE_PENALTY_THRESHOLD_COUNT = 5
 DEFAULT_ORACLE_PENALTY_DURATION = 1800
+DEFAULT_DB_BACKUP_FREQUENCY = 0  # automatic backups are disabled by default
+DEFAULT_DB_BACKUPS_TO_KEEP = 5
+DEFAULT_ETHERSCAN_QUERIES_PER_SECOND = 5  # limit of the free etherscan api keys
 
 JSON_KEYS = (
     'current_price_oracles',
@@ -92,6 +95,9 @@ INTEGER_KEYS = (
     'read_timeout',
     'oracle_penalty_threshold_count',
     'oracle_penalty_duration',
+    'db_backup_frequency',
+    'db_backups_to_keep',
+    'etherscan_queries_per_second',
 )
 STRING_KEYS = (
     'ksm_rpc_endpoint',
@@ -143,6 +149,9 @@ CachedDBSettingsFieldNames = Literal[
     'read_timeout',
     'oracle_penalty_threshold_count',
     'oracle_penalty_duration',
+    'db_backup_frequency',
+    'db_backups_to_keep',
+    'etherscan_queries_per_second',
 ]
 
 DBSettingsFieldTypes = (
@@ -201,6 +210,9 @@ class DBSettings:
     read_timeout: int = DEFAULT_READ_TIMEOUT
     oracle_penalty_threshold_count: int = DEFAULT_ORACLE_PENALTY_THRESHOLD_COUNT
     oracle_penalty_duration: int = DEFAULT_ORACLE_PENALTY_DURATION
+    db_backup_frequency: int = DEFAULT_DB_BACKUP_FREQUENCY
+    db_backups_to_keep: int = DEFAULT_DB_BACKUPS_TO_KEEP
+    etherscan_queries_per_second: int = DEFAULT_ETHERSCAN_QUERIES_PER_SECOND
 
     def serialize(self) -> dict[str, Any]:
         settings_dict = {}
@@ -257,6 +269,9 @@ class ModifiableDBSettings(NamedTuple):
     read_timeout: int | None = None
     oracle_penalty_threshold_count: int | None = None
     oracle_penalty_duration: int | None = None
+    db_backup_frequency: int | None = None
+    db_backups_to_keep: int | None = None
+    etherscan_queries_per_second: int | None = None
 
     def serialize(self) -> dict[str, Any]:
         settings_dict = {}
@@ -447,3 +462,15 @@ class CachedSettings:
     @property
     def oracle_penalty_threshold_count(self) -> int:
         return self._settings.oracle_penalty_threshold_count
+
+    @property
+    def db_backup_frequency(self) -> int:
+        return self._settings.db_backup_frequency
+
+    @property
+    def db_backups_to_keep(self) -> int:
+        return self._settings.db_backups_to_keep
+
+    @property
+    def etherscan_queries_per_second(self) -> int:
+        return self._settings.etherscan_queries_per_second
@@ -63,17 +63,34 @@ def _add_new_supported_locations(write_cursor: 'DBCursor') -> None:
     log.debug('Exit _add_new_supported_locations')
 
 
+def _add_indexes(write_cursor: 'DBCursor') -> None:
+    """Add indexes for the columns history events and transactions are filtered by"""
+    log.debug('Enter _add_indexes')
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp DESC, sequence_index);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_location ON history_events(location);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_asset ON history_events(asset);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_events_info_tx_hash ON evm_events_info(tx_hash);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_events_info_counterparty ON evm_events_info(counterparty);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_transactions_timestamp ON evm_transactions(timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_transactions_chain_id_timestamp ON evm_transactions(chain_id, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evmtx_address_mappings_address ON evmtx_address_mappings(address);')  # noqa: E501
+    log.debug('Exit _add_indexes')
+
+
 def upgrade_v41_to_v42(db: 'DBHandler', progress_handler: 'DBUpgradeProgressHandler') -> None:
     """Upgrades the DB from v41 to v42. This was in v1.33 release.
 
         - Create new tables for zksync lite
+        - Add indexes for the history events and transactions filters
     """
     log.debug('Enter userdb v41->v42 upgrade')
-    progress_handler.set_total_steps(2)
+    progress_handler.set_total_steps(3)
     with db.user_write() as write_cursor:
         _add_zksynclite(write_cursor)
         progress_handler.new_step()
         _add_new_supported_locations(write_cursor)
         progress_handler.new_step()
+        _add_indexes(write_cursor)
+        progress_handler.new_step()
 
     log.debug('Finish userdb v41->v42 upgrade')
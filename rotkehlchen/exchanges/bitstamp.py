@@ -306,6 +306,9 @@ class Bitstamp(ExchangeInterface):
                     )
                     indices_to_delete.append(idx)
 
+        if len(indices_to_delete) != 0:  # the accounting after the updated movements may change
+            self.db.invalidate_pnl_checkpoints(min(crypto_asset_movements[idx].timestamp for idx in indices_to_delete))  # noqa: E501
+
         for idx in sorted(indices_to_delete, reverse=True):
             del crypto_asset_movements[idx]  # remove the crypto asset movements whose data we matched in the DB  # noqa: E501
 
@@ -22,6 +22,7 @@ from rotkehlchen.serialization.deserialize import deserialize_evm_address, deser
 from rotkehlchen.types import ChecksumEvmAddress, Eth2PubKey, ExternalService
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import from_wei, set_user_agent, ts_now, ts_sec_to_ms
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 if TYPE_CHECKING:
@@ -40,7 +41,7 @@ class BeaconChain(ExternalServiceWithApiKey):
         super().__init__(database=database, service_name=ExternalService.BEACONCHAIN)
         self.db: DBHandler  # specifying DB is not optional
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
         self.warning_given = False
         set_user_agent(self.session)
         self.url = f'{BEACONCHAIN_ROOT_URL}/api/v1/'
@@ -20,6 +20,7 @@ from rotkehlchen.serialization.deserialize import deserialize_fval
 from rotkehlchen.types import ChecksumEvmAddress, ExternalService, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import from_wei, iso8601ts_to_timestamp, set_user_agent, ts_sec_to_ms
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 if TYPE_CHECKING:
@@ -36,7 +37,7 @@ class Blockscout(ExternalServiceWithApiKey):
         super().__init__(database=database, service_name=ExternalService.BLOCKSCOUT)
         self.db: DBHandler  # specifying DB is not optional
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
         set_user_agent(self.session)
         self.url = 'https://eth.blockscout.com/api/v2/'
 
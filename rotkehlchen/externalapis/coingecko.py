@@ -20,8 +20,10 @@ from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.interfaces import HistoricalPriceOracleWithCoinListInterface
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChainID, EvmTokenKind, Price, Timestamp
+from rotkehlchen.utils.concurrency import single_flight
 from rotkehlchen.utils.misc import create_timestamp, set_user_agent, timestamp_to_date, ts_now
 from rotkehlchen.utils.mixins.penalizable_oracle import PenalizablePriceOracleMixin
+from rotkehlchen.utils.network import create_session
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -505,7 +507,7 @@ class Coingecko(HistoricalPriceOracleWithCoinListInterface, PenalizablePriceOrac
     def __init__(self) -> None:
         HistoricalPriceOracleWithCoinListInterface.__init__(self, oracle_name='coingecko')
         PenalizablePriceOracleMixin.__init__(self)
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
         set_user_agent(self.session)
         self.last_rate_limit = 0
 
@@ -527,6 +529,7 @@ class Coingecko(HistoricalPriceOracleWithCoinListInterface, PenalizablePriceOrac
     ) -> dict[str, Any]:
         ...
 
+    @single_flight()
     def _query(
             self,
             module: str,
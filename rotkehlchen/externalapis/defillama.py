@@ -27,6 +27,7 @@ from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChainID, Price, Timestamp
 from rotkehlchen.utils.misc import create_timestamp, timestamp_to_date, ts_now
 from rotkehlchen.utils.mixins.penalizable_oracle import PenalizablePriceOracleMixin
+from rotkehlchen.utils.network import create_session
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -38,7 +39,7 @@ class Defillama(HistoricalPriceOracleInterface, PenalizablePriceOracleMixin):
     def __init__(self) -> None:
         HistoricalPriceOracleInterface.__init__(self, oracle_name='defillama')
         PenalizablePriceOracleMixin.__init__(self)
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
         self.last_rate_limit = 0
 
@@ -29,6 +29,7 @@ from rotkehlchen.serialization.deserialize import (
 )
 from rotkehlchen.types import (
     SUPPORTED_EVM_CHAINS,
+    ApiKey,
     ChecksumEvmAddress,
     EvmInternalTransaction,
     EvmTransaction,
@@ -40,6 +41,7 @@ from rotkehlchen.types import (
 )
 from rotkehlchen.utils.data_structures import LRUCacheWithRemove
 from rotkehlchen.utils.misc import hex_or_bytes_to_int, set_user_agent
+from rotkehlchen.utils.network import TokenBucket, create_session
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 if TYPE_CHECKING:
@@ -48,6 +50,7 @@ if TYPE_CHECKING:
 
 ETHERSCAN_QUERY_LIMIT = 10000
 TRANSACTIONS_BATCH_NUM = 10
+ETHERSCAN_NO_API_KEY_QUERIES_PER_SECOND = 0.2  # limit of the queries without an api key
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -105,7 +108,10 @@ class Etherscan(ExternalServiceWithApiKey, ABC):
             SupportedBlockchain.SCROLL,
         ) else 'api-'
         self.base_url = base_url
-        self.session = requests.session()
+        self.session = create_session(handles_rate_limits=True)
+        # shared by all greenlets querying this etherscan so that they stay within its
+        # limits. Replaced when the limit changes. See _get_query_bucket.
+        self.query_bucket = TokenBucket(rate=ETHERSCAN_NO_API_KEY_QUERIES_PER_SECOND)
         self.warning_given = False
         set_user_agent(self.session)
         self.timestamp_to_block_cache: LRUCacheWithRemove[Timestamp, int] = LRUCacheWithRemove(maxsize=32)  # noqa: E501
@@ -125,6 +131,15 @@ class Etherscan(ExternalServiceWithApiKey, ABC):
         else:  # Polygon POS
             self.earliest_ts = 1590856200
 
+    def _get_query_bucket(self, api_key: ApiKey | None) -> TokenBucket:
+        """Returns the rate limiter of the queries. Queries with an api key are limited
+        by the tier of the key, which the user sets in the etherscan_queries_per_second
+        setting and is the one of the free keys by default."""
+        rate = ETHERSCAN_NO_API_KEY_QUERIES_PER_SECOND if api_key is None else CachedSettings().etherscan_queries_per_second  # noqa: E501
+        if self.query_bucket.max_rate != rate:
+            self.query_bucket = TokenBucket(rate=rate)
+        return self.query_bucket
+
     @overload
     def _query(
             self,
@@ -244,15 +259,18 @@ class Etherscan(ExternalServiceWithApiKey, ABC):
         backoff = 1
         backoff_limit = 33
         timeout = timeout if timeout else CachedSettings().get_timeout_tuple()
+        query_bucket = self._get_query_bucket(api_key)
         while backoff < backoff_limit:
             response = None
             log.debug(f'Querying {self.chain} etherscan: {query_str}')
+            query_bucket.acquire()
             try:
                 response = self.session.get(query_str, timeout=timeout)
             except requests.exceptions.RequestException as e:
                 raise RemoteError(f'{self.chain} Etherscan API request failed due to {e!s}') from e
 
             if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                query_bucket.rate_limited()
                 if backoff >= backoff_limit:
                     raise RemoteError(
                         f'Getting {self.chain} Etherscan too many requests error '
@@ -300,6 +318,7 @@ class Etherscan(ExternalServiceWithApiKey, ABC):
                         if result == 'Contract source code not verified':
                             return None
                         if 'rate limit reached' in result:
+                            query_bucket.rate_limited()
                             log.debug(
                                 f'Got response: {response.text} from {self.chain} etherscan.'
                                 f' Will backoff for {backoff} seconds.',
@@ -334,6 +353,7 @@ class Etherscan(ExternalServiceWithApiKey, ABC):
                 ) from e
 
             # success, break out of the loop and return result
+            query_bucket.succeeded()
             return result
 
         return result
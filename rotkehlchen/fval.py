@@ -59,20 +59,16 @@ class FVal:
         return hash(self.num)
 
     def __gt__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('1')
+        return self.num > _evaluate_input(other)
 
     def __lt__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('-1')
+        return self.num < _evaluate_input(other)
 
     def __le__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('-1'), Decimal('0'))
+        return self.num <= _evaluate_input(other)
 
     def __ge__(self, other: AcceptableFValOtherInput) -> bool:
-        evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('1'), Decimal('0'))
+        return self.num >= _evaluate_input(other)
 
     def __eq__(self, other: object) -> bool:
         evaluated_other: Decimal | int
@@ -83,59 +79,46 @@ class FVal:
         else:
             evaluated_other = other
 
-        return self.num.compare_signal(evaluated_other) == Decimal('0')
+        return not self.num.compare_signal(evaluated_other)  # signals for NaN unlike ==
 
     def __add__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__add__(evaluated_other))
+        return _from_decimal(self.num.__add__(_evaluate_input(other)))
 
     def __sub__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__sub__(evaluated_other))
+        return _from_decimal(self.num.__sub__(_evaluate_input(other)))
 
     def __mul__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__mul__(evaluated_other))
+        return _from_decimal(self.num.__mul__(_evaluate_input(other)))
 
     def __truediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__truediv__(evaluated_other))
+        return _from_decimal(self.num.__truediv__(_evaluate_input(other)))
 
     def __floordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__floordiv__(evaluated_other))
+        return _from_decimal(self.num.__floordiv__(_evaluate_input(other)))
 
     def __pow__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__pow__(evaluated_other))
+        return _from_decimal(self.num.__pow__(_evaluate_input(other)))
 
     def __radd__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__radd__(evaluated_other))
+        return _from_decimal(self.num.__radd__(_evaluate_input(other)))
 
     def __rsub__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__rsub__(evaluated_other))
+        return _from_decimal(self.num.__rsub__(_evaluate_input(other)))
 
     def __rmul__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__rmul__(evaluated_other))
+        return _from_decimal(self.num.__rmul__(_evaluate_input(other)))
 
     def __rtruediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__rtruediv__(evaluated_other))
+        return _from_decimal(self.num.__rtruediv__(_evaluate_input(other)))
 
     def __rfloordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__rfloordiv__(evaluated_other))
+        return _from_decimal(self.num.__rfloordiv__(_evaluate_input(other)))
 
     def __mod__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__mod__(evaluated_other))
+        return _from_decimal(self.num.__mod__(_evaluate_input(other)))
 
     def __rmod__(self, other: AcceptableFValOtherInput) -> 'FVal':
-        evaluated_other = _evaluate_input(other)
-        return FVal(self.num.__rmod__(evaluated_other))
+        return _from_decimal(self.num.__rmod__(_evaluate_input(other)))
 
     def __float__(self) -> float:
         return float(self.num)
@@ -143,10 +126,10 @@ class FVal:
     # --- Unary operands
 
     def __neg__(self) -> 'FVal':
-        return FVal(self.num.__neg__())
+        return _from_decimal(self.num.__neg__())
 
     def __abs__(self) -> 'FVal':
-        return FVal(self.num.copy_abs())
+        return _from_decimal(self.num.copy_abs())
 
     # --- Other operations
 
@@ -157,7 +140,7 @@ class FVal:
         """
         evaluated_other = _evaluate_input(other)
         evaluated_third = _evaluate_input(third)
-        return FVal(self.num.fma(evaluated_other, evaluated_third))
+        return _from_decimal(self.num.fma(evaluated_other, evaluated_third))
 
     def to_percentage(self, precision: int = 4, with_perc_sign: bool = True) -> str:
         return f'{self.num * 100:.{precision}f}{"%" if with_perc_sign else ""}'
@@ -184,6 +167,14 @@ class FVal:
         return diff_num <= evaluated_max_diff.num
 
 
+def _from_decimal(num: Decimal) -> FVal:
+    """Create an FVal from the Decimal result of an operation without going through the
+    checks of the constructor. Used by all the operations since it's a lot faster."""
+    value = object.__new__(FVal)
+    value.num = num
+    return value
+
+
 def _evaluate_input(other: Any) -> Decimal | int:
     """Evaluate 'other' and return its Decimal representation"""
     if isinstance(other, FVal):
@@ -0,0 +1,82 @@
+from typing import TYPE_CHECKING, Any, Final
+
+from rotkehlchen.utils.data_structures import LRUCacheWithRemove
+
+if TYPE_CHECKING:
+    from rotkehlchen.assets.asset import EvmToken
+    from rotkehlchen.types import ChainID, ChecksumEvmAddress
+
+EVM_TOKEN_CACHE_MAX_SIZE: Final = 8192
+
+
+class EvmTokenCache:
+    """LRU cache of the evm tokens of the global DB by (address, chain id)
+
+    Addresses that are not tokens are also kept, as None, since most of the addresses
+    looked up while decoding are contracts that are not tokens. Every write to the evm
+    tokens of the global DB needs to invalidate the entries it touches.
+    """
+
+    def __init__(self, maxsize: int = EVM_TOKEN_CACHE_MAX_SIZE) -> None:
+        self.entries: LRUCacheWithRemove[tuple[ChecksumEvmAddress, ChainID], EvmToken | None] = LRUCacheWithRemove(maxsize=maxsize)  # noqa: E501
+        self.hits = 0
+        self.misses = 0
+        # increased on every invalidation so that a token read from the DB while it was
+        # being modified by another greenlet is not kept in the cache
+        self.generation = 0
+
+    def get(
+            self,
+            address: 'ChecksumEvmAddress',
+            chain_id: 'ChainID',
+    ) -> tuple[bool, 'EvmToken | None']:
+        """Returns whether the address is in the cache and if it is, its token or None
+        if the address is known to not be a token"""
+        if (key := (address, chain_id)) in self.entries:
+            self.hits += 1
+            return True, self.entries.get(key)
+
+        self.misses += 1
+        return False, None
+
+    def add(
+            self,
+            address: 'ChecksumEvmAddress',
+            chain_id: 'ChainID',
+            token: 'EvmToken | None',
+            generation: int,
+    ) -> None:
+        """Add the result of a lookup that started when the cache was at the given generation"""
+        if generation == self.generation:
+            self.entries.add((address, chain_id), token)
+
+    def invalidate(self, address: 'ChecksumEvmAddress', chain_id: 'ChainID') -> None:
+        self.generation += 1
+        self.entries.remove((address, chain_id))
+
+    def invalidate_identifier(self, identifier: str) -> None:
+        """Remove the token with the given identifier and any token it is underlying of"""
+        self.generation += 1
+        identifier = identifier.lower()
+        for key in [
+            key for key, token in self.entries.cache.items() if token is not None and (
+                token.identifier.lower() == identifier or
+                any(
+                    x.get_identifier(parent_chain=token.chain_id).lower() == identifier
+                    for x in token.underlying_tokens or []
+                )
+            )
+        ]:
+            self.entries.remove(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries.cache),
+            'max_size': self.entries.maxsize,
+        }
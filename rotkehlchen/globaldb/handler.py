@@ -1,10 +1,13 @@
+import bisect
+import json
 import logging
 import os
 import shutil
 import sqlite3
 from collections import defaultdict
+from collections.abc import Sequence
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Literal, Optional, cast, overload
+from typing import TYPE_CHECKING, Any, Final, Literal, Optional, cast, overload
 
 from gevent.lock import Semaphore
 
@@ -31,6 +34,7 @@ from rotkehlchen.db.drivers.gevent import DBConnection, DBConnectionType, DBCurs
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import DBUpgradeError, InputError
 from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.fval import FVal
 from rotkehlchen.history.deserialization import deserialize_price
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -51,7 +55,9 @@ from rotkehlchen.utils.serialization import (
     deserialize_generic_asset_from_db,
 )
 
+from .evm_token_cache import EvmTokenCache
 from .migrations.manager import LAST_DATA_MIGRATION, maybe_apply_globaldb_migrations
+from .price_series import PriceSeriesCache
 from .schema import DB_SCRIPT_CREATE_TABLES
 from .upgrades.manager import maybe_upgrade_globaldb
 from .utils import GLOBAL_DB_VERSION, globaldb_get_setting_value
@@ -63,6 +69,12 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Log of the changes of the price_history table kept in the settings table as a list of
+# [change id, earliest changed timestamp]. PnL checkpoints keep the id of the latest
+# change so that they are not used if the prices before them changed since.
+PRICE_CHANGES_SETTING: Final = 'price_history_changes'
+PRICE_CHANGES_MAX_NUM: Final = 100  # after that the oldest changes get merged
+
 
 _ALL_ASSETS_TABLES_JOINS = """
 FROM {dbprefix}assets LEFT JOIN {dbprefix}common_asset_details on {dbprefix}assets.identifier={dbprefix}common_asset_details.identifier
@@ -207,6 +219,8 @@ class GlobalDBHandler:
     conn: DBConnection
     used_backup: bool  # specifies if the global DB was restored from a backup
     packaged_db_lock: Semaphore
+    price_series_cache: PriceSeriesCache
+    evm_token_cache: EvmTokenCache
 
     def __new__(
             cls,
@@ -229,6 +243,8 @@ class GlobalDBHandler:
         GlobalDBHandler.__instance._data_directory = data_dir
         GlobalDBHandler.__instance.conn, GlobalDBHandler.__instance.used_backup = _initialize_global_db_directory(data_dir, sql_vm_instructions_cb)  # noqa: E501
         GlobalDBHandler.__instance.packaged_db_lock = Semaphore()
+        GlobalDBHandler.__instance.price_series_cache = PriceSeriesCache()
+        GlobalDBHandler.__instance.evm_token_cache = EvmTokenCache()
         return GlobalDBHandler.__instance
 
     def filepath(self) -> Path:
@@ -349,6 +365,9 @@ class GlobalDBHandler:
             raise InputError(
                 f'Failed to add asset {asset.identifier} into the assets table due to {e!s}',
             ) from e
+        finally:  # invalidate after the transaction so that no greenlet caches uncommitted data
+            if isinstance(asset, EvmToken):
+                GlobalDBHandler().evm_token_cache.invalidate(asset.evm_address, asset.chain_id)
 
     @staticmethod
     def retrieve_assets(userdb: 'DBHandler', filter_query: 'AssetsFilterQuery') -> tuple[list[dict[str, Any]], int]:  # noqa: E501
@@ -829,6 +848,12 @@ class GlobalDBHandler:
 
         If no token for the given address can be found None is returned.
         """
+        evm_token_cache = GlobalDBHandler().evm_token_cache
+        found, token = evm_token_cache.get(address=address, chain_id=chain_id)
+        if found is True:
+            return token
+
+        generation = evm_token_cache.generation
         with GlobalDBHandler().conn.read_ctx() as cursor:
             cursor.execute(
                 'SELECT A.identifier, B.address, B.chain, B.token_kind, B.decimals, C.name, '
@@ -840,13 +865,14 @@ class GlobalDBHandler:
             )
             results = cursor.fetchall()
             if len(results) == 0:
+                evm_token_cache.add(address=address, chain_id=chain_id, token=None, generation=generation)  # noqa: E501
                 return None
 
             token_data = results[0]
             underlying_tokens = GlobalDBHandler().fetch_underlying_tokens(cursor, token_data[0])
 
         try:
-            return EvmToken.deserialize_from_db(
+            token = EvmToken.deserialize_from_db(
                 entry=token_data,
                 underlying_tokens=underlying_tokens,
             )
@@ -857,6 +883,9 @@ class GlobalDBHandler:
             )
             return None
 
+        evm_token_cache.add(address=address, chain_id=chain_id, token=token, generation=generation)
+        return token
+
     @staticmethod
     def get_evm_tokens(
             chain_id: ChainID,
@@ -931,6 +960,8 @@ class GlobalDBHandler:
     def add_evm_token_data(write_cursor: DBCursor, entry: EvmToken) -> None:
         """Adds ethereum token specific information into the global DB
 
+        The caller invalidates the token in the evm token cache once the transaction ends.
+
         May raise InputError if the token already exists
         """
         try:
@@ -1041,6 +1072,9 @@ class GlobalDBHandler:
                 f'Failed to update DB entry for EVM token with address {entry.evm_address} at chain {entry.chain_id}'  # noqa: E501
                 f'due to a constraint being hit. Make sure the new values are valid ',
             ) from e
+        finally:  # the address or chain may have been edited too
+            GlobalDBHandler().evm_token_cache.invalidate_identifier(entry.identifier)
+            GlobalDBHandler().evm_token_cache.invalidate(entry.evm_address, entry.chain_id)
 
         return rotki_id
 
@@ -1153,6 +1187,10 @@ class GlobalDBHandler:
          May raise:
          - InputError if no asset with the provided identifier was found"""
         with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            prices_ts = write_cursor.execute(  # prices get deleted by cascade
+                'SELECT MIN(timestamp) FROM price_history WHERE from_asset=? OR to_asset=?',
+                (identifier, identifier),
+            ).fetchone()[0]
             write_cursor.execute('DELETE FROM assets WHERE identifier=?;', (identifier,))
             if write_cursor.rowcount != 1:
                 raise InputError(
@@ -1160,6 +1198,13 @@ class GlobalDBHandler:
                     f'but it was not found in the DB',
                 )
 
+            if prices_ts is not None:
+                GlobalDBHandler.record_price_change(write_cursor, Timestamp(prices_ts))
+
+        # invalidate after the commit so that no other greenlet reloads the deleted data
+        GlobalDBHandler().price_series_cache.invalidate_asset(identifier)  # prices got deleted by cascade  # noqa: E501
+        GlobalDBHandler().evm_token_cache.invalidate_identifier(identifier)
+
     @staticmethod
     def get_assets_with_symbol(
             symbol: str,
@@ -1233,26 +1278,20 @@ class GlobalDBHandler:
     ) -> Optional['HistoricalPrice']:
         """Gets the price around a particular timestamp
 
+        The prices of the pair are served from the in-memory price series cache.
+
         If no price can be found returns None
         """
-        querystr = (
-            'SELECT from_asset, to_asset, source_type, timestamp, '
-            'price, MIN(ABS(timestamp - ?)) FROM price_history '
-            'WHERE from_asset=? AND to_asset=? '
-            'AND timestamp between ? AND ?'
-        )
-        querylist = [timestamp, from_asset.identifier, to_asset.identifier, timestamp - max_seconds_distance, timestamp + max_seconds_distance]  # noqa: E501
-        if source is not None:
-            querystr += ' AND source_type=? '
-            querylist.append(source.serialize_for_db())
-
-        with GlobalDBHandler().conn.read_ctx() as cursor:
-            result = cursor.execute(querystr, tuple(querylist)).fetchone()
-            if result[0] is None:
-                return None
-
-        # The result tuple last entry MIN(ABS()) is disregarded in deserialize_from_db
-        return HistoricalPrice.deserialize_from_db(result)
+        globaldb = GlobalDBHandler()
+        with globaldb.conn.read_ctx() as cursor:
+            return globaldb.price_series_cache.get_closest_price(
+                cursor=cursor,
+                from_asset=from_asset,
+                to_asset=to_asset,
+                timestamp=timestamp,
+                max_seconds_distance=max_seconds_distance,
+                source=source,
+            )
 
     @staticmethod
     def get_historical_prices(
@@ -1263,28 +1302,103 @@ class GlobalDBHandler:
         """Given a list of from/to/timestamp data to query returns all values
         that could be found in the DB and None for those that could not be found.
         """
-        querystr = (
-            'SELECT from_asset, to_asset, source_type, timestamp, price, MIN(ABS(timestamp - ?)) '
-            'FROM price_history WHERE from_asset=? AND to_asset=? AND timestamp BETWEEN ? AND ?'
+        globaldb = GlobalDBHandler()
+        with globaldb.conn.read_ctx() as cursor:
+            return [
+                globaldb.price_series_cache.get_closest_price(
+                    cursor=cursor,
+                    from_asset=from_asset,
+                    to_asset=to_asset,
+                    timestamp=timestamp,
+                    max_seconds_distance=max_seconds_distance,
+                    source=source,
+                ) for from_asset, to_asset, timestamp in query_data
+            ]
+
+    @staticmethod
+    def get_historical_prices_in_range(
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+            from_timestamp: Timestamp,
+            to_timestamp: Timestamp,
+            sources: Sequence[HistoricalPriceOracle],
+    ) -> dict[HistoricalPriceOracle, list[tuple[Timestamp, Price]]]:
+        """Gets all the prices of the pair between the two timestamps for the given sources.
+        The pair is read with a single scan of the price_history table the first time and
+        then served from the in-memory price series cache.
+
+        Returns a mapping of source to the list of (timestamp, price) entries of that source
+        sorted by timestamp. Sources without any entry in the range are not included.
+        """
+        globaldb = GlobalDBHandler()
+        with globaldb.conn.read_ctx() as cursor:
+            pair_series = globaldb.price_series_cache.get_series(
+                cursor=cursor,
+                from_asset=from_asset,
+                to_asset=to_asset,
+            )
+
+        prices = {}
+        for source in sources:
+            if (series := pair_series.get(source)) is None:
+                continue
+
+            start = bisect.bisect_left(series.timestamps, from_timestamp)
+            end = bisect.bisect_right(series.timestamps, to_timestamp)
+            if start != end:
+                prices[source] = [
+                    (Timestamp(series.timestamps[idx]), Price(FVal(series.prices[idx])))
+                    for idx in range(start, end)
+                ]
+
+        return prices
+
+    @staticmethod
+    def _get_price_changes(cursor: DBCursor) -> list[tuple[int, Timestamp]]:
+        if (result := cursor.execute(
+            'SELECT value FROM settings WHERE name=?', (PRICE_CHANGES_SETTING,),
+        ).fetchone()) is None:
+            return []
+
+        try:
+            return [(int(change_id), Timestamp(int(timestamp))) for change_id, timestamp in json.loads(result[0])]  # noqa: E501
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            log.error(f'Could not read the price changes {result[0]} due to {e!s}. Resetting them')
+            return []  # checkpoints with later ids are treated as if all prices changed
+
+    @staticmethod
+    def record_price_change(write_cursor: DBCursor, timestamp: Timestamp) -> None:
+        """Log a change of the prices at or after the given timestamp. Needs to be called
+        in the same write transaction as every modification of the price_history table."""
+        changes = GlobalDBHandler._get_price_changes(write_cursor)
+        changes.append((changes[-1][0] + 1 if len(changes) != 0 else 1, timestamp))
+        if len(changes) > PRICE_CHANGES_MAX_NUM:  # merge the two oldest keeping the earliest timestamp  # noqa: E501
+            changes[:2] = [(changes[1][0], min(changes[0][1], changes[1][1]))]
+        write_cursor.execute(
+            'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
+            (PRICE_CHANGES_SETTING, json.dumps(changes)),
         )
-        querylist: list[tuple] = []
-        if source is not None:
-            querystr += ' AND source_type=? '
-            serialized_source = source.serialize_for_db()
-            for from_asset, to_asset, timestamp in query_data:
-                querylist.append((timestamp, from_asset.identifier, to_asset.identifier, timestamp - max_seconds_distance, timestamp + max_seconds_distance, serialized_source))  # noqa: E501
 
-        else:
-            for from_asset, to_asset, timestamp in query_data:
-                querylist.append((timestamp, from_asset.identifier, to_asset.identifier, timestamp - max_seconds_distance, timestamp + max_seconds_distance))  # noqa: E501
+    @staticmethod
+    def get_latest_price_change_id() -> int:
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            changes = GlobalDBHandler._get_price_changes(cursor)
+        return changes[-1][0] if len(changes) != 0 else 0
 
-        prices_results = []
+    @staticmethod
+    def get_price_changes_since(change_id: int) -> Timestamp | None:
+        """Returns the earliest timestamp of the prices changed after the change with the
+        given id or None if nothing changed. If the given id is not known, since the price
+        changes got reset, returns 0."""
         with GlobalDBHandler().conn.read_ctx() as cursor:
-            for entry in querylist:
-                result = cursor.execute(querystr, entry).fetchone()  # below last index of the result tuple is ignored in deserialize  # noqa: E501
-                prices_results.append(None if result[0] is None else HistoricalPrice.deserialize_from_db(result))  # noqa: E501
+            changes = GlobalDBHandler._get_price_changes(cursor)
 
-        return prices_results
+        if change_id > (changes[-1][0] if len(changes) != 0 else 0):
+            return Timestamp(0)
+
+        # merged changes may include changes before the given one, which is fine
+        timestamps = [timestamp for entry_id, timestamp in changes if entry_id > change_id]
+        return min(timestamps) if len(timestamps) != 0 else None
 
     @staticmethod
     def add_historical_prices(entries: list['HistoricalPrice']) -> None:
@@ -1300,6 +1414,8 @@ class GlobalDBHandler:
                     ) VALUES (?, ?, ?, ?, ?)
                     """, [x.serialize_for_db() for x in entries],
                 )
+                if write_cursor.rowcount > 0:
+                    GlobalDBHandler.record_price_change(write_cursor, min(x.timestamp for x in entries))  # noqa: E501
         except sqlite3.IntegrityError as e:
             # roll back any of the executemany that may have gone in
             log.error(
@@ -1321,6 +1437,14 @@ class GlobalDBHandler:
                             f'Failed to add {entry!s} due to {entry_error!s}. Skipping entry addition',  # noqa: E501
                         )
 
+                GlobalDBHandler.record_price_change(write_cursor, min(x.timestamp for x in entries))  # noqa: E501
+
+            # some entries may have been skipped so read the pairs again from the DB
+            for from_asset, to_asset in {(x.from_asset.identifier, x.to_asset.identifier) for x in entries}:  # noqa: E501
+                GlobalDBHandler().price_series_cache.invalidate_pair(from_asset, to_asset)
+        else:  # all entries are committed so add them to the cached series
+            GlobalDBHandler().price_series_cache.add_prices(entries)
+
     @staticmethod
     def add_single_historical_price(entry: HistoricalPrice) -> bool:
         """
@@ -1339,11 +1463,14 @@ class GlobalDBHandler:
                     """,
                     serialized,
                 )
+                GlobalDBHandler.record_price_change(write_cursor, entry.timestamp)
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to add single historical price. {e!s}. ',
             )
             return False
+        finally:
+            GlobalDBHandler().price_series_cache.invalidate_pair(entry.from_asset.identifier, entry.to_asset.identifier)  # noqa: E501
 
         return True
 
@@ -1359,6 +1486,12 @@ class GlobalDBHandler:
         - InputError if some db constraint was hit. Probably means manual price duplication.
         """
         with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            changed_ts = now = ts_now()
+            if (previous_ts := write_cursor.execute(  # turned into a historical manual price
+                'SELECT MIN(timestamp) FROM price_history WHERE source_type=? AND from_asset=?',
+                (HistoricalPriceOracle.MANUAL_CURRENT.serialize_for_db(), from_asset.identifier),
+            ).fetchone()[0]) is not None:
+                changed_ts = min(changed_ts, previous_ts)
             try:
                 write_cursor.execute(
                     'UPDATE price_history SET source_type=? WHERE source_type=? AND from_asset=?',
@@ -1392,7 +1525,7 @@ class GlobalDBHandler:
                         from_asset.identifier,
                         to_asset.identifier,
                         HistoricalPriceOracle.MANUAL_CURRENT.serialize_for_db(),
-                        ts_now(),
+                        now,
                         str(price),
                     ),
                 )
@@ -1400,6 +1533,8 @@ class GlobalDBHandler:
                 # Means foreign keys failure. Should not happen since is checked by marshmallow
                 raise InputError(f'Failed to add manual current price due to: {e!s}') from e
 
+            GlobalDBHandler.record_price_change(write_cursor, Timestamp(changed_ts))
+
             #  invalidate the cached price for the assets that are using manual current as type and
             # and that are connected to the given asset
             write_cursor.execute(
@@ -1408,6 +1543,7 @@ class GlobalDBHandler:
             )
             assets_to_invalidate = {Asset(asset) for entry in write_cursor for asset in entry}
 
+        GlobalDBHandler().price_series_cache.invalidate_asset(from_asset.identifier)
         return assets_to_invalidate
 
     @staticmethod
@@ -1461,15 +1597,18 @@ class GlobalDBHandler:
 
             # Execute the deletion
             write_cursor.execute(
-                'DELETE FROM price_history WHERE source_type=? AND from_asset=?',
+                'DELETE FROM price_history WHERE source_type=? AND from_asset=? RETURNING timestamp',  # noqa: E501
                 (HistoricalPriceOracle.MANUAL_CURRENT.serialize_for_db(), asset.identifier),
             )
-            if write_cursor.rowcount != 1:
+            if len(deleted_timestamps := write_cursor.fetchall()) != 1:
                 raise InputError(
                     f'Not found manual current price to delete for asset {asset!s}',
                 )
 
-            return assets_to_invalidate
+            GlobalDBHandler.record_price_change(write_cursor, Timestamp(deleted_timestamps[0][0]))
+
+        GlobalDBHandler().price_series_cache.invalidate_asset(asset.identifier)
+        return assets_to_invalidate
 
     @staticmethod
     def get_manual_prices(
@@ -1522,12 +1661,16 @@ class GlobalDBHandler:
 
                 if write_cursor.rowcount == 0:
                     return False
+
+                GlobalDBHandler.record_price_change(write_cursor, entry.timestamp)
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to edit manual historical prices from {entry.from_asset} '
                 f'to {entry.to_asset} at timestamp: {entry.timestamp!s} due to {e!s}',
             )
             return False
+        finally:
+            GlobalDBHandler().price_series_cache.invalidate_pair(entry.from_asset.identifier, entry.to_asset.identifier)  # noqa: E501
 
         return True
 
@@ -1553,14 +1696,17 @@ class GlobalDBHandler:
         )
         with GlobalDBHandler().conn.write_ctx() as write_cursor:
             write_cursor.execute(querystr, bindings)
-            if write_cursor.rowcount != 1:
-                log.error(
-                    f'Failed to delete historical price from {from_asset} to {to_asset} '
-                    f'and timestamp: {timestamp!s}.',
-                )
-                return False
+            if (deleted := write_cursor.rowcount == 1) is True:
+                GlobalDBHandler.record_price_change(write_cursor, timestamp)
 
-        return True
+        GlobalDBHandler().price_series_cache.invalidate_pair(from_asset.identifier, to_asset.identifier)  # noqa: E501
+        if deleted is False:
+            log.error(
+                f'Failed to delete historical price from {from_asset} to {to_asset} '
+                f'and timestamp: {timestamp!s}.',
+            )
+
+        return deleted
 
     @staticmethod
     def delete_historical_prices(
@@ -1576,12 +1722,16 @@ class GlobalDBHandler:
 
         try:
             with GlobalDBHandler().conn.write_ctx() as write_cursor:
-                write_cursor.execute(querystr, tuple(query_list))
+                write_cursor.execute(f'{querystr} RETURNING timestamp', tuple(query_list))
+                if len(deleted_timestamps := write_cursor.fetchall()) != 0:
+                    GlobalDBHandler.record_price_change(write_cursor, Timestamp(min(x[0] for x in deleted_timestamps)))  # noqa: E501
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to delete historical prices from {from_asset} to {to_asset} '
                 f'and source: {source!s} due to {e!s}',
             )
+        finally:
+            GlobalDBHandler().price_series_cache.invalidate_pair(from_asset.identifier, to_asset.identifier)  # noqa: E501
 
     @staticmethod
     def get_historical_price_range(
@@ -1665,6 +1815,7 @@ class GlobalDBHandler:
                     with self.conn.write_ctx() as write_cursor:
                         # If versions match drop tables
                         write_cursor.execute('DELETE FROM assets')
+                        GlobalDBHandler.record_price_change(write_cursor, Timestamp(0))  # prices got deleted by cascade  # noqa: E501
                         write_cursor.execute('DELETE FROM asset_collections')
                         # Copy assets
                         write_cursor.switch_foreign_keys('OFF')
@@ -1698,6 +1849,8 @@ class GlobalDBHandler:
                     with self.conn.critical_section_and_transaction_lock():
                         read_cursor.execute('DETACH DATABASE "clean_db";')
 
+        self.price_series_cache.clear()  # prices of deleted assets got deleted by cascade
+        self.evm_token_cache.clear()
         return True, ''
 
     def soft_reset_assets_list(self) -> tuple[bool, str]:
@@ -0,0 +1,215 @@
+"""In-memory index of the price_history table of the global DB
+
+Each (from_asset, to_asset) pair is loaded once in compact parallel arrays per source
+and nearest price lookups are answered with a binary search instead of an SQL query.
+"""
+import bisect
+import logging
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Final, NamedTuple
+
+from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.fval import FVal
+from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import Price, Timestamp
+
+if TYPE_CHECKING:
+    from rotkehlchen.assets.asset import Asset
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+PRICE_SERIES_CACHE_MAX_BYTES: Final = 32 * 1024 * 1024
+
+
+class PriceSeries(NamedTuple):
+    """Prices of a single source for a pair, sorted by timestamp"""
+    timestamps: array  # array('q') of timestamps
+    prices: list[Decimal]
+
+
+class PairPriceSeries(NamedTuple):
+    """All the prices stored for a (from_asset, to_asset) pair"""
+    series: dict[HistoricalPriceOracle, PriceSeries]
+    size: int  # estimated size in bytes
+
+
+def _estimate_size(series: dict[HistoricalPriceOracle, PriceSeries]) -> int:
+    size = sys.getsizeof(series)
+    for entry in series.values():
+        size += sys.getsizeof(entry.timestamps) + sys.getsizeof(entry.prices)
+        size += sum(sys.getsizeof(x) for x in entry.prices)
+    return size
+
+
+class PriceSeriesCache:
+    """LRU cache of the price series of asset pairs bounded by their total size in bytes
+
+    Every write to the price_history table needs to invalidate the pairs it touches.
+    """
+
+    def __init__(self, max_bytes: int = PRICE_SERIES_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.pairs: OrderedDict[tuple[str, str], PairPriceSeries] = OrderedDict()
+        # increased on every invalidation so that a pair loaded while the table was
+        # being modified by another greenlet is not kept in the cache
+        self.generation = 0
+
+    @staticmethod
+    def _key(from_asset: str, to_asset: str) -> tuple[str, str]:
+        # identifiers in price_history are compared with NOCASE collation
+        return from_asset.lower(), to_asset.lower()
+
+    def _load_pair(
+            self,
+            cursor: 'DBCursor',
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+    ) -> dict[HistoricalPriceOracle, PriceSeries]:
+        """Read all the prices of the pair from the DB and add them to the cache if they fit"""
+        generation = self.generation
+        series: dict[HistoricalPriceOracle, PriceSeries] = {}
+        cursor.execute(
+            'SELECT source_type, timestamp, price FROM price_history '
+            'WHERE from_asset=? AND to_asset=? ORDER BY source_type, timestamp',
+            (from_asset.identifier, to_asset.identifier),
+        )
+        for source_type, timestamp, price in cursor:
+            try:
+                source = HistoricalPriceOracle.deserialize_from_db(source_type)
+                decimal_price = Decimal(price)
+            except (DeserializationError, InvalidOperation) as e:
+                log.error(
+                    f'Failed to read historical price {price} of {from_asset} -> {to_asset} '
+                    f'at {timestamp} from the DB due to {e!s}. Skipping',
+                )
+                continue
+
+            if (entry := series.get(source)) is None:
+                entry = series[source] = PriceSeries(timestamps=array('q'), prices=[])
+            entry.timestamps.append(timestamp)
+            entry.prices.append(decimal_price)
+
+        size = _estimate_size(series)
+        if generation != self.generation or size > self.max_bytes:
+            return series  # don't keep stale data or a pair that can't fit in the cache
+
+        key = self._key(from_asset.identifier, to_asset.identifier)
+        if (previous := self.pairs.pop(key, None)) is not None:  # loaded by another greenlet
+            self.total_bytes -= previous.size
+        self.pairs[key] = PairPriceSeries(series=series, size=size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.pairs.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+        return series
+
+    def get_series(
+            self,
+            cursor: 'DBCursor',
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+    ) -> dict[HistoricalPriceOracle, PriceSeries]:
+        key = self._key(from_asset.identifier, to_asset.identifier)
+        if (pair := self.pairs.get(key)) is not None:
+            self.pairs.move_to_end(key)
+            return pair.series
+
+        return self._load_pair(cursor=cursor, from_asset=from_asset, to_asset=to_asset)
+
+    def get_closest_price(
+            self,
+            cursor: 'DBCursor',
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+            timestamp: Timestamp,
+            max_seconds_distance: int,
+            source: HistoricalPriceOracle | None = None,
+    ) -> HistoricalPrice | None:
+        """Find the price of the pair closest to the given timestamp that is at most
+        max_seconds_distance away from it. If source is given only prices of that source
+        are considered. Returns None if there is no such price."""
+        pair_series = self.get_series(cursor=cursor, from_asset=from_asset, to_asset=to_asset)
+        if source is not None:
+            pair_series = {source: pair_series[source]} if source in pair_series else {}
+
+        closest: tuple[int, HistoricalPriceOracle, int, Decimal] | None = None
+        for series_source, series in pair_series.items():
+            idx = bisect.bisect_left(series.timestamps, timestamp)
+            # closest entry is either the one at/right after the timestamp or the one before
+            for candidate in (idx - 1, idx):
+                if not 0 <= candidate < len(series.timestamps):
+                    continue
+
+                distance = abs(series.timestamps[candidate] - timestamp)
+                if distance <= max_seconds_distance and (closest is None or distance < closest[0]):
+                    closest = (distance, series_source, series.timestamps[candidate], series.prices[candidate])  # noqa: E501
+
+        if closest is None:
+            return None
+
+        return HistoricalPrice(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            source=closest[1],
+            timestamp=Timestamp(closest[2]),
+            price=Price(FVal(closest[3])),
+        )
+
+    def add_prices(self, entries: Sequence[HistoricalPrice]) -> None:
+        """Insert newly added prices into the cached series of their pairs. Needs to be
+        called after they are committed with INSERT OR IGNORE semantics, so prices at
+        timestamps that already exist for the same source are skipped."""
+        self.generation += 1  # a pair being loaded right now may not contain the new prices
+        changed_pairs = set()
+        for entry in entries:
+            key = self._key(entry.from_asset.identifier, entry.to_asset.identifier)
+            if (pair := self.pairs.get(key)) is None:
+                continue  # will be read from the DB when the pair is first needed
+
+            if (series := pair.series.get(entry.source)) is None:
+                series = pair.series[entry.source] = PriceSeries(timestamps=array('q'), prices=[])
+            idx = bisect.bisect_left(series.timestamps, entry.timestamp)
+            if idx < len(series.timestamps) and series.timestamps[idx] == entry.timestamp:
+                continue  # already in the DB so the insert got ignored
+
+            series.timestamps.insert(idx, entry.timestamp)
+            series.prices.insert(idx, Decimal(str(entry.price)))
+            changed_pairs.add(key)
+
+        for key in changed_pairs:
+            pair = self.pairs[key]
+            size = _estimate_size(pair.series)
+            self.pairs[key] = pair._replace(size=size)
+            self.total_bytes += size - pair.size
+
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.pairs.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def invalidate_pair(self, from_asset: str, to_asset: str) -> None:
+        """Remove a pair from the cache. Needs to be called after its prices are modified"""
+        self.generation += 1
+        if (pair := self.pairs.pop(self._key(from_asset, to_asset), None)) is not None:
+            self.total_bytes -= pair.size
+
+    def invalidate_asset(self, identifier: str) -> None:
+        """Remove all the pairs that the given asset is part of"""
+        self.generation += 1
+        identifier = identifier.lower()
+        for key in [x for x in self.pairs if identifier in x]:
+            self.total_bytes -= self.pairs.pop(key).size
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.pairs.clear()
+        self.total_bytes = 0
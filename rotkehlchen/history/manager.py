@@ -15,7 +15,8 @@ from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.exchanges.data_structures import AssetMovement, Trade
 from rotkehlchen.exchanges.manager import SUPPORTED_EXCHANGES, ExchangeManager
 from rotkehlchen.fval import FVal
-from rotkehlchen.history.events.structures.base import HistoryBaseEntry, HistoryEvent
+from rotkehlchen.history.events.structures.base import HistoryEvent
+from rotkehlchen.history.stream import HistoryStream
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.tasks.manager import TaskManager
 from rotkehlchen.tasks.utils import query_missing_prices_of_base_entries
@@ -299,6 +300,23 @@ class HistoryQueryingManager:
         Creates all events history from start_ts to end_ts. Returns it
         sorted by ascending timestamp.
         """
+        empty_or_error, history = self.get_history_stream(
+            start_ts=start_ts,
+            end_ts=end_ts,
+            has_premium=has_premium,
+        )
+        return empty_or_error, list(history)
+
+    def get_history_stream(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            has_premium: bool,
+    ) -> tuple[str, HistoryStream]:
+        """
+        Queries all events history from start_ts to end_ts. Returns it as a stream
+        that reads it from the DB sorted by ascending timestamp while it's iterated.
+        """
         self._reset_variables()
         step = 0
         total_steps = (
@@ -310,8 +328,8 @@ class HistoryQueryingManager:
             start_ts=start_ts,
             end_ts=end_ts,
         )
-        # start creating the all trades history list
-        history: list[AccountingEventMixin] = []
+        # events that are not saved in the DB and are processed along the DB history
+        extra_events: list[AccountingEventMixin] = []
         empty_or_error = ''
 
         def fail_history_cb(error_msg: str) -> None:
@@ -337,30 +355,6 @@ class HistoryQueryingManager:
             # each exchange instance executes STEPS_PER_CEX steps out of the total_steps
             step = self._increase_progress(step, total_steps, step_by=STEPS_PER_CEX)
 
-        # Query all trades, asset movements and margin positions from the DB for all
-        # possible locations.
-        self.processing_state_name = 'Reading trades, asset movements and margin positions from the DB'  # noqa: E501
-        with self.db.conn.read_ctx() as cursor:
-            # Include all trades
-            trades = self.db.get_trades(
-                cursor,
-                filter_query=TradesFilterQuery.make(to_ts=end_ts),
-                has_premium=True,  # we need all trades for accounting -- limit happens later
-            )
-            history.extend(trades)
-
-            # Include all asset movements
-            asset_movements = self.db.get_asset_movements(
-                cursor,
-                filter_query=AssetMovementsFilterQuery.make(to_ts=end_ts),
-                has_premium=True,  # we need all trades for accounting -- limit happens later
-            )
-            history.extend(asset_movements)
-
-            # Include all margin positions
-            margin_positions = self.db.get_margin_positions(cursor, to_ts=end_ts)
-            history.extend(margin_positions)
-
         step = self._increase_progress(step, total_steps)
 
         for blockchain in EVM_CHAINS_WITH_TRANSACTIONS:
@@ -404,7 +398,7 @@ class HistoryQueryingManager:
                         from_timestamp=Timestamp(0),
                         to_timestamp=end_ts,
                     )
-                    history.extend(eth2_events)
+                    extra_events.extend(eth2_events)
                 except RemoteError as e:
                     self.msg_aggregator.add_error(
                         f'Eth2 daily stats are not included in the PnL report due to {e!s}',
@@ -413,27 +407,9 @@ class HistoryQueryingManager:
             eth2.combine_block_with_tx_events()
 
         step = self._increase_progress(step, total_steps)
-        self.processing_state_name = 'Querying base history events'
-        # Include all base history entries
-        history_events_db = DBHistoryEvents(self.db)
-        with self.db.conn.read_ctx() as cursor:
-            base_entries = history_events_db.get_history_events(
-                cursor=cursor,
-                filter_query=HistoryEventFilterQuery.make(
-                    # We need to have history since before the range
-                    from_ts=Timestamp(0),
-                    to_ts=end_ts,
-                ),
-                has_premium=True,  # ignore limits here. Limit applied at processing
-                group_by_event_ids=False,
-            )
-        history.extend(base_entries)
         self._increase_progress(step, total_steps)
-
-        history.sort(  # sort events first by timestamp and if history base by sequence index
-            key=lambda x: (
-                x.get_timestamp(),
-                x.sequence_index if isinstance(x, HistoryBaseEntry) else 1,
-            ),
+        return empty_or_error, HistoryStream(
+            database=self.db,
+            end_ts=end_ts,
+            extra_events=extra_events,
         )
-        return empty_or_error, history
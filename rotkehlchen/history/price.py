@@ -1,18 +1,21 @@
+import bisect
 import logging
 from collections.abc import Sequence
 from contextlib import suppress
 from http import HTTPStatus
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Final, Optional
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import ONE
 from rotkehlchen.constants.assets import A_KFEE, A_USD
 from rotkehlchen.constants.prices import ZERO_PRICE
+from rotkehlchen.constants.timing import DAY_IN_SECONDS, HOUR_IN_SECONDS
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
 from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.globaldb.manual_price_oracles import ManualPriceOracle
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -29,6 +32,15 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Maximum distance from the queried timestamp that each oracle accepts for a price it
+# has already stored in the DB. Should match what the oracles use in query_historical_price
+ORACLE_CACHE_MAX_SECONDS_DISTANCE: Final = {
+    HistoricalPriceOracle.MANUAL: HOUR_IN_SECONDS,
+    HistoricalPriceOracle.CRYPTOCOMPARE: HOUR_IN_SECONDS,
+    HistoricalPriceOracle.COINGECKO: DAY_IN_SECONDS,
+    HistoricalPriceOracle.DEFILLAMA: DAY_IN_SECONDS,
+}
+
 
 def query_usd_price_or_use_default(
         asset: Asset,
@@ -257,3 +269,67 @@ class PriceHistorian:
             time=timestamp,
             rate_limited=rate_limited,
         )
+
+    @staticmethod
+    def query_cached_historical_prices(
+            from_asset: Asset,
+            to_asset: Asset,
+            timestamps: Sequence[Timestamp],
+    ) -> dict[Timestamp, Price]:
+        """
+        Query the historical prices of `from_asset` in `to_asset` for all the given
+        timestamps using only the prices that the oracles have already stored in the DB.
+
+        All the prices of the pair are read with a single range scan and each timestamp
+        is resolved by checking the oracles in the order set by the user, each with the
+        distance it accepts for its cached prices in `query_historical_price`.
+
+        Timestamps for which no cached price was found are not contained in the result.
+        Those need to go through `query_historical_price`. The same happens for pairs that
+        need special handling there such as fiat to fiat or KFEE.
+        """
+        if (
+            len(timestamps) == 0 or
+            from_asset in (to_asset, A_KFEE) or
+            (from_asset.is_fiat() and to_asset.is_fiat())
+        ):
+            return {}
+
+        oracles = PriceHistorian()._oracles
+        assert oracles is not None, 'PriceHistorian should never be called before setting the oracles'  # noqa: E501
+        oracles = [x for x in oracles if x in ORACLE_CACHE_MAX_SECONDS_DISTANCE]
+        if len(oracles) == 0:
+            return {}
+
+        max_distance = max(ORACLE_CACHE_MAX_SECONDS_DISTANCE[x] for x in oracles)
+        oracle_prices = GlobalDBHandler.get_historical_prices_in_range(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            from_timestamp=Timestamp(min(timestamps) - max_distance),
+            to_timestamp=Timestamp(max(timestamps) + max_distance),
+            sources=oracles,
+        )
+        # cryptocompare ignores zero prices stored in the DB
+        if (cryptocompare_prices := oracle_prices.get(HistoricalPriceOracle.CRYPTOCOMPARE)) is not None:  # noqa: E501
+            oracle_prices[HistoricalPriceOracle.CRYPTOCOMPARE] = [x for x in cryptocompare_prices if x[1] != ZERO_PRICE]  # noqa: E501
+
+        series = [
+            (
+                [x[0] for x in oracle_prices[oracle]],
+                [x[1] for x in oracle_prices[oracle]],
+                ORACLE_CACHE_MAX_SECONDS_DISTANCE[oracle],
+            ) for oracle in oracles if len(oracle_prices.get(oracle, [])) != 0
+        ]
+        result = {}
+        for timestamp in timestamps:
+            for series_timestamps, series_prices, oracle_distance in series:
+                idx = bisect.bisect_left(series_timestamps, timestamp)
+                # the closest entry is either the one at or right after the timestamp or
+                # the one right before it
+                candidates = [x for x in (idx - 1, idx) if 0 <= x < len(series_timestamps)]
+                closest = min(candidates, key=lambda x: abs(series_timestamps[x] - timestamp))
+                if abs(series_timestamps[closest] - timestamp) <= oracle_distance:
+                    result[timestamp] = series_prices[closest]
+                    break
+
+        return result
@@ -0,0 +1,250 @@
+"""Accounting history read lazily from the DB in processing order
+
+The history of a PnL report can be too big to be kept in memory at once. Each table
+of the history is read in pages ordered by timestamp and the pages of all tables are
+merged on the fly, so that only about a page per table is in memory at any point.
+"""
+import heapq
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Final, Literal, TypeVar
+
+from rotkehlchen.db.filtering import (
+    AssetMovementsFilterQuery,
+    DBFilterQuery,
+    DBTimestampFilter,
+    HistoryEventFilterQuery,
+    TradesFilterQuery,
+)
+from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.history.events.structures.base import HistoryBaseEntry
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import Timestamp
+
+if TYPE_CHECKING:
+    from rotkehlchen.accounting.mixins.event import AccountingEventMixin
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+HISTORY_STREAM_PAGE_SIZE: Final = 5000
+PAGED_HISTORY_TABLES: Final[tuple[Literal['trades', 'asset_movements', 'history_events'], ...]] = ('trades', 'asset_movements', 'history_events')  # noqa: E501
+
+T = TypeVar('T', bound='AccountingEventMixin')
+Q = TypeVar('Q', bound=DBFilterQuery)
+
+
+def history_sort_key(event: 'AccountingEventMixin') -> tuple[int, int]:
+    """Events are processed sorted by timestamp and if history base entries by sequence index"""
+    return (
+        event.get_timestamp(),
+        event.sequence_index if isinstance(event, HistoryBaseEntry) else 1,
+    )
+
+
+def _sort_within_seconds(events: Iterable[T]) -> Iterator[T]:
+    """Sort by history_sort_key events that are already sorted by timestamp. Only the
+    events of the same second can be out of order so they are sorted in groups"""
+    group: list[T] = []
+    for event in events:
+        if len(group) != 0 and group[0].get_timestamp() != event.get_timestamp():
+            yield from sorted(group, key=history_sort_key)
+            group = []
+        group.append(event)
+
+    yield from sorted(group, key=history_sort_key)
+
+
+class HistoryStream:
+    """The accounting history from from_ts up to end_ts, read from the DB every time
+    it's iterated
+
+    Events that are not in the DB, like the eth2 daily stats, are given as extra_events.
+    """
+
+    def __init__(
+            self,
+            database: 'DBHandler',
+            end_ts: Timestamp,
+            extra_events: list['AccountingEventMixin'],
+            page_size: int = HISTORY_STREAM_PAGE_SIZE,
+            from_ts: Timestamp | None = None,
+    ) -> None:
+        self.database = database
+        self.from_ts = Timestamp(0) if from_ts is None else from_ts
+        self.end_ts = end_ts
+        self.extra_events = sorted(extra_events, key=history_sort_key)
+        self.page_size = page_size
+
+    def starting_at(self, timestamp: Timestamp) -> 'HistoryStream':
+        """Returns the same history but only from the given timestamp onwards"""
+        return HistoryStream(
+            database=self.database,
+            end_ts=self.end_ts,
+            extra_events=self.extra_events,
+            page_size=self.page_size,
+            from_ts=timestamp,
+        )
+
+    def count_before(self, timestamp: Timestamp) -> list[int]:
+        """Count the entries of each kind of history before the given timestamp"""
+        with self.database.conn.read_ctx() as cursor:
+            counts = [
+                cursor.execute(query, (db_timestamp,)).fetchone()[0]
+                for query, db_timestamp in (
+                    ('SELECT COUNT(*) FROM trades WHERE timestamp < ?', timestamp),
+                    ('SELECT COUNT(*) FROM asset_movements WHERE timestamp < ?', timestamp),
+                    ('SELECT COUNT(*) FROM margin_positions WHERE close_time < ?', timestamp),
+                    ('SELECT COUNT(*) FROM history_events WHERE timestamp < ?', timestamp * 1000),
+                )
+            ]
+
+        return [*counts, len([x for x in self.extra_events if x.get_timestamp() < timestamp])]
+
+    def _count_entries(
+            self,
+            cursor: 'DBCursor',
+            table: Literal['trades', 'asset_movements', 'history_events'],
+            from_ts: int,
+    ) -> int:
+        """Count the entries of the table from the given raw DB timestamp up to end_ts"""
+        end_ts = self.end_ts * 1000 if table == 'history_events' else self.end_ts
+        return cursor.execute(
+            f'SELECT COUNT(*) FROM {table} WHERE timestamp >= ? AND timestamp <= ?',
+            (from_ts, end_ts),
+        ).fetchone()[0]
+
+    def _iterate_pages(
+            self,
+            table: Literal['trades', 'asset_movements', 'history_events'],
+            make_filter_query: Callable[[int | None], Q],
+            query_entries: Callable[['DBCursor', Q], list[T]],
+            get_db_timestamp: Callable[[T], int],
+    ) -> Iterator[T]:
+        """Read the entries returned by query_entries in pages of page_size entries
+
+        Pages are sought by timestamp instead of using offsets. The entries of the last
+        timestamp of a page may continue in the next page so they are read again with it.
+        If a page only has entries of a single timestamp then all the entries of that
+        timestamp are read at once. The entries that fail to deserialize are skipped by
+        query_entries so an empty page only means the end if no entries are left in the
+        table. Otherwise the whole page was skipped and it's read again with a bigger limit.
+        """
+        from_ts = self.from_ts * 1000 if table == 'history_events' else self.from_ts
+        limit = self.page_size
+        while True:
+            filter_query = make_filter_query(limit)
+            # raw DB value since the filter query timestamp filter may be scaled
+            filter_query.filters.append(DBTimestampFilter(and_op=True, from_ts=Timestamp(from_ts)))
+            with self.database.conn.read_ctx() as cursor:
+                page = query_entries(cursor, filter_query)
+                if len(page) == 0:
+                    if self._count_entries(cursor, table=table, from_ts=from_ts) <= limit:
+                        return
+                    limit *= 2
+                    continue
+
+            limit = self.page_size
+            last_ts = get_db_timestamp(page[-1])
+            if get_db_timestamp(page[0]) == last_ts:
+                filter_query = make_filter_query(None)
+                filter_query.filters.append(DBTimestampFilter(
+                    and_op=True,
+                    from_ts=Timestamp(last_ts),
+                    to_ts=Timestamp(last_ts),
+                ))
+                with self.database.conn.read_ctx() as cursor:
+                    yield from query_entries(cursor, filter_query)
+                from_ts = last_ts + 1
+                continue
+
+            for entry in page:
+                if get_db_timestamp(entry) == last_ts:
+                    break
+                yield entry
+
+            from_ts = last_ts
+
+    def _iterate_margin_positions(self) -> Iterator['AccountingEventMixin']:
+        with self.database.conn.read_ctx() as cursor:  # they are few so read them at once
+            margin_positions = self.database.get_margin_positions(
+                cursor,
+                from_ts=self.from_ts,
+                to_ts=self.end_ts,
+            )
+        yield from sorted(margin_positions, key=history_sort_key)
+
+    def __iter__(self) -> Iterator['AccountingEventMixin']:
+        """Iterate the history sorted by history_sort_key. Equal entries of different
+        tables keep the order of trades, asset movements, margin positions, extra events
+        and history events"""
+        dbevents = DBHistoryEvents(self.database)
+        yield from heapq.merge(
+            self._iterate_pages(
+                table='trades',
+                make_filter_query=lambda limit: TradesFilterQuery.make(
+                    to_ts=self.end_ts,
+                    order_by_rules=[('timestamp', True), ('id', True)],
+                    limit=limit,
+                    offset=None if limit is None else 0,
+                ),
+                query_entries=lambda cursor, filter_query: self.database.get_trades(
+                    cursor,
+                    filter_query=filter_query,
+                    has_premium=True,  # we need all trades for accounting -- limit happens later
+                ),
+                get_db_timestamp=lambda trade: trade.timestamp,
+            ),
+            self._iterate_pages(
+                table='asset_movements',
+                make_filter_query=lambda limit: AssetMovementsFilterQuery.make(
+                    to_ts=self.end_ts,
+                    order_by_rules=[('timestamp', True), ('id', True)],
+                    limit=limit,
+                    offset=None if limit is None else 0,
+                ),
+                query_entries=lambda cursor, filter_query: self.database.get_asset_movements(
+                    cursor,
+                    filter_query=filter_query,
+                    has_premium=True,  # we need all movements for accounting -- limit happens later  # noqa: E501
+                ),
+                get_db_timestamp=lambda movement: movement.timestamp,
+            ),
+            self._iterate_margin_positions(),
+            (x for x in self.extra_events if x.get_timestamp() >= self.from_ts),
+            _sort_within_seconds(self._iterate_pages(
+                table='history_events',
+                make_filter_query=lambda limit: HistoryEventFilterQuery.make(
+                    to_ts=self.end_ts,
+                    order_by_rules=[('timestamp', True), ('sequence_index', True), ('history_events.identifier', True)],  # noqa: E501
+                    limit=limit,
+                    offset=None if limit is None else 0,
+                ),
+                query_entries=lambda cursor, filter_query: dbevents.get_history_events(
+                    cursor=cursor,
+                    filter_query=filter_query,
+                    has_premium=True,  # ignore limits here. Limit applied at processing
+                    group_by_event_ids=False,
+                ),
+                get_db_timestamp=lambda event: event.timestamp,
+            )),
+            key=history_sort_key,
+        )
+
+    def __len__(self) -> int:
+        with self.database.conn.read_ctx() as cursor:
+            count = cursor.execute(
+                'SELECT COUNT(*) FROM margin_positions WHERE close_time >= ? AND close_time <= ?',
+                (self.from_ts, self.end_ts),
+            ).fetchone()[0]
+            count += len([x for x in self.extra_events if x.get_timestamp() >= self.from_ts])
+            for table in PAGED_HISTORY_TABLES:
+                count += self._count_entries(
+                    cursor,
+                    table=table,
+                    from_ts=self.from_ts * 1000 if table == 'history_events' else self.from_ts,
+                )
+
+        return count
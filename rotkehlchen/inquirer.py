@@ -95,6 +95,7 @@ from rotkehlchen.types import (
     ProtocolsWithPriceLogic,
     Timestamp,
 )
+from rotkehlchen.utils.concurrency import single_flight
 from rotkehlchen.utils.data_structures import LRUCacheWithRemove
 from rotkehlchen.utils.misc import timestamp_to_daystart_timestamp, ts_now
 from rotkehlchen.utils.mixins.penalizable_oracle import PenalizablePriceOracleMixin
@@ -460,7 +461,51 @@ class Inquirer:
         """
         Query oracle instances.
         `coming_from_latest_price` is used by manual latest price oracle to handle price loops.
+
+        Identical queries of different greenlets that run at the same time are coalesced into
+        one. Not the ones coming from a manual latest price though, since with a loop of manual
+        latest prices they could end up waiting on each other forever.
         """
+        if coming_from_latest_price is True:
+            return Inquirer._query_oracle_instances_uncoalesced(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                coming_from_latest_price=True,
+                skip_onchain=skip_onchain,
+                match_main_currency=match_main_currency,
+            )
+
+        return Inquirer._query_oracle_instances_coalesced(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            skip_onchain=skip_onchain,
+            match_main_currency=match_main_currency,
+        )
+
+    @staticmethod
+    @single_flight()
+    def _query_oracle_instances_coalesced(
+            from_asset: Asset,
+            to_asset: Asset,
+            skip_onchain: bool,
+            match_main_currency: bool,
+    ) -> tuple[Price, CurrentPriceOracle, bool]:
+        return Inquirer._query_oracle_instances_uncoalesced(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            coming_from_latest_price=False,
+            skip_onchain=skip_onchain,
+            match_main_currency=match_main_currency,
+        )
+
+    @staticmethod
+    def _query_oracle_instances_uncoalesced(
+            from_asset: Asset,
+            to_asset: Asset,
+            coming_from_latest_price: bool,
+            skip_onchain: bool,
+            match_main_currency: bool,
+    ) -> tuple[Price, CurrentPriceOracle, bool]:
         instance = Inquirer()
         assert (
             instance._oracles is not None and
@@ -7,16 +7,16 @@ import platform
 import time
 from base64 import b64decode, b64encode
 from binascii import Error as BinasciiError
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from enum import Enum
 from http import HTTPStatus
 from json import JSONDecodeError
+from pathlib import Path
 from typing import Any, Literal, NamedTuple, cast
 from urllib.parse import urlencode
 
 import machineid
 import requests
-from urllib3.util.retry import Retry
 
 from rotkehlchen.constants import ROTKEHLCHEN_SERVER_TIMEOUT
 from rotkehlchen.constants.timing import ROTKEHLCHEN_SERVER_BACKUP_TIMEOUT
@@ -29,6 +29,7 @@ from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import Timestamp
 from rotkehlchen.utils.misc import is_production, set_user_agent
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ class RemoteMetadata(NamedTuple):
 
 DEFAULT_ERROR_MSG = 'Failed to contact rotki server. Check logs for more details'
 DEFAULT_OK_CODES = (HTTPStatus.OK, HTTPStatus.UNAUTHORIZED, HTTPStatus.BAD_REQUEST)
+BACKUP_CHUNK_SIZE = 64 * 1024
 
 
 def check_response_status_code(
@@ -162,26 +164,46 @@ def _decode_premium_json(response: requests.Response) -> Any:
     return json_data
 
 
+class MultipartFileBody:
+    """A multipart/form-data body with the given fields and the file at the given path,
+    formatted like requests does for `data` and `files`. requests reads the whole file
+    in memory while here the file is read in chunks as the body is sent."""
+
+    def __init__(self, fields: dict[str, Any], file_field: str, path: Path) -> None:
+        self.fields = fields
+        self.path = path
+        boundary = os.urandom(16).hex()
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self.preamble = b''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()  # noqa: E501
+            for name, value in fields.items()
+        ) + f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{file_field}"\r\n\r\n'.encode()  # noqa: E501
+        self.epilogue = f'\r\n--{boundary}--\r\n'.encode()
+        self.file_size = path.stat().st_size
+
+    def __len__(self) -> int:
+        """Lets requests set the content length instead of using chunked encoding"""
+        return len(self.preamble) + self.file_size + len(self.epilogue)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.preamble
+        with open(self.path, 'rb') as f:
+            while chunk := f.read(BACKUP_CHUNK_SIZE):
+                yield chunk
+
+        yield self.epilogue
+
+
 class Premium:
 
     def __init__(self, credentials: PremiumCredentials, username: str):
         self.status = SubscriptionStatus.UNKNOWN
-        self.session = requests.session()
         # Make sure to have 3 retries on read/connect/other errors for all requests
         # The reason for this is that we have noticed that in unstable/slow connections
         # rotki.com server will close/cause the connection to result to a read timeout
         # At the moment this only happens for the backup upload endpoint. More info:
         # https://github.com/rotki/rotki/pull/6423
-        adapter = requests.adapters.HTTPAdapter()
-        # Have to set retries like this, since this granularity is not given by HTTPAdapter ctor
-        adapter.max_retries = Retry(
-            total=3,  # have to set each one individually as the code checks them all
-            read=3,
-            connect=3,
-            other=3,
-            allowed_methods=False,  # retry on all method verbs
-        )
-        self.session.mount('https://', adapter)
+        self.session = create_session(retry_all_requests=True)
         self.apiversion = '1'
         rotki_base_url = 'rotki.com'
         if is_production() is False and os.environ.get('ROTKI_API_ENVIRONMENT') == 'staging':
@@ -354,13 +376,13 @@ class Premium:
 
     def upload_data(
             self,
-            data_blob: bytes,
+            encrypted_path: Path,
             our_hash: str,
             last_modify_ts: Timestamp,
             compression_type: Literal['zlib'],
     ) -> dict:
         """Uploads data to the server and returns the response dict. We upload the encrypted
-        database as a file in an http form.
+        database at encrypted_path as a file in an http form, streamed from the disk.
 
         May raise:
         - RemoteError if there are problems reaching the server or if
@@ -372,15 +394,15 @@ class Premium:
             original_hash=our_hash,
             last_modify_ts=last_modify_ts,
             index=0,
-            length=len(data_blob),
+            length=encrypted_path.stat().st_size,
             compression=compression_type,
         )
-
+        body = MultipartFileBody(fields=data, file_field='db_file', path=encrypted_path)
         try:
             response = self.session.post(
                 self.rotki_nest + 'backup',
-                data=data,
-                files={'db_file': data_blob},
+                data=body,
+                headers={'Content-Type': body.content_type},
                 timeout=ROTKEHLCHEN_SERVER_BACKUP_TIMEOUT,
             )
         except requests.exceptions.RequestException as e:
@@ -394,10 +416,11 @@ class Premium:
             user_msg='Size limit reached' if response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE else f'Could not upload database backup due to: {response.text}',  # noqa: E501
         )
 
-    def pull_data(self) -> bytes | None:
-        """Pulls data from the server and returns the binary file with the database encrypted
+    def pull_data(self, encrypted_path: Path) -> bool:
+        """Pulls data from the server and saves the binary file with the database encrypted
+        at encrypted_path. The response is streamed to the file in chunks.
 
-        Returns None if there is no DB saved in the server.
+        Returns False if there is no DB saved in the server.
 
         May raise:
         - RemoteError if there are problems reaching the server or if
@@ -407,21 +430,25 @@ class Premium:
         data = self.sign('backup')
 
         try:
-            response = self.session.get(
+            with self.session.get(
                 self.rotki_nest + 'backup',
                 params=data,
                 timeout=ROTKEHLCHEN_SERVER_BACKUP_TIMEOUT,
-            )
+                stream=True,
+            ) as response:
+                check_response_status_code(response, (HTTPStatus.OK, HTTPStatus.NOT_FOUND))
+                if response.status_code == HTTPStatus.NOT_FOUND:
+                    return False
+
+                with open(encrypted_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=BACKUP_CHUNK_SIZE):
+                        f.write(chunk)
         except requests.exceptions.RequestException as e:
             msg = f'Could not connect to rotki server due to {e!s}'
             log.error(msg)
             raise RemoteError(msg) from e
 
-        check_response_status_code(response, (HTTPStatus.OK, HTTPStatus.NOT_FOUND))
-        if response.status_code == HTTPStatus.NOT_FOUND:
-            return None
-
-        return response.content
+        return True
 
     def query_last_data_metadata(self) -> RemoteMetadata:
         """Queries last metadata from the server and returns the response
@@ -1,6 +1,8 @@
 import logging
 import shutil
+import tempfile
 from enum import Enum
+from pathlib import Path
 from typing import Any, Literal, NamedTuple
 
 from rotkehlchen.api.websockets.typedefs import WSMessageType
@@ -121,22 +123,24 @@ class PremiumSyncManager:
         if self.premium is None:
             return False, 'Pulling failed. User does not have active premium.'
 
-        try:
-            result = self.premium.pull_data()
-        except (RemoteError, PremiumAuthenticationError) as e:
-            log.debug('sync from server -- pulling failed.', error=str(e))
-            return False, f'Pulling failed: {e!s}'
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdirname:  # needed on windows, see https://tinyurl.com/tmp-win-err  # noqa: E501
+            encrypted_path = Path(tmpdirname) / 'remote.db.enc'
+            try:
+                found = self.premium.pull_data(encrypted_path)
+            except (RemoteError, PremiumAuthenticationError) as e:
+                log.debug('sync from server -- pulling failed.', error=str(e))
+                return False, f'Pulling failed: {e!s}'
 
-        if result is None:
-            return False, 'No data found'
+            if found is False:
+                return False, 'No data found'
 
-        try:
-            self.data.decompress_and_decrypt_db(result)
-        except UnableToDecryptRemoteData as e:
-            raise PremiumAuthenticationError(
-                'The given password can not unlock the database that was retrieved  from '
-                'the server. Make sure to use the same password as when the account was created.',
-            ) from e
+            try:
+                self.data.decompress_and_decrypt_db(encrypted_path)
+            except UnableToDecryptRemoteData as e:
+                raise PremiumAuthenticationError(
+                    'The given password can not unlock the database that was retrieved  from '
+                    'the server. Make sure to use the same password as when the account was created.',  # noqa: E501
+                ) from e
 
         # Need to run migrations in case the app was updated since last sync and in
         # case this is a request to sync from the API, where all modules are initialized
@@ -200,52 +204,54 @@ class PremiumSyncManager:
             self.last_upload_attempt_ts = ts_now()
             return False, message
 
-        data, our_hash = self.data.compress_and_encrypt_db()
-        log.debug(
-            'CAN_PUSH',
-            ours=our_hash,
-            theirs=metadata.data_hash,
-        )
-        if our_hash == metadata.data_hash and not force_upload:
-            log.debug('upload to server stopped -- same hash')
-            message = 'Remote database is up to date'
-            self.data.msg_aggregator.add_message(
-                message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
-                data={'uploaded': False, 'actionable': True, 'message': message},
-            )
-            self.last_upload_attempt_ts = ts_now()
-            return False, message
-
-        data_bytes_size = len(data)
-        if data_bytes_size < metadata.data_size and not force_upload:
-            message = 'Remote database bigger than the local one'
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmpdirname:  # needed on windows, see https://tinyurl.com/tmp-win-err  # noqa: E501
+            encrypted_path = Path(tmpdirname) / 'local.db.enc'
+            our_hash = self.data.compress_and_encrypt_db(encrypted_path)
             log.debug(
-                f'upload to server stopped -- remote db({metadata.data_size}) '
-                f'bigger than local({data_bytes_size})',
-            )
-            self.data.msg_aggregator.add_message(
-                message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
-                data={'uploaded': False, 'actionable': True, 'message': message},
+                'CAN_PUSH',
+                ours=our_hash,
+                theirs=metadata.data_hash,
             )
-            self.last_upload_attempt_ts = ts_now()
-            return False, message
+            if our_hash == metadata.data_hash and not force_upload:
+                log.debug('upload to server stopped -- same hash')
+                message = 'Remote database is up to date'
+                self.data.msg_aggregator.add_message(
+                    message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
+                    data={'uploaded': False, 'actionable': True, 'message': message},
+                )
+                self.last_upload_attempt_ts = ts_now()
+                return False, message
+
+            data_bytes_size = encrypted_path.stat().st_size
+            if data_bytes_size < metadata.data_size and not force_upload:
+                message = 'Remote database bigger than the local one'
+                log.debug(
+                    f'upload to server stopped -- remote db({metadata.data_size}) '
+                    f'bigger than local({data_bytes_size})',
+                )
+                self.data.msg_aggregator.add_message(
+                    message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
+                    data={'uploaded': False, 'actionable': True, 'message': message},
+                )
+                self.last_upload_attempt_ts = ts_now()
+                return False, message
 
-        try:
-            self.premium.upload_data(
-                data_blob=data,
-                our_hash=our_hash,
-                last_modify_ts=our_last_write_ts,
-                compression_type='zlib',
-            )
-        except (RemoteError, PremiumAuthenticationError) as e:
-            message = str(e)
-            log.debug('upload to server -- upload error', error=message)
-            self.data.msg_aggregator.add_message(
-                message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
-                data={'uploaded': False, 'actionable': False, 'message': message},
-            )
-            self.last_upload_attempt_ts = ts_now()
-            return False, message
+            try:
+                self.premium.upload_data(
+                    encrypted_path=encrypted_path,
+                    our_hash=our_hash,
+                    last_modify_ts=our_last_write_ts,
+                    compression_type='zlib',
+                )
+            except (RemoteError, PremiumAuthenticationError) as e:
+                message = str(e)
+                log.debug('upload to server -- upload error', error=message)
+                self.data.msg_aggregator.add_message(
+                    message_type=WSMessageType.DATABASE_UPLOAD_RESULT,
+                    data={'uploaded': False, 'actionable': False, 'message': message},
+                )
+                self.last_upload_attempt_ts = ts_now()
+                return False, message
 
         # update the last data upload value
         self.last_data_upload_ts = ts_now()
@@ -52,6 +52,7 @@ from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.data_import.manager import CSVDataImporter
 from rotkehlchen.data_migrations.manager import DataMigrationManager
 from rotkehlchen.db.cache import DBCacheStatic
+from rotkehlchen.db.drivers.instrumentation import DB_INSTRUMENTATION
 from rotkehlchen.db.filtering import NFTFilterQuery
 from rotkehlchen.db.settings import CachedSettings, DBSettings, ModifiableDBSettings
 from rotkehlchen.db.updates import RotkiDataUpdater
@@ -150,6 +151,8 @@ class Rotkehlchen:
                 f'The given data directory {self.data_dir} is not readable or writable',
             )
         self.main_loop_spawned = False
+        if self.args.sqlite_slow_query_ms != 0:
+            DB_INSTRUMENTATION.enable(slow_threshold_ms=self.args.sqlite_slow_query_ms)
         self.api_task_greenlets: list[gevent.Greenlet] = []
         self.msg_aggregator = MessagesAggregator()
         self.greenlet_manager = GreenletManager(msg_aggregator=self.msg_aggregator)
@@ -864,7 +867,7 @@ class Rotkehlchen:
             start_ts: Timestamp,
             end_ts: Timestamp,
     ) -> tuple[int, str]:
-        error_or_empty, events = self.history_querying_manager.get_history(
+        error_or_empty, events = self.history_querying_manager.get_history_stream(
             start_ts=start_ts,
             end_ts=end_ts,
             has_premium=self.premium is not None,
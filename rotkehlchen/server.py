@@ -52,9 +52,10 @@ class RotkehlchenServer:
         # printing them in stdout is now too much spam (and would worry users too)
         hub = gevent.hub.get_hub()
         hub.exception_stream = None
-        # we don't use threadpool much so go to 2 instead of default 10
-        hub.threadpool_size = 2
-        hub.threadpool.maxsize = 2
+        # the threadpool only runs heavy DB statements and opens DB connections
+        # so go to 4 instead of default 10
+        hub.threadpool_size = 4
+        hub.threadpool.maxsize = 4
         if os.name != 'nt':
             gevent.hub.signal(signal.SIGQUIT, self.shutdown)  # type: ignore[attr-defined,unused-ignore]  # pylint: disable=no-member  # linters don't understand the os.name check
         gevent.hub.signal(signal.SIGINT, self.shutdown)
@@ -27,6 +27,7 @@ from rotkehlchen.db.cache import DBCacheDynamic, DBCacheStatic
 from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery, HistoryEventFilterQuery
 from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.db.settings import CachedSettings
 from rotkehlchen.errors.api import PremiumAuthenticationError
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import RemoteError
@@ -159,6 +160,7 @@ class TaskManager:
             self._maybe_augmented_detect_new_spam_tokens,
             self._maybe_query_monerium,
             self._maybe_update_owned_assets,
+            self._maybe_backup_db,
         ]
         if self.premium_sync_manager is not None:
             self.potential_tasks.append(self._maybe_schedule_db_upload)
@@ -349,7 +351,7 @@ class TaskManager:
                 limit=TX_RECEIPTS_QUERY_LIMIT,
             )
             if len(hash_results) == 0:
-                return None
+                continue  # check the next chain
 
             evm_inquirer = self.chains_aggregator.get_chain_manager(blockchain)
             task_name = f'Query {len(hash_results)} {blockchain!s} transactions receipts'
@@ -769,6 +771,22 @@ class TaskManager:
             user_db=self.database,
         )]
 
+    def _maybe_backup_db(self) -> Optional[list[gevent.Greenlet]]:
+        """Schedules an automatic backup of the user DB every `db_backup_frequency` hours,
+        if automatic backups are enabled"""
+        if (frequency := CachedSettings().db_backup_frequency) == 0:
+            return None
+
+        if should_run_periodic_task(self.database, DBCacheStatic.LAST_DB_BACKUP_TS, frequency * HOUR_IN_SECONDS) is False:  # noqa: E501
+            return None
+
+        return [self.greenlet_manager.spawn_and_track(
+            after_seconds=None,
+            task_name='Backup user DB',
+            exception_is_error=True,
+            method=self.database.create_automatic_db_backup,
+        )]
+
     def _maybe_query_monerium(self) -> Optional[list[gevent.Greenlet]]:
         if self.chains_aggregator.premium is None:
             return None  # should not run in free mode
@@ -77,6 +77,7 @@ def test_query_info_version_when_up_to_date(rotkehlchen_api_server):
         )
 
     result = assert_proper_response_with_result(response)
+    assert isinstance(result.pop('http_metrics'), dict)
     assert result == generate_expected_info(expected_version, rotki.data_dir)
 
     with version_patch, release_patch:
@@ -91,6 +92,7 @@ def test_query_info_version_when_up_to_date(rotkehlchen_api_server):
         )
 
     result = assert_proper_response_with_result(response)
+    assert isinstance(result.pop('http_metrics'), dict)
     assert result == generate_expected_info(expected_version, rotki.data_dir, latest_version=expected_version)  # noqa: E501
 
     with version_patch, release_patch, patch.dict(os.environ, {'ROTKI_ACCEPT_DOCKER_RISK': 'whatever'}):  # noqa: E501
@@ -102,6 +104,7 @@ def test_query_info_version_when_up_to_date(rotkehlchen_api_server):
         )
 
     result = assert_proper_response_with_result(response)
+    assert isinstance(result.pop('http_metrics'), dict)
     assert result == generate_expected_info(
         expected_version=expected_version,
         data_dir=rotki.data_dir,
@@ -150,6 +153,7 @@ def test_query_version_when_update_required(rotkehlchen_api_server):
 
     result = assert_proper_response_with_result(response)
     our_version = get_system_spec()['rotkehlchen']
+    assert isinstance(result.pop('http_metrics'), dict)
     assert result == generate_expected_info(
         expected_version=our_version,
         data_dir=rotki.data_dir,
@@ -177,6 +181,7 @@ def test_manage_nodes(rotkehlchen_api_server):
             assert node['identifier'] == 1
         if node['active']:
             assert node['weight'] != 0
+        assert {'health', 'latency_ms', 'error_rate', 'connected', 'pruned', 'archive'} <= node['stats'].keys()  # noqa: E501
 
     # try to delete a node
     response = requests.delete(
@@ -3,9 +3,13 @@ from uuid import uuid4
 
 import gevent
 import pytest
+from gevent.event import Event
+from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.db.drivers.gevent import DBConnection, DBConnectionType
+from rotkehlchen.db.drivers.instrumentation import DB_INSTRUMENTATION, normalize_statement
 from rotkehlchen.db.filtering import HistoryEventFilterQuery
 from rotkehlchen.db.history_events import DBHistoryEvents
 from rotkehlchen.fval import FVal
@@ -151,3 +155,193 @@ def test_can_disable_callback(database):  # pylint: disable=unused-argument
     This is a regression test since setting to 0 was hitting an assertion before
     """
     assert True  # no need to do anything. Test would fail at fixture setup
+
+
+def test_readers(tmp_path):
+    """Test that reads of other greenlets go through the read only connections and don't
+    see the changes of an open write transaction, while the writing greenlet sees them"""
+    conn = DBConnection(
+        path=str(tmp_path / 'test.db'),
+        connection_type=DBConnectionType.USER,
+        sql_vm_instructions_cb=10,
+    )
+    conn.executescript('PRAGMA key="123";')
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute('CREATE TABLE a(b INTEGER PRIMARY KEY)')
+    conn.enable_readers(setup_script='PRAGMA key="123";', max_readers=2)
+    with conn.read_ctx() as cursor:  # the first read doesn't wait for a reader to be opened
+        assert cursor._cursor.connection is conn._conn
+    conn.reader_opener.join()
+    assert len(conn.idle_readers) == 1
+    written, can_commit = Event(), Event()
+
+    def write():
+        with conn.write_ctx() as write_cursor:
+            write_cursor.execute('INSERT INTO a VALUES (1)')
+            with conn.read_ctx() as cursor:  # reads of the writer see its changes
+                assert cursor.execute('SELECT COUNT(*) FROM a').fetchone()[0] == 1
+            written.set()
+            can_commit.wait()
+
+    writer = gevent.spawn(write)
+    written.wait()
+    with conn.read_ctx() as cursor:
+        assert cursor.execute('SELECT COUNT(*) FROM a').fetchone()[0] == 0
+        with conn.read_ctx() as nested_cursor:  # nested reads share the reader
+            assert nested_cursor._cursor.connection is cursor._cursor.connection
+        assert len(conn.busy_readers) == 1
+        with pytest.raises(sqlcipher.OperationalError):  # pylint: disable=no-member
+            cursor.execute('DELETE FROM a')
+
+    can_commit.set()
+    writer.get()
+    assert len(conn.busy_readers) == 0
+    assert len(conn.idle_readers) == 1
+    with conn.read_ctx() as cursor:
+        assert cursor.execute('SELECT COUNT(*) FROM a').fetchone()[0] == 1
+
+    conn.enable_readers(setup_script='PRAGMA key="123";', max_readers=0)
+    assert len(conn.idle_readers) == 0  # reconfiguring closes the open readers
+    with conn.read_ctx() as cursor:  # with no readers the writer connection is used
+        assert cursor._cursor.connection is conn._conn
+    conn.close()
+
+
+def test_execute_in_thread(tmp_path):
+    """Test that other greenlets run while a heavy statement runs in a thread, both through
+    a reader and through the writer, and that they don't read through the writer meanwhile"""
+    conn = DBConnection(
+        path=str(tmp_path / 'test.db'),
+        connection_type=DBConnectionType.USER,
+        sql_vm_instructions_cb=10,
+    )
+    conn.executescript('PRAGMA key="123";')
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute('CREATE TABLE a(b INTEGER PRIMARY KEY)')
+    conn.enable_readers(setup_script='PRAGMA key="123";', max_readers=1)
+    with conn.read_ctx():  # start opening the reader
+        pass
+    conn.reader_opener.join()
+    heavy_query = 'WITH RECURSIVE x(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM x WHERE n < 3000000) SELECT COUNT(*) FROM x'  # noqa: E501
+    ticks = []
+
+    def tick():
+        while True:
+            ticks.append(1)
+            gevent.sleep(0.001)
+
+    ticker = gevent.spawn(tick)
+    with conn.read_ctx() as cursor:
+        ticks.clear()
+        assert cursor.execute_in_thread(heavy_query) == [(3000000,)]
+        assert len(ticks) > 5
+
+    def read_during_write():
+        with conn.read_ctx() as cursor:  # the only reader is in use so the writer is used
+            assert cursor._cursor.connection is conn._conn
+            assert conn.writer_thread_done is None
+            return cursor.execute('SELECT COUNT(*) FROM a').fetchone()[0]
+
+    def execute_during_write():  # using the writer connection directly also waits
+        assert conn.writer_thread_done is not None
+        result = conn.execute('SELECT COUNT(*) FROM a').fetchone()[0]
+        assert conn.writer_thread_done is None
+        return result
+
+    with conn.read_ctx(), conn.write_ctx() as write_cursor:  # keep the reader in use
+        write_cursor.execute('INSERT INTO a VALUES (1)')
+        ticks.clear()
+        reader = gevent.spawn(read_during_write)
+        executor = gevent.spawn(execute_during_write)
+        assert write_cursor.execute_in_thread(heavy_query) == [(3000000,)]
+        assert len(ticks) > 5
+
+    assert reader.get() == 1  # it waited for the thread and read through the writer
+    assert executor.get() == 1
+    ticker.kill()
+    conn.close()
+
+
+def test_readers_during_heavy_write(tmp_path):
+    """Test that reads of other greenlets are not blocked by a heavy statement of a write
+    transaction that runs in a thread when they go through the readers, while they wait
+    for the whole statement when they have to go through the writer"""
+    conn = DBConnection(
+        path=str(tmp_path / 'test.db'),
+        connection_type=DBConnectionType.USER,
+        sql_vm_instructions_cb=10,
+    )
+    conn.executescript('PRAGMA key="123";')
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute('CREATE TABLE a(b INTEGER PRIMARY KEY)')
+    heavy_query = 'WITH RECURSIVE x(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM x WHERE n < 3000000) SELECT COUNT(*) FROM x'  # noqa: E501
+
+    def read_frequently(thread_done: Event, reads_during_thread: list[int]) -> None:
+        while not thread_done.is_set():
+            with conn.read_ctx() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM a').fetchone()
+            if not thread_done.is_set():
+                reads_during_thread.append(1)
+            gevent.sleep(0.001)
+
+    for max_readers in (1, 0):
+        conn.enable_readers(setup_script='PRAGMA key="123";', max_readers=max_readers)
+        with conn.read_ctx():  # start opening the reader
+            pass
+        if conn.reader_opener is not None:
+            conn.reader_opener.join()
+
+        thread_done, reads_during_thread = Event(), []
+        reader = gevent.spawn(read_frequently, thread_done, reads_during_thread)
+        gevent.sleep(0.01)
+        reads_during_thread.clear()
+        with conn.write_ctx() as write_cursor:
+            assert write_cursor.execute_in_thread(heavy_query) == [(3000000,)]
+            thread_done.set()
+
+        reader.get()
+        if max_readers == 1:
+            assert len(reads_during_thread) > 5
+        else:  # the read that started during the thread waited for it to finish
+            assert len(reads_during_thread) == 0
+
+    conn.close()
+
+
+def test_statements_statistics(tmp_path):
+    """Test that statements are aggregated per shape once their rows are fetched, with the
+    rows they return or change and the time write transactions wait for the lock"""
+    assert normalize_statement(
+        "SELECT * FROM a  WHERE b IN (?, ?,?) AND\n c='x''y' AND d > 1.5",
+    ) == 'SELECT * FROM a WHERE b IN (?...) AND c=? AND d > ?'
+    conn = DBConnection(
+        path=str(tmp_path / 'test.db'),
+        connection_type=DBConnectionType.GLOBAL,
+        sql_vm_instructions_cb=10,
+    )
+    conn.execute('CREATE TABLE a(b INTEGER PRIMARY KEY)')
+    DB_INSTRUMENTATION.enable(slow_threshold_ms=1000)
+    try:
+        with conn.write_ctx() as write_cursor:
+            write_cursor.executemany('INSERT INTO a VALUES (?)', [(1,), (2,), (3,)])
+        with conn.read_ctx() as cursor:
+            cursor.execute('SELECT b FROM a WHERE b > 1')
+            assert DB_INSTRUMENTATION.stats.get('SELECT b FROM a WHERE b > ?') is None
+            assert cursor.fetchall() == [(2,), (3,)]
+            cursor.execute('SELECT b FROM a WHERE b > 2')
+            assert list(cursor) == [(3,)]
+
+        statistics = {x['statement']: x for x in DB_INSTRUMENTATION.serialize()['statements']}
+        assert statistics['INSERT INTO a VALUES (?)']['rows'] == 3
+        assert statistics['BEGIN TRANSACTION']['count'] == 1
+        select = statistics['SELECT b FROM a WHERE b > ?']
+        assert select['count'] == 2
+        assert select['rows'] == 3
+        assert sum(select['histogram']) == 2
+        assert len(select['call_sites']) == 2
+        assert all(x.startswith(f'{__name__}:') and x.endswith(' test_statements_statistics') for x in select['call_sites'])  # noqa: E501
+        DB_INSTRUMENTATION.reset()
+        assert DB_INSTRUMENTATION.serialize()['statements'] == []
+    finally:
+        DB_INSTRUMENTATION.disable()
+        conn.close()
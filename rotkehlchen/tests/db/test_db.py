@@ -7,6 +7,7 @@ from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.accounting.structures.balance import BalanceType
 from rotkehlchen.accounting.structures.types import ActionType
@@ -26,6 +27,7 @@ from rotkehlchen.constants.assets import (
     A_USDC,
 )
 from rotkehlchen.constants.misc import USERSDIR_NAME
+from rotkehlchen.crypto import SYNC_HEADER
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.cache import DBCacheDynamic, DBCacheStatic
 from rotkehlchen.db.dbhandler import DBHandler
@@ -42,8 +44,11 @@ from rotkehlchen.db.settings import (
     DEFAULT_CONNECT_TIMEOUT,
     DEFAULT_CURRENT_PRICE_ORACLES,
     DEFAULT_DATE_DISPLAY_FORMAT,
+    DEFAULT_DB_BACKUP_FREQUENCY,
+    DEFAULT_DB_BACKUPS_TO_KEEP,
     DEFAULT_DISPLAY_DATE_IN_LOCALTIME,
     DEFAULT_ETH_STAKING_TAXABLE_AFTER_WITHDRAWAL_ENABLED,
+    DEFAULT_ETHERSCAN_QUERIES_PER_SECOND,
     DEFAULT_HISTORICAL_PRICE_ORACLES,
     DEFAULT_INCLUDE_CRYPTO2CRYPTO,
     DEFAULT_INCLUDE_FEES_IN_COST_BASIS,
@@ -66,7 +71,7 @@ from rotkehlchen.db.settings import (
 )
 from rotkehlchen.db.utils import DBAssetBalance, LocationData, SingleDBAssetBalance
 from rotkehlchen.errors.api import AuthenticationError
-from rotkehlchen.errors.misc import DBSchemaError, InputError
+from rotkehlchen.errors.misc import DBSchemaError, InputError, UnableToDecryptRemoteData
 from rotkehlchen.exchanges.data_structures import AssetMovement, MarginPosition, Trade
 from rotkehlchen.fval import FVal
 from rotkehlchen.premium.premium import PremiumCredentials
@@ -293,7 +298,8 @@ def test_add_remove_exchange(database: DBHandler) -> None:
 
 
 def test_export_import_db(data_dir: Path, username: str, sql_vm_instructions_cb: int) -> None:
-    """Create a DB, write some data and then after export/import confirm it's there"""
+    """Create a DB, write some data and then after export/import confirm it's there.
+    Also check that remote DBs encrypted before the format was versioned can be imported"""
     msg_aggregator = MessagesAggregator()
     data = DataHandler(data_dir, msg_aggregator, sql_vm_instructions_cb)
     data.unlock(username, '123', create_new=True, resume_from_backup=False)
@@ -309,12 +315,22 @@ def test_export_import_db(data_dir: Path, username: str, sql_vm_instructions_cb:
     with data.db.user_write() as cursor:
         data.db.add_manually_tracked_balances(cursor, [starting_balance])
 
-    encoded_data, _ = data.compress_and_encrypt_db()
-    # The server would return them decoded
-    data.decompress_and_decrypt_db(encoded_data)
+    encrypted_path = data_dir / 'encrypted.db'
+    our_hash = data.compress_and_encrypt_db(encrypted_path)
+    assert encrypted_path.read_bytes().startswith(SYNC_HEADER)
+    data.decompress_and_decrypt_db(encrypted_path)
     with data.db.user_write() as cursor:
         balances = data.db.get_manually_tracked_balances(cursor)
     assert balances == [starting_balance]
+    assert data.compress_and_encrypt_db(encrypted_path) == our_hash
+
+    encrypted_path.write_bytes(encrypted_path.read_bytes()[:-1])
+    with pytest.raises(UnableToDecryptRemoteData):  # truncated data is detected
+        data.decompress_and_decrypt_db(encrypted_path)
+
+    data.decompress_and_decrypt_db(Path(__file__).resolve().parent.parent / 'data' / 'remote_old_encrypted_db.bin')  # noqa: E501
+    with data.db.conn.read_ctx() as cursor:
+        assert data.db.get_manually_tracked_balances(cursor) != [starting_balance]
 
 
 def test_writing_fetching_data(data_dir, username, sql_vm_instructions_cb):
@@ -513,6 +529,9 @@ def test_writing_fetching_data(data_dir, username, sql_vm_instructions_cb):
         'read_timeout': DEFAULT_READ_TIMEOUT,
         'oracle_penalty_threshold_count': DEFAULT_ORACLE_PENALTY_THRESHOLD_COUNT,
         'oracle_penalty_duration': DEFAULT_ORACLE_PENALTY_DURATION,
+        'db_backup_frequency': DEFAULT_DB_BACKUP_FREQUENCY,
+        'db_backups_to_keep': DEFAULT_DB_BACKUPS_TO_KEEP,
+        'etherscan_queries_per_second': DEFAULT_ETHERSCAN_QUERIES_PER_SECOND,
     }
     assert len(expected_dict) == len(dataclasses.fields(DBSettings)), 'One or more settings are missing'  # noqa: E501
 
@@ -586,6 +605,50 @@ def test_key_value_cache_entry_types(database):
     assert default_value is None
 
 
+def test_automatic_db_backups(database: DBHandler) -> None:
+    """Test that automatic DB backups include the latest changes, are listed with the
+    other backups and that only the latest `db_backups_to_keep` of them are kept"""
+    with database.user_write() as write_cursor:
+        database.set_settings(write_cursor, ModifiableDBSettings(db_backups_to_keep=2))
+    manual_backup = database.create_db_backup()
+    for timestamp in (1, 2, 3):
+        with patch('rotkehlchen.db.dbhandler.ts_now', return_value=Timestamp(timestamp)):
+            database.create_automatic_db_backup()
+
+    version = ROTKEHLCHEN_DB_VERSION
+    assert manual_backup.exists()
+    assert sorted(x.name for x in database.user_data_dir.glob('*_auto.backup')) == [
+        f'2_rotkehlchen_db_v{version}_auto.backup',
+        f'3_rotkehlchen_db_v{version}_auto.backup',
+    ]
+    assert {x['time'] for x in database.get_backups()} == {int(manual_backup.name.split('_')[0]), 2, 3}  # noqa: E501
+    with database.conn.read_ctx() as cursor:
+        assert database.get_static_cache(cursor=cursor, name=DBCacheStatic.LAST_DB_BACKUP_TS) == 3
+
+    backup_conn = sqlcipher.connect(str(database.user_data_dir / f'3_rotkehlchen_db_v{version}_auto.backup'))  # pylint: disable=no-member  # noqa: E501
+    backup_conn.executescript(database._key_script(database.password))
+    assert backup_conn.execute(
+        "SELECT value FROM settings WHERE name='db_backups_to_keep'",
+    ).fetchone()[0] == '2'
+    backup_conn.close()
+
+    # a backup with the same name as an existing one replaces it
+    with database.user_write() as write_cursor:
+        database.set_settings(write_cursor, ModifiableDBSettings(db_backups_to_keep=3))
+    with patch('rotkehlchen.db.dbhandler.ts_now', return_value=Timestamp(3)):
+        database.create_automatic_db_backup()
+    assert sorted(x.name for x in database.user_data_dir.glob('*_auto.backup*')) == [
+        f'2_rotkehlchen_db_v{version}_auto.backup',
+        f'3_rotkehlchen_db_v{version}_auto.backup',
+    ]
+    backup_conn = sqlcipher.connect(str(database.user_data_dir / f'3_rotkehlchen_db_v{version}_auto.backup'))  # pylint: disable=no-member  # noqa: E501
+    backup_conn.executescript(database._key_script(database.password))
+    assert backup_conn.execute(
+        "SELECT value FROM settings WHERE name='db_backups_to_keep'",
+    ).fetchone()[0] == '3'
+    backup_conn.close()
+
+
 def test_balance_save_frequency_check(data_dir, username, sql_vm_instructions_cb):
     msg_aggregator = MessagesAggregator()
     data = DataHandler(data_dir, msg_aggregator, sql_vm_instructions_cb)
@@ -1947,3 +2010,23 @@ def test_startup_check_settings(database: 'DBHandler') -> None:
     assert settings.non_syncing_exchanges == [
         ExchangeLocationID(name='Coinbase', location=Location.COINBASE),
     ]
+
+
+def test_decimal_sum(database: 'DBHandler') -> None:
+    """Test that the DECIMAL_SUM aggregate sums amounts exactly, unlike REAL based sums"""
+    with database.user_write() as write_cursor:
+        write_cursor.executemany(
+            'INSERT INTO timed_balances(category, timestamp, currency, amount, usd_value) '
+            'VALUES(?, ?, ?, ?, ?)',
+            [
+                ('A', 1, 'ETH', '123456789012345678.123456789012345678', '0.1'),
+                ('A', 2, 'ETH', '0.300000000000000000', '0.2'),
+                ('A', 3, 'ETH', 'invalid', 'inf'),
+            ],
+        )
+        assert write_cursor.execute(
+            'SELECT DECIMAL_SUM(amount), DECIMAL_SUM(usd_value) FROM timed_balances',
+        ).fetchone() == ('123456789012345678.423456789012345678', '0.3')
+        assert write_cursor.execute(
+            'SELECT DECIMAL_SUM(amount) FROM timed_balances WHERE timestamp > 5',
+        ).fetchone() == (None,)
@@ -2247,9 +2247,22 @@ def test_upgrade_db_41_to_42(user_data_dir, messages_aggregator):
         msg_aggregator=messages_aggregator,
         resume_from_backup=False,
     )
+    expected_indexes = {
+        ('idx_history_events_timestamp', 'history_events'),
+        ('idx_history_events_location', 'history_events'),
+        ('idx_history_events_asset', 'history_events'),
+        ('idx_evm_events_info_tx_hash', 'evm_events_info'),
+        ('idx_evm_events_info_counterparty', 'evm_events_info'),
+        ('idx_evm_transactions_timestamp', 'evm_transactions'),
+        ('idx_evm_transactions_chain_id_timestamp', 'evm_transactions'),
+        ('idx_evmtx_address_mappings_address', 'evmtx_address_mappings'),
+    }
     with db_v41.conn.write_ctx() as cursor:
         assert table_exists(cursor, 'zksynclite_tx_type') is False
         assert table_exists(cursor, 'zksynclite_transactions') is False
+        assert cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%'",
+        ).fetchone()[0] == 0
 
     # Execute upgrade
     db = _init_db_with_target_version(
@@ -2267,6 +2280,9 @@ def test_upgrade_db_41_to_42(user_data_dir, messages_aggregator):
         assert cursor.execute('SELECT * FROM zksynclite_tx_type').fetchall() == [
             ('A', 1), ('B', 2), ('C', 3), ('D', 4), ('E', 5),
         ]
+        assert set(cursor.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%'",
+        )) == expected_indexes
 
 
 def test_latest_upgrade_correctness(user_data_dir):
@@ -2312,12 +2328,16 @@ def test_latest_upgrade_correctness(user_data_dir):
     tables_after_upgrade = {x[0] for x in result}
     result = cursor.execute('SELECT name FROM sqlite_master WHERE type="view"')
     views_after_upgrade = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="index"')
+    indexes_after_upgrade = {x[0] for x in result}
     # also add latest tables (this will indicate if DB upgrade missed something
     db.conn.executescript(DB_SCRIPT_CREATE_TABLES)
     result = cursor.execute('SELECT name FROM sqlite_master WHERE type="table"')
     tables_after_creation = {x[0] for x in result}
     result = cursor.execute('SELECT name FROM sqlite_master WHERE type="view"')
     views_after_creation = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="index"')
+    indexes_after_creation = {x[0] for x in result}
 
     assert cursor.execute('SELECT value FROM settings WHERE name="version"').fetchone()[0] == '42'
     removed_tables = set()
@@ -2328,6 +2348,7 @@ def test_latest_upgrade_correctness(user_data_dir):
     assert missing_views == removed_views
     assert tables_after_creation - tables_after_upgrade == set()
     assert views_after_creation - views_after_upgrade == set()
+    assert indexes_after_creation - indexes_after_upgrade == set()
     new_tables = tables_after_upgrade - tables_before
     assert new_tables == {'zksynclite_tx_type', 'zksynclite_transactions'}
     new_views = views_after_upgrade - views_before
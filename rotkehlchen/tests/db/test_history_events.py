@@ -14,10 +14,15 @@ from rotkehlchen.db.filtering import (
     EthDepositEventFilterQuery,
     EvmEventFilterQuery,
     HistoryEventFilterQuery,
+    decode_pagination_cursor,
 )
 from rotkehlchen.db.history_events import DBHistoryEvents
 from rotkehlchen.fval import FVal
-from rotkehlchen.history.events.structures.base import HistoryBaseEntryType, HistoryEvent
+from rotkehlchen.history.events.structures.base import (
+    HistoryBaseEntry,
+    HistoryBaseEntryType,
+    HistoryEvent,
+)
 from rotkehlchen.history.events.structures.eth2 import EthDepositEvent, EthWithdrawalEvent
 from rotkehlchen.history.events.structures.evm_event import EvmEvent, EvmProduct
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
@@ -318,3 +323,130 @@ def test_delete_last_event(database):
     assert 'was the last event of a transaction' in msg
     with db.db.conn.read_ctx() as cursor:
         assert len(db.get_history_events(cursor, HistoryEventFilterQuery.make(), True)) == 1, 'EVM event should be left'  # noqa: E501
+
+
+@pytest.mark.parametrize('has_premium', [True, False])
+def test_keyset_pagination(database: DBHandler, has_premium: bool) -> None:
+    """Test that paginating history events with cursors returns the same events in the
+    same order as offsets, even for events with equal timestamp and sequence index"""
+    db = DBHistoryEvents(database)
+    with db.db.user_write() as write_cursor:
+        db.add_history_events(
+            write_cursor=write_cursor,
+            history=[HistoryEvent(
+                event_identifier=f'TEST{idx}',
+                sequence_index=idx % 3,
+                timestamp=TimestampMS(1000 * (idx % 4)),
+                location=Location.KRAKEN if idx % 5 == 0 else Location.ETHEREUM,
+                event_type=HistoryEventType.TRADE,
+                event_subtype=HistoryEventSubType.NONE,
+                asset=A_ETH,
+                balance=Balance(FVal(idx)),
+            ) for idx in range(40)],
+        )
+
+    order_by_rules = [('timestamp', False), ('sequence_index', True), ('history_events_identifier', True)]  # noqa: E501
+    with db.db.conn.read_ctx() as cursor:
+        for location in (None, Location.ETHEREUM):
+            all_events = db.get_history_events(
+                cursor=cursor,
+                filter_query=HistoryEventFilterQuery.make(order_by_rules=order_by_rules, location=location),  # noqa: E501
+                has_premium=has_premium,
+            )
+            offset_events: list[HistoryBaseEntry] = []
+            cursor_events: list[HistoryBaseEntry] = []
+            after: list[Any] | None = None
+            while True:
+                offset_page = db.get_history_events(
+                    cursor=cursor,
+                    filter_query=HistoryEventFilterQuery.make(order_by_rules=order_by_rules, limit=7, offset=len(offset_events), location=location),  # noqa: E501
+                    has_premium=has_premium,
+                )
+                filter_query = HistoryEventFilterQuery.make(
+                    order_by_rules=order_by_rules,
+                    limit=7,
+                    after=after,
+                    location=location,
+                )
+                cursor_page = db.get_history_events(
+                    cursor=cursor,
+                    filter_query=filter_query,
+                    has_premium=has_premium,
+                )
+                assert cursor_page == offset_page
+                offset_events.extend(offset_page)
+                cursor_events.extend(cursor_page)
+                if (next_cursor := filter_query.next_page_cursor(cursor_page)) is None:
+                    break
+                after = decode_pagination_cursor(next_cursor)
+
+            assert cursor_events == offset_events == all_events
+            assert len(all_events) == (40 if location is None else 32)
+
+
+def test_history_events_counts(database: DBHandler) -> None:
+    """Test that the cached counts and the totals per location of the history events follow
+    all writes to the tables the filters read, whatever code does them, and rollbacks"""
+    db = DBHistoryEvents(database)
+    counts = database.history_events_counts
+
+    counted_filters: tuple[dict[str, Any], ...] = (
+        {},
+        {'location': Location.KRAKEN},
+        {'exclude_ignored_assets': True},
+        {'from_ts': Timestamp(2)},
+    )
+
+    def get_counts() -> tuple[int, int, int, int]:
+        with database.conn.read_ctx() as cursor:
+            return tuple(db.get_history_events_count(  # type: ignore[return-value]
+                cursor=cursor,
+                query_filter=HistoryEventFilterQuery.make(**filter_args),
+            )[0] for filter_args in counted_filters)
+
+    with database.user_write() as write_cursor:
+        db.add_history_events(
+            write_cursor=write_cursor,
+            history=[HistoryEvent(
+                event_identifier=f'TEST{idx}',
+                sequence_index=0,
+                timestamp=TimestampMS(1000 * idx),
+                location=Location.KRAKEN if idx % 2 == 0 else Location.ETHEREUM,
+                event_type=HistoryEventType.TRADE,
+                event_subtype=HistoryEventSubType.NONE,
+                asset=A_ETH,
+                balance=Balance(FVal(idx)),
+            ) for idx in range(6)],
+        )
+
+    assert get_counts() == (6, 3, 6, 4)
+    assert len(counts.counts) == 2, 'only the filtered counts should be cached'
+    assert get_counts() == (6, 3, 6, 4)
+
+    with database.user_write() as write_cursor:  # not through DBHistoryEvents
+        write_cursor.execute(
+            'UPDATE history_events SET location=? WHERE event_identifier=?',
+            (Location.ETHEREUM.serialize_for_db(), 'TEST0'),
+        )
+    assert len(counts.counts) == 0
+    assert get_counts() == (6, 2, 6, 4)
+
+    def delete_all_and_fail() -> None:
+        with database.user_write() as write_cursor:
+            write_cursor.execute('DELETE FROM history_events')
+            raise ValueError('rollback')
+
+    with pytest.raises(ValueError, match='rollback'):
+        delete_all_and_fail()
+    assert get_counts() == (6, 2, 6, 4)
+
+    with database.user_write() as write_cursor:
+        database.add_to_ignored_assets(write_cursor=write_cursor, asset=A_ETH)
+    assert get_counts() == (6, 2, 0, 4)
+
+    with database.conn.read_ctx() as cursor:
+        identifier = cursor.execute(
+            'SELECT identifier FROM history_events WHERE event_identifier=?', ('TEST4',),
+        ).fetchone()[0]
+    assert db.delete_history_events_by_identifier(identifiers=[identifier]) is None
+    assert get_counts() == (5, 1, 0, 3)
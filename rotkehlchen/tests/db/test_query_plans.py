@@ -0,0 +1,176 @@
+import re
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from rotkehlchen.chain.evm.types import EvmAccount
+from rotkehlchen.constants.assets import A_ETH, A_USDC
+from rotkehlchen.db.evmtx import DBEvmTx
+from rotkehlchen.db.filtering import (
+    EvmEventFilterQuery,
+    EvmTransactionsFilterQuery,
+    HistoryEventFilterQuery,
+)
+from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.history.events.structures.evm_event import EvmProduct
+from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
+from rotkehlchen.types import ChainID, Location, Timestamp
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+# a plan step that reads a whole big table without any index
+FULL_SCAN_RE = re.compile(r'^SCAN (history_events|evm_events_info|evm_transactions|evmtx_address_mappings|evm_tx_mappings)$')  # noqa: E501
+ADDRESS = make_evm_address()
+TX_HASH = make_evm_tx_hash()
+# the queries are checked both without and with pagination
+PAGINATION_ARGS: tuple[dict[str, Any], ...] = ({}, {'limit': 10, 'offset': 20})
+
+
+class QueryPlanCursor:
+    """Cursor that records the query plan of the queries executed through it instead
+    of running them. Results are empty and counts are zero."""
+
+    def __init__(self, cursor: 'DBCursor') -> None:
+        self.cursor = cursor
+        self.plans: list[tuple[str, list[str]]] = []
+
+    def execute(self, statement: str, bindings: Any = ()) -> 'QueryPlanCursor':
+        plan = [row[3] for row in self.cursor.execute(f'EXPLAIN QUERY PLAN {statement}', bindings)]
+        self.plans.append((statement, plan))
+        return self
+
+    def execute_in_thread(self, statement: str, bindings: Any = ()) -> list[Any]:
+        self.execute(statement, bindings)
+        return []
+
+    def __iter__(self) -> 'QueryPlanCursor':
+        return self
+
+    def __next__(self) -> Any:
+        raise StopIteration
+
+    def fetchone(self) -> tuple[int]:
+        return (0,)
+
+    def assert_no_full_scans(self) -> None:
+        assert len(self.plans) != 0
+        for statement, plan in self.plans:
+            if 'WHERE' not in statement and 'ORDER BY' not in statement:
+                continue  # reads the whole table anyway
+
+            full_scans = [x for x in plan if FULL_SCAN_RE.match(x) is not None]
+            assert full_scans == [], f'{statement} does a full scan. Plan: {plan}'
+
+
+def _seed_database(database: 'DBHandler') -> None:
+    """Add some transactions and events so that the plans are of a DB in use"""
+    with database.user_write() as write_cursor:
+        for idx in range(20):
+            write_cursor.execute(
+                'INSERT INTO evm_transactions(tx_hash, chain_id, timestamp, block_number, '
+                'from_address, to_address, value, gas, gas_price, gas_used, input_data, nonce) '
+                'VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (make_evm_tx_hash(), ChainID.ETHEREUM.serialize_for_db(), idx, idx, ADDRESS, make_evm_address(), '0', '0', '0', '0', b'', idx),  # noqa: E501
+            )
+            write_cursor.execute(
+                'INSERT INTO evmtx_address_mappings(tx_id, address) VALUES(?, ?)',
+                (write_cursor.lastrowid, ADDRESS),
+            )
+            write_cursor.execute(
+                'INSERT INTO history_events(entry_type, event_identifier, sequence_index, '
+                'timestamp, location, location_label, asset, amount, usd_value, notes, type, '
+                "subtype) VALUES(2, ?, 0, ?, 'f', ?, ?, '1', '1', NULL, 'spend', 'fee')",
+                (f'10x{idx}', idx * 1000, ADDRESS, A_ETH.identifier),
+            )
+            write_cursor.execute(
+                'INSERT INTO evm_events_info(identifier, tx_hash, counterparty, product, '
+                "address, extra_data) VALUES(?, ?, 'gas', NULL, NULL, NULL)",
+                (write_cursor.lastrowid, make_evm_tx_hash()),
+            )
+
+
+@pytest.mark.parametrize('has_premium', [True, False])
+@pytest.mark.parametrize('group_by_event_ids', [False, True])
+@pytest.mark.parametrize(('filter_query_class', 'filter_args'), [
+    (HistoryEventFilterQuery, {}),
+    (HistoryEventFilterQuery, {'from_ts': Timestamp(5), 'to_ts': Timestamp(10)}),
+    (HistoryEventFilterQuery, {'location': Location.ETHEREUM}),
+    (HistoryEventFilterQuery, {'assets': (A_ETH,)}),
+    (HistoryEventFilterQuery, {'assets': (A_ETH, A_USDC)}),
+    (HistoryEventFilterQuery, {'event_identifiers': ['10x1', '10x2']}),
+    (HistoryEventFilterQuery, {'exclude_ignored_assets': True}),
+    (HistoryEventFilterQuery, {'location': Location.ETHEREUM, 'from_ts': Timestamp(5)}),
+    (HistoryEventFilterQuery, {'order_by_rules': [('timestamp', True)]}),
+    (HistoryEventFilterQuery, {'order_by_rules': [('timestamp', False), ('sequence_index', True)]}),  # noqa: E501
+    (EvmEventFilterQuery, {'order_by_rules': [('timestamp', False), ('sequence_index', True)]}),
+    (EvmEventFilterQuery, {'tx_hashes': [TX_HASH]}),
+    (EvmEventFilterQuery, {'counterparties': ['gas']}),
+    (EvmEventFilterQuery, {'counterparties': ['gas'], 'products': [EvmProduct.POOL]}),
+    (EvmEventFilterQuery, {'location': Location.ETHEREUM, 'tx_hashes': [TX_HASH]}),
+])
+def test_history_events_query_plans(
+        database: 'DBHandler',
+        filter_query_class: type[HistoryEventFilterQuery | EvmEventFilterQuery],
+        filter_args: dict[str, Any],
+        group_by_event_ids: bool,
+        has_premium: bool,
+) -> None:
+    """Test that the history events queries, paginated and not, and their counts don't
+    read the whole history_events table when filtered and are ordered through an index"""
+    _seed_database(database)
+    dbevents = DBHistoryEvents(database)
+    with database.conn.read_ctx() as cursor:
+        for pagination_args in PAGINATION_ARGS:
+            plan_cursor = QueryPlanCursor(cursor)
+            dbevents.get_history_events_and_limit_info(
+                cursor=plan_cursor,  # type: ignore  # only the recording of plans is needed
+                filter_query=filter_query_class.make(**filter_args, **pagination_args),
+                has_premium=has_premium,
+                group_by_event_ids=group_by_event_ids,
+                entries_limit=None if has_premium else 100,
+            )
+            plan_cursor.assert_no_full_scans()
+
+        if group_by_event_ids is False:
+            plan_cursor = QueryPlanCursor(cursor)
+            dbevents.get_history_events(
+                cursor=plan_cursor,  # type: ignore  # only the recording of plans is needed
+                filter_query=filter_query_class.make(
+                    **filter_args | {'order_by_rules': [('timestamp', False), ('sequence_index', True), ('history_events_identifier', True)]},  # noqa: E501
+                    limit=10,
+                    after=[10000, 0, 10],
+                ),
+                has_premium=has_premium,
+            )
+            plan_cursor.assert_no_full_scans()
+
+
+@pytest.mark.parametrize('filter_args', [
+    {},
+    {'chain_id': ChainID.ETHEREUM},
+    {'chain_id': ChainID.ETHEREUM, 'from_ts': Timestamp(5), 'to_ts': Timestamp(10)},
+    {'from_ts': Timestamp(5)},
+    {'accounts': [EvmAccount(address=ADDRESS)]},
+    {'accounts': [EvmAccount(address=ADDRESS, chain_id=ChainID.ETHEREUM)], 'chain_id': ChainID.ETHEREUM},  # noqa: E501
+    {'tx_hash': TX_HASH, 'chain_id': ChainID.ETHEREUM},
+    {'order_by_rules': [('timestamp', False)]},
+])
+def test_evm_transactions_query_plans(database: 'DBHandler', filter_args: dict[str, Any]) -> None:
+    """Test that the evm transactions queries and their counts don't read the whole
+    evm_transactions table when filtered and are ordered through an index.
+
+    Only the premium queries are checked. The free ones scan the latest transactions,
+    which are at most the free limit, from a subquery named as the table."""
+    _seed_database(database)
+    dbevmtx = DBEvmTx(database)
+    with database.conn.read_ctx() as cursor:
+        for pagination_args in PAGINATION_ARGS:
+            plan_cursor = QueryPlanCursor(cursor)
+            dbevmtx.get_evm_transactions_and_limit_info(
+                cursor=plan_cursor,  # type: ignore  # only the recording of plans is needed
+                filter_=EvmTransactionsFilterQuery.make(**filter_args, **pagination_args),
+                has_premium=True,
+            )
+            plan_cursor.assert_no_full_scans()
@@ -1,7 +1,9 @@
+from rotkehlchen.accounting.constants import PNL_CHECKPOINTS_MAX_NUM
 from rotkehlchen.accounting.pnl import PnlTotals
 from rotkehlchen.db.reports import DBAccountingReports
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.tests.utils.constants import A_GBP
+from rotkehlchen.types import Timestamp
 
 
 def test_report_settings(database):
@@ -55,3 +57,41 @@ def test_report_settings(database):
         else:
             value = getattr(settings, setting_name)
         assert returned_settings[x] == value
+
+
+def test_pnl_checkpoints(database):
+    """Test that PnL checkpoints are saved, pruned and invalidated"""
+    dbreport = DBAccountingReports(database)
+    for idx in range(PNL_CHECKPOINTS_MAX_NUM + 2):
+        dbreport.add_pnl_checkpoint(
+            timestamp=Timestamp((idx + 1) * 100),
+            settings_hash='hash1',
+            history_counts=[idx, 0, 0, idx, 0],
+            data={'processed_actions': idx},
+        )
+    dbreport.add_pnl_checkpoint(
+        timestamp=Timestamp(100),
+        settings_hash='hash2',
+        history_counts=[1, 0, 0, 0, 0],
+        data={'processed_actions': 1},
+    )
+
+    # only the latest checkpoints of each settings hash are kept
+    checkpoints = dbreport.get_pnl_checkpoints(settings_hash='hash1', to_ts=Timestamp(10000))
+    assert [x[0] for x in checkpoints] == [
+        (idx + 1) * 100 for idx in range(PNL_CHECKPOINTS_MAX_NUM + 1, 1, -1)
+    ]
+    assert checkpoints[0][1] == [PNL_CHECKPOINTS_MAX_NUM + 1, 0, 0, PNL_CHECKPOINTS_MAX_NUM + 1, 0]
+    assert dbreport.get_pnl_checkpoints(settings_hash='hash1', to_ts=Timestamp(450))[0][0] == 400
+    assert dbreport.get_pnl_checkpoint_data(
+        settings_hash='hash1',
+        timestamp=Timestamp(400),
+    ) == {'processed_actions': 3}
+
+    # editing the history deletes the checkpoints after the edited timestamp
+    database.invalidate_pnl_checkpoints(Timestamp(500))
+    assert [x[0] for x in dbreport.get_pnl_checkpoints(settings_hash='hash1', to_ts=Timestamp(10000))] == [500, 400, 300]  # noqa: E501
+    assert len(dbreport.get_pnl_checkpoints(settings_hash='hash2', to_ts=Timestamp(10000))) == 1
+    database.invalidate_pnl_checkpoints()
+    assert dbreport.get_pnl_checkpoints(settings_hash='hash1', to_ts=Timestamp(10000)) == []
+    assert dbreport.get_pnl_checkpoints(settings_hash='hash2', to_ts=Timestamp(10000)) == []
@@ -13,7 +13,11 @@ from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
-from rotkehlchen.externalapis.etherscan import EtherscanHasChainActivity
+from rotkehlchen.db.settings import DEFAULT_ETHERSCAN_QUERIES_PER_SECOND, ModifiableDBSettings
+from rotkehlchen.externalapis.etherscan import (
+    ETHERSCAN_NO_API_KEY_QUERIES_PER_SECOND,
+    EtherscanHasChainActivity,
+)
 from rotkehlchen.globaldb.migrations.migration1 import ILK_REGISTRY_ABI
 from rotkehlchen.serialization.deserialize import deserialize_evm_transaction
 from rotkehlchen.tests.utils.mock import MockResponse
@@ -91,6 +95,29 @@ def test_maximum_rate_limit_reached(temp_etherscan, **kwargs):  # pylint: disabl
     assert result == '0x1337'
 
 
+def test_query_rate_follows_api_key(temp_etherscan):
+    """Test that the queries with an api key are limited by the rate set for the tier of
+    the key and the ones without an api key by the lower rate etherscan allows for those"""
+    etherscan = temp_etherscan
+
+    def eth_call() -> str:
+        return etherscan.eth_call(
+            '0x4678f0a6958e4D2Bc4F1BAF7Bc52E8F3564f3fE4',
+            '0xc455279100000000000000000000000027a2eaaa8bebea8d23db486fb49627c165baacb5',
+        )
+
+    with patch.object(etherscan.session, 'get', return_value=MockResponse(200, '{"jsonrpc":"2.0","id":1,"result":"0x1337"}')):  # noqa: E501
+        assert eth_call() == '0x1337'
+        assert etherscan.query_bucket.max_rate == DEFAULT_ETHERSCAN_QUERIES_PER_SECOND
+        with etherscan.db.user_write() as write_cursor:
+            etherscan.db.set_settings(write_cursor, ModifiableDBSettings(etherscan_queries_per_second=20))  # noqa: E501
+        assert eth_call() == '0x1337'
+        assert etherscan.query_bucket.max_rate == 20
+        etherscan.db.delete_external_service_credentials([ExternalService.ETHERSCAN])
+        assert eth_call() == '0x1337'
+        assert etherscan.query_bucket.max_rate == ETHERSCAN_NO_API_KEY_QUERIES_PER_SECOND
+
+
 def test_deserialize_transaction_from_etherscan():
     # Make sure that a missing to address due to contract creation is handled
     data = {'blockNumber': 54092, 'timeStamp': 1439048640, 'hash': '0x9c81f44c29ff0226f835cd0a8a2f2a7eca6db52a711f8211b566fd15d3e0e8d4', 'nonce': 0, 'blockHash': '0xd3cabad6adab0b52ea632c386ea19403680571e682c62cb589b5abcd76de2159', 'transactionIndex': 0, 'from': '0x5153493bB1E1642A63A098A65dD3913daBB6AE24', 'to': '', 'value': 11901464239480000000000000, 'gas': 2000000, 'gasPrice': 10000000000000, 'isError': 0, 'txreceipt_status': '', 'input': '0x313233', 'contractAddress': '0xde0b295669a9fd93d5f28d9ec85e40f4cb697bae', 'cumulativeGasUsed': 1436963, 'gasUsed': 1436963, 'confirmations': 8569454}  # noqa: E501
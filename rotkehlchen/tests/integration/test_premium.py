@@ -25,6 +25,7 @@ from rotkehlchen.tests.utils.premium import (
     assert_db_got_replaced,
     create_patched_requests_get_for_premium,
     get_different_hash,
+    get_local_db_hash,
     setup_starting_environment,
 )
 from rotkehlchen.utils.misc import ts_now
@@ -66,23 +67,25 @@ def test_upload_data_to_server(
     with rotkehlchen_instance.data.db.conn.read_ctx() as cursor:
         last_write_ts = rotkehlchen_instance.data.db.get_setting(cursor, name='last_write_ts')
 
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = get_different_hash(our_hash)
 
     def mock_succesfull_upload_data_to_server(
             url,  # pylint: disable=unused-argument
             data,
-            files,
+            headers,
             timeout,  # pylint: disable=unused-argument
     ):
         # Can't compare data blobs as they are encrypted and as such can be
         # different each time
-        assert data['original_hash'] == our_hash
-        assert data['last_modify_ts'] == last_write_ts
-        assert 'index' in data
-        assert len(files['db_file']) == data['length']
-        assert 'nonce' in data
-        assert data['compression'] == 'zlib'
+        assert headers['Content-Type'] == data.content_type
+        assert data.fields['original_hash'] == our_hash
+        assert data.fields['last_modify_ts'] == last_write_ts
+        assert 'index' in data.fields
+        assert data.file_size == data.fields['length']
+        assert len(data) == len(b''.join(data))
+        assert 'nonce' in data.fields
+        assert data.fields['compression'] == 'zlib'
 
         return MockResponse(200, '{"success": true}')
 
@@ -152,7 +155,7 @@ def test_upload_data_to_server_same_hash(rotkehlchen_instance):
         # Write anything in the DB to set a non-zero last_write_ts
         rotkehlchen_instance.data.db.set_settings(write_cursor, ModifiableDBSettings(main_currency=A_EUR))  # noqa: E501
 
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = our_hash
 
     patched_put = patch.object(
@@ -185,7 +188,7 @@ def test_upload_data_to_server_smaller_db(rotkehlchen_instance):
         assert last_ts is None
         # Write anything in the DB to set a non-zero last_write_ts
         rotkehlchen_instance.data.db.set_settings(cursor, ModifiableDBSettings(main_currency=A_EUR))  # noqa: E501
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = get_different_hash(our_hash)
 
     patched_put = patch.object(
@@ -504,7 +507,7 @@ def test_upload_data_to_server_db_already_in_use(rotkehlchen_instance):
         assert last_ts is None
         # Write anything in the DB to set a non-zero last_write_ts
         rotkehlchen_instance.data.db.set_settings(cursor, ModifiableDBSettings(main_currency=A_EUR))  # noqa: E501
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = get_different_hash(our_hash)
 
     patched_put = patch.object(
@@ -555,7 +558,7 @@ def test_upload_data_to_server_db_locked(rotkehlchen_instance):
 
         So to check this does not happen we make sure that when we come here
         the plaintext DB is not attached. Which is also the fix. To make that
-        export occur under a critical section
+        export occur with a connection of its own
         """
         result = db.conn.execute('SELECT * FROM pragma_database_list;')
         assert len(result.fetchall()) == 1, 'the plaintext DB should not be attached here'
@@ -568,7 +571,7 @@ def test_upload_data_to_server_db_locked(rotkehlchen_instance):
         # Write anything in the DB to set a non-zero last_write_ts
         rotkehlchen_instance.data.db.set_settings(cursor, ModifiableDBSettings(main_currency=A_EUR))  # noqa: E501
 
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = get_different_hash(our_hash)
 
     patched_put = patch.object(
@@ -604,13 +607,13 @@ def test_error_db_too_big(rotkehlchen_instance: 'Rotkehlchen') -> None:
     def mock_error_upload_data_to_server(
             url,
             data,
-            files,
+            headers,
             timeout,
     ):  # pylint: disable=unused-argument
         return MockResponse(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Payload size is too big')
 
     assert rotkehlchen_instance.premium is not None
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
     remote_hash = get_different_hash(our_hash)
     patched_put = patch.object(
         rotkehlchen_instance.premium.session,
@@ -3,6 +3,7 @@ import sqlite3
 from pathlib import Path
 from shutil import copyfile
 from typing import TYPE_CHECKING
+from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
@@ -65,6 +66,7 @@ from rotkehlchen.utils.misc import ts_now
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
 
 
 selfkey_address = string_to_evm_address('0x4CC19356f2D37338b9802aa8E8fc58B0373296E7')
@@ -1316,3 +1318,82 @@ def test_check_wal_mode_of_package_db(globaldb: GlobalDBHandler) -> None:
         journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
 
     assert journal_mode == 'delete'
+
+
+def test_evm_token_cache(globaldb: GlobalDBHandler) -> None:
+    """Test that evm token lookups are cached, including the ones of addresses that are
+    not tokens, and that adding, editing and deleting a token invalidates its entry"""
+    cache = globaldb.evm_token_cache
+    cache.clear()
+    address = make_evm_address()
+    hits, misses = cache.hits, cache.misses
+    assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) is None
+    assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) is None
+    assert (cache.hits - hits, cache.misses - misses) == (1, 1)
+
+    token = EvmToken.initialize(
+        address=address,
+        chain_id=ChainID.ETHEREUM,
+        token_kind=EvmTokenKind.ERC20,
+        decimals=18,
+        name='Cached token',
+        symbol='CACHED',
+    )
+    # a token read by another greenlet while adding it is not kept if the add fails
+    add_evm_token_data = GlobalDBHandler.add_evm_token_data
+
+    def add_and_fail(write_cursor: 'DBCursor', entry: EvmToken) -> None:
+        add_evm_token_data(write_cursor, entry)
+        assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) is not None
+        raise InputError('failed')
+
+    with (
+        patch.object(GlobalDBHandler, 'add_evm_token_data', side_effect=add_and_fail),
+        pytest.raises(InputError),
+    ):
+        globaldb.add_asset(token)
+    assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) is None
+
+    globaldb.add_asset(token)
+    db_token = globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM)
+    assert db_token is not None
+    assert db_token.name == 'Cached token'
+    assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) == db_token
+    assert cache.stats()['size'] == 1
+
+    globaldb.edit_evm_token(EvmToken.initialize(
+        address=address,
+        chain_id=ChainID.ETHEREUM,
+        token_kind=EvmTokenKind.ERC20,
+        decimals=6,
+        name='Edited token',
+        symbol='CACHED',
+    ))
+    db_token = globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM)
+    assert db_token is not None
+    assert (db_token.name, db_token.decimals) == ('Edited token', 6)
+
+    # a token that has the cached token as underlying is invalidated with it
+    parent_address = make_evm_address()
+    globaldb.add_asset(EvmToken.initialize(
+        address=parent_address,
+        chain_id=ChainID.ETHEREUM,
+        token_kind=EvmTokenKind.ERC20,
+        name='Parent token',
+        underlying_tokens=[UnderlyingToken(address=address, token_kind=EvmTokenKind.ERC20, weight=ONE)],  # noqa: E501
+    ))
+    # but not one whose underlying token has the same address on another chain
+    globaldb.add_asset(EvmToken.initialize(
+        address=parent_address,
+        chain_id=ChainID.OPTIMISM,
+        token_kind=EvmTokenKind.ERC20,
+        name='Optimism parent token',
+        underlying_tokens=[UnderlyingToken(address=address, token_kind=EvmTokenKind.ERC20, weight=ONE)],  # noqa: E501
+    ))
+    for chain_id in (ChainID.ETHEREUM, ChainID.OPTIMISM):
+        assert globaldb.get_evm_token(address=parent_address, chain_id=chain_id) is not None
+        assert (parent_address, chain_id) in cache.entries
+    globaldb.delete_evm_token(address=address, chain_id=ChainID.ETHEREUM)
+    assert (parent_address, ChainID.ETHEREUM) not in cache.entries
+    assert (parent_address, ChainID.OPTIMISM) in cache.entries
+    assert globaldb.get_evm_token(address=address, chain_id=ChainID.ETHEREUM) is None
@@ -131,3 +131,97 @@ def test_get_historical_price(globaldb, historical_price_test_data):  # pylint:
         max_seconds_distance=3600,
     )
     assert price_entry is None
+
+
+def test_price_series_cache(globaldb, historical_price_test_data):  # pylint: disable=unused-argument
+    """Test that pairs are kept in the price series cache and are invalidated
+    when their prices are modified"""
+    cache = globaldb.price_series_cache
+    cache.clear()
+    price_entry = globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    )
+    assert price_entry.price == Price(FVal(396.56))
+    assert list(cache.pairs) == [('eth', 'eur')]
+    assert cache.total_bytes > 0
+
+    # add a closer price and see that it's inserted in the cached series and returned
+    new_entry = HistoricalPrice(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        source=HistoricalPriceOracle.MANUAL,
+        timestamp=Timestamp(1511627620),
+        price=Price(FVal(400)),
+    )
+    globaldb.add_historical_prices([new_entry, new_entry._replace(price=Price(FVal(1)))])
+    assert list(cache.pairs) == [('eth', 'eur')]
+    manual_series = cache.pairs['eth', 'eur'].series[HistoricalPriceOracle.MANUAL]
+    assert list(manual_series.timestamps) == [1511627620]  # the duplicate got ignored
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ) == new_entry
+
+    # editing and deleting manual prices also invalidates the pair
+    edited_entry = new_entry._replace(price=Price(FVal(401)))
+    assert globaldb.edit_manual_price(edited_entry) is True
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ) == edited_entry
+    assert globaldb.delete_manual_price(A_ETH, A_EUR, Timestamp(1511627620)) is True
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ).price == Price(FVal(396.56))
+
+    globaldb.delete_historical_prices(from_asset=A_ETH, to_asset=A_EUR)
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ) is None
+
+    # check that the least recently used pairs get evicted when the cache is full
+    cache.clear()
+    globaldb.get_historical_price(A_BTC, A_EUR, Timestamp(1428994442), 3600)
+    cache.max_bytes = cache.total_bytes
+    globaldb.get_historical_price(A_ETH, A_USD, Timestamp(1428994442), 3600)
+    assert list(cache.pairs) == [('eth', 'usd')]
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_price_changes(globaldb, historical_price_test_data):  # pylint: disable=unused-argument
+    """Test that modifications of the prices are logged with the earliest changed timestamp"""
+    change_id = globaldb.get_latest_price_change_id()
+    assert globaldb.get_price_changes_since(change_id) is None
+    assert globaldb.get_price_changes_since(change_id + 1) == 0  # unknown ids mean anything changed  # noqa: E501
+
+    entry = HistoricalPrice(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        source=HistoricalPriceOracle.MANUAL,
+        timestamp=Timestamp(1511627620),
+        price=Price(FVal(400)),
+    )
+    globaldb.add_historical_prices([entry, entry._replace(timestamp=Timestamp(1511627630))])
+    assert globaldb.get_price_changes_since(change_id) == 1511627620
+    globaldb.add_historical_prices([entry])  # already there so nothing changed
+    assert globaldb.get_price_changes_since(change_id + 1) is None
+
+    assert globaldb.edit_manual_price(entry._replace(timestamp=Timestamp(1511627630), price=Price(FVal(401)))) is True  # noqa: E501
+    assert globaldb.get_price_changes_since(change_id + 1) == 1511627630
+    assert globaldb.delete_manual_price(A_ETH, A_EUR, Timestamp(1511627620)) is True
+    assert globaldb.get_price_changes_since(change_id + 2) == 1511627620
+    assert globaldb.get_price_changes_since(change_id) == 1511627620
+    assert globaldb.get_latest_price_change_id() == change_id + 3
@@ -28,3 +28,13 @@ def test_arg_sql_vm_instructions_cb(argparser):
     assert args.sqlite_instructions == 200
     args = argparser.parse_args(['--sqlite-instructions', '0'])
     assert args.sqlite_instructions == 0
+
+
+def test_arg_sqlite_slow_query_ms(argparser):
+    with pytest.raises(SystemExit):
+        argparser.parse_args(['--sqlite-slow-query-ms', '-1'])
+
+    args = argparser.parse_args(['--data-dir', 'foo'])
+    assert args.sqlite_slow_query_ms == 0
+    args = argparser.parse_args(['--sqlite-slow-query-ms', '250'])
+    assert args.sqlite_slow_query_ms == 250
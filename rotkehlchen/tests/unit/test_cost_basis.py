@@ -1,30 +1,40 @@
 import csv
+import json
+import logging
+import os
 import tempfile
+import time
 from itertools import zip_longest
 from pathlib import Path
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Any, cast
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from rotkehlchen.accounting.accountant import Accountant
 from rotkehlchen.accounting.cost_basis import AssetAcquisitionEvent
-from rotkehlchen.accounting.cost_basis.base import AverageCostBasisMethod
+from rotkehlchen.accounting.cost_basis.base import AverageCostBasisMethod, CostBasisEvents
 from rotkehlchen.accounting.export.csv import FILENAME_ALL_CSV, CSVExporter
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
 from rotkehlchen.accounting.pot import AccountingPot
 from rotkehlchen.accounting.structures.balance import Balance
+from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
 from rotkehlchen.accounting.types import MissingAcquisition
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.evm.accounting.structures import TxAccountingTreatment, TxEventSettings
 from rotkehlchen.chain.evm.decoding.uniswap.constants import CPT_UNISWAP_V2
 from rotkehlchen.constants import ONE, ZERO
 from rotkehlchen.constants.assets import A_3CRV, A_BTC, A_ETH, A_EUR, A_WETH
-from rotkehlchen.db.settings import DBSettings
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
+from rotkehlchen.db.filtering import ReportDataFilterQuery
+from rotkehlchen.db.reports import DBAccountingReports
+from rotkehlchen.db.settings import DBSettings, ModifiableDBSettings
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
 from rotkehlchen.history.events.structures.evm_event import EvmEvent
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
+from rotkehlchen.history.stream import HistoryStream
 from rotkehlchen.tests.utils.accounting import accounting_history_process
 from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
 from rotkehlchen.types import (
@@ -42,6 +52,7 @@ from rotkehlchen.types import (
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
 
+log = logging.getLogger(__name__)
 
 EXAMPLE_TIMESTAMP = Timestamp(1675483017)
 ONE_PRICE = Price(ONE)
@@ -663,6 +674,164 @@ def test_accounting_lifo_order(accountant: Accountant):
     ]
 
 
+@pytest.mark.parametrize('cost_basis_method', list(CostBasisMethod))
+def test_cost_basis_state_roundtrip(accountant: Accountant, cost_basis_method: CostBasisMethod):
+    """Test that the cost basis state saved in PnL checkpoints is restored to the same
+    state and that spending after restoring gives the same cost basis"""
+    cost_basis = accountant.pots[0].cost_basis
+    settings = DBSettings(cost_basis_method=cost_basis_method)
+    cost_basis.reset(settings)
+    acquisitions: tuple[tuple[int, int | str], ...] = ((2, 1), (1, 3), (5, 2), (3, '1.5'))
+    for idx, (amount, rate) in enumerate(acquisitions, start=1):
+        cost_basis.get_events(A_ETH).acquisitions_manager.add_in_event(AssetAcquisitionEvent(
+            amount=FVal(amount),
+            timestamp=Timestamp(EXAMPLE_TIMESTAMP + idx),
+            rate=Price(FVal(rate)),
+            index=idx,
+        ))
+    assert cost_basis.reduce_asset_amount(A_ETH, FVal(4), Timestamp(0)) is True
+    cost_basis.get_events(A_BTC).acquisitions_manager.add_in_event(AssetAcquisitionEvent(
+        amount=FVal('0.5'),
+        timestamp=EXAMPLE_TIMESTAMP,
+        rate=ONE_PRICE,
+        index=5,
+    ))
+    assert cost_basis.reduce_asset_amount(A_BTC, ONE, EXAMPLE_TIMESTAMP) is False
+    state = json.loads(json.dumps(cost_basis.serialize_state()))
+    spend_kwargs = {
+        'location': Location.BLOCKCHAIN,
+        'timestamp': Timestamp(EXAMPLE_TIMESTAMP + 10),
+        'asset': A_ETH,
+        'amount': FVal(3),
+        'rate': FVal(4),
+        'taxable_spend': True,
+    }
+    expected_info = cost_basis.spend_asset(**spend_kwargs)  # type: ignore[call-overload]
+    expected_state = cost_basis.serialize_state()
+
+    cost_basis.reset(settings)
+    cost_basis.restore_state(state)
+    assert cost_basis.serialize_state() == state
+    assert len(cost_basis.missing_acquisitions) == 1
+    assert cost_basis.spend_asset(**spend_kwargs) == expected_info  # type: ignore[call-overload]
+    assert cost_basis.serialize_state() == expected_state
+
+
+@pytest.mark.parametrize('start_with_valid_premium', [True])
+@pytest.mark.parametrize('cost_basis_method', list(CostBasisMethod))
+def test_resumed_report_equals_full_replay(
+        accountant: Accountant,
+        database: 'DBHandler',
+        cost_basis_method: CostBasisMethod,
+) -> None:
+    """Test that a PnL report resumed from a checkpoint of the accounting state is the
+    same as the report created by processing the whole history"""
+    with database.user_write() as write_cursor:
+        database.set_settings(write_cursor, ModifiableDBSettings(
+            cost_basis_method=cost_basis_method,
+            calculate_past_cost_basis=True,
+        ))
+        database.add_trades(write_cursor=write_cursor, trades=[Trade(
+            timestamp=Timestamp(EXAMPLE_TIMESTAMP + idx * 20 * DAY_IN_SECONDS),
+            location=Location.EXTERNAL,
+            base_asset=A_ETH,
+            quote_asset=A_EUR,
+            trade_type=TradeType.SELL if idx % 3 == 2 else TradeType.BUY,
+            amount=AssetAmount(FVal(idx % 4 + 1)),
+            rate=Price(FVal(1000 + (idx * 137) % 500)),
+            fee=Fee(ZERO),
+            fee_currency=A_EUR,
+            link=f'trade{idx}',
+        ) for idx in range(40)])
+
+    start_ts = Timestamp(EXAMPLE_TIMESTAMP + 400 * DAY_IN_SECONDS)
+    end_ts = Timestamp(EXAMPLE_TIMESTAMP + 800 * DAY_IN_SECONDS)
+    dbpnl = DBAccountingReports(database)
+
+    def create_report() -> tuple[dict[str, Any], list[ProcessedAccountingEvent]]:
+        report_id = accountant.process_history(
+            start_ts=start_ts,
+            end_ts=end_ts,
+            events=HistoryStream(database=database, end_ts=end_ts, extra_events=[]),
+        )
+        report = dbpnl.get_reports(report_id=report_id, with_limit=False)[0][0]
+        for key in ('identifier', 'timestamp'):  # differ per report
+            report.pop(key)
+        return report, dbpnl.get_report_data(
+            filter_=ReportDataFilterQuery.make(report_id=report_id),
+            with_limit=False,
+        )[0]
+
+    found_checkpoints: list[tuple[Timestamp, dict[str, Any]] | None] = []
+    original_find_checkpoint = accountant._find_checkpoint
+
+    def find_checkpoint(**kwargs: Any) -> tuple[Timestamp, dict[str, Any]] | None:
+        found_checkpoints.append(checkpoint := original_find_checkpoint(**kwargs))
+        return checkpoint
+
+    with (
+        patch('rotkehlchen.premium.premium.Premium.is_active', MagicMock(return_value=True)),
+        patch.object(accountant, '_find_checkpoint', side_effect=find_checkpoint),
+    ):
+        full_replay = create_report()
+        assert accountant.skipped_events is False
+        resumed = create_report()
+
+    assert found_checkpoints[0] is None
+    assert found_checkpoints[1] is not None and found_checkpoints[1][0] <= start_ts
+    assert resumed == full_replay
+
+
+@pytest.mark.skipif('CI' in os.environ, reason='benchmark that takes too long for the CI')
+@pytest.mark.parametrize('acquisitions_num', [10 ** 5, 10 ** 6])
+@pytest.mark.parametrize('cost_basis_method', list(CostBasisMethod))
+def test_cost_basis_methods_benchmark(
+        cost_basis_method: CostBasisMethod,
+        acquisitions_num: int,
+) -> None:
+    """Add many small acquisitions of an asset, like a long history of DCA buys, and
+    spend them all in a few big spends. Checks that all the acquisitions are consumed with
+    the right cost basis and logs the acquisitions added and consumed per second"""
+    manager = CostBasisEvents(cost_basis_method).acquisitions_manager
+    settings = DBSettings(cost_basis_method=cost_basis_method, taxfree_after_period=None)
+    amount, spends_num = FVal('0.001'), 10
+    start = time.perf_counter()
+    for idx in range(acquisitions_num):
+        manager.add_in_event(AssetAcquisitionEvent(
+            amount=amount,
+            timestamp=Timestamp(EXAMPLE_TIMESTAMP + idx),
+            rate=Price(FVal(idx % 1000 + 1)),
+            index=idx,
+        ))
+    add_seconds = time.perf_counter() - start
+
+    taxable_amount = taxable_bought_cost = ZERO
+    start = time.perf_counter()
+    for _ in range(spends_num):
+        cost_basis_info = manager.calculate_spend_cost_basis(
+            spending_amount=amount * (acquisitions_num // spends_num),
+            spending_asset=A_ETH,
+            timestamp=Timestamp(EXAMPLE_TIMESTAMP + acquisitions_num),
+            missing_acquisitions=[],
+            used_acquisitions=[],
+            settings=settings,
+            timestamp_to_date=str,
+        )
+        assert cost_basis_info.is_complete is True
+        taxable_amount += cost_basis_info.taxable_amount
+        taxable_bought_cost += cost_basis_info.taxable_bought_cost
+    spend_seconds = time.perf_counter() - start
+
+    assert len(manager) == 0
+    assert taxable_amount == amount * acquisitions_num
+    assert taxable_bought_cost.is_close(amount * sum(idx % 1000 + 1 for idx in range(acquisitions_num)))  # noqa: E501
+    log.info(
+        f'{cost_basis_method.serialize()} with {acquisitions_num} acquisitions: '
+        f'{acquisitions_num / add_seconds:.2f} acquisitions added/sec, '
+        f'{acquisitions_num / spend_seconds:.2f} acquisitions consumed/sec',
+    )
+
+
 def test_accounting_simple_hifo_order(accountant: Accountant):
     """A simple test that checks that from 2 events the one with the highest amount is used."""
     asset = A_BTC
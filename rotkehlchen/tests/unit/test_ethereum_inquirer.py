@@ -1,6 +1,9 @@
+import json
+from typing import Any
 from unittest.mock import patch
 
 import pytest
+from web3 import HTTPProvider, Web3
 
 from rotkehlchen.chain.accounts import BlockchainAccountData
 from rotkehlchen.chain.ethereum.constants import ETHEREUM_ETHERSCAN_NODE_NAME
@@ -9,7 +12,7 @@ from rotkehlchen.chain.evm.decoding.constants import ERC20_OR_ERC721_TRANSFER
 from rotkehlchen.chain.evm.structures import EvmTxReceipt, EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.db.evmtx import DBEvmTx
-from rotkehlchen.errors.misc import EventNotInABI
+from rotkehlchen.errors.misc import EventNotInABI, RemoteError
 from rotkehlchen.tests.utils.checks import assert_serialized_dicts_equal
 from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_FULL_TEST_PARAMETERS,
@@ -122,6 +125,67 @@ def test_get_transaction_receipt(
         ])
 
 
+@pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
+def test_get_transaction_receipts(
+        ethereum_inquirer,
+        call_order,
+        ethereum_manager_connect_at_start,
+):
+    """Test that the receipts queried in batches are the same as the ones queried one by one"""
+    wait_until_all_nodes_connected(
+        connect_at_start=ethereum_manager_connect_at_start,
+        evm_inquirer=ethereum_inquirer,
+    )
+    tx_hashes = [deserialize_evm_tx_hash(x) for x in (
+        '0x12d474b6cbba04fd1a14e55ef45b1eb175985612244631b4b70450c888962a89',
+        '0x5b180e3dcc19cd29c918b98c876f19393e07b74c07fd728102eb6241db3c2d5c',
+        '0x13684203a4bf07aaed0112983cb380db6004acac772af2a5d46cb2a28245fbad',
+    )]
+    result = ethereum_inquirer.get_transaction_receipts(
+        tx_hashes=tx_hashes,
+        call_order=call_order,
+        batch_size=2,
+    )
+    assert set(result) == set(tx_hashes)
+    for tx_hash in tx_hashes:
+        assert result[tx_hash] == ethereum_inquirer.get_transaction_receipt(
+            tx_hash=tx_hash,
+            call_order=call_order,
+        )
+
+
+def test_batch_request_responses(ethereum_inquirer):
+    """Test that the responses to a batch request are matched to the calls by their id,
+    that failed calls give None and that responses that are not a list are errors"""
+    web3 = Web3(HTTPProvider('https://node.example.com'))
+
+    def batch_request(raw_response: bytes) -> list[Any]:
+        with patch('rotkehlchen.chain.evm.node_inquirer.make_post_request', return_value=raw_response):  # noqa: E501
+            return ethereum_inquirer._batch_request(
+                web3=web3,
+                method='eth_getTransactionReceipt',
+                params_list=[['0x1'], ['0x2'], ['0x3'], ['0x4']],
+            )
+
+    assert batch_request(json.dumps([  # in any order, with failed calls and unknown ids
+        {'jsonrpc': '2.0', 'id': 2, 'result': {'blockNumber': '0x2'}},
+        {'jsonrpc': '2.0', 'id': 0, 'result': {'blockNumber': '0x0'}},
+        {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32000, 'message': 'missing trie node'}},
+        {'jsonrpc': '2.0', 'id': 7, 'result': {'blockNumber': '0x7'}},
+        {'jsonrpc': '2.0', 'id': -1, 'result': {'blockNumber': '0x1'}},
+        {'jsonrpc': '2.0', 'id': '3', 'result': {'blockNumber': '0x3'}},
+        'unexpected',
+    ]).encode()) == [{'blockNumber': '0x0'}, None, {'blockNumber': '0x2'}, None]
+
+    for raw_response in (
+        json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch requests are not supported'}}).encode(),  # noqa: E501
+        json.dumps('rate limited').encode(),
+        b'<html>Bad Gateway</html>',
+    ):
+        with pytest.raises(RemoteError):
+            batch_request(raw_response)
+
+
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
 def test_get_transaction_by_hash(ethereum_inquirer, call_order, ethereum_manager_connect_at_start):
     wait_until_all_nodes_connected(
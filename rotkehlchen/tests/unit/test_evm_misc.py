@@ -1,6 +1,19 @@
+import random
+from collections import Counter
+
+import requests
+
 from rotkehlchen.chain.evm.constants import EVM_ADDRESS_REGEX
-from rotkehlchen.chain.evm.types import asset_id_is_evm_token, string_to_evm_address
-from rotkehlchen.types import ChainID
+from rotkehlchen.chain.evm.nodes import NODE_RATE_LIMIT_COOLDOWN, NodesStats
+from rotkehlchen.chain.evm.types import (
+    NodeName,
+    WeightedNode,
+    asset_id_is_evm_token,
+    string_to_evm_address,
+)
+from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.fval import FVal
+from rotkehlchen.types import ChainID, SupportedBlockchain
 
 
 def test_asset_id_is_evm_token():
@@ -40,3 +53,65 @@ def test_address_regex() -> None:
 
     for case, expected_result in cases.items():
         assert (EVM_ADDRESS_REGEX.search(case) is not None) == expected_result
+
+
+def test_nodes_call_order() -> None:
+    """Test that nodes that fail, get rate limited or are slow are queried first less often
+    but still once in a while, and that the order is deterministic given the rng"""
+    now = 1000.0
+    nodes_stats = NodesStats(clock=lambda: now, rng=random.Random(42))
+    nodes = [WeightedNode(
+        node_info=NodeName(
+            name=name,
+            endpoint=f'https://{name}.com',
+            owned=False,
+            blockchain=SupportedBlockchain.ETHEREUM,
+        ),
+        active=True,
+        weight=FVal('0.25'),
+    ) for name in ('fast', 'slow', 'flaky', 'limited')]
+    fast, slow, flaky, limited = (x.node_info for x in nodes)
+
+    def first_nodes() -> Counter[str]:
+        return Counter(nodes_stats.order(nodes)[0].node_info.name for _ in range(1000))
+
+    assert set(first_nodes()) == {'fast', 'slow', 'flaky', 'limited'}  # no stats, only weights
+    for _ in range(10):
+        nodes_stats.add_success(fast, started_at=now - 0.5)
+        nodes_stats.add_success(slow, started_at=now - 4)
+        nodes_stats.add_success(limited, started_at=now - 0.5)
+        nodes_stats.add_failure(flaky, RemoteError('Failed to query'))
+    nodes_stats.add_failure(limited, requests.exceptions.HTTPError(
+        response=type('Response', (), {'status_code': 429})(),
+    ))
+
+    assert nodes_stats.health(fast, fastest_latency=0.5) == 1
+    assert nodes_stats.health(slow, fastest_latency=0.5) == 0.125
+    assert nodes_stats.health(flaky, fastest_latency=0.5) < 0.06
+    assert nodes_stats.health(limited, fastest_latency=0.5) == 0.75 * 0.1
+    counts = first_nodes()
+    assert counts['fast'] > 700
+    assert 0 < counts['flaky'] < counts['slow']
+    assert counts['limited'] > 0
+
+    now += NODE_RATE_LIMIT_COOLDOWN  # the rate limit is not penalized anymore
+    assert nodes_stats.health(limited, fastest_latency=0.5) == 0.75
+    assert nodes_stats.serialize(flaky, nodes) == {
+        'health': 0.0563,
+        'latency_ms': None,
+        'error_rate': 0.9437,
+        'queries': 10,
+        'failures': 10,
+        'seconds_since_rate_limited': None,
+    }
+    assert nodes_stats.serialize(limited, nodes)['seconds_since_rate_limited'] == NODE_RATE_LIMIT_COOLDOWN  # noqa: E501
+
+    # batch requests count as successful queries but don't change the latency
+    nodes_stats.add_success(fast, started_at=now - 30, calls=100)
+    assert nodes_stats.serialize(fast, nodes)['latency_ms'] == 500
+    assert nodes_stats.serialize(fast, nodes)['queries'] == 11
+
+    # the same rng gives the same orders
+    first, second = (NodesStats(clock=lambda: now, rng=random.Random(7)) for _ in range(2))
+    first.stats = second.stats = nodes_stats.stats
+    assert [first.order(nodes) for _ in range(10)] == [second.order(nodes) for _ in range(10)]
@@ -1,11 +1,15 @@
+import logging
+import time
 from typing import TYPE_CHECKING
 from unittest.mock import patch
 
 import pytest
 
 from rotkehlchen.accounting.structures.balance import Balance
+from rotkehlchen.accounting.structures.types import ActionType
 from rotkehlchen.chain.evm.constants import GENESIS_HASH
 from rotkehlchen.chain.evm.decoding.constants import CPT_GAS
+from rotkehlchen.chain.evm.decoding.session import DecodingSession
 from rotkehlchen.chain.evm.types import EvmAccount, string_to_evm_address
 from rotkehlchen.chain.optimism.types import OptimismTransaction
 from rotkehlchen.constants.assets import A_ETH, A_SAI
@@ -29,6 +33,7 @@ from rotkehlchen.types import (
     Location,
     SupportedBlockchain,
     Timestamp,
+    TimestampMS,
     deserialize_evm_tx_hash,
 )
 from rotkehlchen.utils.hexbytes import hexstring_to_bytes
@@ -40,6 +45,8 @@ if TYPE_CHECKING:
     from rotkehlchen.chain.optimism.transactions import OptimismTransactions
     from rotkehlchen.db.dbhandler import DBHandler
 
+log = logging.getLogger(__name__)
+
 
 def _add_transactions_to_db(
         db: 'DBHandler',
@@ -278,3 +285,139 @@ def test_genesis_remove_address(
         )
 
     assert len(genesis_tx) == 0, 'Genesis transaction should have been deleted'
+
+
+@pytest.mark.parametrize('ethereum_accounts', [[
+    '0x2B888954421b424C5D3D9Ce9bB67c9bD47537d12',
+    '0x756F45E3FA69347A9A973A725E3C98bC4db0b5a0',
+]])
+def test_decoding_session_batches_writes(
+        database: 'DBHandler',
+        ethereum_accounts: list[ChecksumEvmAddress],
+) -> None:
+    """Test that the decoding session only writes the decoded events, the decoded state
+    and the ignored actions when it is flushed and that it flushes when it is full"""
+    dbevmtx, dbevents = DBEvmTx(database), DBHistoryEvents(database)
+    evmhash_eth, evmhash_eth_yabir, _ = _add_transactions_to_db(database, ethereum_accounts)
+    with database.conn.read_ctx() as cursor:
+        transaction_eth, transaction_eth_yabir = (dbevmtx.get_evm_transactions(
+            cursor=cursor,
+            filter_=EvmTransactionsFilterQuery.make(tx_hash=tx_hash, chain_id=ChainID.ETHEREUM),
+            has_premium=True,
+        )[0] for tx_hash in (evmhash_eth, evmhash_eth_yabir))
+
+    event = EvmEvent(
+        tx_hash=evmhash_eth,
+        sequence_index=0,
+        timestamp=TimestampMS(transaction_eth.timestamp * 1000),
+        location=Location.ETHEREUM,
+        event_type=HistoryEventType.SPEND,
+        event_subtype=HistoryEventSubType.NONE,
+        asset=A_ETH,
+        balance=Balance(amount=FVal('0.1')),
+        location_label=ethereum_accounts[0],
+    )
+    session = DecodingSession(
+        database=database,
+        dbevents=dbevents,
+        chain_id=ChainID.ETHEREUM,
+        max_transactions=2,
+    )
+    session.add(transaction=transaction_eth, events=[event])
+    assert session.get_pending_events(evmhash_eth) == [event]
+    assert session.get_pending_events(evmhash_eth_yabir) is None
+    assert len(dbevmtx.get_transaction_hashes_not_decoded(chain_id=ChainID.ETHEREUM, limit=None)) == 2  # noqa: E501
+
+    session.add(transaction=transaction_eth_yabir, events=[])  # limit reached, writes both
+    assert session.pending == {}
+    assert dbevmtx.get_transaction_hashes_not_decoded(chain_id=ChainID.ETHEREUM, limit=None) == []
+    with database.conn.read_ctx() as cursor:
+        events = dbevents.get_history_events(
+            cursor=cursor,
+            filter_query=EvmEventFilterQuery.make(tx_hashes=[evmhash_eth]),
+            has_premium=True,
+        )
+        assert len(events) == 1
+        assert_events_equal(events[0], event)
+        assert database.get_ignored_action_ids(cursor, ActionType.HISTORY_EVENT) == {
+            ActionType.HISTORY_EVENT: {transaction_eth_yabir.identifier},
+        }
+
+    # adding an already ignored transaction again does not fail the whole batch
+    with DecodingSession(database=database, dbevents=dbevents, chain_id=ChainID.ETHEREUM) as session:  # noqa: E501
+        session.add(transaction=transaction_eth_yabir, events=[])
+    assert session.pending == {}
+
+    # redecoding replaces the old events in the write that stores the new ones
+    redecoded_event = EvmEvent(
+        tx_hash=evmhash_eth,
+        sequence_index=0,
+        timestamp=event.timestamp,
+        location=Location.ETHEREUM,
+        event_type=HistoryEventType.SPEND,
+        event_subtype=HistoryEventSubType.NONE,
+        asset=A_ETH,
+        balance=Balance(amount=FVal('0.1')),
+        location_label=ethereum_accounts[0],
+        notes='redecoded',
+    )
+    with DecodingSession(database=database, dbevents=dbevents, chain_id=ChainID.ETHEREUM) as session:  # noqa: E501
+        session.add(transaction=transaction_eth, events=[redecoded_event], redecoded=True)
+        with database.conn.read_ctx() as cursor:  # old events are kept until the flush
+            assert dbevents.get_history_events(
+                cursor=cursor,
+                filter_query=EvmEventFilterQuery.make(tx_hashes=[evmhash_eth]),
+                has_premium=True,
+            )[0].notes is None
+    with database.conn.read_ctx() as cursor:
+        events = dbevents.get_history_events(
+            cursor=cursor,
+            filter_query=EvmEventFilterQuery.make(tx_hashes=[evmhash_eth]),
+            has_premium=True,
+        )
+        assert len(events) == 1
+        assert events[0].notes == 'redecoded'
+    assert dbevmtx.get_transaction_hashes_not_decoded(chain_id=ChainID.ETHEREUM, limit=None) == []
+
+
+@pytest.mark.parametrize('use_custom_database', ['ethtxs.db'])
+def test_event_rules_dispatch_benchmark(
+        ethereum_transaction_decoder: 'EthereumTransactionDecoder',
+        database: 'DBHandler',
+) -> None:
+    """Decode the recorded transactions of the test DB once giving each log only to the
+    event rules indexed for its topic and once trying all the event rules for every log.
+    Checks that the events are the same and logs the decoded logs per second of each."""
+    decoder, dbevmtx = ethereum_transaction_decoder, DBEvmTx(database)
+    with database.conn.read_ctx() as cursor:
+        corpus = []
+        for tx in dbevmtx.get_evm_transactions(
+            cursor=cursor,
+            filter_=EvmTransactionsFilterQuery.make(chain_id=ChainID.ETHEREUM),
+            has_premium=True,
+        ):
+            receipt = dbevmtx.get_receipt(cursor, tx.tx_hash, ChainID.ETHEREUM)
+            assert receipt is not None, 'all receipts should be queried in the test DB'
+            corpus.append((tx, receipt))
+
+    logs_num = sum(len(receipt.logs) for _, receipt in corpus)
+    assert logs_num != 0
+
+    def decode_corpus() -> tuple[list[list[EvmEvent]], float]:
+        start = time.perf_counter()
+        events = [decoder._decode_transaction(tx, receipt)[0] for tx, receipt in corpus]
+        return events, time.perf_counter() - start
+
+    decode_corpus()  # warm up the caches so that both runs below do the same work
+    indexed_events, indexed_seconds = decode_corpus()
+    with (
+        patch.object(decoder, 'event_rules_by_topic', {}),
+        patch.object(decoder, 'catch_all_event_rules', [(x, None) for x in decoder.rules.event_rules]),  # noqa: E501
+    ):
+        all_rules_events, all_rules_seconds = decode_corpus()
+
+    assert indexed_events == all_rules_events
+    log.info(
+        f'Decoded {logs_num} logs. Trying all event rules: {logs_num / all_rules_seconds:.2f} '
+        f'logs/sec. Indexed event rules: {logs_num / indexed_seconds:.2f} logs/sec',
+    )
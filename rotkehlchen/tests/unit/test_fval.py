@@ -1,4 +1,7 @@
 import math
+import operator
+import random
+from decimal import Decimal, InvalidOperation
 
 import pytest
 
@@ -175,3 +178,45 @@ def test_calculations_with_large_values():
     assert FVal(
         115792089237316195423570985008687907853269984665640564039457584007913129639936,
     ) + 1 == FVal(115792089237316195423570985008687907853269984665640564039457584007913129639937)
+
+
+def _assert_same_result(fval_op, decimal_op):
+    """Assert that the FVal operation gives the same result as the Decimal one, with the
+    same exponent, or raises the same error"""
+    try:
+        expected = decimal_op()
+    except (InvalidOperation, ZeroDivisionError) as e:
+        with pytest.raises(type(e)):
+            fval_op()
+        return
+
+    result = fval_op()
+    assert isinstance(result, FVal)
+    assert result.num.as_tuple() == expected.as_tuple()
+
+
+def test_operations_match_decimal():
+    """Test that the results of all operations are exactly the ones of the underlying
+    Decimal operations, both with FVal and int operands"""
+    rng = random.Random(42)
+    values = [Decimal(x) for x in ('0', '-0', '1', '-1', '0.1', '1E+3', '0.000000000000000001', '115792089237316195423570985008687907853269984665640564039457584007913129639936')]  # noqa: E501
+    values.extend(Decimal(rng.randint(-10 ** 30, 10 ** 30)).scaleb(-rng.randint(0, 36)) for _ in range(50))  # noqa: E501
+    arithmetic_ops = (operator.add, operator.sub, operator.mul, operator.truediv, operator.floordiv, operator.mod)  # noqa: E501
+    comparison_ops = (operator.lt, operator.le, operator.gt, operator.ge, operator.eq, operator.ne)
+    for a in values:
+        _assert_same_result(lambda: -FVal(a), lambda: -a)  # noqa: B023
+        _assert_same_result(lambda: abs(FVal(a)), lambda: abs(a))  # noqa: B023
+        for b in (*values, 0, 3, -7, 10 ** 18):
+            fval_b = FVal(b) if isinstance(b, Decimal) else b
+            for op in comparison_ops:
+                assert op(FVal(a), fval_b) is op(a, b)
+                assert op(fval_b, FVal(a)) is op(b, a)
+            for op in arithmetic_ops:
+                _assert_same_result(lambda: op(FVal(a), fval_b), lambda: op(a, b))  # noqa: B023
+                _assert_same_result(lambda: op(fval_b, FVal(a)), lambda: op(b, a))  # noqa: B023
+
+
+def test_nan_comparison_raises():
+    for op in (operator.lt, operator.le, operator.gt, operator.ge, operator.eq):
+        with pytest.raises(InvalidOperation):
+            op(FVal('NaN'), ZERO)
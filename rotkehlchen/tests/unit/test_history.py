@@ -1,19 +1,24 @@
+import random
+
 import pytest
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.chain.ethereum.modules.eth2.structures import ValidatorDailyStats
-from rotkehlchen.constants import ZERO
-from rotkehlchen.constants.assets import A_ETH, A_ETH2
+from rotkehlchen.constants import ONE, ZERO
+from rotkehlchen.constants.assets import A_ETH, A_ETH2, A_USDC
+from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
 from rotkehlchen.history.events.structures.base import HistoryEvent
 from rotkehlchen.history.events.structures.types import HistoryEventSubType, HistoryEventType
+from rotkehlchen.history.stream import HistoryStream, history_sort_key
 from rotkehlchen.history.types import HistoricalPriceOracle
 from rotkehlchen.tests.utils.accounting import accounting_history_process, check_pnls_and_csv
 from rotkehlchen.tests.utils.history import prices
 from rotkehlchen.tests.utils.messages import no_message_errors
-from rotkehlchen.types import Location
+from rotkehlchen.types import AssetAmount, Fee, Location, Price, Timestamp, TimestampMS, TradeType
 
 
 @pytest.mark.parametrize(('value', 'result'), [
@@ -92,3 +97,67 @@ def test_pnl_processing_with_eth2_staking_setting(accountant, db_settings):
             AccountingEventType.STAKING: PNL(taxable=FVal('20.55537445038'), free=ZERO),
         })
     check_pnls_and_csv(accountant, expected_pnls, None)
+
+
+def test_history_stream(database):
+    """Test that the history stream reads the history from the DB in the same order as
+    sorting all of it in memory, also when the pages end in the middle of a timestamp"""
+    rng = random.Random(42)
+    trades = [Trade(
+        timestamp=Timestamp(rng.choice((1, 2, 5))),
+        location=Location.EXTERNAL,
+        base_asset=A_ETH,
+        quote_asset=A_USDC,
+        trade_type=TradeType.BUY,
+        amount=AssetAmount(FVal(idx + 1)),
+        rate=Price(ONE),
+        fee=Fee(ZERO),
+        fee_currency=A_USDC,
+        link='',
+        notes='',
+    ) for idx in range(15)]
+    history_events = [HistoryEvent(
+        identifier=idx + 1,  # the DB is empty so it will be the same as the one assigned there
+        event_identifier=f'event{idx}',
+        sequence_index=rng.randint(0, 3),
+        # events of the same second but different milliseconds are sorted by sequence index
+        timestamp=TimestampMS(rng.choice((1000, 1500, 1999, 2000, 4000))),
+        location=Location.KRAKEN,
+        asset=A_ETH,
+        balance=Balance(amount=ONE),
+        notes=f'event {idx}',
+        event_type=HistoryEventType.RECEIVE,
+        event_subtype=HistoryEventSubType.NONE,
+    ) for idx in range(25)]
+    extra_events = [ValidatorDailyStats(
+        validator_index=1,
+        timestamp=Timestamp(timestamp),
+        pnl=ONE,
+    ) for timestamp in (2, 1)]
+    with database.user_write() as write_cursor:
+        database.add_trades(write_cursor=write_cursor, trades=trades)
+        DBHistoryEvents(database).add_history_events(write_cursor=write_cursor, history=history_events)  # noqa: E501
+
+    # same order as the DB ties, sorted in memory as when querying the whole history at once
+    expected = sorted(
+        sorted(trades, key=lambda x: (x.timestamp, x.identifier)) +
+        sorted(extra_events, key=history_sort_key) +
+        sorted(history_events, key=lambda x: (x.timestamp, x.sequence_index, x.identifier)),
+        key=history_sort_key,
+    )
+    for page_size in (1, 3, 1000):
+        stream = HistoryStream(
+            database=database,
+            end_ts=Timestamp(10),
+            extra_events=extra_events,
+            page_size=page_size,
+        )
+        assert len(stream) == len(expected)
+        assert [x.get_identifier() for x in stream] == [x.get_identifier() for x in expected]
+        assert [x.get_identifier() for x in stream] == [x.get_identifier() for x in expected], 'the stream can be iterated again'  # noqa: E501
+
+    stream = HistoryStream(database=database, end_ts=Timestamp(1), extra_events=[], page_size=2)
+    assert [x.get_identifier() for x in stream] == [
+        x.get_identifier() for x in expected
+        if x.get_timestamp() <= 1 and not isinstance(x, ValidatorDailyStats)
+    ]
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from rotkehlchen.constants.assets import A_BTC, A_USD
+from rotkehlchen.constants.prices import ZERO_PRICE
 from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
 from rotkehlchen.externalapis.coingecko import Coingecko
@@ -267,3 +268,62 @@ def test_get_historical_prices(globaldb):
         max_seconds_distance=DAY_IN_SECONDS,
     )
     assert [price1, price2, price3, None, price4] == [x.price if x is not None else None for x in result]  # noqa: E501
+
+
+def test_query_cached_historical_prices(globaldb, fake_price_historian):
+    """Test that prices are resolved in bulk from the DB following the oracles order
+    and the distance each oracle accepts for its cached prices"""
+    ts1 = Timestamp(1611595470)
+    globaldb.add_historical_prices([
+        HistoricalPrice(
+            from_asset=A_BTC,
+            to_asset=A_USD,
+            source=HistoricalPriceOracle.MANUAL,
+            timestamp=ts1,
+            price=Price(FVal(30000)),
+        ), HistoricalPrice(
+            from_asset=A_BTC,
+            to_asset=A_USD,
+            source=HistoricalPriceOracle.CRYPTOCOMPARE,
+            timestamp=ts1,
+            price=Price(FVal(31000)),
+        ), HistoricalPrice(  # zero prices are ignored by cryptocompare
+            from_asset=A_BTC,
+            to_asset=A_USD,
+            source=HistoricalPriceOracle.CRYPTOCOMPARE,
+            timestamp=Timestamp(ts1 + DAY_IN_SECONDS),
+            price=ZERO_PRICE,
+        ), HistoricalPrice(
+            from_asset=A_BTC,
+            to_asset=A_USD,
+            source=HistoricalPriceOracle.COINGECKO,
+            timestamp=Timestamp(ts1 + DAY_IN_SECONDS),
+            price=Price(FVal(32000)),
+        ),
+    ])
+    timestamps = [
+        Timestamp(ts1 - 1800),  # manual price within an hour
+        Timestamp(ts1 + 7200),  # cryptocompare price is too far, manual too
+        Timestamp(ts1 + DAY_IN_SECONDS - 7200),  # coingecko price within a day
+        Timestamp(ts1 + 3 * DAY_IN_SECONDS),  # nothing cached
+    ]
+    prices = fake_price_historian.query_cached_historical_prices(
+        from_asset=A_BTC,
+        to_asset=A_USD,
+        timestamps=timestamps,
+    )
+    assert prices == {
+        timestamps[0]: Price(FVal(30000)),
+        timestamps[1]: Price(FVal(32000)),
+        timestamps[2]: Price(FVal(32000)),
+    }
+    # make sure it's consistent with the prices the DB returns for a single query
+    assert globaldb.get_historical_price(
+        from_asset=A_BTC,
+        to_asset=A_USD,
+        timestamp=timestamps[1],
+        max_seconds_distance=DAY_IN_SECONDS,
+        source=HistoricalPriceOracle.COINGECKO,
+    ).price == prices[timestamps[1]]
+    for oracle_instance in fake_price_historian._oracle_instances[1:]:
+        assert oracle_instance.query_historical_price.call_count == 0
@@ -178,7 +178,7 @@ def test_maybe_schedule_ethereum_txreceipts(
     timeout = 10
     tx_hash_1 = hexstring_to_bytes('0x692f9a6083e905bdeca4f0293f3473d7a287260547f8cbccc38c5cb01591fcda')  # noqa: E501
     tx_hash_2 = hexstring_to_bytes('0x6beab9409a8f3bd11f82081e99e856466a7daf5f04cca173192f79e78ed53a77')  # noqa: E501
-    receipt_get_patch = patch.object(ethereum_manager.node_inquirer, 'get_transaction_receipt', wraps=ethereum_manager.node_inquirer.get_transaction_receipt)  # pylint: disable=protected-member  # noqa: E501
+    receipt_get_patch = patch.object(ethereum_manager.node_inquirer, 'get_transaction_receipts', wraps=ethereum_manager.node_inquirer.get_transaction_receipts)  # pylint: disable=protected-member  # noqa: E501
     queried_receipts = set()
     try:
         with gevent.Timeout(timeout), receipt_get_patch as receipt_task_mock, mock_evm_chains_with_transactions():  # noqa: E501
@@ -193,7 +193,8 @@ def test_maybe_schedule_ethereum_txreceipts(
 
             task_manager.schedule()
             gevent.sleep(.5)
-            assert receipt_task_mock.call_count == 1 if one_receipt_in_db else 2, '2nd schedule should do nothing'  # noqa: E501
+            queried_hashes = [x for call in receipt_task_mock.call_args_list for x in call.kwargs['tx_hashes']]  # noqa: E501
+            assert len(queried_hashes) == (1 if one_receipt_in_db else 2), '2nd schedule should do nothing'  # noqa: E501
 
     except gevent.Timeout as e:
         raise AssertionError(f'receipts query was not completed within {timeout} seconds') from e
@@ -556,3 +557,26 @@ def test_tasks_dont_schedule_if_no_eth_address(task_manager: TaskManager) -> Non
             if len(task_manager.running_greenlets) != 0:
                 gevent.joinall(task_manager.running_greenlets[func])
             assert mocked_func.call_count == 0
+
+
+@pytest.mark.parametrize('max_tasks_num', [5])
+def test_maybe_backup_db(task_manager: TaskManager, database: 'DBHandler') -> None:
+    """Test that automatic DB backups are only created if enabled and once per period"""
+    task_manager.potential_tasks = [task_manager._maybe_backup_db]
+
+    def run_task() -> None:
+        task_manager.schedule()
+        gevent.joinall(task_manager.running_greenlets.get(task_manager._maybe_backup_db, []))
+
+    run_task()  # disabled by default
+    assert list(database.user_data_dir.glob('*_auto.backup')) == []
+
+    with database.user_write() as write_cursor:
+        database.set_settings(write_cursor, ModifiableDBSettings(db_backup_frequency=1))
+    run_task()
+    backups = list(database.user_data_dir.glob('*_auto.backup'))
+    assert len(backups) == 1
+    assert should_run_periodic_task(database, DBCacheStatic.LAST_DB_BACKUP_TS, 3600) is False
+
+    run_task()  # the period has not passed yet
+    assert list(database.user_data_dir.glob('*_auto.backup')) == backups
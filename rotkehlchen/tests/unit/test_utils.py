@@ -4,11 +4,14 @@ from datetime import datetime
 from json.decoder import JSONDecodeError
 from unittest.mock import patch
 
+import gevent
 import pytest
 from eth_typing import HexAddress, HexStr
 from eth_utils import to_checksum_address
+from gevent.pywsgi import WSGIServer
 from hexbytes import HexBytes
 from packaging.version import Version
+from urllib3.response import HTTPResponse
 
 from rotkehlchen.chain.ethereum.utils import generate_address_via_create2
 from rotkehlchen.errors.serialization import ConversionError
@@ -17,6 +20,7 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.serialization.deserialize import deserialize_timestamp_from_date
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.utils.concurrency import single_flight
 from rotkehlchen.utils.misc import (
     combine_dicts,
     combine_stat_dicts,
@@ -28,6 +32,13 @@ from rotkehlchen.utils.misc import (
     timestamp_to_date,
 )
 from rotkehlchen.utils.mixins.cacheable import CacheableMixIn, cache_response_timewise
+from rotkehlchen.utils.network import (
+    HTTP_MAX_RETRY_AFTER,
+    HTTP_RETRIES,
+    HostMetrics,
+    TokenBucket,
+    create_session,
+)
 from rotkehlchen.utils.serialization import jsonloads_dict, jsonloads_list
 from rotkehlchen.utils.version_check import get_current_version
 
@@ -418,3 +429,136 @@ def test_pairwise():
     a = [1, 2, 3, 4, 5]
     assert [x + y for x, y in pairwise(a)] == [3, 7]
     assert list(pairwise_longest(a)) == [(1, 2), (3, 4), (5, None)]
+
+
+def test_token_bucket():
+    """Test that the token bucket waits for tokens and slows down when rate limited"""
+    now = 0.0
+
+    def sleep(seconds: float) -> None:
+        nonlocal now
+        now += seconds
+
+    bucket = TokenBucket(rate=2, clock=lambda: now, sleep=sleep)
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]  # burst up to the capacity
+    assert bucket.acquire() == 0.5
+    assert now == 0.5
+
+    bucket.rate_limited()
+    assert bucket.rate == 1
+    assert bucket.acquire() == 1
+    for _ in range(5):
+        bucket.rate_limited()
+    assert bucket.rate == 2 / 32  # never slows down below the minimum rate
+
+    for _ in range(30):
+        bucket.succeeded()
+    assert bucket.rate == 2  # recovered back to the configured rate
+
+    # batches take a token per call. Those bigger than the capacity leave it in debt.
+    bucket = TokenBucket(rate=2, clock=lambda: now, sleep=sleep)
+    assert bucket.acquire(tokens=6) == 0
+    assert bucket.acquire() == 2.5
+
+
+def test_single_flight():
+    """Test that identical calls running at the same time are made only once"""
+    calls = []
+
+    @single_flight(argument_keys={'call_order': sorted})
+    def query(name: str, call_order: tuple[str, ...] = ()) -> dict[str, list[str]]:  # pylint: disable=unused-argument
+        calls.append(name)
+        gevent.sleep(0.05)
+        if name == 'bad':
+            raise ValueError(name)
+        return {'name': [name]}
+
+    orders = [('x', 'y'), ('y', 'x'), ('x', 'y')]
+    greenlets = [gevent.spawn(query, 'a', call_order=order) for order in orders]
+    greenlets.extend((
+        gevent.spawn(query, 'b'),
+        gevent.spawn(query, 'a', call_order=('x',)),  # other nodes make another call
+    ))
+    gevent.joinall(greenlets)
+    assert calls == ['a', 'b', 'a']
+    assert [x.value for x in greenlets] == [{'name': ['a']}] * 3 + [{'name': ['b']}, {'name': ['a']}]  # noqa: E501
+    assert greenlets[0].value is not greenlets[1].value  # each caller gets its own copy
+
+    calls.clear()  # the exception of the call is raised to all callers
+    greenlets = [gevent.spawn(query, 'bad') for _ in range(2)]
+    gevent.joinall(greenlets)
+    assert calls == ['bad']
+    assert all(isinstance(x.exception, ValueError) for x in greenlets)
+    assert greenlets[0].exception is not greenlets[1].exception  # each caller gets its own
+
+    calls.clear()  # if the greenlet of the call is killed, the others make the call again
+    greenlets = [gevent.spawn(query, 'c') for _ in range(2)]
+    gevent.sleep(0.01)
+    greenlets[0].kill()
+    greenlets[1].join()
+    assert calls == ['c', 'c']
+    assert greenlets[1].value == {'name': ['c']}
+    assert query('c') == {'name': ['c']}  # nothing is in flight anymore
+
+    @single_flight()
+    def recursive(name: str) -> int:
+        calls.append(name)
+        return 1 if len(calls) > 1 else recursive(name) + 1
+
+    calls.clear()  # calls of the greenlet of the call in flight don't wait for it
+    assert gevent.spawn(recursive, 'd').get(timeout=1) == 2
+    assert calls == ['d', 'd']
+
+
+@pytest.mark.parametrize(('retry_after', 'expected_requests'), [
+    (str(HTTP_MAX_RETRY_AFTER * 3), 1),  # too long to wait for, so returned to the caller
+    ('0', HTTP_RETRIES + 1),
+])
+def test_session_retry_after(retry_after: str, expected_requests: int):
+    """Test that sessions only retry rate limits whose Retry-After is short enough"""
+    requests_made = []
+
+    def rate_limited(environ, start_response):  # pylint: disable=unused-argument
+        requests_made.append(environ['PATH_INFO'])
+        start_response('429 Too Many Requests', [('Retry-After', retry_after)])
+        return [b'']
+
+    server = WSGIServer(('127.0.0.1', 0), rate_limited, log=None)
+    server.start()
+    try:
+        with gevent.Timeout(HTTP_MAX_RETRY_AFTER):
+            response = create_session().get(f'http://127.0.0.1:{server.server_port}/query')
+    finally:
+        server.stop()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == retry_after
+    assert requests_made == ['/query'] * expected_requests
+
+
+def test_create_session():
+    """Test that sessions only retry idempotent requests and wait a limited time for them"""
+    retries = create_session().get_adapter('https://api.etherscan.io').max_retries
+    assert retries.read is False
+    assert 'POST' not in retries.allowed_methods
+    assert retries.get_retry_after(HTTPResponse(headers={'Retry-After': '2'})) == 2
+    assert retries.get_retry_after(HTTPResponse()) is None
+
+    # rate limits with a Retry-After are retried unless the caller handles them itself
+    assert retries.is_retry('GET', status_code=429, has_retry_after=True) is True
+    rate_limited_session = create_session(handles_rate_limits=True)
+    rate_limited_retries = rate_limited_session.get_adapter('https://api.etherscan.io').max_retries
+    assert rate_limited_retries.status == 0
+    assert rate_limited_retries.is_retry('GET', status_code=429, has_retry_after=True) is False
+    assert rate_limited_retries.is_retry('GET', status_code=503, has_retry_after=True) is False
+
+    premium_retries = create_session(retry_all_requests=True).get_adapter('https://rotki.com').max_retries
+    assert premium_retries.read == 3
+    assert premium_retries.allowed_methods is False
+
+    assert HostMetrics(requests=4, connections=1, total_latency=0.5).serialize() == {
+        'requests': 4,
+        'connections': 1,
+        'connection_reuse': 0.75,
+        'average_latency_ms': 125,
+    }
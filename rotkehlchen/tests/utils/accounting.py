@@ -275,18 +275,15 @@ def assert_csv_export(
     If google_service exists then it's also uploaded to a sheet to check the formular rendering
     """
     csvexporter = accountant.csvexporter
-    if len(accountant.pots[0].processed_events) == 0:
+    if accountant.pots[0].processed_events_num == 0:
         return  # nothing to do for no events as no csv is generated
 
     with tempfile.TemporaryDirectory() as tmpdirname:
         tmpdir = Path(tmpdirname)
         # first make sure we export without formulas
         csvexporter.settings = dataclasses.replace(csvexporter.settings, pnl_csv_with_formulas=False)  # noqa: E501
-        accountant.csvexporter.export(
-            events=accountant.pots[0].processed_events,
-            pnls=accountant.pots[0].pnls,
-            directory=tmpdir,
-        )
+        success, msg = accountant.export(directory_path=tmpdir)
+        assert success is True, msg
 
         calculated_pnls = PnlTotals()
         expected_csv_data = []
@@ -306,11 +303,8 @@ def assert_csv_export(
 
         # export with formulas and summary
         csvexporter.settings = dataclasses.replace(csvexporter.settings, pnl_csv_with_formulas=True, pnl_csv_have_summary=True)  # noqa: E501
-        accountant.csvexporter.export(
-            events=accountant.pots[0].processed_events,
-            pnls=accountant.pots[0].pnls,
-            directory=tmpdir,
-        )
+        success, msg = accountant.export(directory_path=tmpdir)
+        assert success is True, msg
         index = CSV_INDEX_OFFSET
         at_summaries = False
         to_upload_data = []
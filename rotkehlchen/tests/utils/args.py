@@ -17,6 +17,7 @@ class ConfigurationArgs(NamedTuple):
     max_size_in_mb_all_logs: int = DEFAULT_MAX_LOG_SIZE_IN_MB
     max_logfiles_num: int = DEFAULT_MAX_LOG_BACKUP_FILES
     sqlite_instructions: int = DEFAULT_SQL_VM_INSTRUCTIONS_CB
+    sqlite_slow_query_ms: int = 0
 
 
 def default_args(
@@ -33,6 +34,7 @@ def default_args(
         max_size_in_mb_all_logs=max_size_in_mb_all_logs,
         max_logfiles_num=DEFAULT_MAX_LOG_BACKUP_FILES,
         sqlite_instructions=DEFAULT_SQL_VM_INSTRUCTIONS_CB,
+        sqlite_slow_query_ms=0,
         logfile=None,
         logtarget=None,
     )
@@ -1128,7 +1128,11 @@ def maybe_mock_historical_price_queries(
 
         return price
 
+    def mock_cached_historical_prices_query(from_asset, to_asset, timestamps):  # pylint: disable=unused-argument
+        return {}  # make sure all price queries go through the mocked function
+
     historian.query_historical_price = mock_historical_price_query
+    historian.query_cached_historical_prices = mock_cached_historical_prices_query
 
 
 def assert_pnl_debug_import(filepath: Path, database: DBHandler) -> None:
@@ -1,5 +1,7 @@
 import os
+import tempfile
 from http import HTTPStatus
+from pathlib import Path
 from typing import Literal
 from unittest.mock import patch
 
@@ -39,7 +41,7 @@ def mock_query_last_metadata(last_modify_ts, data_hash, data_size):
 
 
 def mock_get_backup(saved_data: bytes | None):
-    def do_mock_get_backup(url, timeout, params, data=None):  # pylint: disable=unused-argument
+    def do_mock_get_backup(url, timeout, params, stream, data=None):  # pylint: disable=unused-argument
         if data is not None:
             assert len(data) == 1
             assert 'nonce' in data
@@ -120,6 +122,12 @@ def create_patched_premium(
     return patched_premium_at_start, patched_premium_at_set, patched_get
 
 
+def get_local_db_hash(rotkehlchen_instance: Rotkehlchen) -> str:
+    """Returns the hash of the local DB, which is compared with the one of the remote DB"""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        return rotkehlchen_instance.data.compress_and_encrypt_db(Path(tmpdirname) / 'local.db.enc')
+
+
 def get_different_hash(given_hash: str) -> str:
     """Given the string hash get one that's different but has same length"""
     new_hash = ''
@@ -155,7 +163,7 @@ def setup_starting_environment(
         our_last_write_ts = rotkehlchen_instance.data.db.get_setting(cursor, name='last_write_ts')
         assert rotkehlchen_instance.data.db.get_setting(cursor, name='main_currency') == DEFAULT_TESTS_MAIN_CURRENCY  # noqa: E501
 
-    _, our_hash = rotkehlchen_instance.data.compress_and_encrypt_db()
+    our_hash = get_local_db_hash(rotkehlchen_instance)
 
     if same_hash_with_remote:
         remote_hash = our_hash
@@ -0,0 +1,95 @@
+from collections.abc import Callable, Mapping
+from copy import copy, deepcopy
+from functools import wraps
+from typing import TYPE_CHECKING, Any
+
+import gevent
+from gevent.event import AsyncResult
+
+if TYPE_CHECKING:
+    from gevent.greenlet import Greenlet
+
+
+class CallInterruptedError(Exception):
+    """The greenlet of an in flight call got killed before the call finished"""
+
+
+def _single_flight_key(
+        argument_keys: Mapping[str, Callable[[Any], Any]],
+        *args: Any,
+        **kwargs: Any,
+) -> tuple[str, ...]:
+    """Return the key identifying a call by its arguments
+
+    Keyword arguments in argument_keys are identified by what their function returns.
+    """
+    return (
+        *(str(arg) for arg in args),
+        *(
+            f'{name}={argument_keys[name](value) if name in argument_keys else value!s}'
+            for name, value in sorted(kwargs.items())
+        ),
+    )
+
+
+def _copy_exception(exception: Exception) -> Exception:
+    """Return a copy of the exception, or the exception itself if it can't be copied"""
+    try:
+        return copy(exception)
+    except TypeError:  # its __init__ takes arguments that are not in its args
+        return exception
+
+
+def single_flight(argument_keys: Mapping[str, Callable[[Any], Any]] | None = None) -> Callable:
+    """This is a decorator for coalescing identical calls that run at the same time
+
+    If a greenlet calls the decorated function with the same arguments as a call that
+    is in flight, it waits for that call to finish and gets a copy of its result or
+    its exception instead of making the same remote query again. Calls of the greenlet
+    that makes the call in flight, such as recursive ones, are not coalesced since they
+    would wait for themselves. Calls are identical if the string representation of their
+    arguments is equal. argument_keys maps keyword arguments to a function returning what
+    identifies them instead, such as the nodes to query regardless of their order.
+
+    For methods the object is part of the key, so only calls of the same object are
+    coalesced unless the objects have the same string representation.
+    """
+    def _single_flight(f: Callable) -> Callable:
+        in_flight: dict[tuple[str, ...], tuple[AsyncResult, 'Greenlet']] = {}
+        keys = argument_keys if argument_keys is not None else {}
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = _single_flight_key(keys, *args, **kwargs)
+            current_greenlet = gevent.getcurrent()
+            while (flight := in_flight.get(key)) is not None:
+                call, owner = flight
+                if owner is current_greenlet:
+                    return f(*args, **kwargs)
+
+                call.wait()
+                if (exception := call.exception) is None:
+                    return deepcopy(call.value)  # copy, since the callers may modify the result
+                if isinstance(exception, CallInterruptedError):
+                    continue  # make the call again since its greenlet got killed
+                if (copied := _copy_exception(exception)) is exception:
+                    raise exception
+                raise copied from exception  # so that callers don't share its traceback
+
+            call = AsyncResult()
+            in_flight[key] = (call, current_greenlet)
+            try:
+                result = f(*args, **kwargs)
+            except Exception as e:
+                call.set_exception(e)
+                raise
+            else:
+                call.set(result)
+                return result
+            finally:
+                del in_flight[key]
+                if call.ready() is False:  # the greenlet got killed
+                    call.set_exception(CallInterruptedError())
+
+        return wrapper
+    return _single_flight
@@ -1,11 +1,21 @@
 import json
 import logging
+import time
+from collections import defaultdict
 from collections.abc import Callable
+from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Any, Literal, overload
+from types import TracebackType
+from typing import Any, Final, Literal, overload
+from urllib.parse import urlparse
 
 import gevent
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import ConnectionPool, HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
 
 from rotkehlchen.constants import GLOBAL_REQUESTS_TIMEOUT
 from rotkehlchen.db.settings import CachedSettings
@@ -15,6 +25,18 @@ from rotkehlchen.logging import RotkehlchenLogsAdapter
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# part of the configured rate that a rate limiter regains after each successful query
+RATE_RECOVERY_STEP: Final = 0.05
+MIN_RATE_DIVISOR: Final = 32  # a rate limiter never slows down below rate / MIN_RATE_DIVISOR
+
+HTTP_POOL_CONNECTIONS: Final = 10  # hosts whose connections a session keeps alive
+HTTP_POOL_MAXSIZE: Final = 10  # connections a session keeps alive per host
+HTTP_RETRIES: Final = 3
+HTTP_RETRY_BACKOFF_FACTOR: Final = 0.5
+# Longest Retry-After in seconds that a session waits for before retrying. Responses
+# that should be retried much later are returned to the callers, which handle them.
+HTTP_MAX_RETRY_AFTER: Final = 10
+
 
 def request_get(
         url: str,
@@ -155,3 +177,197 @@ def query_file(url: str, is_json: bool = False) -> str | dict[str, Any]:
             raise RemoteError(f'Queried file {url} is not a valid json file') from e
 
     return response.text
+
+
+class TokenBucket:
+    """Limits the rate of the queries to an endpoint
+
+    Tokens are added at `rate` per second up to `capacity`, which is how many queries
+    can burst at once, and each query takes a token, waiting until one is available.
+    Batch requests take a token per call. Batches bigger than the capacity wait for a
+    full bucket and leave it in debt, so that the following queries wait for the rest.
+    When the endpoint rate limits us the rate is halved and it slowly recovers to the
+    configured rate with each successful query.
+
+    The clock and the sleep function can be given so that it is deterministic in tests.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: float | None = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Any] = gevent.sleep,
+    ) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Takes the given number of tokens, waiting until they are available. Returns
+        the seconds waited."""
+        waited = 0.0
+        needed = min(tokens, self.capacity)
+        self._refill()
+        while self.tokens < needed:
+            wait = (needed - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+            self._refill()
+
+        self.tokens -= tokens
+        return waited
+
+    def rate_limited(self) -> None:
+        self._refill()
+        self.rate = max(self.rate / 2, self.max_rate / MIN_RATE_DIVISOR)
+
+    def succeeded(self) -> None:
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.rate + self.max_rate * RATE_RECOVERY_STEP, self.max_rate)
+
+
+@dataclass
+class HostMetrics:
+    """Totals of the requests made to a host by the sessions of create_session"""
+    requests: int = 0
+    connections: int = 0  # connections that had to be opened. The rest were reused.
+    total_latency: float = 0  # seconds until the response headers were received
+
+    def serialize(self) -> dict[str, Any]:
+        reused = max(self.requests - self.connections, 0)
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'connection_reuse': round(reused / self.requests, 4) if self.requests != 0 else 0,
+            'average_latency_ms': round(self.total_latency * 1000 / self.requests, 2) if self.requests != 0 else None,  # noqa: E501
+        }
+
+
+class HTTPMetrics:
+    """Per host metrics of the requests made by the sessions of create_session"""
+
+    def __init__(self) -> None:
+        self.hosts: defaultdict[str, HostMetrics] = defaultdict(HostMetrics)
+
+    def add_connection(self, host: str) -> None:
+        self.hosts[host].connections += 1
+
+    def add_response(self, response: requests.Response, *args: Any, **kwargs: Any) -> None:  # pylint: disable=unused-argument
+        """Response hook of the sessions"""
+        metrics = self.hosts[urlparse(response.url).netloc]
+        metrics.requests += 1
+        metrics.total_latency += response.elapsed.total_seconds()
+
+    def serialize(self) -> dict[str, dict[str, Any]]:
+        return {host: metrics.serialize() for host, metrics in self.hosts.items()}
+
+
+http_metrics = HTTPMetrics()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self) -> Any:
+        http_metrics.add_connection(self.host if self.port in {None, 80} else f'{self.host}:{self.port}')  # noqa: E501
+        return super()._new_conn()  # type: ignore[misc]  # missing in the urllib3 stubs
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self) -> Any:
+        http_metrics.add_connection(self.host if self.port in {None, 443} else f'{self.host}:{self.port}')  # noqa: E501
+        return super()._new_conn()  # type: ignore[misc]  # missing in the urllib3 stubs
+
+
+class _CappedRetry(Retry):
+    """Retry that waits at most HTTP_MAX_RETRY_AFTER seconds for a Retry-After
+
+    Responses with a longer Retry-After are not retried but returned to the caller.
+    """
+
+    def increment(
+            self,
+            method: str | None = None,
+            url: str | None = None,
+            response: HTTPResponse | None = None,
+            error: Exception | None = None,
+            _pool: ConnectionPool | None = None,
+            _stacktrace: TracebackType | None = None,
+    ) -> Retry:
+        if (
+            response is not None and
+            (retry_after := self.get_retry_after(response)) is not None and
+            retry_after > HTTP_MAX_RETRY_AFTER
+        ):  # since raise_on_status is False urllib3 returns the response
+            raise MaxRetryError(
+                pool=_pool,  # type: ignore[arg-type]  # urllib3 passes both for responses
+                url=url,  # type: ignore[arg-type]
+                reason=ResponseError(f'Retry-After of {retry_after} seconds is too long'),
+            )
+        return super().increment(
+            method=method,
+            url=url,
+            response=response,
+            error=error,
+            _pool=_pool,
+            _stacktrace=_stacktrace,
+        )
+
+
+class _PooledHTTPAdapter(HTTPAdapter):
+    """Adapter whose connection pools count the connections they open"""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)  # type: ignore[no-untyped-call]
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def create_session(
+        retry_all_requests: bool = False,
+        handles_rate_limits: bool = False,
+) -> requests.Session:
+    """Create a requests session for querying a service
+
+    It keeps up to HTTP_POOL_MAXSIZE connections alive per host, so that greenlets querying
+    the same service at the same time reuse connections instead of doing a new TLS handshake
+    per query. Idempotent requests that failed to connect or got a response with a
+    Retry-After of at most HTTP_MAX_RETRY_AFTER seconds are retried with a backoff. All
+    other responses, such as rate limits without a Retry-After, are left to the caller.
+    If retry_all_requests is True, requests of all methods are retried and also on read
+    errors. If handles_rate_limits is True, the caller has its own handling of rate limits,
+    so responses with a Retry-After are returned to it instead of being retried. The
+    requests are added to the per host http_metrics.
+    """
+    retries = _CappedRetry(
+        total=HTTP_RETRIES,
+        # read errors are not retried by default since the request may have reached the server
+        read=HTTP_RETRIES if retry_all_requests else False,
+        allowed_methods=False if retry_all_requests else Retry.DEFAULT_ALLOWED_METHODS,
+        # callers that handle rate limits would otherwise wait for them a second time
+        status=0 if handles_rate_limits else None,
+        respect_retry_after_header=not handles_rate_limits,
+        backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+    adapter = _PooledHTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.hooks['response'].append(http_metrics.add_response)
+    return session